@@ -580,7 +580,7 @@ describe('Pool management functionality', () => {
      * - A POST request is made to the correct URL with appropriate data.
      * - The modal is closed after the form submission.
      * - An alert is shown if the pool is created successfully.
-     * - The page is reloaded after successful creation.
+     * - The page is reloaded when the response carries no rows to patch in.
      */
     test('submit pool form triggers fetch, shows alert, reloads, and closes modal', async () => {
         const modal = document.getElementById('create-pool-modal');
@@ -606,7 +606,7 @@ describe('Pool management functionality', () => {
 
         // Trigger form submission
         submitPoolFormButton.click();
-        await Promise.resolve(); // Wait for the fetch call to resolve
+        await new Promise(resolve => setTimeout(resolve, 0)); // Wait for the response body to be read
 
         // Assertions
         expect(fetch).toHaveBeenCalledWith('/ve/create_pool', expect.any(Object));
@@ -689,6 +689,7 @@ describe('Pool management functionality', () => {
         // Assert that a POST request was made with the correct URL and data
         expect(fetch).toHaveBeenCalledWith('/ve/upload_diagram/1', {
             method: 'POST',
+            headers: { 'Accept': 'application/json' },
             body: expect.any(FormData),
         });
 
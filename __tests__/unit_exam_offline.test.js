@@ -0,0 +1,159 @@
+/**
+ * File: exam_offline.test.js
+ *
+ * Description: This file contains unit tests for the offline exam client.
+ *
+ * @jest-environment jsdom
+ */
+
+const {
+    mergeAnswers, answerDigest, pendingAnswers, syncAnswers, recordAnswer, renderQuestion,
+} = require('../openwaves/static/js/exam_offline');
+
+describe('Offline exam client', () => {
+    const bundle = {
+        review_url: '/exam/1/review',
+        questions: [
+            { question_number: 1, number: 'T1A01', refs: '[97.1]', question: 'First?',
+              options: ['a1', 'b1', 'c1', 'd1'], diagram: null, diagram_name: null },
+            { question_number: 2, number: 'T1A02', refs: '[97.3]', question: 'Second?',
+              options: ['a2', 'b2', 'c2', 'd2'], diagram: '/static/images/diagrams/T1.png',
+              diagram_name: 'T1' },
+        ],
+    };
+
+    function makeState(serverAnswers, localAnswers = []) {
+        return {
+            bundle,
+            db: null,
+            examId: 1,
+            syncUrl: '/exam/1/answers',
+            csrfToken: 'dummy-csrf-token',
+            answers: mergeAnswers(serverAnswers, localAnswers),
+            status: null,
+            syncing: null,
+            index: 0,
+        };
+    }
+
+    beforeEach(() => {
+        global.fetch = jest.fn();
+        document.body.innerHTML = `
+            <div id="exam">
+                <figure id="exam-diagram" class="is-hidden"><picture><source srcset="/static/images/diagrams/old.webp" type="image/webp"><img alt="" width="640" height="480"></picture></figure>
+                <h1 id="question-meta"></h1>
+                <h2 id="question-text"></h2>
+                <form id="exam-form" action="/exam/1?index=0">
+                    <input type="hidden" name="question_number" value="1">
+                    <input type="radio" name="answer" value="0"><span class="option-text"></span>
+                    <input type="radio" name="answer" value="1"><span class="option-text"></span>
+                    <input type="radio" name="answer" value="2"><span class="option-text"></span>
+                    <input type="radio" name="answer" value="3"><span class="option-text"></span>
+                    <button id="exam-back" name="back"></button>
+                    <button id="exam-next" name="next"></button>
+                </form>
+            </div>
+        `;
+    });
+
+    /**
+     * Test ID: UT-113
+     * Test merging the server's answers with answers kept in the browser.
+     *
+     * Asserts:
+     * - The most recent write of each answer wins.
+     * - The digest matches the server's format, with '-' for unanswered questions.
+     */
+    test('mergeAnswers keeps the latest write and answerDigest matches the server', () => {
+        const answers = mergeAnswers(
+            [{ question_number: 1, answer: 2, updated_at: 50 },
+             { question_number: 2, answer: null, updated_at: null },
+             { question_number: 3, answer: 1, updated_at: 90 }],
+            [{ question_number: 1, answer: 3, updated_at: 60, pending: true },
+             { question_number: 3, answer: 0, updated_at: 80, pending: true }]);
+
+        expect(answerDigest(answers)).toBe('3-1');
+        expect(pendingAnswers({ answers }).map(answer => answer.question_number)).toEqual([1]);
+    });
+
+    /**
+     * Test ID: UT-114
+     * Test sending waiting answers in one batch.
+     *
+     * Asserts:
+     * - Only waiting answers are posted, with the CSRF token.
+     * - Answers the server confirmed are no longer waiting.
+     */
+    test('syncAnswers posts waiting answers and takes the server state', async () => {
+        const state = makeState([{ question_number: 1, answer: null, updated_at: null },
+                                 { question_number: 2, answer: 1, updated_at: 10 }]);
+        await recordAnswer(state, 1, 2);
+        fetch.mockResolvedValueOnce({
+            ok: true,
+            json: () => Promise.resolve({
+                answers: [{ question_number: 1, answer: 2, updated_at: state.answers.get(1).updated_at },
+                          { question_number: 2, answer: 1, updated_at: 10 }],
+            }),
+        });
+
+        await expect(syncAnswers(state)).resolves.toBe(0);
+        const [url, options] = fetch.mock.calls[0];
+        expect(url).toBe('/exam/1/answers');
+        expect(options.headers['X-CSRFToken']).toBe('dummy-csrf-token');
+        expect(JSON.parse(options.body).answers.map(answer => answer.question_number)).toEqual([1]);
+        expect(answerDigest(state.answers)).toBe('21');
+    });
+
+    /**
+     * Test ID: UT-115
+     * Test that a failed sync keeps the answers for the next attempt.
+     *
+     * Asserts:
+     * - syncAnswers rejects with the server's error.
+     * - The answer is still waiting afterwards.
+     */
+    test('syncAnswers keeps answers waiting when the server refuses them', async () => {
+        const state = makeState([{ question_number: 1, answer: null, updated_at: null }]);
+        await recordAnswer(state, 1, 0);
+        fetch.mockResolvedValueOnce({
+            ok: false,
+            status: 409,
+            json: () => Promise.resolve({ error: 'Exam session is closed.' }),
+        });
+
+        await expect(syncAnswers(state)).rejects.toThrow('Exam session is closed.');
+        expect(pendingAnswers(state).length).toBe(1);
+    });
+
+    /**
+     * Test ID: UT-116
+     * Test rendering a question from the bundle without the server.
+     *
+     * Asserts:
+     * - The question text, options and stored answer are shown.
+     * - The diagram is shown only for questions that need one, from the bundle's URL alone.
+     * - The navigation buttons and form action follow the question index.
+     */
+    test('renderQuestion shows a question of the bundle', () => {
+        const root = document.getElementById('exam');
+        const state = makeState([{ question_number: 1, answer: null, updated_at: null },
+                                 { question_number: 2, answer: 3, updated_at: 10 }]);
+
+        renderQuestion(state, root, 1);
+        expect(root.querySelector('#question-text').textContent).toBe('Q2: Second?');
+        expect(root.querySelector('#question-meta').textContent).toBe('Question ID: T1A02, References: [97.3]');
+        expect(root.querySelectorAll('.option-text')[1].textContent).toBe('B. b2');
+        expect(root.querySelector('input[value="3"]').checked).toBe(true);
+        expect(root.querySelector('#exam-diagram').classList.contains('is-hidden')).toBe(false);
+        expect(root.querySelector('#exam-diagram img').getAttribute('src')).toBe('/static/images/diagrams/T1.png');
+        expect(root.querySelector('#exam-diagram source')).toBeNull();
+        expect(root.querySelector('#exam-diagram img').hasAttribute('width')).toBe(false);
+        expect(root.querySelector('#exam-next').disabled).toBe(true);
+        expect(root.querySelector('#exam-form').getAttribute('action')).toContain('index=1');
+
+        renderQuestion(state, root, 0);
+        expect(root.querySelector('#exam-diagram').classList.contains('is-hidden')).toBe(true);
+        expect(root.querySelector('#exam-back').disabled).toBe(true);
+        expect(root.querySelector('input[name="question_number"]').value).toBe('1');
+    });
+});
@@ -0,0 +1,91 @@
+/**
+ * File: rows.test.js
+ *
+ * Description: This file contains unit tests for patching table rows from VE route responses.
+ *
+ * @jest-environment jsdom
+ */
+
+const { replaceRows, removeRows, applyRowUpdate } = require('../openwaves/static/js/rows');
+
+describe('Table row updates', () => {
+    let tbody;
+
+    beforeEach(() => {
+        document.body.innerHTML = `
+            <table>
+                <tbody id="session-rows" data-sort="desc">
+                    <tr data-id="2" data-sort="2024-10-05"><td>10/05/2024</td></tr>
+                    <tr data-id="1" data-sort="2024-09-01"><td>09/01/2024</td></tr>
+                    <tr class="empty-row is-hidden"><td>No exam sessions found.</td></tr>
+                </tbody>
+            </table>
+        `;
+        tbody = document.getElementById('session-rows');
+    });
+
+    /**
+     * Test ID: UT-109
+     * Test replacing the row of an existing item.
+     *
+     * Asserts:
+     * - The row with the same data-id is replaced in place.
+     * - No row is added.
+     */
+    test('replaceRows replaces an existing row in place', () => {
+        replaceRows(tbody, 1, '<tr data-id="1" data-sort="2024-09-01"><td>Open</td></tr>');
+
+        const rows = tbody.querySelectorAll('tr[data-id]');
+        expect(rows.length).toBe(2);
+        expect(rows[1].textContent).toBe('Open');
+    });
+
+    /**
+     * Test ID: UT-110
+     * Test inserting the row of a new item in the table's sort order.
+     *
+     * Asserts:
+     * - A new row is inserted before the first row that sorts after it.
+     */
+    test('replaceRows inserts a new row in sort order', () => {
+        replaceRows(tbody, 3, '<tr data-id="3" data-sort="2024-09-20"><td>09/20/2024</td></tr>');
+
+        const ids = Array.from(tbody.querySelectorAll('tr[data-id]')).map(row => row.dataset.id);
+        expect(ids).toEqual(['2', '3', '1']);
+    });
+
+    /**
+     * Test ID: UT-111
+     * Test removing rows and the empty table placeholder.
+     *
+     * Asserts:
+     * - The placeholder row is shown once the last row is removed.
+     * - The placeholder row is hidden again when a row is added.
+     */
+    test('removeRows shows the placeholder when the table is empty', () => {
+        const emptyRow = tbody.querySelector('.empty-row');
+        removeRows(tbody, 1);
+        removeRows(tbody, 2);
+        expect(emptyRow.classList.contains('is-hidden')).toBe(false);
+
+        replaceRows(tbody, 4, '<tr data-id="4" data-sort="2024-11-01"><td>11/01/2024</td></tr>');
+        expect(emptyRow.classList.contains('is-hidden')).toBe(true);
+        expect(tbody.lastElementChild).toBe(emptyRow);
+    });
+
+    /**
+     * Test ID: UT-112
+     * Test applying route responses without rows.
+     *
+     * Asserts:
+     * - A response without html or deleted returns false so the page is reloaded.
+     * - A deleted response removes the item's rows.
+     */
+    test('applyRowUpdate falls back when the response has no rows', () => {
+        expect(applyRowUpdate(tbody, { success: true })).toBe(false);
+        expect(applyRowUpdate(null, { success: true, id: 1, deleted: true })).toBe(false);
+
+        expect(applyRowUpdate(tbody, { success: true, id: 1, deleted: true })).toBeTruthy();
+        expect(tbody.querySelector('tr[data-id="1"]')).toBeNull();
+    });
+});
@@ -0,0 +1,69 @@
+"""File: bench_compression.py
+
+    This script measures the response compression middleware against the uncompressed output of a
+    50-question Extra review page. Run it from the project root:
+
+        python -m benchmarks.bench_compression
+"""
+import gzip
+import time
+from types import SimpleNamespace
+from flask import g, render_template
+from openwaves import create_app
+from openwaves.compression import compress, brotli
+
+QUESTION_COUNT = 50
+ROUNDS = 200
+QUESTION_STEMS = [
+    "What is the effect of a ferrite bead placed on a DC power lead that also carries RF?",
+    "Which of the following describes the radiation pattern of a three-element Yagi antenna?",
+    "What is the maximum transmitting power permitted on the 60-meter band for an Extra?",
+    "How does a phase-locked loop maintain a stable output frequency from a reference?",
+    "What is the approximate velocity factor of a typical foam dielectric coaxial cable?",
+    "Which type of digital mode uses 8-FSK modulation with a Reed-Solomon code?",
+    "What happens to the impedance of a series resonant circuit at its resonant frequency?",
+]
+
+def build_review_context():
+    """Build template context for a 50-question Extra review page with realistic text lengths."""
+    exam = SimpleNamespace(id=1, element=4, session_id=1)
+    questions = {}
+    exam_answers = []
+    for number in range(1, QUESTION_COUNT + 1):
+        questions[number] = SimpleNamespace(
+            id=number,
+            question=f"{QUESTION_STEMS[number % len(QUESTION_STEMS)]} (E{number % 10}"
+                     f"{chr(65 + number % 6)}{number:02d})"
+        )
+        exam_answers.append(SimpleNamespace(question_id=number, question_number=number,
+                                            answer=number % 4))
+    return {'exam': exam, 'exam_answers': exam_answers, 'questions': questions,
+            'exam_name': 'Extra'}
+
+def time_call(func, rounds=ROUNDS):
+    """Return the mean wall time of func() in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) * 1000 / rounds
+
+def main():
+    """Render the review page and report raw vs compressed size and compression cost."""
+    app = create_app({"TESTING": False, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.test_request_context('/exam/1/review', headers={'Accept-Encoding': 'gzip, br'}):
+        g.csp_nonce = 'benchmark'
+        body = render_template('review.html', **build_review_context()).encode('utf-8')
+
+    print(f"review.html, {QUESTION_COUNT} questions")
+    print(f"{'encoding':<10}{'bytes':>10}{'ratio':>8}{'ms/resp':>10}")
+    print(f"{'identity':<10}{len(body):>10}{1.0:>8.2f}{0.0:>10.3f}")
+    encodings = ['gzip'] + (['br'] if brotli is not None else [])
+    for encoding in encodings:
+        compressed = compress(body, encoding, app)
+        elapsed = time_call(lambda encoding=encoding: compress(body, encoding, app))
+        print(f"{encoding:<10}{len(compressed):>10}{len(body) / len(compressed):>8.2f}"
+              f"{elapsed:>10.3f}")
+    assert gzip.decompress(compress(body, 'gzip', app)) == body
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""File: bench_startup.py
+
+    This script measures worker start-up time and checks it against the start-up budget documented
+    in the README. Each run boots a fresh interpreter, imports the package and calls create_app(),
+    the same work a new (or recycled) gunicorn worker does. Run it from the project root:
+
+        python -m benchmarks.bench_startup [--runs N]
+
+    The script exits with status 1 if the median of either measurement is over budget.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Start-up budget (seconds), see "Performance budgets" in README.md
+IMPORT_BUDGET = 1.0
+CREATE_APP_BUDGET = 0.25
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import openwaves
+imported = time.perf_counter()
+openwaves.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+created = time.perf_counter()
+print(json.dumps({"import": imported - start, "create_app": created - imported}))
+"""
+
+def measure(runs):
+    """Boot ``runs`` fresh interpreters and return the per-phase timings."""
+    samples = {"import": [], "create_app": []}
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE], check=True, capture_output=True,
+                                text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        for phase, seconds in result.items():
+            samples[phase].append(seconds)
+    return samples
+
+def main():
+    """Run the start-up benchmark and compare the medians with the budget."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--runs', type=int, default=5, help='number of fresh interpreters')
+    args = parser.parse_args()
+
+    samples = measure(args.runs)
+    budgets = {"import": IMPORT_BUDGET, "create_app": CREATE_APP_BUDGET}
+    over_budget = False
+    print(f"{'phase':<12}{'median':>10}{'max':>10}{'budget':>10}")
+    for phase, values in samples.items():
+        median = statistics.median(values)
+        over_budget |= median > budgets[phase]
+        print(f"{phase:<12}{median:>10.3f}{max(values):>10.3f}{budgets[phase]:>10.3f}"
+              f"{'  OVER BUDGET' if median > budgets[phase] else ''}")
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""File: conftest.py
+
+    This file contains the fixtures for the microbenchmark suite: a database seeded with pools of
+    realistic size and a ``bench`` fixture that times a function, counts the SQL statements it
+    runs and fails when either regresses past the saved baseline. Run the suite with:
+
+        python -m pytest benchmarks [--bench-save]
+
+    --bench-save writes the measured values to baseline_utils.json. Absolute times depend on
+    the machine, so each benchmark's fastest round is compared as a ratio to a fixed
+    calibration workload timed in the same run; the saved ratios and statement counts hold on
+    any machine. The application cache is turned off, so the benchmarks time the queries and
+    not cache hits.
+"""
+
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime
+import pytest
+from openwaves import create_app, db
+from openwaves.imports import Pool, Question, TLI, ExamDiagram
+from openwaves.query_stats import capture_queries
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline_utils.json')
+
+# Allowed slowdown before a timing counts as a regression (0.5 = 50% slower than the baseline),
+# plus a fixed allowance so timer noise on microsecond-scale functions is not a regression
+TIME_THRESHOLD = float(os.getenv('BENCH_TIME_THRESHOLD', '0.5'))
+TIME_SLACK_MS = 0.05
+
+# Pool sizes close to the published NCVEC pools: (element, questions, TLIs, diagrams)
+POOL_SIZES = ((2, 411, 35, 3), (3, 456, 35, 12), (4, 622, 50, 24))
+
+def pytest_addoption(parser):
+    """Add the --bench-save option."""
+    parser.addoption('--bench-save', action='store_true',
+                     help='write the measured benchmark values to the baseline file')
+
+def seed_pools():
+    """Create one pool per element, spreading questions over TLIs and referencing diagrams.
+
+    Returns:
+        dict: The pool id for each element.
+    """
+    pool_ids = {}
+    for element, question_count, tli_count, diagram_count in POOL_SIZES:
+        prefix = 'TGE'[element - 2]
+        pool = Pool(name=f'Element {element} pool', element=element,
+                    start_date=datetime(2024, 7, 1), end_date=datetime(2028, 6, 30))
+        db.session.add(pool)
+        db.session.flush()
+        pool_ids[element] = pool.id
+
+        tlis = [f'{prefix}{index // 10}{chr(65 + index % 10)}' for index in range(tli_count)]
+        diagrams = [f'{prefix}{number}-1' for number in range(1, diagram_count + 1)]
+        db.session.add_all(TLI(pool_id=pool.id, tli=tli, quantity=0) for tli in tlis)
+        db.session.add_all(ExamDiagram(pool_id=pool.id, name=name,
+                                       path=f'images/diagrams/{pool.id}_{name}.png')
+                           for name in diagrams)
+        for number in range(question_count):
+            tli = tlis[number % tli_count]
+            text = f'What is the purpose of component {number} in this circuit? ' * 2
+            if number % 9 == 0:
+                text += f'Refer to figure {diagrams[number % diagram_count]}.'
+            db.session.add(Question(pool_id=pool.id, number=f'{tli}{number // tli_count:02d}',
+                                    correct_answer=number % 4, question=text,
+                                    option_a='Answer A text', option_b='Answer B text',
+                                    option_c='Answer C text', option_d='Answer D text',
+                                    refs='[97.3(a)(4)]'))
+    db.session.commit()
+    return pool_ids
+
+def calibration_workload():
+    """A fixed mix of Python and SQLite work that machine speed scales like the benchmarks."""
+    values = sorted(random.Random(0).random() for _ in range(2000))
+    with sqlite3.connect(':memory:') as connection:
+        connection.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, value REAL)')
+        connection.executemany('INSERT INTO item (value) VALUES (?)',
+                               ((value,) for value in values))
+        connection.execute('SELECT count(*), sum(value) FROM item WHERE value > 0.5').fetchone()
+
+@pytest.fixture(scope='session')
+def calibration_ms():
+    """Return the fastest of several runs of the calibration workload, in milliseconds."""
+    timings = []
+    for _ in range(15):
+        start = time.perf_counter()
+        calibration_workload()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+@pytest.fixture(scope='session')
+def bench_app():
+    """Create an app on a temporary SQLite file seeded with full-size pools."""
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'bench.db')}",
+            "TEMPLATE_WARMUP": False,
+            "LOG_LEVEL": "WARNING",
+            "CACHE_BACKEND": "none"
+        })
+        with app.app_context():
+            db.create_all()
+            app.config['BENCH_POOL_IDS'] = seed_pools()
+            yield app
+            db.session.remove()
+            db.engine.dispose()
+
+@pytest.fixture(scope='session')
+def bench_results(request):
+    """Collect the results of every benchmark and save them as the baseline if asked to."""
+    results = {}
+    request.config.bench_table = results
+    yield results
+    if request.config.getoption('--bench-save') and results:
+        # Only the machine-independent values are kept
+        baseline = {name: {'ratio': result['ratio'], 'queries': result['queries']}
+                    for name, result in results.items()}
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+
+@pytest.fixture(scope='session')
+def bench_baseline():
+    """Load the saved baseline values (empty when there is none)."""
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+@pytest.fixture
+def bench(request, bench_results, bench_baseline, calibration_ms): # pylint: disable=W0621
+    """Return a function that benchmarks ``func(*args)`` and checks it against the baseline.
+
+    Each round starts with a fresh database session (as a new request would) unless
+    ``fresh_session`` is False. The result holds the median and minimum time in milliseconds,
+    the minimum as a ratio to the calibration workload and the SQL statements executed by one
+    call; only the ratio and the statement count are compared with the baseline.
+    """
+    def run(func, *args, rounds=30, fresh_session=True):
+        def call():
+            if fresh_session:
+                db.session.remove()
+            start = time.perf_counter()
+            func(*args)
+            return time.perf_counter() - start
+
+        call()  # Warm up compiled statements
+        with capture_queries() as stats:
+            call()
+        timings = [call() for _ in range(rounds)]
+        result = {'median_ms': round(statistics.median(timings) * 1000, 4),
+                  'min_ms': round(min(timings) * 1000, 4),
+                  'ratio': round(min(timings) * 1000 / calibration_ms, 6),
+                  'queries': stats.count}
+        name = request.node.name
+        bench_results[name] = result
+
+        baseline = bench_baseline.get(name)
+        if baseline and not request.config.getoption('--bench-save'):
+            assert result['queries'] <= baseline['queries'], \
+                f"{name} ran {result['queries']} statements (baseline {baseline['queries']})"
+            # The fastest round is the least disturbed by other work on the machine
+            limit = baseline['ratio'] * (1 + TIME_THRESHOLD) + TIME_SLACK_MS / calibration_ms
+            assert result['ratio'] <= limit, \
+                f"{name} took {result['ratio']} calibration units (baseline " \
+                f"{baseline['ratio']}, limit {limit:.6f})"
+        return result
+    return run
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Print a table of the benchmark results after the run."""
+    results = getattr(config, 'bench_table', None)
+    if results:
+        terminalreporter.section('benchmarks')
+        terminalreporter.write_line(f"{'benchmark':<40}{'median ms':>12}{'min ms':>12}"
+                                    f"{'ratio':>10}{'queries':>9}")
+        for name, result in sorted(results.items()):
+            terminalreporter.write_line(f"{name:<40}{result['median_ms']:>12.4f}"
+                                        f"{result['min_ms']:>12.4f}{result['ratio']:>10.6f}"
+                                        f"{result['queries']:>9}")
@@ -0,0 +1,403 @@
+"""File: load_test.py
+
+    This script simulates an exam session end to end. N candidates log in, open the sessions page,
+    register, launch an exam, answer every question, finish and view their results, while a VE
+    polls the session results page. It reports throughput, p50/p95/p99 latency per endpoint and
+    SQLite lock errors, and saves the results as JSON so runs can be compared.
+
+    Against a local threaded server on a fresh SQLite database (the default):
+
+        python -m benchmarks.load_test --candidates 50
+
+    Against a running server (e.g. gunicorn), seeding the database it uses first:
+
+        python -m benchmarks.load_test --url http://127.0.0.1:8000 \\
+            --database-uri sqlite:///instance/openwaves.db
+
+    Add --compare benchmarks/results/<earlier run>.json to print the change in p95 per endpoint.
+"""
+import argparse
+import http.cookiejar
+import json
+import logging
+import os
+import re
+import secrets
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from datetime import datetime
+from flask import got_request_exception
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import make_server
+from openwaves import create_app, db
+from openwaves.imports import User, Pool, Question, TLI, ExamSession
+
+ENDPOINTS = ['login_post', 'sessions', 'register', 'launch_exam', 'take_exam', 'finish_exam',
+             'exam_results', 've_session_results']
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+PASSWORD = 'load-test-password'
+CSRF_PATTERN = re.compile(r'name="csrf_token" value="([^"]+)"')
+QUESTION_NUMBER_PATTERN = re.compile(r'name="question_number" value="(\d+)"')
+NEXT_DISABLED_PATTERN = re.compile(r'name="next"[^>]*disabled')
+LOCK_MESSAGE = 'database is locked'
+
+class Recorder:
+    """Thread-safe collection of request timings, status codes and errors per endpoint."""
+
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.lock_errors = 0
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def request(self, endpoint, seconds, status):
+        """Record one request."""
+        with self._lock:
+            self.timings[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+            if status >= 500 or status == 0:
+                self.errors[endpoint] += 1
+
+    def count(self, attribute):
+        """Increment one of the run counters (completed, failed, lock_errors)."""
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Return redirects to the caller so each hop is timed as its own endpoint."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl): # pylint: disable=R0913,R0917
+        return None
+
+class Browser:
+    """A cookie-keeping HTTP client that times every request it makes."""
+
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect())
+        self.csrf_token = ''
+
+    def request(self, endpoint, path, data=None):
+        """Send a GET (or a form POST when data is given) and record its timing.
+
+        Returns:
+            tuple: The status code, the Location header and the body text.
+        """
+        if data is not None:
+            data = urllib.parse.urlencode({**data, 'csrf_token': self.csrf_token}).encode()
+        start = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data=data, timeout=60) as response:
+                status, location, body = response.status, None, response.read()
+        except urllib.error.HTTPError as error:
+            status, location, body = error.code, error.headers.get('Location'), error.read()
+        except OSError:
+            status, location, body = 0, None, b''
+        self.recorder.request(endpoint, time.perf_counter() - start, status)
+
+        body = body.decode('utf-8', 'replace')
+        match = CSRF_PATTERN.search(body)
+        if match:
+            self.csrf_token = match.group(1)
+        if location:
+            location = urllib.parse.urlsplit(location)
+            location = location.path + (f'?{location.query}' if location.query else '')
+        return status, location, body
+
+    def login(self, username):
+        """Log in through the login form; returns True on success."""
+        self.request('login', '/auth/login')
+        status, location, _ = self.request('login_post', '/auth/login',
+                                           {'username': username, 'password': PASSWORD})
+        return status == 302 and location is not None and 'login' not in location
+
+def run_candidate(base_url, username, session_id, element, recorder):
+    """Take one candidate through a whole exam, stopping at the first unexpected response."""
+    browser = Browser(base_url, recorder)
+    form = {'session_id': session_id, 'exam_element': element}
+    try:
+        if not browser.login(username):
+            raise RuntimeError('login failed')
+        browser.request('sessions', '/sessions')
+        browser.request('register', '/register', form)
+        browser.request('sessions', '/sessions')
+        status, location, _ = browser.request('launch_exam', '/launch-exam', form)
+        if status != 302 or '/exam/' not in (location or ''):
+            raise RuntimeError('launch failed')
+
+        status, _, body = browser.request('take_exam', location)
+        index = 0
+        exam_path = location.split('?')[0]
+        while True:
+            match = QUESTION_NUMBER_PATTERN.search(body)
+            if status != 200 or not match:
+                raise RuntimeError('question page failed')
+            # The Next button is disabled on the last question
+            last = NEXT_DISABLED_PATTERN.search(body) is not None
+            answer = {'question_number': match.group(1), 'answer': secrets.randbelow(4),
+                      ('review' if last else 'next'): ''}
+            status, location, body = browser.request('take_exam', f'{exam_path}?index={index}',
+                                                     answer)
+            if last:
+                break
+            index += 1
+
+        status, location, _ = browser.request('finish_exam', f'{exam_path}/finish')
+        status, _, _ = browser.request('exam_results', location)
+        if status != 200:
+            raise RuntimeError('results failed')
+        recorder.count('completed')
+    except RuntimeError:
+        recorder.count('failed')
+
+def run_ve_poller(base_url, username, session_id, recorder, stop, interval): # pylint: disable=R0913,R0917
+    """Poll the session results page as a VE until ``stop`` is set."""
+    browser = Browser(base_url, recorder)
+    if not browser.login(username):
+        recorder.count('failed')
+        return
+    while not stop.is_set():
+        browser.request('ve_session_results', f'/ve/session/results/{session_id}')
+        stop.wait(interval)
+
+def seed(app, candidates):
+    """Create an open session, pools for every element, a VE and the candidate accounts.
+
+    Returns:
+        dict: The session id, the VE username and the candidate usernames.
+    """
+    tag = secrets.token_hex(3).upper()
+    # One hash for every account keeps seeding fast; each login still pays the full verification
+    password = generate_password_hash(PASSWORD, method=app.config['PASSWORD_HASH_METHOD'])
+    with app.app_context():
+        db.create_all()
+        pools = {}
+        for element, tli_count in ((2, 35), (3, 35), (4, 50)):
+            pool = Pool(name=f'Load test {tag} E{element}', element=element,
+                        start_date=datetime(2000, 1, 1), end_date=datetime(2100, 1, 1))
+            db.session.add(pool)
+            db.session.flush()
+            for tli_index in range(tli_count):
+                tli = f'{"TGE"[element - 2]}{tli_index // 10}{chr(65 + tli_index % 10)}'
+                db.session.add(TLI(pool_id=pool.id, tli=tli, quantity=4))
+                db.session.add_all(Question(
+                    pool_id=pool.id, number=f'{tli}{number:02d}', correct_answer=number % 4,
+                    question=f'Load test question {tli}{number:02d}?', option_a='A',
+                    option_b='B', option_c='C', option_d='D', refs='')
+                    for number in range(1, 5))
+            pools[element] = pool.id
+
+        session = ExamSession(session_date=datetime.now(), start_time=datetime.now(),
+                              tech_pool_id=pools[2], gen_pool_id=pools[3],
+                              extra_pool_id=pools[4], status=True)
+        db.session.add(session)
+        ve_username = f'LTVE{tag}'
+        db.session.add(User(username=ve_username, first_name='Load', last_name='VE',
+                            email='ve@load.test', password=password, role=2))
+        usernames = [f'LT{tag}{number:05d}' for number in range(candidates)]
+        db.session.add_all(User(username=username, first_name='Load', last_name='Candidate',
+                                email=f'{username.lower()}@load.test', password=password, role=1)
+                           for username in usernames)
+        db.session.commit()
+        return {'session_id': session.id, 've_username': ve_username, 'usernames': usernames}
+
+class LockErrorHandler(logging.Handler):
+    """Count application log records reporting a locked SQLite database."""
+
+    def __init__(self, recorder):
+        super().__init__(logging.ERROR)
+        self.recorder = recorder
+
+    def emit(self, record):
+        if LOCK_MESSAGE in record.getMessage():
+            self.recorder.count('lock_errors')
+
+def start_local_server(app, recorder):
+    """Serve the app from a threaded werkzeug server on a free port and count lock errors.
+
+    Returns:
+        tuple: The base URL and a function that stops the server and the lock error counting.
+    """
+    def count_exception(_sender, exception, **_extra):
+        if LOCK_MESSAGE in str(exception):
+            recorder.count('lock_errors')
+    got_request_exception.connect(count_exception, app, weak=False)
+    lock_handler = LockErrorHandler(recorder)
+    logging.getLogger('openwaves').addHandler(lock_handler)
+
+    # Per-request access log lines would swamp the summary
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop():
+        server.shutdown()
+        got_request_exception.disconnect(count_exception, app)
+        logging.getLogger('openwaves').removeHandler(lock_handler)
+    return f'http://127.0.0.1:{server.server_port}', stop
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))]
+
+def summarize(recorder, wall_time, settings):
+    """Build the JSON-serialisable summary of a run."""
+    endpoints = {}
+    for endpoint in ENDPOINTS + sorted(set(recorder.timings) - set(ENDPOINTS)):
+        timings = recorder.timings.get(endpoint)
+        if not timings:
+            continue
+        endpoints[endpoint] = {
+            'requests': len(timings),
+            'errors': recorder.errors[endpoint],
+            'p50_ms': round(percentile(timings, 50) * 1000, 2),
+            'p95_ms': round(percentile(timings, 95) * 1000, 2),
+            'p99_ms': round(percentile(timings, 99) * 1000, 2),
+            'mean_ms': round(statistics.mean(timings) * 1000, 2),
+            'statuses': dict(recorder.statuses[endpoint]),
+        }
+    total = sum(len(timings) for timings in recorder.timings.values())
+    return {
+        'started': settings.pop('started'),
+        'settings': settings,
+        'wall_time_s': round(wall_time, 3),
+        'requests': total,
+        'requests_per_s': round(total / wall_time, 2) if wall_time else 0,
+        'exams_completed': recorder.completed,
+        'exams_per_minute': round(recorder.completed * 60 / wall_time, 2) if wall_time else 0,
+        'failed_candidates': recorder.failed,
+        'lock_errors': recorder.lock_errors,
+        'endpoints': endpoints,
+    }
+
+def run_load_test(candidates=20, element='2', url=None, database_uri=None, config=None, # pylint: disable=R0913,R0914,R0917
+                  ramp_up=0.0, poll_interval=1.0):
+    """Seed the database, run the simulated session and return its summary.
+
+    Args:
+        candidates (int): Number of simultaneous candidates.
+        element (str): Exam element taken by every candidate ('2', '3' or '4').
+        url (str): Base URL of a running server; None starts a local threaded server.
+        database_uri (str): Database to seed (a temporary SQLite file when None).
+        config (dict): Extra app configuration for seeding and the local server.
+        ramp_up (float): Seconds over which candidate start times are spread.
+        poll_interval (float): Seconds between VE polls of the results page.
+
+    Returns:
+        dict: The run summary (see summarize()).
+    """
+    temp_dir = None
+    if database_uri is None:
+        temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        database_uri = f"sqlite:///{os.path.join(temp_dir.name, 'load_test.db')}"
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'TEMPLATE_WARMUP': True,
+                      'LOG_LEVEL': 'WARNING', **(config or {})})
+    seeded = seed(app, candidates)
+
+    recorder = Recorder()
+    stop_server = None
+    if url is None:
+        url, stop_server = start_local_server(app, recorder)
+
+    settings = {'candidates': candidates, 'element': element, 'url': url,
+                'database': database_uri.split('://')[0], 'ramp_up_s': ramp_up,
+                'started': datetime.now().isoformat(timespec='seconds')}
+    stop = threading.Event()
+    poller = threading.Thread(target=run_ve_poller, args=(url, seeded['ve_username'],
+                                                          seeded['session_id'], recorder, stop,
+                                                          poll_interval))
+    workers = [threading.Thread(target=run_candidate, args=(url, username, seeded['session_id'],
+                                                            element, recorder))
+               for username in seeded['usernames']]
+
+    start = time.perf_counter()
+    poller.start()
+    for worker in workers:
+        worker.start()
+        if ramp_up:
+            time.sleep(ramp_up / len(workers))
+    for worker in workers:
+        worker.join()
+    wall_time = time.perf_counter() - start
+    stop.set()
+    poller.join()
+
+    if stop_server is not None:
+        stop_server()
+    if temp_dir is not None:
+        with app.app_context():
+            db.engine.dispose()
+        temp_dir.cleanup()
+    return summarize(recorder, wall_time, settings)
+
+def save_results(summary, output_dir=RESULTS_DIR):
+    """Write the summary to a timestamped JSON file and return its path."""
+    os.makedirs(output_dir, exist_ok=True)
+    name = f"load_test-{summary['started'].replace(':', '')}-" \
+        f"{summary['settings']['candidates']}c.json"
+    path = os.path.join(output_dir, name)
+    with open(path, 'w', encoding='utf-8') as results_file:
+        json.dump(summary, results_file, indent=2)
+    return path
+
+def print_summary(summary, previous=None):
+    """Print the run summary, with the change in p95 against an earlier run when given."""
+    print(f"{summary['settings']['candidates']} candidates, element "
+          f"{summary['settings']['element']}: {summary['requests']} requests in "
+          f"{summary['wall_time_s']:.1f} s ({summary['requests_per_s']:.1f} req/s, "
+          f"{summary['exams_per_minute']:.1f} exams/min)")
+    print(f"completed {summary['exams_completed']}, failed {summary['failed_candidates']}, "
+          f"SQLite lock errors {summary['lock_errors']}")
+    print(f"{'endpoint':<20}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          + (f"{'p95 change':>12}" if previous else ''))
+    for endpoint, stats in summary['endpoints'].items():
+        line = f"{endpoint:<20}{stats['requests']:>9}{stats['errors']:>8}{stats['p50_ms']:>9.1f}" \
+            f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+        before = (previous or {}).get('endpoints', {}).get(endpoint)
+        if before and before['p95_ms']:
+            line += f"{(stats['p95_ms'] / before['p95_ms'] - 1) * 100:>+11.1f}%"
+        print(line)
+
+def main():
+    """Parse the command line, run the load test and save its results."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1].strip())
+    parser.add_argument('--candidates', type=int, default=20, help='simultaneous candidates')
+    parser.add_argument('--element', choices=['2', '3', '4'], default='2',
+                        help='exam element (4 = Extra, 50 questions)')
+    parser.add_argument('--url', help='base URL of a running server (default: start one)')
+    parser.add_argument('--database-uri', help='database to seed (default: temporary SQLite)')
+    parser.add_argument('--ramp-up', type=float, default=0.0,
+                        help='seconds over which candidates start')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='seconds between VE results polls')
+    parser.add_argument('--output', default=RESULTS_DIR, help='directory for the JSON results')
+    parser.add_argument('--compare', help='earlier results file to compare p95 against')
+    args = parser.parse_args()
+    if args.url and not args.database_uri:
+        parser.error('--url needs --database-uri so the session can be seeded')
+
+    summary = run_load_test(args.candidates, args.element, args.url, args.database_uri,
+                            ramp_up=args.ramp_up, poll_interval=args.poll_interval)
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as previous_file:
+            previous = json.load(previous_file)
+    print_summary(summary, previous)
+    print(f"results saved to {save_results(summary, args.output)}")
+    sys.exit(1 if summary['failed_candidates'] else 0)
+
+if __name__ == "__main__":
+    main()
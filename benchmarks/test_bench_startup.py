@@ -0,0 +1,20 @@
+"""File: test_bench_startup.py
+
+    This file contains the start-up budget check, run with the other benchmarks
+    (python -m pytest benchmarks) rather than in the test suite, because wall-clock timings
+    depend on how loaded the machine is.
+"""
+
+import statistics
+import time
+from openwaves import create_app
+from benchmarks.bench_startup import CREATE_APP_BUDGET
+
+def test_create_app_startup_budget():
+    """Check the median time of create_app() is below CREATE_APP_BUDGET."""
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+        timings.append(time.perf_counter() - start)
+    assert statistics.median(timings) < CREATE_APP_BUDGET
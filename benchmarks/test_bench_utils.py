@@ -0,0 +1,46 @@
+"""File: test_bench_utils.py
+
+    This file contains the microbenchmarks for the hot functions in openwaves/utils.py, run
+    against full-size pools. See conftest.py for how they are timed and compared.
+"""
+
+from types import SimpleNamespace
+import pytest
+from openwaves import db
+from openwaves.imports import Question, generate_exam, get_exam_score, requires_diagram, \
+    load_question_pools
+
+@pytest.fixture(autouse=True)
+def app_context(bench_app):
+    """Run every benchmark inside the seeded app's context."""
+    with bench_app.app_context():
+        yield bench_app
+
+@pytest.mark.parametrize('element', [2, 3, 4])
+def test_generate_exam(bench, bench_app, element):
+    """Time generating an exam from each pool."""
+    pool_id = bench_app.config['BENCH_POOL_IDS'][element]
+    assert len(generate_exam(pool_id)) == (50 if element == 4 else 35)
+    bench(generate_exam, pool_id)
+
+@pytest.mark.parametrize('element', [2, 4])
+def test_get_exam_score(bench, element):
+    """Time scoring a completed exam."""
+    count = 50 if element == 4 else 35
+    answers = [SimpleNamespace(answer=number % 4, correct_answer=number % 3)
+               for number in range(count)]
+    bench(get_exam_score, answers, element, rounds=2000, fresh_session=False)
+
+def test_requires_diagram(bench, bench_app):
+    """Time the diagram lookup for a question that references a figure."""
+    pool_id = bench_app.config['BENCH_POOL_IDS'][4]
+    question = Question.query.filter(Question.pool_id == pool_id,
+                                     Question.question.like('%figure%')).first()
+    db.session.expunge(question)
+    assert requires_diagram(question) is not None
+    bench(requires_diagram, question, rounds=200)
+
+def test_load_question_pools(bench):
+    """Time loading every pool with its diagrams."""
+    assert len(load_question_pools()) == 3
+    bench(load_question_pools, rounds=100)
@@ -0,0 +1,15 @@
+"""File: build_assets.py
+
+    This script builds the fingerprinted static assets (content-hashed copies plus .gz/.br
+    variants) that the application serves with long-lived cache headers.
+"""
+from openwaves import create_app
+from openwaves.assets import build_assets
+
+# Create the app
+app = create_app()
+
+manifest = build_assets(app.static_folder, app.config['ASSET_DIST_DIR'])
+for logical_path, entry in manifest.items():
+    print(f"{logical_path} -> {entry['hashed']} {' '.join(entry['encodings'])}")
+print(f"Built {len(manifest)} assets.")
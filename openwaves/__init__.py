@@ -9,11 +9,20 @@ from flask import Flask, g
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf.csrf import CSRFProtect
-from dotenv import load_dotenv
-from .config import Config
+from jinja2 import FileSystemBytecodeCache
 
-# Load environment variables from the .env file (if present)
-load_dotenv()
+try:
+    from dotenv import load_dotenv
+except ImportError:  # pragma: no cover - python-dotenv is optional at runtime
+    load_dotenv = None
+
+# Load environment variables from the .env file (if present) before Config reads them
+if load_dotenv is not None:
+    load_dotenv()
+
+from .config import Config  # pylint: disable=C0413
+from . import assets, cache, compression, diagram_store, logging_config, metrics, \
+    query_stats  # pylint: disable=C0413
 
 # init SQLAlchemy so we can use it later in our models
 db = SQLAlchemy()
@@ -28,11 +37,23 @@ def create_app(test_config=None):
     if test_config:
         app.config.update(test_config)
 
-    _csrf = CSRFProtect(app)
+    csrf = CSRFProtect(app)
 
     # Initialize extensions with the app
+    logging_config.init_app(app)
     db.init_app(app)
     login_manager.init_app(app)
+    cache.init_app(app)
+    assets.init_app(app)
+    diagram_store.init_app(app)
+    compression.init_app(app)
+    query_stats.init_app(app)
+    metrics.init_app(app)
+
+    # Register the `flask openwaves` administration commands and the background job worker
+    from . import cli, jobs  # pylint: disable=C0415,R0401
+    cli.init_app(app)
+    jobs.init_app(app)
 
     # Configure Login Manager settings
     login_manager.login_view = app.config['LOGIN_VIEW']
@@ -47,6 +68,9 @@ def create_app(test_config=None):
     # Set CSP headers after the request
     @app.after_request
     def set_csp_header(response):
+        # A 304 must not replace the policy whose nonce matches the browser's cached page
+        if response.status_code == 304:
+            return response
         csp = (
             f"default-src {app.config['CSP_DEFAULT_SRC']}; "
             f"script-src {app.config['CSP_SCRIPT_SRC']} 'nonce-{g.csp_nonce}'; "
@@ -61,6 +85,13 @@ def create_app(test_config=None):
         response.headers['Content-Security-Policy'] = csp
         return response
 
+    # Cache compiled templates so recycled workers do not recompile them
+    if app.config['TEMPLATE_BYTECODE_CACHE']:
+        cache_dir = app.config['TEMPLATE_BYTECODE_CACHE_DIR']
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
     # blueprint for auth routes in our app
     from .auth import auth as auth_blueprint  # pylint: disable=C0415,R0401
     app.register_blueprint(auth_blueprint, url_prefix='/auth')
@@ -69,12 +100,36 @@ def create_app(test_config=None):
     from .main import main as main_blueprint  # pylint: disable=C0415,R0401
     app.register_blueprint(main_blueprint)
 
+    # Browsers cannot send a CSRF token with CSP violation reports
+    csrf.exempt('openwaves.main.csp_violation_report')
+
     # blueprint for non-auth ve parts of app
     from .main_ve import main_ve as main_ve_blueprint  # pylint: disable=C0415,R0401
     app.register_blueprint(main_ve_blueprint)
 
+    # blueprint for ve result exports
+    from .main_reports import main_reports as main_reports_blueprint  # pylint: disable=C0415,R0401
+    app.register_blueprint(main_reports_blueprint)
+
+    if app.config['TEMPLATE_WARMUP']:
+        warm_templates(app)
+
     return app
 
+def warm_templates(app):
+    """Compile every template up front so the first request in a worker skips compilation.
+
+    Args:
+        app (Flask): The application whose templates should be compiled.
+
+    Returns:
+        int: The number of templates compiled.
+    """
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
 @login_manager.user_loader
 def load_user(user_id):
     """Method to avoid circular import for User"""
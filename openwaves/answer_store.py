@@ -0,0 +1,636 @@
+"""File: answer_store.py
+
+    This file contains the accessors for exam answers, which are kept in one of two formats:
+
+        rows    One ExamAnswer row per question (the original format).
+        packed  One ExamAnswerPack row per exam holding the question ids, correct answers,
+                responses and answer times as packed arrays, so an exam costs one row and one
+                primary key entry instead of 35-50 rows and their index entries.
+
+    ANSWER_STORAGE chooses the format of new exams and Exam.packed records the format of each
+    exam, so both can live in one database. Routes, scoring, analytics and maintenance go
+    through the functions here and see ExamAnswer-like objects either way; setting answer or
+    answered_at on a packed answer writes through to its pack, so callers commit as usual.
+    pack_exams() and unpack_exams() convert existing exams between the formats.
+
+    Exams assigned a pre-built ExamForm (see exam_forms.py) are always packed and their pack
+    holds only the responses; the question ids and correct answers are read from the form.
+
+    With EXAM_GENERATION = 'seeded' a drawn exam stores only a seed (Exam.seed). Its questions
+    are regenerated from the seed by utils.generate_seeded_exam() whenever they are needed, and
+    an ExamAnswer row is written only when a question is first answered, so launching an exam
+    writes one row and unanswered questions cost nothing. Regeneration depends on the pool's
+    questions, so finishing an exam writes out its unanswered questions and drops the seed
+    (materialize_exam()), and importing questions into a pool first does the same for its
+    seeded exams (materialize_seeded()).
+"""
+
+import secrets
+import sys
+from array import array
+from collections import Counter
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from . import cache
+from .imports import db, Pool, Question, Exam, ExamAnswer, ExamAnswerPack, ExamForm, \
+    generate_exam, generate_seeded_exam
+
+STORAGE_MODES = ('rows', 'packed')
+GENERATION_MODES = ('stored', 'seeded')
+
+# Packed arrays are stored little-endian whatever the byte order of the host
+QUESTION_ID_TYPE = 'I'  # Unsigned 32-bit
+ANSWERED_AT_TYPE = 'q'  # Signed 64-bit
+NO_ANSWER = 255
+NO_TIME = 0
+
+def storage_mode():
+    """Return the storage format for new exams, checking ANSWER_STORAGE."""
+    mode = current_app.config.get('ANSWER_STORAGE', 'rows')
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"ANSWER_STORAGE must be one of {', '.join(STORAGE_MODES)}, "
+                         f"not {mode!r}.")
+    return mode
+
+def generation_mode():
+    """Return how new drawn exams are kept, checking EXAM_GENERATION."""
+    mode = current_app.config.get('EXAM_GENERATION', 'stored')
+    if mode not in GENERATION_MODES:
+        raise ValueError(f"EXAM_GENERATION must be one of {', '.join(GENERATION_MODES)}, "
+                         f"not {mode!r}.")
+    return mode
+
+def draw_questions(pool_id):
+    """Draw the questions of a new exam in the configured generation mode.
+
+    Args:
+        pool_id (int): The pool to draw from.
+
+    Returns:
+        tuple: (questions, seed); the seed is None for stored exams, and questions is None if
+        the pool cannot supply a complete exam.
+    """
+    if generation_mode() == 'seeded':
+        # 63 bits keeps the seed within a signed BIGINT column
+        seed = secrets.randbits(63)
+        return generate_seeded_exam(pool_id, seed), seed
+    return generate_exam(pool_id), None
+
+def seeded_question_keys(pool_id, seed):
+    """Return the (question_id, correct_answer) pairs a seed selects, in question number order.
+
+    The list is cached per version of the pool's questions, since regenerating it reads the
+    whole pool.
+
+    Args:
+        pool_id (int): The exam's pool.
+        seed (int): The exam's seed.
+
+    Returns:
+        list: One (question_id, correct_answer) tuple per question.
+
+    Raises:
+        LookupError: If the pool can no longer supply the exam. Question imports write out
+            seeded exams first, so this only happens if the pool was changed some other way.
+    """
+    pool = db.session.get(Pool, pool_id)
+
+    def load():
+        questions = generate_seeded_exam(pool_id, seed) if pool is not None else None
+        if not questions:
+            raise LookupError(f"Pool {pool_id} can no longer supply the exam with seed {seed}.")
+        return [(question.id, question.correct_answer) for question in questions]
+
+    return [tuple(entry) for entry in cache.cached(
+        cache.QUESTIONS, f"seed:{pool_id}:{seed}:{pool.question_version if pool else None}",
+        load)]
+
+def encode_array(typecode, values):
+    """Encode integers as a little-endian array."""
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+def decode_array(typecode, data):
+    """Decode a little-endian array written by encode_array()."""
+    packed = array(typecode)
+    packed.frombytes(data)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed
+
+class PackedAnswers:
+    """The decoded arrays of one ExamAnswerPack.
+
+    Attributes:
+        pack (ExamAnswerPack): The stored row; changes are written back to it at once.
+        form (ExamForm): The form holding the questions and key of a form exam, or None.
+        question_ids (array): Question ids by question number - 1.
+        correct_answers (bytearray): Correct answers by question number - 1.
+        answers (bytearray): Responses by question number - 1 (NO_ANSWER when unanswered).
+        answered_at (array): Answer times by question number - 1 (NO_TIME when unanswered).
+    """
+
+    def __init__(self, pack, form=None):
+        self.pack = pack
+        # A form exam's pack holds only the responses
+        self.form = form if form is not None and not pack.question_ids else None
+        key_source = self.form or pack
+        self.question_ids = decode_array(QUESTION_ID_TYPE, key_source.question_ids)
+        self.correct_answers = bytearray(key_source.correct_answers)
+        self.answers = bytearray(pack.answers)
+        self.answered_at = decode_array(ANSWERED_AT_TYPE, pack.answered_at)
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def set_answer(self, index, answer, answered_at):
+        """Record a response and write the changed arrays back to the pack."""
+        self.answers[index] = NO_ANSWER if answer is None else answer
+        self.answered_at[index] = NO_TIME if answered_at is None else answered_at
+        self.pack.answers = bytes(self.answers)
+        self.pack.answered_at = encode_array(ANSWERED_AT_TYPE, self.answered_at)
+
+    def tally(self):
+        """Return (answered, total, correct) for the exam."""
+        answered = sum(1 for answer in self.answers if answer != NO_ANSWER)
+        correct = sum(1 for answer, key in zip(self.answers, self.correct_answers)
+                      if answer == key)
+        return answered, len(self), correct
+
+class PackedAnswer:
+    """One answer of a packed exam, with the attributes of an ExamAnswer row."""
+
+    __slots__ = ('packed', 'index')
+
+    def __init__(self, packed, index):
+        self.packed = packed
+        self.index = index
+
+    @property
+    def exam_id(self):
+        """The exam the answer belongs to."""
+        return self.packed.pack.exam_id
+
+    @property
+    def question_number(self):
+        """The number of the question in the exam."""
+        return self.index + 1
+
+    @property
+    def question_id(self):
+        """The id of the question."""
+        return self.packed.question_ids[self.index]
+
+    @property
+    def correct_answer(self):
+        """The correct answer to the question."""
+        return self.packed.correct_answers[self.index]
+
+    @property
+    def answer(self):
+        """The candidate's answer, or None."""
+        answer = self.packed.answers[self.index]
+        return None if answer == NO_ANSWER else answer
+
+    @answer.setter
+    def answer(self, value):
+        self.packed.set_answer(self.index, value, self.answered_at)
+
+    @property
+    def answered_at(self):
+        """When the answer was chosen, or None."""
+        answered_at = self.packed.answered_at[self.index]
+        return None if answered_at == NO_TIME else answered_at
+
+    @answered_at.setter
+    def answered_at(self, value):
+        self.packed.set_answer(self.index, self.answer, value)
+
+    def __repr__(self):
+        return f"PackedAnswer('{self.answer}')"
+
+class SeededAnswer:
+    """An unanswered question of a seeded exam, with the attributes of an ExamAnswer row.
+
+    Setting answer or answered_at adds the ExamAnswer row to the session on first use and
+    writes to it from then on. Another request may insert the same row first (a double submit,
+    an offline sync or finish_exam writing out the exam); the unique index on (exam_id,
+    question_number) rejects the second insert and the existing row is updated instead.
+    """
+
+    __slots__ = ('exam_id', 'question_number', 'question_id', 'correct_answer', 'row')
+
+    def __init__(self, exam_id, question_number, question_id, correct_answer): # pylint: disable=R0913,R0917
+        self.exam_id = exam_id
+        self.question_number = question_number
+        self.question_id = question_id
+        self.correct_answer = correct_answer
+        self.row = None
+
+    def new_row(self):
+        """Return a new, unsaved ExamAnswer row for the question."""
+        return ExamAnswer(exam_id=self.exam_id, question_id=self.question_id,
+                          question_number=self.question_number,
+                          correct_answer=self.correct_answer)
+
+    def materialize(self):
+        """Return the answer's ExamAnswer row, inserting it if it is new.
+
+        The insert runs in a savepoint so that losing a race to another request only undoes
+        the insert, after which the row that request wrote is loaded.
+        """
+        if self.row is None:
+            row = self.new_row()
+            try:
+                with db.session.begin_nested():
+                    db.session.add(row)
+            except IntegrityError:
+                row = ExamAnswer.query.filter_by(exam_id=self.exam_id,
+                                                 question_number=self.question_number).one()
+            self.row = row
+        return self.row
+
+    @property
+    def answer(self):
+        """The candidate's answer, or None."""
+        return self.row.answer if self.row is not None else None
+
+    @answer.setter
+    def answer(self, value):
+        self.materialize().answer = value
+
+    @property
+    def answered_at(self):
+        """When the answer was chosen, or None."""
+        return self.row.answered_at if self.row is not None else None
+
+    @answered_at.setter
+    def answered_at(self, value):
+        self.materialize().answered_at = value
+
+    def __repr__(self):
+        return f"SeededAnswer('{self.answer}')"
+
+def build_pack(exam_id, entries):
+    """Build an ExamAnswerPack.
+
+    Args:
+        exam_id (int): The exam.
+        entries (list): (question_id, correct_answer, answer, answered_at) per question, in
+            question number order.
+
+    Returns:
+        ExamAnswerPack: The new, unsaved pack.
+    """
+    return ExamAnswerPack(
+        exam_id=exam_id,
+        question_ids=encode_array(QUESTION_ID_TYPE, [entry[0] for entry in entries]),
+        correct_answers=bytes(entry[1] for entry in entries),
+        answers=bytes(NO_ANSWER if entry[2] is None else entry[2] for entry in entries),
+        answered_at=encode_array(ANSWERED_AT_TYPE,
+                                 [NO_TIME if entry[3] is None else entry[3]
+                                  for entry in entries]),
+    )
+
+def create_answers(exam, questions, form=None):
+    """Add unanswered answers for a new exam in the configured format.
+
+    The exam must have an id; nothing is committed.
+
+    Args:
+        exam (Exam): The new exam.
+        questions (list): The exam's questions in question number order (unused with a form).
+        form (ExamForm): The pre-built form assigned to the exam, if any.
+    """
+    if exam.seed is not None:
+        # Seeded exams write their answers one at a time as they are answered
+        return
+    if form is not None:
+        # The form holds the questions and key, so the exam keeps only its responses
+        count = len(form.correct_answers)
+        exam.form_id = form.id
+        exam.packed = True
+        db.session.add(ExamAnswerPack(
+            exam_id=exam.id, question_ids=b'', correct_answers=b'',
+            answers=bytes([NO_ANSWER] * count),
+            answered_at=encode_array(ANSWERED_AT_TYPE, [NO_TIME] * count)))
+        return
+
+    exam.packed = storage_mode() == 'packed'
+    if exam.packed:
+        db.session.add(build_pack(exam.id, [(question.id, question.correct_answer, None, None)
+                                            for question in questions]))
+        return
+    db.session.add_all([ExamAnswer(exam_id=exam.id, question_id=question.id,
+                                   question_number=number,
+                                   correct_answer=question.correct_answer)
+                        for number, question in enumerate(questions, start=1)])
+
+def load_answers(exam):
+    """Return an exam's answers in question number order.
+
+    Args:
+        exam (Exam): The exam.
+
+    Returns:
+        list: ExamAnswer rows, or PackedAnswer objects for a packed exam. A seeded exam has
+        rows for its answered questions and SeededAnswer objects for the rest.
+    """
+    if exam.seed is not None:
+        return seeded_answers(exam, ExamAnswer.query.filter_by(exam_id=exam.id))
+    if exam.packed:
+        pack = db.session.get(ExamAnswerPack, exam.id)
+        if pack is None:
+            return []
+        return packed_answers(PackedAnswers(pack, db.session.get(ExamForm, exam.form_id)
+                                            if exam.form_id else None))
+    return ExamAnswer.query.filter_by(exam_id=exam.id) \
+        .order_by(ExamAnswer.question_number).all()
+
+def load_exam_answers(exams):
+    """Return the answers of several exams, keyed by exam id.
+
+    Like load_answers() for each exam, but the ExamAnswer rows of every exam are read with one
+    query and the packs with load_packs(), instead of one or two queries per exam.
+
+    Args:
+        exams (list): The exams.
+
+    Returns:
+        dict: Exam id to the list load_answers() would return.
+    """
+    packs = load_packs([exam.id for exam in exams if exam.seed is None and exam.packed])
+    rows = {exam.id: [] for exam in exams if exam.seed is not None or not exam.packed}
+    if rows:
+        for row in ExamAnswer.query.filter(ExamAnswer.exam_id.in_(list(rows))) \
+                .order_by(ExamAnswer.exam_id, ExamAnswer.question_number):
+            rows[row.exam_id].append(row)
+
+    answers = {}
+    for exam in exams:
+        if exam.seed is not None:
+            answers[exam.id] = seeded_answers(exam, rows[exam.id])
+        elif exam.packed:
+            answers[exam.id] = packed_answers(packs[exam.id]) if exam.id in packs else []
+        else:
+            answers[exam.id] = rows[exam.id]
+    return answers
+
+def seeded_answers(exam, rows):
+    """Return a seeded exam's answers from its ExamAnswer rows, filling in the unanswered."""
+    by_number = {row.question_number: row for row in rows}
+    return [by_number.get(number) or SeededAnswer(exam.id, number, question_id, correct_answer)
+            for number, (question_id, correct_answer)
+            in enumerate(seeded_question_keys(exam.pool_id, exam.seed), start=1)]
+
+def packed_answers(packed):
+    """Return PackedAnswer objects for every question of a decoded pack."""
+    return [PackedAnswer(packed, index) for index in range(len(packed))]
+
+def decode_packs(query):
+    """Decode the packs of a query over ExamAnswerPack joined to Exam, keyed by exam id.
+
+    The forms of form exams are loaded in one further query.
+    """
+    rows = query.with_entities(ExamAnswerPack, Exam.form_id).all()
+    form_ids = {form_id for _pack, form_id in rows if form_id}
+    forms = {form.id: form for form in
+             ExamForm.query.filter(ExamForm.id.in_(form_ids))} if form_ids else {}
+    return {pack.exam_id: PackedAnswers(pack, forms.get(form_id)) for pack, form_id in rows}
+
+def pack_query():
+    """Return a query over packs joined to their exams."""
+    return ExamAnswerPack.query.join(Exam, Exam.id == ExamAnswerPack.exam_id)
+
+def load_packs(exam_ids):
+    """Return the decoded packs of the given exams that are packed, keyed by exam id."""
+    if not exam_ids:
+        return {}
+    return decode_packs(pack_query().filter(ExamAnswerPack.exam_id.in_(list(exam_ids))))
+
+def packed_tallies(exam_ids):
+    """Return (answered, total, correct) for each packed exam among the given exams.
+
+    The results and monitor queries count ExamAnswer rows in SQL; this supplies the same
+    counts for packed exams, which have no rows to count.
+
+    Args:
+        exam_ids (iterable): Exam ids; ids of exams stored as rows are ignored.
+
+    Returns:
+        dict: Exam id to an (answered, total, correct) tuple.
+    """
+    return {exam_id: packed.tally() for exam_id, packed in load_packs(exam_ids).items()}
+
+def packed_incorrect_counts(pool_id):
+    """Count the incorrect responses to each question in packed exams from a pool.
+
+    Args:
+        pool_id (int): The pool.
+
+    Returns:
+        Counter: (question_id, answer) to the number of times it was chosen.
+    """
+    counts = Counter()
+    for packed in decode_packs(pack_query().filter(Exam.pool_id == pool_id)).values():
+        for question_id, answer, key in zip(packed.question_ids, packed.answers,
+                                            packed.correct_answers):
+            if answer not in (NO_ANSWER, key):
+                counts[question_id, answer] += 1
+    return counts
+
+def rescore_key(source, current):
+    """Copy current correct answers into a pack or form.
+
+    Args:
+        source: An ExamAnswerPack or ExamForm.
+        current (dict): Question id to its current correct answer.
+
+    Returns:
+        int: The number of correct answers changed.
+    """
+    question_ids = decode_array(QUESTION_ID_TYPE, source.question_ids)
+    keys = bytearray(source.correct_answers)
+    changed = 0
+    for index, question_id in enumerate(question_ids):
+        key = current.get(question_id)
+        if key is not None and key != keys[index]:
+            keys[index] = key
+            changed += 1
+    if changed:
+        source.correct_answers = bytes(keys)
+    return changed
+
+def rescore_packs(pool_id=None):
+    """Copy each question's current correct answer into the packs and forms that differ.
+
+    Args:
+        pool_id (int): Only rescore exams taken from this pool.
+
+    Returns:
+        int: The number of answers changed; nothing is committed.
+    """
+    questions = db.session.query(Question.id, Question.correct_answer)
+    packs = ExamAnswerPack.query
+    forms = ExamForm.query
+    if pool_id is not None:
+        questions = questions.filter(Question.pool_id == pool_id)
+        packs = packs.filter(ExamAnswerPack.exam_id.in_(
+            select(Exam.id).where(Exam.pool_id == pool_id)))
+        forms = forms.filter(ExamForm.pool_id == pool_id)
+    current = dict(questions.all())
+
+    # Form exams' packs have no key of their own and change nothing here
+    changed = sum(rescore_key(pack, current) for pack in packs)
+    for form in forms:
+        form_changed = rescore_key(form, current)
+        if form_changed:
+            # A form's key is shared by every exam assigned the form
+            changed += form_changed * Exam.query.filter_by(form_id=form.id).count()
+    return changed
+
+def seeded_totals(exams):
+    """Return the number of questions of each seeded exam, keyed by exam id.
+
+    The monitor counts ExamAnswer rows in SQL, which for a seeded exam are only the answered
+    questions; this supplies the exam's length.
+
+    Args:
+        exams (iterable): (exam_id, pool_id, seed) tuples; exams without a seed are ignored.
+
+    Returns:
+        dict: Exam id to its number of questions, without exams that can no longer be
+        regenerated (the monitor then shows their answered rows).
+    """
+    totals = {}
+    for exam_id, pool_id, seed in exams:
+        if seed is not None:
+            try:
+                totals[exam_id] = len(seeded_question_keys(pool_id, seed))
+            except LookupError:
+                continue
+    return totals
+
+def materialize_seeded(pool_id):
+    """Write out the unanswered questions of a pool's seeded exams and drop their seeds.
+
+    Called before a pool's questions change, since regenerating the exams afterwards would
+    select different questions. Nothing is committed.
+
+    Args:
+        pool_id (int): The pool about to change.
+
+    Returns:
+        int: The number of exams written out.
+    """
+    exams = Exam.query.filter(Exam.pool_id == pool_id, Exam.seed.isnot(None)).all()
+    for exam in exams:
+        materialize_exam(exam)
+    db.session.flush()
+    return len(exams)
+
+def materialize_exam(exam):
+    """Write out a seeded exam's unanswered questions as ExamAnswer rows and drop its seed.
+
+    Does nothing for an exam without a seed. Nothing is committed.
+
+    Args:
+        exam (Exam): The exam.
+    """
+    if exam.seed is None:
+        return
+    unanswered = [answer for answer in load_answers(exam) if isinstance(answer, SeededAnswer)]
+    try:
+        with db.session.begin_nested():
+            db.session.add_all([answer.new_row() for answer in unanswered])
+    except IntegrityError:
+        # A late answer inserted one of the rows first; insert the rest one at a time
+        for answer in unanswered:
+            answer.materialize()
+    exam.seed = None
+
+def delete_answers(exam_ids):
+    """Delete the answers of the given exams in both formats; nothing is committed.
+
+    Args:
+        exam_ids: A list of exam ids or a select() of them.
+    """
+    ExamAnswer.query.filter(ExamAnswer.exam_id.in_(exam_ids)) \
+        .delete(synchronize_session=False)
+    ExamAnswerPack.query.filter(ExamAnswerPack.exam_id.in_(exam_ids)) \
+        .delete(synchronize_session=False)
+
+def convert_exams(packed, batch_size=500, progress=None):
+    """Convert exams to or from the packed format in batches, one transaction per batch.
+
+    Form exams are left packed, since their packs hold only the responses, and seeded exams
+    are left as they are, since they have rows only for their answered questions.
+
+    Args:
+        packed (bool): True to pack exams stored as rows, False to unpack packed exams.
+        batch_size (int): Exams converted per transaction.
+        progress (callable): Called with (exams converted, total) after each batch.
+
+    Returns:
+        int: The number of exams converted.
+    """
+    exam_ids = [row.id for row in db.session.query(Exam.id)
+                .filter(Exam.packed.is_(not packed), Exam.form_id.is_(None), Exam.seed.is_(None))
+                .order_by(Exam.id)]
+
+    for start in range(0, len(exam_ids), batch_size):
+        batch = exam_ids[start:start + batch_size]
+        if packed:
+            pack_batch(batch)
+        else:
+            unpack_batch(batch)
+        Exam.query.filter(Exam.id.in_(batch)) \
+            .update({Exam.packed: packed}, synchronize_session=False)
+        db.session.commit()
+
+        if progress:
+            progress(start + len(batch), len(exam_ids))
+    # Exams loaded before the conversion still carry the old flag
+    db.session.expire_all()
+    return len(exam_ids)
+
+def pack_batch(exam_ids):
+    """Replace the ExamAnswer rows of the given exams with packs."""
+    entries = {exam_id: [] for exam_id in exam_ids}
+    rows = db.session.query(ExamAnswer.exam_id, ExamAnswer.question_id,
+                            ExamAnswer.correct_answer, ExamAnswer.answer,
+                            ExamAnswer.answered_at) \
+        .filter(ExamAnswer.exam_id.in_(exam_ids)) \
+        .order_by(ExamAnswer.exam_id, ExamAnswer.question_number)
+    for exam_id, *entry in rows:
+        entries[exam_id].append(entry)
+
+    db.session.add_all([build_pack(exam_id, exam_entries)
+                        for exam_id, exam_entries in entries.items()])
+    ExamAnswer.query.filter(ExamAnswer.exam_id.in_(exam_ids)) \
+        .delete(synchronize_session=False)
+
+def unpack_batch(exam_ids):
+    """Replace the packs of the given exams with ExamAnswer rows."""
+    rows = []
+    for exam_id, packed in load_packs(exam_ids).items():
+        rows.extend({'exam_id': exam_id, 'question_id': answer.question_id,
+                     'question_number': answer.question_number,
+                     'correct_answer': answer.correct_answer, 'answer': answer.answer,
+                     'answered_at': answer.answered_at}
+                    for answer in packed_answers(packed))
+    if rows:
+        db.session.execute(ExamAnswer.__table__.insert(), rows)
+    ExamAnswerPack.query.filter(ExamAnswerPack.exam_id.in_(exam_ids)) \
+        .delete(synchronize_session=False)
+
+def pack_exams(batch_size=500, progress=None):
+    """Convert every exam stored as ExamAnswer rows to the packed format."""
+    return convert_exams(True, batch_size, progress)
+
+def unpack_exams(batch_size=500, progress=None):
+    """Convert every packed exam back to ExamAnswer rows."""
+    return convert_exams(False, batch_size, progress)
@@ -0,0 +1,234 @@
+"""File: assets.py
+
+    This file contains the static asset pipeline for the application. The build step copies each
+    static file to a content-hashed name with precompressed siblings, and the runtime half rewrites
+    url_for('static', ...) to the hashed names and serves them with long-lived cache headers.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from flask import current_app, request, send_from_directory
+from werkzeug.utils import safe_join
+from .conditional import file_etag
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+FINGERPRINT_EXTENSIONS = {'css', 'js', 'webp', 'png', 'jpg', 'jpeg', 'gif', 'svg', 'ico'}
+COMPRESSIBLE_EXTENSIONS = {'css', 'js', 'svg'}
+RUNTIME_FOLDERS = ('images/diagrams',)  # Uploaded at runtime, versioned by file stat instead
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+CSS_URL_PATTERN = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+
+def _file_hash(data):
+    """Return the short content hash used in fingerprinted filenames."""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def _hashed_name(logical_path, digest):
+    """Insert the content hash before the file extension (css/a.css -> css/a.<hash>.css)."""
+    root, ext = posixpath.splitext(logical_path)
+    return f"{root}.{digest}{ext}"
+
+def _extension(path):
+    """Return the lower-case extension of a path without the leading dot."""
+    return path.rsplit('.', 1)[-1].lower() if '.' in path else ''
+
+def _rewrite_css_urls(css, logical_path, manifest):
+    """Point relative url() references in a stylesheet at their fingerprinted names."""
+    css_dir = posixpath.dirname(logical_path)
+
+    def replace(match):
+        quote, target = match.group(1), match.group(2)
+        if target.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        referenced = posixpath.normpath(posixpath.join(css_dir, target))
+        entry = manifest.get(referenced)
+        if not entry:
+            return match.group(0)
+        return f"url({quote}{posixpath.relpath(entry['hashed'], css_dir)}{quote})"
+
+    return CSS_URL_PATTERN.sub(replace, css)
+
+def _write_compressed(path, data):
+    """Write .gz (and .br when brotli is installed) siblings and return the encodings created."""
+    encodings = []
+    if brotli is not None:
+        with open(path + ENCODING_SUFFIXES['br'], 'wb') as handle:
+            handle.write(brotli.compress(data, quality=11))
+        encodings.append('br')
+    with open(path + ENCODING_SUFFIXES['gzip'], 'wb') as handle:
+        # mtime=0 keeps the output byte-for-byte reproducible between builds
+        handle.write(gzip.compress(data, compresslevel=9, mtime=0))
+    encodings.append('gzip')
+    return encodings
+
+def _collect_static_files(static_folder, dist_dir):
+    """Return the logical (posix) paths of all static files that should be fingerprinted."""
+    logical_paths = []
+    for root, dirs, files in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder).replace(os.sep, '/')
+        rel_root = '' if rel_root == '.' else rel_root
+        # Skip previous build output and folders written to at runtime
+        dirs[:] = [d for d in dirs
+                   if posixpath.join(rel_root, d) not in (dist_dir,) + RUNTIME_FOLDERS]
+        for name in files:
+            if _extension(name) in FINGERPRINT_EXTENSIONS:
+                logical_paths.append(posixpath.join(rel_root, name))
+    return sorted(logical_paths)
+
+def build_assets(static_folder, dist_dir='dist'):
+    """Build fingerprinted copies of the static assets.
+
+    Every fingerprintable file under ``static_folder`` is copied to
+    ``<static_folder>/<dist_dir>/<path>.<hash>.<ext>``. Text assets also get ``.gz`` and ``.br``
+    siblings, and stylesheets have their relative ``url()`` references rewritten so the hashed CSS
+    points at the hashed images. A manifest mapping logical names to hashed names is written last.
+
+    Args:
+        static_folder (str): The application's static folder.
+        dist_dir (str): Sub-folder of the static folder to write the build into.
+
+    Returns:
+        dict: The manifest, keyed by logical path.
+    """
+    output_folder = os.path.join(static_folder, dist_dir)
+    if os.path.exists(output_folder):
+        shutil.rmtree(output_folder)
+
+    manifest = {}
+    logical_paths = _collect_static_files(static_folder, dist_dir)
+
+    # Stylesheets go last so the files they reference are already in the manifest
+    logical_paths.sort(key=lambda path: _extension(path) == 'css')
+
+    for logical_path in logical_paths:
+        with open(os.path.join(static_folder, logical_path), 'rb') as handle:
+            data = handle.read()
+
+        if _extension(logical_path) == 'css':
+            data = _rewrite_css_urls(data.decode('utf-8'), logical_path, manifest).encode('utf-8')
+
+        hashed = _hashed_name(logical_path, _file_hash(data))
+        output_path = os.path.join(output_folder, *hashed.split('/'))
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'wb') as handle:
+            handle.write(data)
+
+        encodings = []
+        if _extension(logical_path) in COMPRESSIBLE_EXTENSIONS:
+            encodings = _write_compressed(output_path, data)
+
+        manifest[logical_path] = {'hashed': hashed, 'encodings': encodings}
+
+    with open(os.path.join(output_folder, MANIFEST_NAME), 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+
+    return manifest
+
+def load_manifest(app):
+    """Load the asset manifest for the app, if a build exists.
+
+    Stores a dict in ``app.extensions['openwaves_assets']`` with the forward mapping used by
+    url_for and the reverse mapping used when serving the hashed files.
+    """
+    dist_dir = app.config['ASSET_DIST_DIR']
+    manifest_path = os.path.join(app.static_folder, dist_dir, MANIFEST_NAME)
+    manifest = {}
+    if app.config['ASSET_FINGERPRINTING'] and os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as handle:
+            manifest = json.load(handle)
+
+    app.extensions['openwaves_assets'] = {
+        'urls': {logical: f"{dist_dir}/{entry['hashed']}" for logical, entry in manifest.items()},
+        'encodings': {f"{dist_dir}/{entry['hashed']}": entry['encodings']
+                      for entry in manifest.values()},
+    }
+    return manifest
+
+def _runtime_version(filename):
+    """Return a cache-busting token for a static file that is not part of the build."""
+    try:
+        stat = os.stat(os.path.join(current_app.static_folder, filename))
+    except (OSError, ValueError):
+        return None
+    return f"{int(stat.st_mtime):x}{stat.st_size:x}"
+
+def fingerprint_static_url(endpoint, values):
+    """url_defaults hook that rewrites static filenames to their fingerprinted form."""
+    if endpoint != 'static' or 'filename' not in values or 'v' in values:
+        return
+    assets = current_app.extensions.get('openwaves_assets', {})
+    filename = values['filename']
+    hashed = assets.get('urls', {}).get(filename)
+    if hashed:
+        values['filename'] = hashed
+    elif current_app.config['ASSET_FINGERPRINTING']:
+        version = _runtime_version(filename)
+        if version:
+            values['v'] = version
+
+def _choose_encoding(filename, assets):
+    """Pick the best precompressed sibling the client accepts, or None."""
+    available = assets.get('encodings', {}).get(filename, [])
+    best, best_quality = None, 0
+    for encoding in available:
+        quality = request.accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def serve_static(filename):
+    """Serve a static file, preferring precompressed variants and immutable caching.
+
+    Replaces Flask's default static view. Fingerprinted files (from the build, or carrying the
+    ``v`` version token of the file's current contents) are sent with
+    ``Cache-Control: public, max-age=..., immutable``. A stale or made-up token gets the file
+    with normal revalidation, so it is never cached against the wrong version.
+    """
+    assets = current_app.extensions.get('openwaves_assets', {})
+    version = request.args.get('v')
+    fingerprinted = filename in assets.get('encodings', {}) or \
+        (version is not None and version == _runtime_version(filename))
+    max_age = current_app.config['ASSET_MAX_AGE'] if fingerprinted else None
+
+    encoding = _choose_encoding(filename, assets)
+    if encoding:
+        # Send the compressed bytes under the original file's content type
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(current_app.static_folder,
+                                       filename + ENCODING_SUFFIXES[encoding],
+                                       mimetype=mimetype,
+                                       max_age=max_age)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        # Uploaded files (diagrams) get a strong validator derived from their content
+        etag = True
+        if filename.startswith(tuple(f"{folder}/" for folder in RUNTIME_FOLDERS)):
+            path = safe_join(current_app.static_folder, filename)
+            etag = (file_etag(path) if path else None) or True
+        response = send_from_directory(current_app.static_folder, filename, max_age=max_age,
+                                       etag=etag)
+
+    if filename in assets.get('encodings', {}):
+        response.vary.add('Accept-Encoding')
+    if fingerprinted:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
+
+def init_app(app):
+    """Register the asset pipeline with the Flask app."""
+    load_manifest(app)
+    app.url_defaults(fingerprint_static_url)
+    if app.has_static_folder:
+        app.view_functions['static'] = serve_static
@@ -3,20 +3,21 @@
     This file contains the user authorization methods for the application.
 """
 
+import logging
 import secrets
 import string
 from flask import Blueprint, render_template, redirect, url_for, request, flash
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from .imports import User, update_user_password, db
+from .imports import User, update_user_password, hash_password, verify_password, db
+from .metrics import LOGIN_ATTEMPTS
 
 auth = Blueprint('auth', __name__)
+logger = logging.getLogger(__name__)
 
 PAGE_ACCOUNT = 'main.profile'
 PAGE_VE_PROFILE = 'main_ve.ve_profile'
 PAGE_LOGIN = 'auth.login'
 PAGE_LOGOUT = 'auth.logout'
-PASS_ENCRYPTION = 'pbkdf2:sha256'
 MSG_ACCESS_DENIED = 'Access denied.'
 
 # Route to display login page
@@ -50,8 +51,9 @@ def login_post():
     # check if the user actually exists
     # take the user-supplied password, hash it, and compare it to the hashed password in the
     # database
-    if user and check_password_hash(user.password, password):
+    if user and verify_password(user.password, password):
         # if the above check passes, then we know the user has the right credentials
+        LOGIN_ATTEMPTS.inc(result='success')
         login_user(user)
 
         if current_user.role == 2:
@@ -59,6 +61,7 @@ def login_post():
         return redirect(url_for('main.profile'))
 
     # if the above check did not pass, we have an issue
+    LOGIN_ATTEMPTS.inc(result='failure')
     flash('Please check your login details and try again.')
     return redirect(url_for(PAGE_LOGIN))
 
@@ -105,7 +108,7 @@ def signup_post():
         return redirect(url_for("auth.signup"))
 
     # Hash the password
-    hashed_password = generate_password_hash(password, method=PASS_ENCRYPTION)
+    hashed_password = hash_password(password)
 
     # Create and add the user
     new_user = User(
@@ -170,7 +173,7 @@ def ve_signup_post():
         return redirect(url_for("auth.ve_signup"))
 
     # Hash the password
-    hashed_password = generate_password_hash(password, method=PASS_ENCRYPTION)
+    hashed_password = hash_password(password)
 
     # Check if a VE Account already exists
     ve_user_exists = User.query.filter_by(role=2).first()
@@ -318,7 +321,8 @@ def reset_password(account_id):
         Response: Redirects to the password reset page with a flash message showing
         the new password.
     """
-    print("Password reset requested")
+    logger.info("Password reset requested for account %s by user %s", account_id,
+                current_user.id)
     if current_user.role != 2:  # Only VE users can reset passwords
         flash("Access denied.", "danger")
         return redirect(url_for(PAGE_LOGOUT))
@@ -333,7 +337,7 @@ def reset_password(account_id):
     new_password = ''.join(secrets.choice(alphabet) for _ in range(8))
 
     # Update the account's password
-    account.password = generate_password_hash(new_password, method=PASS_ENCRYPTION)
+    account.password = hash_password(new_password)
     db.session.commit()
 
     flash(f"Password for {account.username} has been reset. " +
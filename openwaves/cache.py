@@ -0,0 +1,256 @@
+"""File: cache.py
+
+    This file contains the application cache for stable data that pages would otherwise reload
+    from the database on every request (pool lists, pool options, exam questions). Entries live
+    in named regions; a mutating route calls invalidate() for the regions it changes, which bumps
+    the region's generation so every older entry is ignored from then on.
+
+    CACHE_BACKEND selects the storage: 'local' keeps an LRU with per-entry TTL in each process,
+    'redis' shares entries and invalidations between workers through CACHE_REDIS_URL, 'memory'
+    is a local stand-in for the shared backend and 'none' disables caching.
+"""
+
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Regions used by the application
+POOLS = 'pools'
+QUESTIONS = 'questions'
+
+class LocalCache:
+    """Thread-safe in-process LRU cache with a time to live per entry.
+
+    Region generations are kept apart from the entries so an eviction never resets one.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (True, value) for a live entry, or (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entry when full."""
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counter(self, key):
+        """Return a counter's value (0 if it was never incremented)."""
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        """Increment a counter and return its new value."""
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        """Drop every entry and counter."""
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+class SharedCache:
+    """Cache stored in a Redis-compatible client, shared by every worker that uses it.
+
+    Values are pickled, so only plain data (not ORM instances) should be cached.
+    """
+
+    def __init__(self, client, prefix='openwaves:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        """Return (True, value) for a live entry, or (False, None)."""
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            return False, None
+        return True, pickle.loads(data)
+
+    def set(self, key, value, ttl=None):
+        """Store a value that expires after ttl seconds."""
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def counter(self, key):
+        """Return a counter's value (0 if it was never incremented)."""
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        """Increment a counter and return its new value."""
+        return self.client.incr(self.prefix + key)
+
+    def clear(self):
+        """Drop every key with this cache's prefix."""
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+class MemoryClient:
+    """Local stand-in for the subset of the Redis client API that SharedCache uses."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """Return the stored bytes, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        """Store bytes, expiring after ex seconds."""
+        with self._lock:
+            self._data[name] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    def incr(self, name):
+        """Increment an integer value and return it."""
+        with self._lock:
+            _, value = self._data.get(name, (None, b'0'))
+            value = int(value) + 1
+            self._data[name] = (None, str(value).encode())
+            return value
+
+    def delete(self, *names):
+        """Delete keys and return how many existed."""
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def scan_iter(self, match='*'):
+        """Return the keys starting with match's prefix (only trailing '*' is supported)."""
+        prefix = match.rstrip('*')
+        with self._lock:
+            return [name for name in self._data if name.startswith(prefix)]
+
+class AppCache:
+    """Region-aware cache in front of a LocalCache or SharedCache backend.
+
+    Attributes:
+        backend: The storage, or None when caching is disabled.
+        default_ttl (int): Seconds an entry lives when get_or_set() is given no ttl.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that called the loader.
+    """
+
+    def __init__(self, backend, default_ttl=300):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, region, key):
+        generation = self.backend.counter(f"generation:{region}")
+        return f"{region}:{generation}:{key}"
+
+    def get_or_set(self, region, key, loader, ttl=None):
+        """Return the cached value for key in region, calling loader() to fill a miss.
+
+        Args:
+            region (str): The region the entry belongs to.
+            key: A value whose str() identifies the entry within the region.
+            loader (callable): Builds the value on a miss; it must be picklable plain data.
+            ttl (int): Seconds the entry lives (default_ttl if None).
+
+        Returns:
+            The cached or freshly loaded value.
+        """
+        if self.backend is None:
+            return loader()
+        try:
+            cache_key = self._key(region, key)
+            found, value = self.backend.get(cache_key)
+        except Exception: # pylint: disable=W0718
+            # An unreachable shared cache must not take the pages down with it
+            logger.warning("Cache read failed for %s", region, exc_info=True)
+            return loader()
+        if found:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = loader()
+        try:
+            self.backend.set(cache_key, value, self.default_ttl if ttl is None else ttl)
+        except Exception: # pylint: disable=W0718
+            logger.warning("Cache write failed for %s", region, exc_info=True)
+        return value
+
+    def invalidate(self, *regions):
+        """Make every entry of the given regions stale."""
+        if self.backend is None:
+            return
+        for region in regions:
+            self.backend.incr(f"generation:{region}")
+            logger.debug("Invalidated cache region %s", region)
+
+    def clear(self):
+        """Drop every entry."""
+        if self.backend is not None:
+            self.backend.clear()
+
+def create_backend(config):
+    """Return the storage selected by CACHE_BACKEND, or None when caching is disabled."""
+    name = config['CACHE_BACKEND']
+    if name == 'none':
+        return None
+    if name == 'memory':
+        return SharedCache(MemoryClient())
+    if name == 'redis':
+        if redis is not None and config['CACHE_REDIS_URL']:
+            return SharedCache(redis.Redis.from_url(config['CACHE_REDIS_URL']))
+        logger.warning("CACHE_BACKEND is 'redis' but the redis package or CACHE_REDIS_URL is "
+                       "missing; using the local cache")
+    return LocalCache(config['CACHE_MAX_ENTRIES'])
+
+def get_cache():
+    """Return the current app's cache."""
+    return current_app.extensions['openwaves_cache']
+
+def cached(region, key, loader, ttl=None):
+    """Return a value from the current app's cache, calling loader() to fill a miss."""
+    return get_cache().get_or_set(region, key, loader, ttl)
+
+def invalidate(*regions):
+    """Make every entry of the given regions stale in the current app's cache."""
+    get_cache().invalidate(*regions)
+
+def init_app(app):
+    """Create the app's cache from the CACHE_* settings."""
+    app.extensions['openwaves_cache'] = AppCache(create_backend(app.config),
+                                                 app.config['CACHE_DEFAULT_TTL'])
@@ -0,0 +1,210 @@
+"""File: cli.py
+
+    This file contains the `flask openwaves` commands for bulk administrative work that is too
+    slow or too large for a web request. The commands call the same service functions as the VE
+    routes and print their progress, e.g.:
+
+        flask --app openwaves openwaves import-pool 2022-2026_technician.csv --pool-id 1
+        flask --app openwaves openwaves purge --batch-size 200
+        flask --app openwaves openwaves convert-answers packed
+        flask --app openwaves openwaves export-results results.csv --start 2024-01-01
+"""
+
+import csv
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from . import answer_store, datagen, exam_forms, jobs, results_export, score_reports, services
+from .imports import db, ExamSession, Pool
+
+openwaves_cli = AppGroup('openwaves', help='OpenWaves administration commands.')
+
+def get_pool(pool_id):
+    """Return a pool or stop the command with an error."""
+    pool = db.session.get(Pool, pool_id)
+    if pool is None:
+        raise click.ClickException(f"Pool {pool_id} not found.")
+    return pool
+
+@openwaves_cli.command('import-pool')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--pool-id', type=int, help='Add the questions to this existing pool.')
+@click.option('--name', help='Name of a new pool to create.')
+@click.option('--element', type=click.Choice(['2', '3', '4']), help='Element of the new pool.')
+@click.option('--start-date', help='First valid day of the new pool (YYYY-MM-DD).')
+@click.option('--end-date', help='Last valid day of the new pool (YYYY-MM-DD).')
+def import_pool(csv_path, pool_id, name, element, start_date, end_date): # pylint: disable=R0913,R0917
+    """Import questions from a pool CSV file (columns id, correct, question, a-d, refs)."""
+    if pool_id is None:
+        if not (name and element and start_date and end_date):
+            raise click.UsageError("Give --pool-id, or --name, --element, --start-date and "
+                                   "--end-date to create a pool.")
+        try:
+            pool = services.create_pool(name, int(element), start_date, end_date)
+        except ValueError as error:
+            raise click.BadParameter(str(error)) from error
+        click.echo(f"Created pool {pool.id}: {pool.name}")
+    else:
+        pool = get_pool(pool_id)
+
+    with open(csv_path, newline='', encoding='utf-8') as csv_file:
+        reader = csv.DictReader(csv_file)
+        missing = services.missing_question_columns(reader.fieldnames)
+        if missing:
+            raise click.ClickException(f"Missing CSV columns: {', '.join(missing)}")
+        count = services.import_questions(pool.id, reader)
+    click.echo(f"Imported {count} questions into pool {pool.id}")
+
+@openwaves_cli.command('import-diagrams')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--pool-id', type=int, required=True, help='Pool the diagrams belong to.')
+def import_diagrams(directory, pool_id):
+    """Import every image in DIRECTORY as a diagram named after its file (T1.png -> T1)."""
+    pool = get_pool(pool_id)
+    count = services.import_diagrams(pool.id, directory,
+                                     progress=lambda name: click.echo(f"  {name}"))
+    click.echo(f"Imported {count} diagrams into pool {pool.id}")
+
+@openwaves_cli.command('build-forms')
+@click.option('--pool-id', type=int, required=True, help='Pool to build the forms from.')
+@click.option('--count', type=click.IntRange(1, len(exam_forms.FORM_LABELS)), default=None,
+              help='Number of forms (default EXAM_FORM_COUNT).')
+def build_forms(pool_id, count):
+    """Build pre-built exam forms for a pool, replacing its active forms."""
+    pool = get_pool(pool_id)
+    try:
+        forms = exam_forms.build_forms(pool.id, count or current_app.config['EXAM_FORM_COUNT'])
+    except ValueError as error:
+        raise click.ClickException(str(error)) from error
+    click.echo(f"Built forms {', '.join(form.label for form in forms)} for pool {pool.id}")
+
+@openwaves_cli.command('purge')
+@click.option('--batch-size', type=click.IntRange(min=1), default=None,
+              help='Sessions deleted per transaction (default PURGE_BATCH_SIZE).')
+@click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help=f'Purge sessions before this date (default {services.RETENTION_MONTHS} '
+                   'months ago).')
+@click.option('--yes', is_flag=True, help='Do not ask for confirmation.')
+def purge(batch_size, before, yes):
+    """Delete old sessions with their registrations, exams and answers."""
+    cutoff = before.date() if before else services.purge_cutoff(datetime.now().date())
+    if not yes:
+        click.confirm(f"Delete every session before {cutoff}?", abort=True)
+
+    deleted = services.purge_sessions(
+        cutoff, batch_size or current_app.config['PURGE_BATCH_SIZE'],
+        progress=lambda done, total: click.echo(f"  {done}/{total} sessions deleted"))
+    click.echo(f"Purged {deleted} sessions before {cutoff}")
+
+@openwaves_cli.command('rescore')
+@click.option('--pool-id', type=int, help='Only rescore exams taken from this pool.')
+def rescore(pool_id):
+    """Update exam answers to their question's current correct answer."""
+    if pool_id is not None:
+        get_pool(pool_id)
+    changed = services.rescore_answers(pool_id)
+    click.echo(f"Rescored {changed} answers")
+
+@openwaves_cli.command('convert-answers')
+@click.argument('storage', type=click.Choice(answer_store.STORAGE_MODES))
+@click.option('--batch-size', type=click.IntRange(min=1), default=500, show_default=True,
+              help='Exams converted per transaction.')
+def convert_answers(storage, batch_size):
+    """Convert existing exams' answers to STORAGE (rows or packed).
+
+    Set ANSWER_STORAGE to the same format so new exams are created in it.
+    """
+    convert = answer_store.pack_exams if storage == 'packed' else answer_store.unpack_exams
+    converted = convert(batch_size,
+                        progress=lambda done, total: click.echo(f"  {done}/{total} exams"))
+    click.echo(f"Converted {converted} exams to {storage} answers")
+
+@openwaves_cli.command('export-results')
+@click.argument('output', type=click.Path(dir_okay=False, allow_dash=True))
+@click.option('--format', 'export_format', type=click.Choice(results_export.EXPORT_FORMATS),
+              default=None, help='File format (default from the OUTPUT extension, else csv).')
+@click.option('--session-id', type=int, help='Only export this session.')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Only export sessions on or after this date.')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Only export sessions on or before this date.')
+def export_results(output, export_format, session_id, start, end):
+    """Write exam results to OUTPUT ('-' for stdout) as CSV or XLSX, one row per exam."""
+    if export_format is None:
+        export_format = 'xlsx' if output.lower().endswith('.xlsx') else 'csv'
+    chunks = results_export.export_results(export_format, session_id,
+                                           start.date() if start else None,
+                                           end.date() if end else None)
+    with click.open_file(output, 'wb') as output_file:
+        for chunk in chunks:
+            output_file.write(chunk.encode() if isinstance(chunk, str) else chunk)
+    if output != '-':
+        click.echo(f"Exported results to {output}")
+
+@openwaves_cli.command('session-reports')
+@click.argument('session_id', type=int)
+@click.argument('output', type=click.Path(dir_okay=False))
+def session_reports(session_id, output):
+    """Write a ZIP of a session's score reports and CSCE drafts to OUTPUT."""
+    if db.session.get(ExamSession, session_id) is None:
+        raise click.ClickException(f"Session {session_id} not found.")
+    with open(output, 'wb') as output_file:
+        for chunk in score_reports.session_reports(session_id):
+            output_file.write(chunk)
+    click.echo(f"Wrote the reports of session {session_id} to {output}")
+
+@openwaves_cli.command('upgrade-db')
+def upgrade_db():
+    """Add the tables, columns and indexes an older database is missing."""
+    changes = services.upgrade_database()
+    for change in changes:
+        click.echo(f"  {change}")
+    click.echo(f"Database up to date ({len(changes)} changes)")
+
+@openwaves_cli.command('rebuild-analytics')
+def rebuild_analytics():
+    """Create missing analytics indexes and refresh the query planner statistics."""
+    created = services.rebuild_analytics()
+    for name in created:
+        click.echo(f"  created index {name}")
+    click.echo(f"Analytics indexes up to date ({len(created)} created), statistics refreshed")
+
+@openwaves_cli.command('vacuum')
+def vacuum():
+    """Reclaim the space left by deleted rows (run after a large purge)."""
+    before, after = services.vacuum()
+    if before is None or after is None:
+        click.echo("Vacuum complete")
+    else:
+        click.echo(f"Vacuum complete: {before / 1048576:.1f} MB -> {after / 1048576:.1f} MB")
+
+@openwaves_cli.command('generate-data')
+@click.option('--users', type=click.IntRange(min=0), default=100, show_default=True)
+@click.option('--sessions', type=click.IntRange(min=0), default=10, show_default=True)
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('--participation', type=click.FloatRange(0, 1), default=0.3, show_default=True,
+              help='Chance a candidate attends a session.')
+def generate_data(users, sessions, seed, participation):
+    """Fill the database with synthetic candidates, sessions, exams and answers."""
+    counts = datagen.generate_dataset(users, sessions, seed, participation,
+                                      progress=lambda message: click.echo(f"  {message}"))
+    click.echo(f"Created {counts['answers']} answers in {counts['seconds']} s")
+
+@openwaves_cli.command('worker')
+@click.option('--once', is_flag=True, help='Run the jobs that are due and exit.')
+def worker(once):
+    """Run queued background jobs (for JOBS_MODE=external)."""
+    job_worker = jobs.Worker(current_app._get_current_object()) # pylint: disable=W0212
+    if once:
+        click.echo(f"Ran {job_worker.run_pending()} jobs")
+        return
+    click.echo("Job worker started, press Ctrl+C to stop")
+    try:
+        job_worker.run_forever()
+    except KeyboardInterrupt:
+        job_worker.stop()
+
+def init_app(app):
+    """Register the `flask openwaves` command group."""
+    app.cli.add_command(openwaves_cli)
@@ -0,0 +1,86 @@
+"""File: compression.py
+
+    This file contains the response compression middleware for the application. Rendered pages and
+    JSON responses above a size threshold are gzip or Brotli encoded when the client accepts it.
+"""
+
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+def _choose_encoding():
+    """Return the preferred encoding the client accepts ('br', 'gzip') or None."""
+    best, best_quality = None, 0
+    for encoding in ('br', 'gzip'):
+        if encoding == 'br' and brotli is None:
+            continue
+        quality = request.accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def _should_compress(app, response):
+    """Check whether a response is eligible for compression."""
+    if not app.config['COMPRESSION_ENABLED']:
+        return False
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    return response.mimetype in app.config['COMPRESSION_MIMETYPES']
+
+def compress(data, encoding, app):
+    """Compress a response body with the given encoding.
+
+    Args:
+        data (bytes): The uncompressed body.
+        encoding (str): 'br' or 'gzip'.
+        app (Flask): The app whose compression levels should be used.
+
+    Returns:
+        bytes: The compressed body.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=app.config['COMPRESSION_BR_QUALITY'])
+    return gzip.compress(data, compresslevel=app.config['COMPRESSION_GZIP_LEVEL'])
+
+def init_app(app):
+    """Register the compression after_request hook with the Flask app.
+
+    The hook only touches the body, so the per-request CSP nonce in the rendered page and the
+    Content-Security-Policy header stay in step.
+    """
+    @app.after_request
+    def compress_response(response):
+        if not _should_compress(app, response):
+            return response
+
+        # Responses that vary by encoding must say so even if this one is not compressed
+        response.vary.add('Accept-Encoding')
+
+        data = response.get_data()
+        if len(data) < app.config['COMPRESSION_MIN_SIZE']:
+            return response
+
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+
+        compressed = compress(data, encoding, app)
+        if len(compressed) >= len(data):
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+
+        # A strong validator must not be shared between encodings of the same resource
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
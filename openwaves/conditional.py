@@ -0,0 +1,96 @@
+"""File: conditional.py
+
+    This file contains the helpers for ETag/conditional GET handling. Exam pages are fingerprinted
+    from the pool version and the candidate's answer state so unchanged pages can be answered with
+    a 304, and files are given strong, content-based validators.
+"""
+
+import hashlib
+import os
+import time
+from functools import lru_cache
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+
+def make_etag(*parts):
+    """Build an opaque ETag value from the given parts.
+
+    Args:
+        *parts: Values that together identify one version of a representation.
+
+    Returns:
+        str: A hex digest suitable for use as an ETag.
+    """
+    digest = hashlib.sha1(usedforsecurity=False)
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+def _csrf_state():
+    """Return the parts of the session that are baked into rendered forms.
+
+    Cached pages carry a signed CSRF token, so the ETag changes when the session's raw token
+    changes and before the signed token would expire.
+    """
+    if not current_app.config.get('WTF_CSRF_ENABLED'):
+        return None
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    bucket = int(time.time() // max(time_limit // 2, 1)) if time_limit else 0
+    return session.get('csrf_token'), bucket
+
+def page_etag(*parts):
+    """Build the ETag for a rendered, per-user page.
+
+    Args:
+        *parts: Values describing the page content (e.g. pool version and answer state).
+
+    Returns:
+        str | None: The ETag, or None if the page must not be served from cache (pending flash
+        messages would otherwise be swallowed by a 304).
+    """
+    if session.get('_flashes'):
+        return None
+    user_id = current_user.get_id() if current_user.is_authenticated else None
+    return make_etag(request.endpoint, user_id, _csrf_state(), *parts)
+
+def conditional_render(etag, render):
+    """Return a 304 if the client already holds ``etag``, otherwise render the page.
+
+    The page is marked ``private, no-cache`` so browsers keep a copy but revalidate it on every
+    use. A 304 carries no Content-Security-Policy header (see set_csp_header), so the browser
+    keeps the policy whose nonce matches its cached body.
+
+    Args:
+        etag (str | None): The page ETag from page_etag(); None disables conditional handling.
+        render (Callable[[], str]): Renders the page when it is needed.
+
+    Returns:
+        Response: The 304 or full response.
+    """
+    if etag and request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render())
+    if etag:
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response
+
+@lru_cache(maxsize=1024)
+def _content_hash(path, _mtime_ns, _size):
+    """Hash a file's contents; the stat fields make the cache entry expire when the file changes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_etag(path):
+    """Return a strong, content-based ETag for a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return _content_hash(path, stat.st_mtime_ns, stat.st_size)
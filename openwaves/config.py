@@ -16,23 +16,114 @@ class Config:
     Configuration settings for the Flask application.
 
     Attributes:
-        UPLOAD_FOLDER (str): Directory to store uploaded files.
+        UPLOAD_FOLDER (str): Directory to store uploaded files (the local diagram store).
+        DIAGRAM_STORE (str): Diagram storage backend: 'local' (content-addressed files in
+            UPLOAD_FOLDER).
+        DIAGRAM_DELIVERY (str): Who sends diagram bytes: 'flask' (the app), 'x-accel-redirect'
+            (nginx) or 'x-sendfile' (Apache mod_xsendfile, lighttpd).
+        DIAGRAM_ACCEL_PREFIX (str): nginx internal location mapped to UPLOAD_FOLDER, used by
+            'x-accel-redirect'.
         ALLOWED_EXTENSIONS (set): Allowed file extensions for uploads.
+        DIAGRAM_MAX_SIZE (int): Longest side in pixels diagrams are scaled down to (needs
+            Pillow, as does the WebP version).
+        DIAGRAM_WEBP_QUALITY (int): WebP quality (0-100) of stored diagrams.
+        PURGE_BATCH_SIZE (int): Sessions deleted per transaction when purging old sessions.
+        ANSWER_STORAGE (str): Format of new exams' answers: 'rows' (one ExamAnswer row per
+            question) or 'packed' (one ExamAnswerPack row per exam).
+        EXAM_FORM_COUNT (int): Forms built for a pool when the VE does not give a number.
+        EXAM_FORM_ASSIGNMENT (str): How pre-built forms are handed to candidates:
+            'round-robin' (the form assigned least so far) or 'random'.
+        EXAM_GENERATION (str): How drawn exams are kept: 'stored' (the question list is
+            written with the answers) or 'seeded' (regenerated from a per-exam seed, with
+            answer rows written only when a question is answered).
+        JOBS_MODE (str): Background job worker: 'thread' (in each app process), 'external'
+            (`flask openwaves worker`) or 'inline' (run while queuing, for tests).
+        JOBS_* : Job queue settings (poll interval, attempts, retry delay, heartbeat interval,
+            and the silence after which a running job is requeued).
+        CACHE_BACKEND (str): Application cache storage: 'local' (per-process LRU), 'redis'
+            (shared by all workers), 'memory' (local stand-in for the shared backend) or 'none'.
+        CACHE_REDIS_URL (str): Redis URL for the 'redis' backend.
+        CACHE_DEFAULT_TTL (int): Seconds a cached entry lives unless it is invalidated sooner.
+        CACHE_MAX_ENTRIES (int): Entries kept by the local backend before evicting.
+        REPORT_WORKERS (int): Processes rendering score report PDFs: 0 for one per CPU, 1 to
+            render in the request process.
+        SESSION_MONITOR_HEARTBEAT (int): Seconds between keep-alive lines on a monitor stream.
+        SESSION_MONITOR_POLL_INTERVAL (int): Seconds between checks of a watched session's
+            version by the process's shared poller.
+        SESSION_MONITOR_MAX_AGE (int): Seconds before a monitor stream ends and the browser
+            reconnects, which bounds how long a stream holds a worker.
         SECRET_KEY (str): Secret key for session management and CSRF protection.
+        PASSWORD_HASH_METHOD (str): werkzeug hash method used for new password hashes.
         SQLALCHEMY_DATABASE_URI (str): Database connection URI.
         SQLALCHEMY_TRACK_MODIFICATIONS (bool): Disable or enable track modifications.
         WTF_CSRF_ENABLED (bool): Enable CSRF protection for forms.
         CSP_* (str): Content Security Policy settings.
+        CSP_REPORT_* : Violation report handling (size limit, sample rate, flush interval, the
+            number of distinct violations held in memory and shown to VEs).
         LOGIN_VIEW (str): Default view for user login redirection.
         LOGIN_MESSAGE (str): Message displayed when login is required.
         LOGIN_MESSAGE_CATEGORY (str): Bootstrap alert category for login messages.
+        ASSET_FINGERPRINTING (bool): Serve static files under content-hashed, immutable URLs.
+        ASSET_DIST_DIR (str): Static sub-folder holding the fingerprinted asset build.
+        ASSET_MAX_AGE (int): Cache lifetime in seconds for fingerprinted static files.
+        COMPRESSION_* : Response compression settings (threshold, content types, levels).
+        TEMPLATE_BYTECODE_CACHE (bool): Cache compiled Jinja templates on disk.
+        TEMPLATE_BYTECODE_CACHE_DIR (str): Directory for the bytecode cache (None = Jinja's
+            per-user temp directory).
+        TEMPLATE_WARMUP (bool): Compile every template while the app is created.
+        QUERY_STATS_* : Per-request SQL statistics (logging, N+1 threshold, debug headers).
+        METRICS_ENABLED (bool): Collect request metrics and serve them at /metrics.
+        METRICS_TOKEN (str): Bearer token required to read /metrics. Without one, /metrics is
+            only served in debug and testing.
+        LOG_LEVEL (str): Level of the openwaves loggers.
+        LOG_LEVELS (str): Per-module levels, e.g. "openwaves.main_ve=DEBUG,openwaves.auth=WARNING".
+        LOG_FORMAT (str): 'json' for one JSON object per line, or 'text'.
+        LOG_QUEUE (bool): Write log output from a background thread instead of the request thread.
+        LOG_REQUEST_ID_HEADER (str): Header used to accept and return the request id.
     """
     # Upload settings
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'openwaves/static/images/diagrams')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    DIAGRAM_MAX_SIZE = 1200
+    DIAGRAM_WEBP_QUALITY = 80
+    DIAGRAM_STORE = os.getenv('DIAGRAM_STORE', 'local')
+    DIAGRAM_DELIVERY = os.getenv('DIAGRAM_DELIVERY', 'flask')
+    DIAGRAM_ACCEL_PREFIX = os.getenv('DIAGRAM_ACCEL_PREFIX', '/_diagrams/')
+
+    # Maintenance settings
+    PURGE_BATCH_SIZE = 500
+
+    # Exam answer settings
+    ANSWER_STORAGE = os.getenv('ANSWER_STORAGE', 'rows')
+    EXAM_FORM_COUNT = 6
+    EXAM_FORM_ASSIGNMENT = os.getenv('EXAM_FORM_ASSIGNMENT', 'round-robin')
+    EXAM_GENERATION = os.getenv('EXAM_GENERATION', 'stored')
+
+    # Background job settings
+    JOBS_MODE = os.getenv('JOBS_MODE', 'thread')
+    JOBS_POLL_INTERVAL = 2  # Seconds between queue checks when no job was queued locally
+    JOBS_MAX_ATTEMPTS = 3
+    JOBS_RETRY_DELAY = 5  # Seconds before the first retry, doubled for each further attempt
+    JOBS_HEARTBEAT_INTERVAL = 30  # Seconds between liveness updates from a running job
+    JOBS_STALE_AFTER = 300  # Seconds without a heartbeat before a running job is requeued
+
+    # Application cache settings
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'local')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+    CACHE_DEFAULT_TTL = 300
+    CACHE_MAX_ENTRIES = 1024
+
+    # Score report settings
+    REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '0'))
+
+    # Live session monitor settings
+    SESSION_MONITOR_HEARTBEAT = 15
+    SESSION_MONITOR_POLL_INTERVAL = 2
+    SESSION_MONITOR_MAX_AGE = 30
 
     # Flask settings
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256'
 
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI', 'sqlite:///default.db')
@@ -51,10 +142,50 @@ class Config:
     CSP_FORM_ACTION = "'self'"
     CSP_FRAME_ANCESTORS = "'none'"
     CSP_REPORT_URI = "/csp-violation-report-endpoint"
+    CSP_REPORT_MAX_BYTES = 8192
+    CSP_REPORT_SAMPLE_RATE = float(os.getenv('CSP_REPORT_SAMPLE_RATE', '1.0'))
+    CSP_REPORT_FLUSH_INTERVAL = 60  # Seconds between batched writes
+    CSP_REPORT_MAX_KEYS = 500
+    CSP_REPORT_TOP_N = 50
 
     # Login settings
     LOGIN_VIEW = 'auth.login'
     LOGIN_MESSAGE = "Please log in to access this page."
     LOGIN_MESSAGE_CATEGORY = 'danger'
 
+    # Static asset settings (run build_assets.py to create the fingerprinted build)
+    ASSET_FINGERPRINTING = os.getenv('ASSET_FINGERPRINTING', 'true').lower() == 'true'
+    ASSET_DIST_DIR = 'dist'
+    ASSET_MAX_AGE = 31536000  # One year
+
+    # Response compression settings
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = 1024  # Bytes; smaller bodies are not worth the CPU
+    COMPRESSION_MIMETYPES = {'text/html', 'text/css', 'text/plain', 'text/csv',
+                             'text/javascript', 'application/javascript', 'application/json',
+                             'image/svg+xml'}
+    COMPRESSION_GZIP_LEVEL = 6
+    COMPRESSION_BR_QUALITY = 4  # Dynamic responses favour speed; static builds use quality 11
+
+    # Template settings
+    TEMPLATE_BYTECODE_CACHE = True
+    TEMPLATE_BYTECODE_CACHE_DIR = os.getenv('TEMPLATE_BYTECODE_CACHE_DIR')
+    TEMPLATE_WARMUP = os.getenv('TEMPLATE_WARMUP', 'true').lower() == 'true'
+
+    # SQL instrumentation settings
+    QUERY_STATS_ENABLED = True
+    QUERY_STATS_HEADER = os.getenv('QUERY_STATS_HEADER', 'false').lower() == 'true'
+    QUERY_STATS_REPEAT_THRESHOLD = 5  # Same statement this often in one request looks like N+1
+
+    # Metrics settings
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Logging settings
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    LOG_QUEUE = True
+    LOG_REQUEST_ID_HEADER = 'X-Request-ID'
+
     #SERVER_NAME = f"{os.getenv('SERVER_NAME', '127.0.0.1')}:{os.getenv('SERVER_PORT', '5000')}"
@@ -0,0 +1,267 @@
+"""File: csp_reports.py
+
+    This file contains the in-memory aggregation of Content Security Policy violation reports.
+    Reports are size-limited, optionally sampled and counted per (directive, blocked URI); the
+    counts are written to the CspViolation table in one batch at most every
+    CSP_REPORT_FLUSH_INTERVAL seconds, so a report storm costs a dictionary update per request.
+    A report that arrives within the interval starts a timer that writes the counts once it
+    ends, and the counts still pending when the process exits are written then, so they are
+    saved even if no further report arrives.
+"""
+
+import atexit
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+# Content types browsers use for CSP reports (legacy report-uri and the Reporting API)
+REPORT_MIMETYPES = {'application/csp-report', 'application/json', 'application/reports+json'}
+
+DIRECTIVE_LENGTH = 100
+URI_LENGTH = 255
+
+def parse_reports(data):
+    """Extract (directive, blocked URI, document URI) tuples from a report payload.
+
+    Accepts the legacy ``{"csp-report": {...}}`` body and the Reporting API list of
+    ``{"type": "csp-violation", "body": {...}}`` entries.
+
+    Args:
+        data (bytes): The raw request body.
+
+    Returns:
+        list: The violations found; empty if the body is not a recognised report.
+    """
+    try:
+        payload = json.loads(data)
+    except (ValueError, UnicodeDecodeError):
+        return []
+
+    violations = []
+    if isinstance(payload, dict) and isinstance(payload.get('csp-report'), dict):
+        report = payload['csp-report']
+        violations.append((report.get('effective-directive') or report.get('violated-directive'),
+                           report.get('blocked-uri'), report.get('document-uri')))
+    elif isinstance(payload, list):
+        for entry in payload:
+            if isinstance(entry, dict) and entry.get('type') == 'csp-violation' \
+                    and isinstance(entry.get('body'), dict):
+                body = entry['body']
+                violations.append((body.get('effectiveDirective'), body.get('blockedURL'),
+                                   body.get('documentURL')))
+
+    # Normalise to short strings that fit the table columns
+    return [(str(directive or 'unknown').split(' ', 1)[0][:DIRECTIVE_LENGTH],
+             str(blocked or 'unknown')[:URI_LENGTH], str(document or '')[:URI_LENGTH])
+            for directive, blocked, document in violations]
+
+class CspReportAggregator:
+    """Thread-safe counts of CSP violations waiting to be written to the database.
+
+    Attributes:
+        app (Flask): The application the timer and at-exit flushes run in.
+        max_keys (int): Distinct (directive, blocked URI) pairs kept between flushes; reports
+            for further pairs are dropped and counted in ``dropped``.
+        dropped (int): Reports dropped because max_keys was reached.
+    """
+
+    def __init__(self, max_keys=500, app=None):
+        self.max_keys = max_keys
+        self.app = app
+        self.dropped = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    def record(self, directive, blocked_uri, document_uri, weight=1.0):
+        """Count one report.
+
+        Args:
+            directive (str): The violated directive.
+            blocked_uri (str): The blocked resource.
+            document_uri (str): The page that triggered the report (first one is kept).
+            weight (float): How many reports this one stands for (1 / sample rate).
+
+        Returns:
+            bool: True if this is the first report for the pair since the last flush.
+        """
+        key = (directive, blocked_uri)
+        now = datetime.now()
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                if len(self._pending) >= self.max_keys:
+                    self.dropped += 1
+                    return False
+                self._pending[key] = {'count': weight, 'document_uri': document_uri,
+                                      'first_seen': now, 'last_seen': now}
+                return True
+            entry['count'] += weight
+            entry['last_seen'] = now
+        return False
+
+    def due(self, interval):
+        """Return True if ``interval`` seconds have passed since the last flush."""
+        return time.monotonic() - self._last_flush >= interval
+
+    def flush_later(self, interval):
+        """Flush from a timer thread when ``interval`` seconds have passed since the last flush.
+
+        Does nothing if nothing is pending or a timer is already waiting.
+        """
+        with self._lock:
+            if self._timer is not None or not self._pending:
+                return
+            delay = max(0.0, interval - (time.monotonic() - self._last_flush))
+            self._timer = threading.Timer(delay, self.flush_in_app)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush_in_app(self):
+        """Flush outside a request, e.g. from the timer thread or at exit."""
+        from . import db  # pylint: disable=C0415,R0401
+
+        with self._lock:
+            self._timer = None
+            if not self._pending:
+                return 0
+        with self.app.app_context():
+            try:
+                return self.flush()
+            finally:
+                db.session.remove()
+
+    def drain(self):
+        """Remove and return the pending counts."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        return pending
+
+    def flush(self):
+        """Write the pending counts to the CspViolation table in a single transaction.
+
+        If another worker inserts one of the same new pairs first, the unique constraint fails
+        the commit; the batch is then written again, adding to the rows that now exist.
+
+        Returns:
+            int: The number of (directive, blocked URI) rows written.
+        """
+        from . import db  # pylint: disable=C0415,R0401
+
+        pending = self.drain()
+        if not pending:
+            return 0
+
+        for attempt in range(2):
+            try:
+                write_counts(pending)
+                db.session.commit()
+                break
+            except IntegrityError:
+                db.session.rollback()
+                if attempt == 0:
+                    continue
+                logger.error("Could not save %d CSP violation counts: a row was inserted "
+                             "concurrently", len(pending))
+                return 0
+            except SQLAlchemyError as error:
+                # Losing a batch of report counts is better than failing the request that
+                # flushed it
+                db.session.rollback()
+                logger.error("Could not save %d CSP violation counts: %s", len(pending), error)
+                return 0
+        logger.info("Saved %d CSP violation counts", len(pending))
+        return len(pending)
+
+def write_counts(pending):
+    """Add pending counts to their CspViolation rows, creating the missing ones; not committed.
+
+    Args:
+        pending (dict): Counts from CspReportAggregator.drain().
+    """
+    from .models import CspViolation  # pylint: disable=C0415,R0401
+    from . import db  # pylint: disable=C0415,R0401
+
+    # Load the existing rows for every pending pair with one query
+    existing = {
+        (row.directive, row.blocked_uri): row
+        for row in CspViolation.query.filter(or_(*[
+            and_(CspViolation.directive == directive, CspViolation.blocked_uri == blocked)
+            for directive, blocked in pending
+        ]))
+    }
+    for key, entry in pending.items():
+        count = max(1, round(entry['count']))
+        row = existing.get(key)
+        if row is None:
+            db.session.add(CspViolation(directive=key[0], blocked_uri=key[1],
+                                        document_uri=entry['document_uri'], count=count,
+                                        first_seen=entry['first_seen'],
+                                        last_seen=entry['last_seen']))
+        else:
+            row.count += count
+            row.last_seen = max(row.last_seen, entry['last_seen'])
+    db.session.flush()
+
+def get_aggregator(app):
+    """Return the app's aggregator, creating it on first use."""
+    aggregator = app.extensions.get('openwaves_csp_reports')
+    if aggregator is None:
+        # The timer and at-exit flushes need the app itself, not the current_app proxy
+        aggregator = CspReportAggregator(app.config['CSP_REPORT_MAX_KEYS'],
+                                         current_app._get_current_object()) # pylint: disable=W0212
+        app.extensions['openwaves_csp_reports'] = aggregator
+        # Write the counts a stopping worker still holds
+        atexit.register(aggregator.flush_in_app)
+    return aggregator
+
+def ingest(app, request):
+    """Handle one incoming report request.
+
+    Args:
+        app (Flask): The application.
+        request (Request): The report request.
+
+    Returns:
+        int: The HTTP status to answer with (204, or 413 for an oversized body).
+    """
+    max_bytes = app.config['CSP_REPORT_MAX_BYTES']
+    if request.content_length is not None and request.content_length > max_bytes:
+        return 413
+
+    # Skip parsing entirely for reports that are not sampled
+    sample_rate = app.config['CSP_REPORT_SAMPLE_RATE']
+    if sample_rate < 1 and random.random() >= sample_rate:
+        return 204
+
+    if request.mimetype not in REPORT_MIMETYPES:
+        logger.info("Received non-JSON CSP violation report")
+        return 204
+
+    # Chunked reports have no Content-Length, so never read more than the limit
+    data = request.stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        return 413
+
+    aggregator = get_aggregator(app)
+    for directive, blocked, document in parse_reports(data):
+        if aggregator.record(directive, blocked, document, weight=1 / sample_rate):
+            # Only the first report of each pair per flush window is logged
+            logger.warning("CSP Violation: %s blocked %s on %s", directive, blocked, document)
+
+    interval = app.config['CSP_REPORT_FLUSH_INTERVAL']
+    if aggregator.due(interval):
+        aggregator.flush()
+    else:
+        aggregator.flush_later(interval)
+    return 204
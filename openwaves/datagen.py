@@ -0,0 +1,297 @@
+"""File: datagen.py
+
+    This file contains the synthetic data generator used to benchmark analytics, results and purge
+    on realistic volumes. It creates candidates, closed exam sessions, registrations, exams for all
+    three elements and their answers with bulk inserts and a seeded random number generator, so the
+    same arguments always produce the same dataset. Run it from the project root:
+
+        python -m openwaves.datagen --users 1000 --sessions 50 --seed 42
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from . import db
+from .models import User, Pool, Question, TLI, ExamDiagram, ExamSession, ExamRegistration, \
+    Exam, ExamAnswer
+from .utils import hash_password
+
+# Questions, TLIs and diagrams of a synthetic pool per element, close to the published pools
+POOL_SIZES = {2: (411, 35, 3), 3: (456, 35, 12), 4: (622, 50, 24)}
+
+# Share of candidates whose first exam of the day is each element
+ELEMENT_WEIGHTS = {2: 0.55, 3: 0.30, 4: 0.15}
+
+# Chance that a candidate who finishes one element goes on to the next in the same session
+NEXT_ELEMENT_RATE = 0.2
+
+# Share of wrong answers that go to each question's most attractive distractor
+POPULAR_DISTRACTOR_RATE = 0.6
+
+UNANSWERED_RATE = 0.01
+BATCH_SIZE = 50000
+ANSWER_COLUMNS = ('id', 'exam_id', 'question_id', 'question_number', 'correct_answer', 'answer')
+
+def create_pool(element, rng, questions=None, tli_count=None, diagram_count=None): # pylint: disable=R0914
+    """Create a synthetic question pool with TLIs and diagrams for one element.
+
+    Args:
+        element (int): The exam element (2, 3 or 4).
+        rng (random.Random): The random number generator.
+        questions, tli_count, diagram_count (int): Sizes; default to POOL_SIZES.
+
+    Returns:
+        Pool: The new pool (flushed, not committed).
+    """
+    default_questions, default_tlis, default_diagrams = POOL_SIZES[element]
+    questions = questions or default_questions
+    tli_count = tli_count or default_tlis
+    diagram_count = diagram_count or default_diagrams
+    prefix = 'TGE'[element - 2]
+
+    pool = Pool(name=f'Synthetic element {element} pool', element=element,
+                start_date=datetime(2024, 7, 1), end_date=datetime(2028, 6, 30))
+    db.session.add(pool)
+    db.session.flush()
+
+    tlis = [f'{prefix}{index // 10}{chr(65 + index % 10)}' for index in range(tli_count)]
+    diagrams = [f'{prefix}{number}-1' for number in range(1, diagram_count + 1)]
+    db.session.add_all(TLI(pool_id=pool.id, tli=tli, quantity=0) for tli in tlis)
+    db.session.add_all(ExamDiagram(pool_id=pool.id, name=name,
+                                   path=f'images/diagrams/{pool.id}_{name}.png')
+                       for name in diagrams)
+    rows = []
+    for number in range(questions):
+        tli = tlis[number % tli_count]
+        text = f'What is the purpose of component {number} in this circuit? ' * 2
+        if number % 9 == 0:
+            text += f'Refer to figure {diagrams[number % diagram_count]}.'
+        rows.append({'pool_id': pool.id, 'number': f'{tli}{number // tli_count:02d}',
+                     'correct_answer': rng.randrange(4), 'question': text,
+                     'option_a': 'Answer A text', 'option_b': 'Answer B text',
+                     'option_c': 'Answer C text', 'option_d': 'Answer D text',
+                     'refs': '[97.3(a)(4)]'})
+    db.session.execute(Question.__table__.insert(), rows)
+    return pool
+
+def load_pool(element, rng, create_missing):
+    """Return the newest pool for an element with its questions grouped by TLI.
+
+    Returns:
+        tuple: The pool and a list of (TLI, [questions]) in TLI order, or (None, None).
+    """
+    pool = Pool.query.filter_by(element=element).order_by(Pool.start_date.desc()).first()
+    if pool is None:
+        if not create_missing:
+            return None, None
+        pool = create_pool(element, rng)
+
+    tlis = [tli.tli for tli in TLI.query.filter_by(pool_id=pool.id).order_by(TLI.tli)]
+    by_tli = {tli: [] for tli in tlis}
+    for question in db.session.query(Question.id, Question.number, Question.correct_answer) \
+            .filter(Question.pool_id == pool.id).order_by(Question.id):
+        if question.number[:3] in by_tli:
+            by_tli[question.number[:3]].append(question)
+    return pool, [(tli, questions) for tli, questions in by_tli.items() if questions]
+
+def bulk_insert(table, columns, rows):
+    """Insert tuples into a table with one executemany on the driver cursor.
+
+    Building SQLAlchemy parameter dicts costs more than the insert itself at this volume, so the
+    rows go to the driver as plain tuples.
+
+    Args:
+        table (Table): The table to insert into.
+        columns (tuple): The column names, in the order of the tuple fields.
+        rows (list): The rows to insert.
+    """
+    if not rows:
+        return
+    connection = db.session.connection()
+    placeholder = '?' if connection.dialect.paramstyle == 'qmark' else '%s'
+    statement = f"INSERT INTO {table.name} ({', '.join(columns)}) " \
+                f"VALUES ({', '.join([placeholder] * len(columns))})"
+    connection.exec_driver_sql(statement, rows)
+
+def next_ids(*models):
+    """Return the next free primary key for each model, so bulk rows can carry their own ids."""
+    return [(db.session.query(func.max(model.id)).scalar() or 0) + 1 for model in models]
+
+def answer_traits(rng, questions_by_tli):
+    """Give every question a difficulty and a most attractive distractor.
+
+    Returns:
+        list: Per TLI, a list of (id, correct answer, difficulty, popular distractor,
+            distractors) tuples.
+    """
+    traits = []
+    for _tli, questions in questions_by_tli:
+        group = []
+        for question in questions:
+            distractors = tuple(option for option in range(4)
+                                if option != question.correct_answer)
+            group.append((question.id, question.correct_answer, rng.gauss(0, 0.12),
+                          rng.choice(distractors), distractors))
+        traits.append(group)
+    return traits
+
+def respond(random_value, question, ability):
+    """Return a plausible response to a question from a candidate of the given ability.
+
+    Args:
+        random_value (callable): The generator's random() method.
+        question (tuple): The question's entry from answer_traits.
+        ability (float): The candidate's chance of answering an average question correctly.
+
+    Returns:
+        int: The chosen option, or None for an unanswered question.
+    """
+    _question_id, correct, difficulty, popular, distractors = question
+    if random_value() < UNANSWERED_RATE:
+        return None
+    if random_value() < min(0.98, max(0.05, ability - difficulty)):
+        return correct
+    if random_value() < POPULAR_DISTRACTOR_RATE:
+        return popular
+    return distractors[int(random_value() * 3)]
+
+def generate_dataset(users=100, sessions=10, seed=0, participation=0.3, create_pools=True, # pylint: disable=R0913,R0914,R0915,R0917
+                     progress=None):
+    """Generate candidates, sessions, registrations, exams and answers.
+
+    Args:
+        users (int): Number of candidate accounts to create.
+        sessions (int): Number of closed sessions to spread over the past year.
+        seed (int): Seed for the random number generator.
+        participation (float): Chance that a candidate attends any one session.
+        create_pools (bool): Create synthetic pools for elements that have none.
+        progress (callable): Called with a message after each stage.
+
+    Returns:
+        dict: The number of rows created per table and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    report = progress or (lambda _message: None)
+
+    pools = {}
+    for element in (2, 3, 4):
+        pool, questions_by_tli = load_pool(element, rng, create_pools)
+        if pool is None:
+            raise ValueError(f"No question pool for element {element}; "
+                             "load one or allow synthetic pools.")
+        pools[element] = (pool, answer_traits(rng, questions_by_tli))
+
+    # Candidates share one password hash so account creation stays cheap
+    user_id, session_id, registration_id, exam_id, answer_id = \
+        next_ids(User, ExamSession, ExamRegistration, Exam, ExamAnswer)
+    password = hash_password('Test@1234')
+    # Names follow the row ids, so running again (even with the same seed) adds new accounts
+    user_rows = [{'id': user_id + index, 'username': f'GEN{user_id + index:07d}',
+                  'first_name': 'Synthetic', 'last_name': f'Candidate{user_id + index}',
+                  'email': f'candidate{user_id + index}@example.com', 'password': password,
+                  'role': 1, 'active': True}
+                 for index in range(users)]
+    db.session.execute(User.__table__.insert(), user_rows)
+    abilities = {row['id']: rng.betavariate(8, 3) for row in user_rows}
+    report(f"{users} users")
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    session_rows = []
+    for index in range(sessions):
+        session_date = today - timedelta(days=rng.randint(1, 365))
+        start_time = session_date.replace(hour=rng.randint(8, 12))
+        session_rows.append({'id': session_id + index, 'session_date': session_date,
+                             'start_time': start_time,
+                             'end_time': start_time + timedelta(hours=rng.randint(1, 3)),
+                             'tech_pool_id': pools[2][0].id, 'gen_pool_id': pools[3][0].id,
+                             'extra_pool_id': pools[4][0].id, 'status': False})
+    db.session.execute(ExamSession.__table__.insert(), session_rows)
+    report(f"{sessions} sessions")
+
+    random_value = rng.random
+    counts = {'users': users, 'sessions': sessions, 'registrations': 0, 'exams': 0,
+              'answers': 0}
+    registrations, exams, answers = [], [], []
+
+    def flush_batch(force=False):
+        # Parents first, so the answers' foreign keys always point at inserted rows
+        if not (answers or exams) or not (force or len(answers) >= BATCH_SIZE):
+            return
+        if registrations:
+            db.session.execute(ExamRegistration.__table__.insert(), registrations)
+        if exams:
+            db.session.execute(Exam.__table__.insert(), exams)
+        if answers:
+            bulk_insert(ExamAnswer.__table__, ANSWER_COLUMNS, answers)
+        counts['registrations'] += len(registrations)
+        counts['exams'] += len(exams)
+        counts['answers'] += len(answers)
+        registrations.clear()
+        exams.clear()
+        answers.clear()
+
+    elements, weights = list(ELEMENT_WEIGHTS), list(ELEMENT_WEIGHTS.values())
+    for session in session_rows:
+        for user in user_rows:
+            if random_value() >= participation:
+                continue
+
+            # First element by weight, sometimes followed by the next ones
+            taken = [rng.choices(elements, weights)[0]]
+            while taken[-1] < 4 and rng.random() < NEXT_ELEMENT_RATE:
+                taken.append(taken[-1] + 1)
+
+            registrations.append({'id': registration_id, 'session_id': session['id'],
+                                  'user_id': user['id'], 'tech': 2 in taken, 'gen': 3 in taken,
+                                  'extra': 4 in taken, 'valid': True})
+            registration_id += 1
+
+            ability = abilities[user['id']]
+            for element in taken:
+                pool, traits = pools[element]
+                exams.append({'id': exam_id, 'user_id': user['id'], 'pool_id': pool.id,
+                              'session_id': session['id'], 'element': element, 'open': False})
+                # One question per TLI, as generate_exam does
+                for number, questions in enumerate(traits, start=1):
+                    question = questions[int(random_value() * len(questions))]
+                    answers.append((answer_id, exam_id, question[0], number, question[1],
+                                    respond(random_value, question, ability)))
+                    answer_id += 1
+                exam_id += 1
+            flush_batch()
+
+    flush_batch(force=True)
+    db.session.commit()
+
+    counts['seconds'] = round(time.perf_counter() - start, 2)
+    report(f"{counts['exams']} exams, {counts['answers']} answers")
+    return counts
+
+def main():
+    """Parse the command line and generate a dataset in the configured database."""
+    from . import create_app  # pylint: disable=C0415
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1].strip())
+    parser.add_argument('--users', type=int, default=100, help='candidate accounts to create')
+    parser.add_argument('--sessions', type=int, default=10, help='closed sessions to create')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--participation', type=float, default=0.3,
+                        help='chance a candidate attends a session')
+    parser.add_argument('--no-synthetic-pools', action='store_true',
+                        help='fail instead of creating pools for elements that have none')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        counts = generate_dataset(args.users, args.sessions, args.seed, args.participation,
+                                  not args.no_synthetic_pools, progress=print)
+    print(f"created {counts['users']} users, {counts['sessions']} sessions, "
+          f"{counts['registrations']} registrations, {counts['exams']} exams and "
+          f"{counts['answers']} answers in {counts['seconds']} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""File: diagram_store.py
+
+    This file contains the storage and delivery of diagram files. DIAGRAM_STORE selects the
+    storage backend; the default 'local' backend keeps them in UPLOAD_FOLDER under
+    content-addressed names (the SHA-256 of the file), so identical uploads share one file and
+    a stored file never changes once written.
+
+    Diagrams are served from /diagrams/<name>. DIAGRAM_DELIVERY chooses who sends the bytes:
+    with 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache mod_xsendfile, lighttpd) the app
+    only checks the file exists and answers with a header naming it, and the front server sends
+    it, so WSGI workers never stream images during an exam. 'flask' sends the file from Python,
+    for development servers.
+"""
+
+import mimetypes
+import os
+import re
+import tempfile
+from urllib.parse import quote
+from flask import Response, abort, current_app, send_file, url_for
+from werkzeug.security import safe_join
+
+DELIVERY_MODES = ('flask', 'x-sendfile', 'x-accel-redirect')
+# Names of content-addressed files, which can be cached forever
+CONTENT_NAME = re.compile(r'^[0-9a-f]{64}\.[a-z]+$')
+
+class LocalDiagramStore:
+    """Diagram files kept in a local directory.
+
+    Attributes:
+        root (str): The directory holding the files.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, name):
+        """Return the full path of a stored file, or None if the name leaves the directory."""
+        return safe_join(self.root, name)
+
+    def exists(self, name):
+        """Return whether a file is stored under this name."""
+        path = self.path(name)
+        return path is not None and os.path.exists(path)
+
+    def put(self, name, data):
+        """Store a file, replacing any file already stored under the name.
+
+        An existing content-addressed file is written again rather than reused, since another
+        request may be about to remove it along with the last diagram referencing it.
+        """
+        # Write to a uniquely named file then rename, so a concurrent reader never sees a
+        # partial file and concurrent writers (threads or processes) never share one
+        handle, partial = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                output.write(data)
+            # mkstemp creates the file private to the app; the front server must read it
+            os.chmod(partial, 0o644)
+            os.replace(partial, self.path(name))
+        except OSError:
+            os.remove(partial)
+            raise
+
+    def delete(self, name):
+        """Remove a stored file, returning False if there was none."""
+        if not self.exists(name):
+            return False
+        os.remove(self.path(name))
+        return True
+
+STORE_BACKENDS = {'local': LocalDiagramStore}
+
+def get_store():
+    """Return the current app's diagram store, as selected by DIAGRAM_STORE."""
+    config = current_app.config
+    return STORE_BACKENDS[config['DIAGRAM_STORE']](config['UPLOAD_FOLDER'])
+
+def store_name(path):
+    """Return the name a diagram path (e.g. "diagrams/<digest>.png") is stored under."""
+    return os.path.basename(path)
+
+def diagram_url(path):
+    """Return the URL of a stored diagram, for templates and the exam bundle."""
+    return url_for('diagram', name=store_name(path))
+
+def serve_diagram(name):
+    """Send a stored diagram, or hand it to the front server with an offload header.
+
+    Content-addressed files are sent with ``Cache-Control: public, max-age=..., immutable``.
+
+    Returns:
+        - 200 response with the file, or an empty body and an X-Accel-Redirect or
+          X-Sendfile header.
+        - 404 if no file is stored under the name.
+    """
+    store = get_store()
+    if not store.exists(name):
+        abort(404)
+
+    config = current_app.config
+    immutable = CONTENT_NAME.match(name) is not None
+    mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    delivery = config['DIAGRAM_DELIVERY']
+    if delivery == 'x-accel-redirect':
+        response = Response(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = \
+            f"{config['DIAGRAM_ACCEL_PREFIX'].rstrip('/')}/{quote(name)}"
+    elif delivery == 'x-sendfile':
+        response = Response(mimetype=mimetype)
+        response.headers['X-Sendfile'] = store.path(name)
+    else:
+        response = send_file(store.path(name), mimetype=mimetype,
+                             max_age=config['ASSET_MAX_AGE'] if immutable else None)
+
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = config['ASSET_MAX_AGE']
+        response.cache_control.immutable = True
+    return response
+
+def init_app(app):
+    """Register the diagram route and the diagram_url template helper with the Flask app."""
+    if app.config['DIAGRAM_STORE'] not in STORE_BACKENDS:
+        raise ValueError(f"DIAGRAM_STORE must be one of {', '.join(STORE_BACKENDS)}.")
+    if app.config['DIAGRAM_DELIVERY'] not in DELIVERY_MODES:
+        raise ValueError(f"DIAGRAM_DELIVERY must be one of {', '.join(DELIVERY_MODES)}.")
+    app.add_url_rule('/diagrams/<name>', 'diagram', serve_diagram)
+    app.jinja_env.globals['diagram_url'] = diagram_url
@@ -0,0 +1,113 @@
+"""File: diagrams.py
+
+    This file contains the diagram upload pipeline. Uploaded images are named after the SHA-256
+    of their contents, so a diagram reused across pools is stored once, and with Pillow
+    installed they are scaled down to DIAGRAM_MAX_SIZE pixels on their longest side and written
+    as WebP alongside an optimised PNG or JPEG fallback. The stored width and height let pages
+    reserve the diagram's space before it loads.
+
+    Pillow is optional: without it (or for files it cannot read) the upload is stored as sent,
+    still deduplicated, with its dimensions read from the PNG, GIF or JPEG header.
+"""
+
+import hashlib
+import io
+import os
+import struct
+from flask import current_app
+from . import diagram_store
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = ImageOps = None
+
+# JPEG start-of-frame markers, which carry the image size
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE,
+                    0xCF}
+
+def header_size(data):
+    """Read an image's (width, height) from its PNG, GIF or JPEG header, or (None, None)."""
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data[:2] == b'\xff\xd8':
+        offset = 2
+        while offset + 9 <= len(data) and data[offset] == 0xFF:
+            marker = data[offset + 1]
+            length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+            if marker in JPEG_SOF_MARKERS:
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return width, height
+            offset += 2 + length
+    return None, None
+
+def process_diagram(data, extension):
+    """Normalise an uploaded diagram.
+
+    Args:
+        data (bytes): The uploaded file.
+        extension (str): The uploaded file's extension, lower case.
+
+    Returns:
+        dict: 'digest' (SHA-256 of the upload), 'fallback' ((extension, bytes) served to every
+        browser), 'webp' (bytes or None), 'width' and 'height' (or None).
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    extension = 'jpg' if extension == 'jpeg' else extension
+    if Image is not None:
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                return {'digest': digest, **encode_image(image, extension)}
+        except (OSError, ValueError, Image.DecompressionBombError) as error:
+            current_app.logger.warning(f"Storing diagram {digest} as uploaded: {error}")
+
+    width, height = header_size(data)
+    return {'digest': digest, 'fallback': (extension, data), 'webp': None, 'width': width,
+            'height': height}
+
+def encode_image(image, extension):
+    """Scale an image down to DIAGRAM_MAX_SIZE and encode it as WebP and a PNG/JPEG fallback."""
+    config = current_app.config
+    image = ImageOps.exif_transpose(image)
+    # Photos stay JPEG; line art (PNG, GIF) is kept lossless
+    fallback_extension = 'jpg' if extension == 'jpg' else 'png'
+    image = image.convert('RGB' if fallback_extension == 'jpg' else 'RGBA')
+    max_size = config['DIAGRAM_MAX_SIZE']
+    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
+    webp = io.BytesIO()
+    image.save(webp, 'WEBP', quality=config['DIAGRAM_WEBP_QUALITY'], method=6)
+    fallback = io.BytesIO()
+    if fallback_extension == 'jpg':
+        image.save(fallback, 'JPEG', quality=85, optimize=True, progressive=True)
+    else:
+        image.save(fallback, 'PNG', optimize=True)
+    return {'fallback': (fallback_extension, fallback.getvalue()), 'webp': webp.getvalue(),
+            'width': image.width, 'height': image.height}
+
+def store_diagram(data, filename):
+    """Process an uploaded diagram and keep its files in the diagram store.
+
+    Args:
+        data (bytes): The uploaded file.
+        filename (str): The uploaded file's name, for its extension.
+
+    Returns:
+        dict: The ExamDiagram columns describing the stored files (path, webp_path, digest,
+        width, height).
+    """
+    store = diagram_store.get_store()
+    processed = process_diagram(data, os.path.splitext(filename)[1].lstrip('.').lower())
+    digest = processed['digest']
+
+    extension, fallback = processed['fallback']
+    store.put(f'{digest}.{extension}', fallback)
+    webp_path = None
+    if processed['webp'] is not None:
+        store.put(f'{digest}.webp', processed['webp'])
+        webp_path = f'diagrams/{digest}.webp'
+
+    return {'path': f'diagrams/{digest}.{extension}', 'webp_path': webp_path, 'digest': digest,
+            'width': processed['width'], 'height': processed['height']}
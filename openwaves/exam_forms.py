@@ -0,0 +1,173 @@
+"""File: exam_forms.py
+
+    This file contains the pre-built exam forms. A VE builds a few forms (versions A, B, ...)
+    of a pool ahead of the session; each is a complete, validated question set drawn like any
+    other exam. Launching an exam then assigns one of the pool's forms instead of drawing and
+    writing a new question list, and the candidate's exam stores only the responses. Forms
+    are built for one version of the pool's questions, so importing questions stops them being
+    assigned until new forms are built; until then candidates get freshly drawn exams as
+    before. Diagram changes do not affect forms.
+
+    EXAM_FORM_ASSIGNMENT chooses how forms are handed out: 'round-robin' (the form assigned
+    least so far, so consecutive candidates get different versions) or 'random'.
+"""
+
+import secrets
+import string
+from flask import current_app
+from sqlalchemy import func
+from .answer_store import NO_ANSWER, QUESTION_ID_TYPE, decode_array, encode_array
+from .imports import db, Exam, ExamAnswerPack, ExamForm, Pool, Question, generate_exam
+
+ASSIGNMENT_MODES = ('round-robin', 'random')
+FORM_LABELS = string.ascii_uppercase
+
+# Attempts to claim a round-robin turn before settling for the least assigned form
+CLAIM_ATTEMPTS = 5
+
+def active_forms(pool):
+    """Return the forms assigned to new exams from a pool, in label order."""
+    return ExamForm.query.filter_by(pool_id=pool.id, pool_version=pool.question_version,
+                                    active=True) \
+        .order_by(ExamForm.label).populate_existing().all()
+
+def build_forms(pool_id, count):
+    """Build new forms for a pool, replacing its active forms.
+
+    Forms that were never assigned are deleted; forms exams already use are kept for those
+    exams but no longer assigned.
+
+    Args:
+        pool_id (int): The pool.
+        count (int): The number of forms to build (1-26).
+
+    Returns:
+        list: The new ExamForm objects, committed.
+
+    Raises:
+        ValueError: If the pool does not exist, the count is out of range, or the pool cannot
+            supply a complete exam.
+    """
+    pool = db.session.get(Pool, pool_id)
+    if pool is None:
+        raise ValueError("Pool not found.")
+    if not 1 <= count <= len(FORM_LABELS):
+        raise ValueError(f"Build between 1 and {len(FORM_LABELS)} forms.")
+
+    forms = []
+    for label in FORM_LABELS[:count]:
+        questions = generate_exam(pool_id)
+        if not questions:
+            raise ValueError("The pool cannot supply a complete exam.")
+        forms.append(ExamForm(
+            pool_id=pool_id, label=label, pool_version=pool.question_version, active=True,
+            question_ids=encode_array(QUESTION_ID_TYPE, [question.id for question in questions]),
+            correct_answers=bytes(question.correct_answer for question in questions)))
+
+    used = {form_id for (form_id,) in db.session.query(Exam.form_id).distinct()
+            .join(ExamForm, ExamForm.id == Exam.form_id).filter(ExamForm.pool_id == pool_id)}
+    for old_form in ExamForm.query.filter_by(pool_id=pool_id, active=True):
+        if old_form.id in used:
+            old_form.active = False
+        else:
+            db.session.delete(old_form)
+    db.session.add_all(forms)
+    db.session.commit()
+    return forms
+
+def assign_form(pool_id):
+    """Pick the form for a new exam, or None if the pool has no forms for its questions.
+
+    In round-robin mode the form assigned least so far is claimed by raising its assignment
+    count only if nobody else raised it first, so simultaneous launches get different forms.
+    The count is committed with the caller's exam.
+
+    Args:
+        pool_id (int): The exam's pool.
+
+    Returns:
+        ExamForm: The form to assign, or None to draw a new exam.
+    """
+    mode = current_app.config.get('EXAM_FORM_ASSIGNMENT', 'round-robin')
+    if mode not in ASSIGNMENT_MODES:
+        raise ValueError(f"EXAM_FORM_ASSIGNMENT must be one of {', '.join(ASSIGNMENT_MODES)}, "
+                         f"not {mode!r}.")
+
+    pool = db.session.get(Pool, pool_id)
+    forms = active_forms(pool) if pool else []
+    if not forms:
+        return None
+    if mode == 'random':
+        return secrets.choice(forms)
+
+    for _attempt in range(CLAIM_ATTEMPTS):
+        form = min(forms, key=lambda form: (form.assignments, form.label))
+        claimed = ExamForm.query.filter_by(id=form.id, assignments=form.assignments).update(
+            {ExamForm.assignments: ExamForm.assignments + 1}, synchronize_session=False)
+        if claimed:
+            return form
+        # Another launch took this turn; reload the counts and try the next form
+        forms = active_forms(pool) or forms
+    return form
+
+def form_summaries(pool_id):
+    """Return the forms of a pool, active ones first, with the number of exams assigned each.
+
+    Args:
+        pool_id (int): The pool.
+
+    Returns:
+        list: One dict per form.
+    """
+    pool = db.session.get(Pool, pool_id)
+    exam_counts = dict(db.session.query(Exam.form_id, func.count(Exam.id))
+                       .filter(Exam.pool_id == pool_id, Exam.form_id.isnot(None))
+                       .group_by(Exam.form_id).all())
+    return [{
+        'id': form.id,
+        'label': form.label,
+        'pool_version': form.pool_version,
+        'assigned': form.active and pool is not None
+                    and form.pool_version == pool.question_version,
+        'questions': len(form.correct_answers),
+        'exams': exam_counts.get(form.id, 0),
+        'created_at': form.created_at.isoformat(timespec='seconds'),
+    } for form in ExamForm.query.filter_by(pool_id=pool_id)
+        .order_by(ExamForm.active.desc(), ExamForm.pool_version.desc(), ExamForm.label,
+                  ExamForm.id.desc())]
+
+def form_item_stats(form):
+    """Count the responses to each question of a form over its finished exams.
+
+    Every exam on a form asks the same questions in the same order, so the counts are summed
+    position by position straight from the packed responses.
+
+    Args:
+        form (ExamForm): The form.
+
+    Returns:
+        list: One dict per question with its number, id, correct answer, the number of
+        candidates who answered it and got it right, and the count of each option chosen.
+    """
+    question_ids = decode_array(QUESTION_ID_TYPE, form.question_ids)
+    counts = [[0, 0, 0, 0] for _question_id in question_ids]
+    responses = db.session.query(ExamAnswerPack.answers) \
+        .join(Exam, Exam.id == ExamAnswerPack.exam_id) \
+        .filter(Exam.form_id == form.id, Exam.open.is_(False))
+    for (answers,) in responses:
+        for index, answer in enumerate(answers[:len(counts)]):
+            if answer != NO_ANSWER:
+                counts[index][answer] += 1
+
+    numbers = dict(db.session.query(Question.id, Question.number)
+                   .filter(Question.id.in_(list(question_ids))).all())
+    return [{
+        'question_number': index + 1,
+        'question_id': question_id,
+        'number': numbers.get(question_id),
+        'correct_answer': key,
+        'answered': sum(option_counts),
+        'correct': option_counts[key],
+        'option_counts': option_counts,
+    } for index, (question_id, key, option_counts)
+        in enumerate(zip(question_ids, form.correct_answers, counts))]
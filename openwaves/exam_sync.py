@@ -0,0 +1,152 @@
+"""File: exam_sync.py
+
+    This file contains the helpers for the offline exam client. At launch the exam page downloads
+    the exam bundle (every question, its options and diagram) so a service worker can keep it
+    and the candidate can move between questions without a server round-trip. Answers are kept
+    in the browser and sent back in batches; each carries the time it was chosen and the server
+    keeps the most recent write, so batches can arrive late, twice or out of order.
+"""
+
+import time
+from flask import url_for
+from .imports import load_exam_question
+from . import diagram_store
+
+# Answer values a candidate can choose (A-D)
+ANSWER_CHOICES = range(4)
+
+def now_ms():
+    """Return the current time in milliseconds since the epoch, as the browser counts it."""
+    return int(time.time() * 1000)
+
+def answer_digest(exam_answers):
+    """Return a compact string of an exam's answers in question order.
+
+    The offline client computes the same string from its own answers; finish_exam compares the
+    two so an exam is only finished once the server holds every answer.
+
+    Args:
+        exam_answers (list): The exam's answers from answer_store.load_answers().
+
+    Returns:
+        str: One character per question: the answer index, or '-' if unanswered.
+    """
+    ordered = sorted(exam_answers, key=lambda answer: answer.question_number)
+    return ''.join('-' if answer.answer is None else str(answer.answer) for answer in ordered)
+
+def answer_states(exam_answers):
+    """Return the answers the server holds, in the format the offline client stores."""
+    return [{
+        'question_number': answer.question_number,
+        'answer': answer.answer,
+        'updated_at': answer.answered_at,
+    } for answer in sorted(exam_answers, key=lambda answer: answer.question_number)]
+
+def build_bundle(exam, exam_answers, pool_version):
+    """Build everything the offline client needs to run an exam.
+
+    Questions come from the per-pool-version question cache, so launching a room of candidates
+    on the same pool loads each question once. Correct answers are never included.
+
+    Args:
+        exam (Exam): The open exam.
+        exam_answers (list): The exam's answers from answer_store.load_answers().
+        pool_version (int): The current version of the exam's pool.
+
+    Returns:
+        dict: The exam bundle, JSON serialisable.
+    """
+    questions = []
+    for answer in sorted(exam_answers, key=lambda answer: answer.question_number):
+        question, diagram = load_exam_question(answer.question_id, pool_version)
+        questions.append({
+            'question_number': answer.question_number,
+            'number': question.number,
+            'refs': question.refs,
+            'question': question.question,
+            'options': [question.option_a, question.option_b, question.option_c,
+                        question.option_d],
+            # The offline client runs only in browsers that also show WebP
+            'diagram': diagram_store.diagram_url(diagram.webp_path or diagram.path)
+                       if diagram else None,
+            'diagram_name': diagram.name if diagram else None,
+        })
+
+    return {
+        'exam_id': exam.id,
+        'element': exam.element,
+        'pool_version': pool_version,
+        'questions': questions,
+        'answers': answer_states(exam_answers),
+        'digest': answer_digest(exam_answers),
+        'sync_url': url_for('main.sync_answers', exam_id=exam.id),
+        'review_url': url_for('main.review_exam', exam_id=exam.id),
+        'finish_url': url_for('main.finish_exam', exam_id=exam.id),
+    }
+
+def parse_changes(payload):
+    """Validate a batch of answer changes sent by the offline client.
+
+    Args:
+        payload (dict): The request body, {"answers": [{"question_number", "answer",
+            "updated_at"}, ...]}.
+
+    Returns:
+        list: (question_number, answer, updated_at) tuples.
+
+    Raises:
+        ValueError: If the batch is malformed.
+    """
+    changes = payload.get('answers') if isinstance(payload, dict) else None
+    if not isinstance(changes, list):
+        raise ValueError("Expected a list of answers.")
+
+    parsed = []
+    for change in changes:
+        if not isinstance(change, dict):
+            raise ValueError("Each answer must be an object.")
+        number, value, updated_at = (change.get('question_number'), change.get('answer'),
+                                     change.get('updated_at'))
+        # bool is an int subclass, so rule it out explicitly
+        if any(not isinstance(field, int) or isinstance(field, bool)
+               for field in (number, value, updated_at)):
+            raise ValueError("Answers need an integer question_number, answer and updated_at.")
+        if value not in ANSWER_CHOICES:
+            raise ValueError(f"Invalid answer for question {number}.")
+        parsed.append((number, value, updated_at))
+    return parsed
+
+def apply_changes(exam_answers, changes):
+    """Apply answer changes, keeping the most recent write of each answer.
+
+    A change is applied only if it is newer than the answer the server holds, so replaying or
+    reordering batches never undoes a later answer. Timestamps from the future (a fast browser
+    clock) are capped at the server's time so they cannot lock an answer.
+
+    Args:
+        exam_answers (list): The exam's answers from answer_store.load_answers().
+        changes (list): Tuples from parse_changes().
+
+    Returns:
+        int: The number of answers changed.
+
+    Raises:
+        ValueError: If a change refers to a question the exam does not have.
+    """
+    by_number = {answer.question_number: answer for answer in exam_answers}
+    # Reject the whole batch before changing anything
+    for number, _value, _updated_at in changes:
+        if number not in by_number:
+            raise ValueError(f"Question {number} is not part of this exam.")
+
+    latest = now_ms()
+    applied = 0
+    for number, value, updated_at in changes:
+        answer = by_number[number]
+        updated_at = min(updated_at, latest)
+        if answer.answered_at is not None and updated_at <= answer.answered_at:
+            continue
+        answer.answer = value
+        answer.answered_at = updated_at
+        applied += 1
+    return applied
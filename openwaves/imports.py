@@ -4,8 +4,9 @@
 """
 # pylint: disable=W0611
 from .models import User, Question, Pool, TLI, ExamSession, ExamRegistration, \
-    ExamDiagram, Exam, ExamAnswer
+    ExamDiagram, ExamForm, Exam, ExamAnswer, ExamAnswerPack, CspViolation, Job
 from .utils import update_user_password, get_exam_name, is_already_registered, \
-    remove_exam_registration, load_question_pools, allowed_file, requires_diagram, \
-    get_exam_score, generate_exam
+    remove_exam_registration, load_question_pools, load_question_pool, load_pool_options, \
+    load_exam_question, allowed_file, requires_diagram, get_exam_score, exam_passed, \
+    generate_exam, generate_seeded_exam, bump_pool_version, hash_password, verify_password
 from . import db
@@ -0,0 +1,352 @@
+"""File: jobs.py
+
+    This file contains the background job queue for heavy VE operations. Jobs are rows in the Job
+    table, so they survive restarts and can be polled from any worker process. A route queues a
+    job and returns its id at once; a worker claims due jobs with an atomic UPDATE, runs the
+    registered task, records progress and retries failures with exponential back-off. While a
+    job runs, its worker updates the job's heartbeat, and a job whose heartbeat stops is
+    requeued, so a long job is never taken over by a second worker while the first is alive.
+
+    JOBS_MODE selects the worker: 'thread' runs a daemon thread in each app process, 'external'
+    leaves the queue to `flask openwaves worker`, and 'inline' runs each job as it is queued
+    (used by the tests).
+"""
+
+import csv
+import io
+import json
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from flask import current_app
+from .imports import db, Job
+from . import services
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+# Errors that another attempt cannot fix, such as bad input (LookupError includes KeyError)
+PERMANENT_ERRORS = (LookupError, ValueError)
+
+def task(kind):
+    """Register a function as the task that runs jobs of the given kind.
+
+    The function is called with a JobContext and the job's parameters as keyword arguments, and
+    returns a JSON-serialisable result.
+    """
+    def register(func):
+        TASKS[kind] = func
+        return func
+    return register
+
+class JobContext: # pylint: disable=R0903
+    """Handle given to a running task for reporting its progress."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def progress(self, done, total=None, message=None):
+        """Record progress. Call it between transactions, as it commits the session."""
+        values = {Job.progress: done}
+        if total is not None:
+            values[Job.total] = total
+        if message is not None:
+            values[Job.message] = message[:255]
+        Job.query.filter_by(id=self.job.id).update(values, synchronize_session=False)
+        db.session.commit()
+
+def job_to_dict(job):
+    """Return the fields of a job that the status endpoints expose."""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'message': job.message,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+def enqueue(kind, user_id=None, **params):
+    """Queue a job and hand it to the configured worker.
+
+    Args:
+        kind (str): A registered task name.
+        user_id (int): The VE who queued the job.
+        **params: JSON-serialisable arguments for the task.
+
+    Returns:
+        Job: The queued job (already finished in inline mode).
+    """
+    if kind not in TASKS:
+        raise KeyError(f"Unknown job kind: {kind}")
+
+    job = Job(kind=kind, params=json.dumps(params), user_id=user_id,
+              max_attempts=current_app.config['JOBS_MAX_ATTEMPTS'])
+    db.session.add(job)
+    db.session.commit()
+    logger.info("Queued job %s (%s)", job.id, kind)
+    dispatch(job)
+    return job
+
+def dispatch(job):
+    """Hand a queued job to the worker selected by JOBS_MODE."""
+    mode = current_app.config['JOBS_MODE']
+    if mode == 'inline':
+        # Run every attempt now, without the back-off delay
+        while (claimed := claim(job.id, ignore_delay=True)) is not None:
+            run_job(claimed)
+    elif mode == 'thread':
+        get_worker(current_app._get_current_object()).wake() # pylint: disable=W0212
+
+def retry(job):
+    """Queue a failed job again with a fresh set of attempts.
+
+    Returns:
+        bool: False if the job has not failed.
+    """
+    if job.status != 'failed':
+        return False
+    job.status = 'queued'
+    job.attempts = 0
+    job.run_after = datetime.now()
+    job.finished_at = None
+    db.session.commit()
+    dispatch(job)
+    return True
+
+def claim(job_id=None, ignore_delay=False):
+    """Mark the next due queued job as running and return it.
+
+    The status check in the UPDATE makes the claim atomic, so several workers can share the
+    queue without running a job twice.
+
+    Args:
+        job_id (int): Claim only this job.
+        ignore_delay (bool): Claim the job even if its retry time has not come.
+
+    Returns:
+        Job: The claimed job, or None if nothing is due.
+    """
+    now = datetime.now()
+    candidates = Job.query.with_entities(Job.id).filter(Job.status == 'queued')
+    if job_id is not None:
+        candidates = candidates.filter(Job.id == job_id)
+    if not ignore_delay:
+        candidates = candidates.filter(Job.run_after <= now)
+
+    for (candidate_id,) in candidates.order_by(Job.id).limit(5).all():
+        claimed = Job.query.filter(Job.id == candidate_id, Job.status == 'queued').update(
+            {Job.status: 'running', Job.attempts: Job.attempts + 1, Job.started_at: now,
+             Job.heartbeat_at: now},
+            synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            job = db.session.get(Job, candidate_id)
+            db.session.refresh(job)
+            return job
+    return None
+
+class Heartbeat:
+    """Updates a running job's heartbeat_at from a daemon thread until stopped.
+
+    The updates use their own app context and session, so they never commit the task's work.
+    """
+
+    def __init__(self, app, job_id):
+        self.app = app
+        self.job_id = job_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True,
+                                        name=f'openwaves-job-{job_id}-heartbeat')
+
+    def run(self):
+        """Record a heartbeat every JOBS_HEARTBEAT_INTERVAL seconds."""
+        interval = self.app.config['JOBS_HEARTBEAT_INTERVAL']
+        while not self._stop.wait(interval):
+            with self.app.app_context():
+                try:
+                    Job.query.filter(Job.id == self.job_id, Job.status == 'running').update(
+                        {Job.heartbeat_at: datetime.now()}, synchronize_session=False)
+                    db.session.commit()
+                except Exception: # pylint: disable=W0718
+                    # A missed beat is harmless unless the outage outlasts JOBS_STALE_AFTER
+                    logger.exception("Heartbeat for job %s failed", self.job_id)
+                finally:
+                    db.session.remove()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+def run_job(job):
+    """Run a claimed job and record its result, or schedule a retry if it fails."""
+    func = TASKS.get(job.kind)
+    try:
+        if func is None:
+            raise LookupError(f"Unknown job kind: {job.kind}")
+        if current_app.config['JOBS_MODE'] == 'inline':
+            # The request that queued the job is running it, so no other worker can take it
+            result = func(JobContext(job), **json.loads(job.params))
+        else:
+            with Heartbeat(current_app._get_current_object(), job.id): # pylint: disable=W0212
+                result = func(JobContext(job), **json.loads(job.params))
+    except Exception as error: # pylint: disable=W0718
+        db.session.rollback()
+        job = db.session.get(Job, job.id)
+        job.error = f"{type(error).__name__}: {error}"
+        if job.attempts < job.max_attempts and not isinstance(error, PERMANENT_ERRORS):
+            delay = current_app.config['JOBS_RETRY_DELAY'] * 2 ** (job.attempts - 1)
+            job.status = 'queued'
+            job.run_after = datetime.now() + timedelta(seconds=delay)
+            logger.warning("Job %s (%s) attempt %s failed, retrying in %ss: %s",
+                           job.id, job.kind, job.attempts, delay, error)
+        else:
+            job.status = 'failed'
+            job.finished_at = datetime.now()
+            logger.error("Job %s (%s) failed after %s attempts: %s",
+                         job.id, job.kind, job.attempts, error)
+        db.session.commit()
+        return
+
+    job = db.session.get(Job, job.id)
+    job.status = 'succeeded'
+    job.result = json.dumps(result)
+    job.error = None
+    job.finished_at = datetime.now()
+    job.progress = max(job.progress, job.total)
+    db.session.commit()
+    logger.info("Job %s (%s) succeeded", job.id, job.kind)
+
+def requeue_stale():
+    """Queue again the running jobs whose worker stopped before finishing them.
+
+    A job counts as abandoned when neither its heartbeat nor, for jobs claimed before the
+    heartbeat column existed, its start is newer than JOBS_STALE_AFTER seconds.
+
+    Returns:
+        int: The number of jobs requeued.
+    """
+    cutoff = datetime.now() - timedelta(seconds=current_app.config['JOBS_STALE_AFTER'])
+    last_seen = db.func.coalesce(Job.heartbeat_at, Job.started_at)
+    requeued = Job.query.filter(Job.status == 'running', last_seen < cutoff).update(
+        {Job.status: 'queued', Job.run_after: datetime.now()}, synchronize_session=False)
+    db.session.commit()
+    if requeued:
+        logger.warning("Requeued %s jobs whose worker stopped sending heartbeats", requeued)
+    return requeued
+
+class Worker:
+    """Runs due jobs for one app, either in a daemon thread or in the foreground."""
+
+    def __init__(self, app):
+        self.app = app
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def run_pending(self):
+        """Run every job that is due now.
+
+        Returns:
+            int: The number of job attempts run.
+        """
+        count = 0
+        with self.app.app_context():
+            try:
+                while not self._stop.is_set():
+                    job = claim()
+                    if job is None:
+                        break
+                    run_job(job)
+                    count += 1
+            finally:
+                db.session.remove()
+        return count
+
+    def run_forever(self):
+        """Run jobs until stop() is called, waking early when a job is queued.
+
+        Abandoned jobs are looked for at start-up and then once per heartbeat interval, so a
+        job left by a worker that died is picked up by the workers still running.
+        """
+        next_check = 0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() >= next_check:
+                    with self.app.app_context():
+                        requeue_stale()
+                        db.session.remove()
+                    next_check = time.monotonic() + self.app.config['JOBS_HEARTBEAT_INTERVAL']
+                self.run_pending()
+            except Exception: # pylint: disable=W0718
+                # Keep the worker alive when the database is briefly unavailable
+                logger.exception("Job worker error")
+            self._wake.wait(self.app.config['JOBS_POLL_INTERVAL'])
+            self._wake.clear()
+
+    def start(self):
+        """Start the daemon thread if it is not running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self.run_forever, daemon=True,
+                                                name='openwaves-jobs')
+                self._thread.start()
+
+    def wake(self):
+        """Start the thread if needed and have it look for jobs now."""
+        self.start()
+        self._wake.set()
+
+    def stop(self, timeout=5):
+        """Stop the worker after the current job."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+def get_worker(app):
+    """Return the app's worker, creating it on first use."""
+    worker = app.extensions.get('openwaves_jobs')
+    if worker is None:
+        worker = Worker(app)
+        app.extensions['openwaves_jobs'] = worker
+    return worker
+
+@task('import-questions')
+def import_questions_task(context, pool_id, csv_text):
+    """Import an uploaded question pool CSV."""
+    count = services.import_questions(pool_id, csv.DictReader(io.StringIO(csv_text)))
+    context.progress(count, count, f"Imported {count} questions")
+    return {'questions': count}
+
+@task('purge-sessions')
+def purge_sessions_task(context, before, batch_size):
+    """Purge sessions dated before an ISO date, reporting progress per batch."""
+    deleted = services.purge_sessions(
+        date.fromisoformat(before), batch_size,
+        progress=lambda done, total: context.progress(done, total,
+                                                      f"{done}/{total} sessions deleted"))
+    return {'sessions': deleted}
+
+def init_app(app):
+    """Start the job worker thread with the first request when JOBS_MODE is 'thread'."""
+    if app.config['JOBS_MODE'] != 'thread':
+        return
+
+    @app.before_request
+    def start_job_worker():
+        get_worker(app).start()
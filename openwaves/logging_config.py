@@ -0,0 +1,130 @@
+"""File: logging_config.py
+
+    This file contains the logging setup for the application. Records from the openwaves loggers
+    are formatted (as JSON by default) in the request thread, tagged with the request id, and put
+    on a queue; a single listener thread writes them out, so a slow log destination never blocks
+    a request.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+LOGGER_NAME = 'openwaves'
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Attributes every LogRecord has; anything else was passed through ``extra`` and is logged
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id', 'taskName'
+}
+
+class RequestIdFilter(logging.Filter): # pylint: disable=R0903
+    """Attach the current request id (or '-' outside a request) to every record."""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line.
+
+    The object holds the time, level, logger name, message and request id, any fields passed
+    through ``extra``, and the formatted traceback when there is one.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def parse_levels(levels):
+    """Parse per-module levels given as a dict or as "name=LEVEL,name=LEVEL".
+
+    Args:
+        levels (dict or str): The per-module levels.
+
+    Returns:
+        dict: Logger names mapped to upper-case level names.
+    """
+    if isinstance(levels, dict):
+        return {name: str(level).upper() for name, level in levels.items()}
+    parsed = {}
+    for item in (levels or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            parsed[name.strip()] = level.strip().upper()
+    return parsed
+
+@lru_cache(maxsize=None)
+def _start_listener():
+    """Start the shared listener thread once per process and return its queue."""
+    log_queue = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(logging.Formatter('%(message)s'))
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    # Flush whatever is still queued when the worker exits
+    atexit.register(listener.stop)
+    return log_queue
+
+def init_app(app):
+    """Configure the openwaves loggers and the request id hooks for the Flask app.
+
+    Settings: LOG_LEVEL, LOG_LEVELS (per-module), LOG_FORMAT ('json' or 'text'), LOG_QUEUE
+    (write through the background listener) and LOG_REQUEST_ID_HEADER.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(app.config['LOG_LEVEL'].upper())
+    for name, level in parse_levels(app.config['LOG_LEVELS']).items():
+        logging.getLogger(name).setLevel(level)
+
+    # create_app can run several times in one process; replace our handler rather than stack them
+    for handler in list(logger.handlers):
+        if handler is default_handler or getattr(handler, 'openwaves_handler', False):
+            logger.removeHandler(handler)
+
+    if app.config['LOG_QUEUE']:
+        handler = QueueHandler(_start_listener())
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.openwaves_handler = True
+    handler.addFilter(RequestIdFilter())
+    if app.config['LOG_FORMAT'] == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+    logger.addHandler(handler)
+
+    header = app.config['LOG_REQUEST_ID_HEADER']
+
+    @app.before_request
+    def assign_request_id():
+        # Reuse the id from a proxy or load balancer when it is safe to log, otherwise make one
+        incoming = request.headers.get(header, '')
+        g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+
+    @app.after_request
+    def send_request_id(response):
+        if 'request_id' in g:
+            response.headers[header] = g.request_id
+        return response
@@ -3,14 +3,19 @@
     This file contains the main routes and view functions for the user routes in the application.
 """
 
+import os
 from collections import defaultdict
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, \
-    current_app as app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, \
+    send_from_directory, current_app as app
 from flask_login import login_required, current_user
 from sqlalchemy.exc import SQLAlchemyError
-from .imports import db, Question, ExamSession, ExamRegistration, ExamAnswer, Exam, get_exam_name, \
-    is_already_registered, remove_exam_registration, requires_diagram, get_exam_score, generate_exam
+from .imports import db, Question, ExamSession, ExamRegistration, Exam, Pool, \
+    get_exam_name, is_already_registered, remove_exam_registration, load_exam_question, \
+    get_exam_score
+from .conditional import page_etag, conditional_render
+from . import answer_store, csp_reports, exam_forms, exam_sync, session_monitor
+from .metrics import ANSWERS_SAVED
 
 PAGE_LOGOUT = 'auth.logout'
 PAGE_SESSIONS = 'main.sessions'
@@ -19,6 +24,38 @@ MSG_ACCESS_DENIED = 'Access denied.'
 
 main = Blueprint('main', __name__)
 
+def get_pool_version(pool_id):
+    """Return the current version of a pool, or None if it no longer exists."""
+    pool = db.session.get(Pool, pool_id)
+    return pool.version if pool else None
+
+def get_questions_by_id(exam_answers):
+    """Load the questions for a list of exam answers, keyed by question ID."""
+    question_ids = [answer.question_id for answer in exam_answers]
+    questions = Question.query.filter(Question.id.in_(question_ids)).all()
+    return {question.id: question for question in questions}
+
+def get_candidate_exam(exam_id):
+    """Return the current user's open exam with its session status and pool version.
+
+    Returns:
+        tuple: (exam, session_status, pool_version), or None if the exam does not exist, is
+        closed, or belongs to another candidate.
+    """
+    exam_row = (
+        db.session.query(Exam, ExamSession.status, Pool.version)
+        .join(ExamSession, ExamSession.id == Exam.session_id)
+        .outerjoin(Pool, Pool.id == Exam.pool_id)
+        .filter(Exam.id == exam_id, Exam.user_id == current_user.id, Exam.open.is_(True))
+        .first()
+    )
+    return tuple(exam_row) if exam_row else None
+
+def answer_state(exam_answers):
+    """Return the parts of an exam's answers that affect the rendered review/results pages."""
+    return tuple((answer.question_id, answer.question_number, answer.answer, answer.answered_at)
+                 for answer in exam_answers)
+
 # Default Route
 @main.route('/')
 def index():
@@ -35,17 +72,13 @@ def csp_violation_report():
     """Handle incoming CSP violation reports.
 
     Processes the Content Security Policy (CSP) violation reports sent by the browser.
-    Logs the violation details for further analysis.
+    Reports are counted in memory and saved in batches (see csp_reports.py).
 
     Returns:
-        Tuple[str, int]: An empty response with HTTP status code 204 (No Content).
+        Tuple[str, int]: An empty response with HTTP status code 204 (No Content), or 413 if
+        the report is too large.
     """
-    if request.is_json:
-        violation_report = request.get_json()
-        print("CSP Violation:", violation_report)
-    else:
-        print("Received non-JSON CSP violation report")
-    return '', 204  # Return 204 No Content
+    return '', csp_reports.ingest(app, request)
 
 # Account Select Route
 @main.route('/account_select')
@@ -134,6 +167,7 @@ def sessions():
         'extra_exam_completed': False
     })
 
+    exams_closed = False
     for session, registration, exam in combined_query:
         session_id = session.id
 
@@ -156,8 +190,9 @@ def sessions():
 
         # Close exams that ended before submission
         if exam and session.end_time and exam.open:
-                exam.open = False
-                db.session.commit()
+            exam.open = False
+            exam.finished_at = session.end_time
+            exams_closed = True
 
         # Update exam completion status for each element
         if exam and not exam.open:
@@ -168,6 +203,10 @@ def sessions():
             elif exam.element == 4:
                 session_info['extra_exam_completed'] |= True
 
+    # Save any closed exams in one commit rather than one per row
+    if exams_closed:
+        db.session.commit()
+
     # Convert the dictionary to a list for use in the template
     sessions_with_registrations = list(session_dict.values())
     current_date = datetime.now().date()
@@ -408,10 +447,11 @@ def launch_exam(): # pylint: disable=R0911
         return redirect(url_for(PAGE_SESSIONS))
 
     try:
-        # Get the questions for the exam
-        questions = generate_exam(pool_id)
+        # Assign one of the pool's pre-built forms, or draw new questions if it has none
+        form = exam_forms.assign_form(pool_id)
+        questions, seed = (None, None) if form else answer_store.draw_questions(pool_id)
 
-        if not questions:
+        if not form and not questions:
             flash('No questions found for the exam. Please try again later.', 'danger')
             return redirect(url_for(PAGE_SESSIONS))
 
@@ -421,20 +461,16 @@ def launch_exam(): # pylint: disable=R0911
             pool_id=pool_id,
             session_id=session_id,
             element=exam_element,
-            open=True
+            open=True,
+            seed=seed
         )
         db.session.add(new_exam)
         db.session.commit()
 
-        # Enumerate the questions and create exam answers
-        for q_index, question in enumerate(questions):
-            new_answer = ExamAnswer(
-                exam_id=new_exam.id,
-                question_id=question.id,
-                question_number=q_index + 1,
-                correct_answer=question.correct_answer
-            )
-            db.session.add(new_answer)
+        # Create the unanswered exam answers in the configured storage format (seeded exams
+        # write theirs as they are answered)
+        answer_store.create_answers(new_exam, questions, form)
+        session_monitor.publish_exam(new_exam)
         db.session.commit()
 
         return redirect(url_for('main.take_exam', exam_id=new_exam.id))
@@ -452,6 +488,29 @@ def launch_exam(): # pylint: disable=R0911
         app.logger.error(f'Error creating exam session: {str(e)}')
         return redirect(url_for(PAGE_SESSIONS))
 
+def posted_answer(exam_answers, form):
+    """Find the answer a take_exam POST changes and check the chosen option.
+
+    Args:
+        exam_answers (list): The exam's answers from answer_store.load_answers().
+        form: The posted form, with 'question_number' and 'answer'.
+
+    Returns:
+        tuple: (answer, choice, error); error is a message to flash if the question number or
+        the option is invalid.
+    """
+    # The answer row is already loaded with the rest of the exam
+    question_number = form.get('question_number', type=int)
+    answer = next((answer for answer in exam_answers
+                   if answer.question_number == question_number), None)
+    if answer is None:
+        return None, None, 'Invalid question number. Please try again.'
+    # Packed answers hold one byte each, and only options A-D are valid
+    choice = form.get('answer', type=int)
+    if choice not in exam_sync.ANSWER_CHOICES:
+        return answer, None, 'Invalid answer. Please try again.'
+    return answer, choice, None
+
 @main.route('/exam/<int:exam_id>', methods=['GET', 'POST'])
 @login_required
 def take_exam(exam_id):
@@ -462,34 +521,43 @@ def take_exam(exam_id):
         flash(MSG_ACCESS_DENIED, "danger")
         return redirect(url_for(PAGE_LOGOUT))
 
-    # Retrieve the exam
-    exam = db.session.get(Exam, exam_id)
-    if not exam or not exam.open:
+    # Retrieve the exam with its session status and pool version in one query
+    exam_row = (
+        db.session.query(Exam, ExamSession.status, Pool.version)
+        .join(ExamSession, ExamSession.id == Exam.session_id)
+        .outerjoin(Pool, Pool.id == Exam.pool_id)
+        .filter(Exam.id == exam_id)
+        .first()
+    )
+    if not exam_row or not exam_row[0].open:
         flash('Invalid exam ID. Please try again.', 'danger')
         return redirect(url_for(PAGE_SESSIONS))
+    exam, session_status, pool_version = exam_row
 
     # Ensure session is open
-    exam_session = db.session.get(ExamSession, exam.session_id)
-    if not exam_session.status:
+    if not session_status:
         flash('Exam session is closed.', 'danger')
         return redirect(url_for(PAGE_SESSIONS))
 
     # Retrieve answers for the exam
-    exam_answers = \
-        ExamAnswer.query.filter_by(exam_id=exam.id).order_by(ExamAnswer.question_id).all()
+    exam_answers = answer_store.load_answers(exam)
 
     # Get current question index (or default to the first question)
     current_question_index = int(request.args.get('index', 0))
 
     if request.method == 'POST':
         # Save user answer
-        answer_value = request.form.get('answer')
-        question_number = int(request.form.get('question_number'))
-        if answer_value is not None:
-            answer = ExamAnswer.query.filter_by(exam_id=exam_id,
-                                                question_number=question_number).first()
-            answer.answer = int(answer_value)
+        if request.form.get('answer') is not None:
+            answer, choice, error = posted_answer(exam_answers, request.form)
+            if error:
+                flash(error, 'danger')
+                return redirect(url_for('main.take_exam', exam_id=exam.id,
+                                        index=current_question_index))
+            answer.answer = choice
+            answer.answered_at = exam_sync.now_ms()
+            session_monitor.publish_exam(exam)
             db.session.commit()
+            ANSWERS_SAVED.inc()
 
         # Determine navigation
         if 'next' in request.form:
@@ -506,19 +574,115 @@ def take_exam(exam_id):
         current_question_index = len(exam_answers) - 1
 
     current_answer = exam_answers[current_question_index]
-    current_question = db.session.get(Question, current_answer.question_id)
 
-    diagram = requires_diagram(current_question)
+    def render():
+        # The question and its diagram are cached until the pool changes
+        current_question, diagram = load_exam_question(current_answer.question_id, pool_version)
+
+        return render_template(
+            'exam.html',
+            exam=exam,
+            question=current_question,
+            answer=current_answer,
+            current_index=current_question_index,
+            total_questions=len(exam_answers),
+            diagram=diagram
+        )
+
+    # Question content only changes with the pool, so a GET can be answered with a 304
+    etag = None
+    if request.method == 'GET':
+        etag = page_etag(exam.id, pool_version, current_question_index,
+                         len(exam_answers), current_answer.question_id, current_answer.answer)
+    return conditional_render(etag, render)
 
-    return render_template(
-        'exam.html',
-        exam=exam,
-        question=current_question,
-        answer=current_answer,
-        current_index=current_question_index,
-        total_questions=len(exam_answers),
-        diagram=diagram
-    )
+@main.route('/exam/sw.js', methods=['GET'])
+def exam_service_worker():
+    """
+    Serve the offline exam service worker.
+
+    It is served from /exam/ rather than /static/ because a service worker only controls pages
+    below its own URL.
+    """
+    response = send_from_directory(os.path.join(app.static_folder, 'js'), 'exam_sw.js',
+                                   mimetype='text/javascript', max_age=0)
+    # Browsers check for a new worker on each visit; never let a proxy keep an old one
+    response.cache_control.no_cache = True
+    return response
+
+@main.route('/exam/<int:exam_id>/bundle', methods=['GET'])
+@login_required
+def exam_bundle(exam_id):
+    """
+    Return everything the offline exam client needs to run an exam without the server.
+
+    Returns:
+        - 200 JSON response with the questions, options, diagram URLs and the saved answers.
+        - 404 JSON response if the exam is not one of the candidate's open exams.
+        - 409 JSON response if the exam session is closed.
+    """
+    if current_user.role != 1:
+        return jsonify({"error": MSG_ACCESS_DENIED}), 403
+
+    exam_row = get_candidate_exam(exam_id)
+    if exam_row is None:
+        return jsonify({"error": "Exam not found."}), 404
+    exam, session_status, pool_version = exam_row
+    if not session_status:
+        return jsonify({"error": "Exam session is closed."}), 409
+
+    exam_answers = answer_store.load_answers(exam)
+    response = jsonify(exam_sync.build_bundle(exam, exam_answers, pool_version))
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@main.route('/exam/<int:exam_id>/answers', methods=['POST'])
+@login_required
+def sync_answers(exam_id):
+    """
+    Save a batch of answers recorded by the offline exam client.
+
+    The body is {"answers": [{"question_number", "answer", "updated_at"}, ...]}. Each answer is
+    kept only if it is newer than the one the server holds, so batches may be resent or arrive
+    out of order.
+
+    Returns:
+        - 200 JSON response with the number of answers applied, every answer the server now
+          holds and their digest.
+        - 400 JSON response if the batch is malformed.
+        - 404 JSON response if the exam is not one of the candidate's open exams.
+        - 409 JSON response if the exam session is closed.
+    """
+    if current_user.role != 1:
+        return jsonify({"error": MSG_ACCESS_DENIED}), 403
+
+    exam_row = get_candidate_exam(exam_id)
+    if exam_row is None:
+        return jsonify({"error": "Exam not found."}), 404
+    exam, session_status, _pool_version = exam_row
+    if not session_status:
+        return jsonify({"error": "Exam session is closed."}), 409
+
+    exam_answers = answer_store.load_answers(exam)
+    try:
+        applied = exam_sync.apply_changes(
+            exam_answers, exam_sync.parse_changes(request.get_json(silent=True)))
+    except ValueError as error:
+        db.session.rollback()
+        return jsonify({"error": str(error)}), 400
+
+    if applied:
+        session_monitor.publish_exam(exam)
+        db.session.commit()
+        ANSWERS_SAVED.inc(applied)
+
+    return jsonify({
+        "success": True,
+        "applied": applied,
+        "answers": exam_sync.answer_states(exam_answers),
+        "digest": exam_sync.answer_digest(exam_answers),
+    }), 200
 
 @main.route('/exam/<int:exam_id>/review', methods=['GET'])
 @login_required
@@ -545,22 +709,20 @@ def review_exam(exam_id):
     exam_name = get_exam_name(f'{exam.element}')
 
     # Retrieve all answers related to the exam
-    exam_answers = \
-        ExamAnswer.query.filter_by(exam_id=exam.id).order_by(ExamAnswer.question_number).all()
-
-    # Get the associated questions for review
-    question_ids = [answer.question_id for answer in exam_answers]
-    questions = Question.query.filter(Question.id.in_(question_ids)).all()
-
-    # Create a dictionary of questions by ID for easier lookup
-    question_dict = {question.id: question for question in questions}
+    exam_answers = answer_store.load_answers(exam)
+
+    def render():
+        return render_template(
+            'review.html',
+            exam=exam,
+            exam_answers=exam_answers,
+            questions=get_questions_by_id(exam_answers),
+            exam_name=exam_name
+        )
 
-    return render_template(
-        'review.html',
-        exam=exam,
-        exam_answers=exam_answers,
-        questions=question_dict,
-        exam_name=exam_name
+    return conditional_render(
+        page_etag(exam.id, get_pool_version(exam.pool_id), answer_state(exam_answers)),
+        render
     )
 
 @main.route('/exam/<int:exam_id>/finish', methods=['GET'])
@@ -584,7 +746,19 @@ def finish_exam(exam_id):
         flash(MSG_ACCESS_DENIED, "danger")
         return redirect(url_for(PAGE_LOGOUT))
 
+    # The offline client sends the answers it holds; refuse until the server has them all
+    client_digest = request.args.get('answers')
+    if client_digest is not None:
+        exam_answers = answer_store.load_answers(exam)
+        if client_digest != exam_sync.answer_digest(exam_answers):
+            flash('Some answers have not reached the server yet. Please try again.', 'danger')
+            return redirect(url_for('main.review_exam', exam_id=exam.id))
+
     exam.open = False
+    exam.finished_at = datetime.now()
+    # A finished exam keeps its questions even if the pool changes later
+    answer_store.materialize_exam(exam)
+    session_monitor.publish_exam(exam)
     db.session.commit()
 
     return redirect(url_for('main.exam_results',
@@ -641,27 +815,25 @@ def exam_results():
         return redirect(url_for(PAGE_SESSIONS))
 
     # Get the exam answers
-    exam_answers = \
-        ExamAnswer.query.filter_by(exam_id=exam.id).order_by(ExamAnswer.question_number).all()
+    exam_answers = answer_store.load_answers(exam)
 
     # Get the exam name
     exam_name = get_exam_name(f'{exam.element}')
 
     exam_score_string = get_exam_score(exam_answers, exam.element)
 
-    # Get the associated questions for review
-    question_ids = [answer.question_id for answer in exam_answers]
-    questions = Question.query.filter(Question.id.in_(question_ids)).all()
-
-    # Create a dictionary of questions by ID for easier lookup
-    question_dict = {question.id: question for question in questions}
+    def render():
+        return render_template(
+            'results.html',
+            exam=exam,
+            exam_answers=exam_answers,
+            questions=get_questions_by_id(exam_answers),
+            exam_name=exam_name,
+            exam_score_string=exam_score_string,
+            hc=current_user
+        )
 
-    return render_template(
-        'results.html',
-        exam=exam,
-        exam_answers=exam_answers,
-        questions=question_dict,
-        exam_name=exam_name,
-        exam_score_string=exam_score_string,
-        hc=current_user
+    return conditional_render(
+        page_etag(exam.id, get_pool_version(exam.pool_id), answer_state(exam_answers)),
+        render
     )
@@ -0,0 +1,90 @@
+"""File: main_reports.py
+
+    This file contains the VE routes that export exam results and score reports for VEC
+    paperwork.
+"""
+
+from datetime import datetime
+from flask import Blueprint, Response, jsonify, redirect, request, flash, url_for, \
+    stream_with_context
+from flask_login import login_required, current_user
+from .imports import db, ExamSession
+from . import results_export, score_reports
+
+main_reports = Blueprint('main_reports', __name__)
+
+PAGE_LOGOUT = 'auth.logout'
+MSG_ACCESS_DENIED = 'Access denied.'
+
+def parse_day(value):
+    """Parse an optional YYYY-MM-DD query argument, raising ValueError if it is malformed."""
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+@main_reports.route('/ve/results/export', methods=['GET'])
+@login_required
+def export_results():
+    """
+    Stream the results of a session or a date range of sessions as CSV or XLSX.
+
+    Query args:
+        format (str): 'csv' (default) or 'xlsx'.
+        session_id (int, optional): Export one session.
+        start, end (str, optional): Export the sessions between these days (YYYY-MM-DD).
+
+    Returns:
+        - 200 streamed attachment with one row per exam.
+        - 400 JSON response if the format or a date is invalid.
+        - 404 JSON response if the session does not exist.
+    """
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
+
+    export_format = request.args.get('format', 'csv')
+    session_id = request.args.get('session_id', type=int)
+    try:
+        start = parse_day(request.args.get('start'))
+        end = parse_day(request.args.get('end'))
+        chunks = results_export.export_results(export_format, session_id, start, end)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    if session_id is not None and db.session.get(ExamSession, session_id) is None:
+        return jsonify({"error": "Session not found."}), 404
+
+    filename = results_export.export_filename(export_format, session_id, start, end)
+    response = Response(stream_with_context(chunks),
+                        mimetype=results_export.MIMETYPES[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@main_reports.route('/ve/session/<int:session_id>/reports', methods=['GET'])
+@login_required
+def session_reports(session_id):
+    """
+    Stream a ZIP of a session's score reports and CSCE drafts as PDFs.
+
+    Every finished exam gets a score report, and every candidate who passed an element gets a
+    CSCE draft. The PDFs are rendered in the report process pool.
+
+    Returns:
+        - 200 streamed ZIP attachment.
+        - 404 JSON response if the session does not exist.
+    """
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
+
+    if db.session.get(ExamSession, session_id) is None:
+        return jsonify({"error": "Session not found."}), 404
+
+    response = Response(stream_with_context(score_reports.session_reports(session_id)),
+                        mimetype='application/zip')
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename="session_{session_id}_reports.zip"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -3,19 +3,25 @@
     This file contains the main routes and view functions for the ve routes in the application.
 """
 
-import os
 import csv
+import os
+import logging
 from datetime import datetime
-from io import TextIOWrapper
+from io import StringIO, TextIOWrapper
 from flask import Blueprint, jsonify, redirect, render_template, request, flash, url_for, \
     current_app as app
 from flask_login import login_required, current_user
+from sqlalchemy import case, func
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.utils import secure_filename
-from .imports import db, Pool, Question, TLI, ExamSession, ExamDiagram, Exam, ExamAnswer, User, \
-    ExamRegistration, load_question_pools, allowed_file, get_exam_name, get_exam_score
+from .imports import db, Pool, Question, TLI, ExamSession, ExamDiagram, ExamForm, Exam, \
+    ExamAnswer, User, CspViolation, Job, load_question_pools, load_question_pool, \
+    load_pool_options, allowed_file, get_exam_name, get_exam_score, bump_pool_version, exam_passed
+from . import answer_store, cache, csp_reports, diagram_store, exam_forms, jobs, services, \
+    session_monitor
 
 main_ve = Blueprint('main_ve', __name__)
+logger = logging.getLogger(__name__)
 
 PAGE_LOGOUT = 'auth.logout'
 PAGE_POOLS = 'main_ve.pools'
@@ -28,6 +34,48 @@ MSG_ACCESS_DENIED = 'Access denied.'
 #                                        #
 ##########################################
 
+def job_accepted(job):
+    """Return the 202 response for a queued job, with the URL to poll for its status."""
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": url_for('main_ve.job_status', job_id=job.id)
+    }), 202
+
+def row_update(item_id, template, **context):
+    """Return the 200 response for a changed table row, with its re-rendered HTML.
+
+    The pools and sessions pages replace the rows with the same data-id (or insert them) instead
+    of reloading the whole page.
+
+    Args:
+        item_id (int): The id of the pool or session whose rows changed.
+        template (str): The row partial to render, e.g. 'session_row.html'.
+        **context: The variables the partial needs.
+    """
+    return jsonify({
+        "success": True,
+        "id": item_id,
+        "html": render_template(template, **context)
+    }), 200
+
+def row_deleted(item_id):
+    """Return the 200 response for a deleted table row."""
+    return jsonify({"success": True, "id": item_id, "deleted": True}), 200
+
+def pool_rows(pool_id):
+    """Return the row update of a pool, or a deleted row if the pool no longer exists."""
+    pool = load_question_pool(pool_id)
+    if pool is None:
+        return row_deleted(pool_id)
+    return row_update(pool_id, 'pool_rows.html', pool=pool)
+
+def session_row(session):
+    """Return the row update of an exam session."""
+    return row_update(session.id, 'session_row.html', test_session=session,
+                      current_date=datetime.now().date())
+
 # VE Profile Route
 @main_ve.route('/ve/profile')
 @login_required
@@ -63,11 +111,8 @@ def pools():
         flash(MSG_ACCESS_DENIED, "danger")
         return redirect(url_for(PAGE_LOGOUT))
 
-    # Get all question pools from the database
+    # Get all question pools with their diagrams and question counts (cached)
     question_pools = load_question_pools()
-    for question_pool in question_pools:
-        question_count = Question.query.filter_by(pool_id=question_pool.id).count()
-        question_pool.question_count = question_count
     return render_template('pools.html', question_pools=question_pools)
 
 # Route to create question pools
@@ -83,10 +128,10 @@ def create_pool():
     is returned with a message indicating that all fields are required.
 
     On successful creation of the question pool, the pool is added to the database
-    and a JSON response with success status is returned.
+    and a JSON response with the new pool's table rows is returned.
 
     Returns:
-        Response: A JSON response with a success message and a 200 status code on
+        Response: A JSON response with the pool id and rendered rows and a 200 status code on
         successful creation, or a 400 status code with an error message if any field
         is missing.
     """
@@ -107,16 +152,9 @@ def create_pool():
         return jsonify({"error": "All fields are required."}), 400
 
     # Create a new question pool entry in the database
-    new_pool = Pool(
-        name=pool_name,
-        element=exam_element,
-        start_date=datetime.strptime(start_date, '%Y-%m-%d'),
-        end_date=datetime.strptime(end_date, '%Y-%m-%d'),
-    )
-    db.session.add(new_pool)
-    db.session.commit()
+    pool = services.create_pool(pool_name, exam_element, start_date, end_date)
 
-    return jsonify({"success": True}), 200
+    return pool_rows(pool.id)
 
 # Route to upload question pools
 @main_ve.route('/ve/upload_questions/<int:pool_id>', methods=['POST'])
@@ -128,7 +166,9 @@ def upload_questions(pool_id):
         flash(MSG_ACCESS_DENIED, "danger")
         return redirect(url_for(PAGE_LOGOUT))
 
-    # If a VE account exists
+    if db.session.get(Pool, pool_id) is None:
+        return jsonify({"error": "Pool not found."}), 404
+
     file = request.files.get('file')
 
     if not file:
@@ -138,44 +178,88 @@ def upload_questions(pool_id):
     if not filename.endswith('.csv'):
         return jsonify({"error": "Invalid file type. Only CSV files are allowed."}), 400
 
-    # Parse the CSV file
-    file_stream = TextIOWrapper(file.stream, encoding='utf-8')
-    csv_reader = csv.DictReader(file_stream)
-
-    tlis = {}
-    questions = []
-    for row in csv_reader:
-        # Get the TLI and count questions
-        tli = row['id'][:3]
-        if tli in tlis:
-            tlis[tli] += 1
-        else:
-            tlis[tli] = 1
-
-        # Assuming the CSV has the fields: id, correct, question, a, b, c, d, refs
-        new_question = Question(
-            number=row['id'],
-            pool_id=pool_id,  # Associate with the correct pool
-            correct_answer=row['correct'],
-            question=row['question'],
-            option_a=row['a'],
-            option_b=row['b'],
-            option_c=row['c'],
-            option_d=row['d'],
-            refs=row['refs']
-        )
-        questions.append(new_question)
-
-    for tli, count in tlis.items():
-        # Create a TLI count entry for each TLI code
-        new_tli = TLI(pool_id=pool_id, tli=tli, quantity=count)
-        db.session.add(new_tli)
-
-    # Add all questions to the database
-    db.session.bulk_save_objects(questions)
-    db.session.commit()
+    # Check the header now, as the CLI does, so a bad file is refused rather than queued
+    csv_text = TextIOWrapper(file.stream, encoding='utf-8').read()
+    missing = services.missing_question_columns(csv.DictReader(StringIO(csv_text)).fieldnames)
+    if missing:
+        return jsonify({"error": f"Missing CSV columns: {', '.join(missing)}"}), 400
+
+    # Import the CSV file in the background
+    job = jobs.enqueue('import-questions', user_id=current_user.id, pool_id=pool_id,
+                       csv_text=csv_text)
+
+    return job_accepted(job)
+
+# Route to re-render the rows of one question pool
+@main_ve.route('/ve/pool_rows/<int:pool_id>', methods=['GET'])
+@login_required
+def get_pool_rows(pool_id):
+    """Return a pool's re-rendered table rows, e.g. once its question import job has finished.
+
+    Returns:
+        - 200 JSON response with the pool id and rows, or with "deleted" if it does not exist.
+    """
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
+
+    return pool_rows(pool_id)
+
+# Route to list and build the pre-built exam forms of a pool
+@main_ve.route('/ve/pool/<int:pool_id>/forms', methods=['GET', 'POST'])
+@login_required
+def pool_forms(pool_id):
+    """
+    Lists a pool's exam forms, or builds new ones (POST with an optional "count" field,
+    default EXAM_FORM_COUNT) that replace its active forms.
+
+    Returns:
+        - 200 JSON response: {"forms": [...]} with each form's label, state and exam count.
+        - 201 JSON response with the same list after building forms.
+        - 400 JSON response: {"error": ...} if the forms cannot be built.
+        - 404 JSON response: {"error": "Pool not found."} if the pool ID is invalid.
+    """
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
+
+    if db.session.get(Pool, pool_id) is None:
+        return jsonify({"error": "Pool not found."}), 404
+
+    if request.method == 'GET':
+        return jsonify({"forms": exam_forms.form_summaries(pool_id)}), 200
+
+    count = request.form.get('count', app.config['EXAM_FORM_COUNT'], type=int)
+    try:
+        exam_forms.build_forms(pool_id, count)
+    except ValueError as error:
+        db.session.rollback()
+        return jsonify({"error": str(error)}), 400
+    return jsonify({"forms": exam_forms.form_summaries(pool_id)}), 201
+
+# Route to show item analytics for one exam form
+@main_ve.route('/ve/forms/<int:form_id>/analytics', methods=['GET'])
+@login_required
+def form_analytics(form_id):
+    """
+    Returns per-question response counts over the finished exams of one form.
+
+    Returns:
+        - 200 JSON response: {"form": {...}, "items": [...]}.
+        - 404 JSON response: {"error": "Form not found."} if the form ID is invalid.
+    """
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
 
-    return jsonify({"success": True}), 200
+    form = db.session.get(ExamForm, form_id)
+    if form is None:
+        return jsonify({"error": "Form not found."}), 404
+
+    return jsonify({
+        "form": {"id": form.id, "pool_id": form.pool_id, "label": form.label},
+        "items": exam_forms.form_item_stats(form),
+    }), 200
 
 # Route to delete question pools
 @main_ve.route('/ve/delete_pool/<int:pool_id>', methods=['DELETE'])
@@ -192,7 +276,8 @@ def delete_pool(pool_id):
         pool_id (int): The ID of the pool to be deleted.
 
     Returns:
-        - 200 JSON response: {"success": True} on successful deletion.
+        - 200 JSON response: {"success": True, "id": pool_id, "deleted": True} on successful
+          deletion.
         - 404 JSON response: {"error": "Pool not found."} if the pool ID is invalid.
         - 404 JSON response: {"error": "Diagram file not found."} if any associated diagram 
           file is missing from the server.
@@ -215,27 +300,18 @@ def delete_pool(pool_id):
     # Delete all questions associated with the pool
     Question.query.filter_by(pool_id=pool_id).delete()
     TLI.query.filter_by(pool_id=pool_id).delete()
+    ExamForm.query.filter_by(pool_id=pool_id).delete()
 
     # Delete all diagrams associated with the pool
-    diagrams = ExamDiagram.query.filter_by(pool_id=pool_id).all()
-    upload_folder = app.config['UPLOAD_FOLDER']
-
-    for diagram in diagrams:
-        # Delete the diagram file from the server
-        file_path = os.path.join(upload_folder, os.path.basename(diagram.path))
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        else:
-            app.logger.error(f"File does not exist: {file_path}")
+    paths = services.delete_diagrams(ExamDiagram.query.filter_by(pool_id=pool_id).all())
 
-        # Delete the diagram from the database
-        db.session.delete(diagram)
-
-    # Delete the pool itself
+    # Delete the pool itself, then the diagram files no other pool shares
     db.session.delete(pool)
     db.session.commit()
+    services.release_diagram_files(paths)
+    cache.invalidate(cache.POOLS, cache.QUESTIONS)
 
-    return jsonify({"success": True}), 200
+    return row_deleted(pool_id)
 
 # Route to show exam sessions page
 @main_ve.route('/ve/sessions')
@@ -254,29 +330,14 @@ def ve_sessions():
     # Get all test sessions from the database
     test_sessions = \
         ExamSession.query.order_by(ExamSession.session_date.desc()).all()
-    question_pools=Pool.query.all()
-
-    tech_pool_options={}
-    general_pool_options={}
-    extra_pool_options={}
-
-    for pool in question_pools:
-        if pool.element == 2:
-            tech_pool_options[pool.id] = \
-                f"{pool.name} {pool.start_date.strftime('%Y')}-{pool.end_date.strftime('%Y')}"
-        elif pool.element == 3:
-            general_pool_options[pool.id] = \
-                f"{pool.name} {pool.start_date.strftime('%Y')}-{pool.end_date.strftime('%Y')}"
-        elif pool.element == 4:
-            extra_pool_options[pool.id] = \
-                f"{pool.name} {pool.start_date.strftime('%Y')}-{pool.end_date.strftime('%Y')}"
+    pool_options = load_pool_options()
 
     current_date = datetime.now().date()
     return render_template('ve_sessions.html',
                         test_sessions=test_sessions,
-                        tech_pool_options=tech_pool_options,
-                        general_pool_options=general_pool_options,
-                        extra_pool_options=extra_pool_options,
+                        tech_pool_options=pool_options[2],
+                        general_pool_options=pool_options[3],
+                        extra_pool_options=pool_options[4],
                         current_date=current_date)
 
 # Route to create test sessions
@@ -292,10 +353,10 @@ def create_session():
     is returned with a message indicating that all fields are required.
 
     On successful creation of the test session, the session is added to the database
-    and a JSON response with success status is returned.
+    and a JSON response with the session's table row is returned.
 
     Returns:
-        Response: A JSON response with a success message and a 200 status code on
+        Response: A JSON response with the session id and rendered row and a 200 status code on
         successful creation, or a 400 status code with an error message if any field
         is missing.
     """
@@ -303,22 +364,16 @@ def create_session():
         flash(MSG_ACCESS_DENIED, "danger")
         return redirect(url_for(PAGE_LOGOUT))
 
-    # Debugging for current user role
-    print(f"Current user role: {current_user.role}")
-
     # Get the form data
     start_date = request.form.get('start_date')
     tech_pool_id = request.form.get('tech_pool')
     general_pool_id = request.form.get('general_pool')
     extra_pool_id = request.form.get('extra_pool')
 
-    # Debugging the received form data
-    print(f"Form Data Received - Start Date: {start_date}, Tech Pool ID: {tech_pool_id}, " + \
-            "General Pool ID: {general_pool_id}, Extra Pool ID: {extra_pool_id}")
-
     # Validate the form data
     if not start_date or not tech_pool_id or not general_pool_id or not extra_pool_id:
-        print("Form validation failed")
+        logger.info("Session creation rejected, missing fields: date=%s pools=%s/%s/%s",
+                    start_date, tech_pool_id, general_pool_id, extra_pool_id)
         return jsonify({"error": "All fields are required."}), 400
 
     # Convert the session_date to a Python datetime object
@@ -332,14 +387,12 @@ def create_session():
         extra_pool_id=extra_pool_id,
     )
 
-    # Debugging session creation
-    print(f"Creating session: {new_session}")
-
     db.session.add(new_session)
     db.session.commit()
 
-    print("Session successfully created and committed")
-    return jsonify({"success": True}), 200
+    logger.info("Created exam session %s for %s (pools %s/%s/%s)", new_session.id, session_date,
+                tech_pool_id, general_pool_id, extra_pool_id)
+    return session_row(new_session)
 
 # Route to open a session
 @main_ve.route('/ve/open_session/<int:session_id>', methods=['POST'])
@@ -364,7 +417,7 @@ def open_session(session_id):
     session.status = True
     db.session.commit()
 
-    return jsonify({"success": True}), 200
+    return session_row(session)
 
 # Route to close a session
 @main_ve.route('/ve/close_session/<int:session_id>', methods=['POST'])
@@ -390,7 +443,7 @@ def close_session(session_id):
     session.status = False
     db.session.commit()
 
-    return jsonify({"success": True}), 200
+    return session_row(session)
 
 # Route to upload exam diagrams
 @main_ve.route('/ve/upload_diagram/<int:pool_id>', methods=['POST'])
@@ -404,77 +457,60 @@ def upload_diagram(pool_id): # pylint: disable=R0911
     file securely, and stores the diagram's metadata (including the path) in the 
     database. 
 
+    Requests that accept only JSON (the pools page sends "Accept: application/json") get the
+    pool's re-rendered rows, or a 400 error, instead of a flash message and a redirect.
+
     Args:
         pool_id (int): The ID of the exam pool to which the diagram belongs.
 
     Returns:
         - Redirects back to the pools page or the referrer upon success or failure.
+        - 200 JSON response with the pool's rows, or 400 JSON error, for JSON requests.
     """
     # Check for VE role
     if current_user.role != 2:
         flash(MSG_ACCESS_DENIED, "danger")
         return redirect(url_for(PAGE_LOGOUT))
 
-    if 'file' not in request.files:
-        flash('No file part')
+    wants_json = request.accept_mimetypes.best == 'application/json'
+
+    def failed(message):
+        if wants_json:
+            return jsonify({"error": message}), 400
+        flash(message)
         return redirect(url_for(PAGE_POOLS))
 
+    if 'file' not in request.files:
+        return failed('No file part')
+
     file = request.files['file']
     diagram_name = request.form.get('diagram_name')
 
     if file.filename == '':
-        flash('No selected file')
-        return redirect(url_for(PAGE_POOLS))
-
-    if file and allowed_file(file.filename):
-        # Secure the filename to prevent issues with directory traversal
-        filename = secure_filename(f"{pool_id}_{file.filename}")
-
-        # Construct the full path to save the file using current_app
-        upload_folder = app.config['UPLOAD_FOLDER']
-        file_path = os.path.join(upload_folder, filename)
-
-        # Relative path to store in the database
-        relative_path = f"diagrams/{filename}"
-
-        # Debugging output to verify the path
-        app.logger.info(f"File path to save: {file_path}")
-        app.logger.info(f"Path to store in database: {relative_path}")
-
-        # Ensure the directory exists
-        if not os.path.exists(upload_folder):
-            app.logger.error(f"Directory does not exist: {upload_folder}")
-            flash('Upload directory does not exist.')
-            return redirect(url_for(PAGE_POOLS))
-
-        app.logger.info(f"Directory exists: {upload_folder}")
-
-        try:
-            # Save the file to the designated folder
-            file.save(file_path)
+        return failed('No selected file')
 
-            # Store the diagram information in the database
-            new_diagram = ExamDiagram(
-                pool_id=pool_id,
-                name=diagram_name,
-                path=relative_path  # Store the relative path, not the full path
-            )
-            db.session.add(new_diagram)
-            db.session.commit()
-
-            flash('Diagram uploaded successfully')
-            return redirect(url_for(PAGE_POOLS, pool_id=pool_id))
+    if not (file and allowed_file(file.filename)):
+        return failed('Invalid file type. Allowed types: png, jpg, jpeg, gif')
 
-        except SQLAlchemyError as e:
-            db.session.rollback()  # Rollback the session in case of an error
-            app.logger.error(f"Error saving diagram to the database: {e}")
-            flash('An error occurred while saving the diagram to the database.')
+    upload_folder = app.config['UPLOAD_FOLDER']
 
-            return redirect(url_for(PAGE_POOLS))
+    # Ensure the directory exists
+    if not os.path.exists(upload_folder):
+        app.logger.error(f"Directory does not exist: {upload_folder}")
+        return failed('Upload directory does not exist.')
 
-    else:
-        flash('Invalid file type. Allowed types: png, jpg, jpeg, gif')
-        return redirect(url_for(PAGE_POOLS))
+    try:
+        # Save the file to the designated folder and store the diagram information
+        services.add_diagram(pool_id, diagram_name, file.filename, file.save)
+    except SQLAlchemyError as e:
+        db.session.rollback()  # Rollback the session in case of an error
+        app.logger.error(f"Error saving diagram to the database: {e}")
+        return failed('An error occurred while saving the diagram to the database.')
+
+    if wants_json:
+        return pool_rows(pool_id)
+    flash('Diagram uploaded successfully')
+    return redirect(url_for(PAGE_POOLS, pool_id=pool_id))
 
 # Route to delete diagrams
 @main_ve.route('/ve/delete_diagram/<int:diagram_id>', methods=['DELETE'])
@@ -493,7 +529,8 @@ def delete_diagram(diagram_id):
         diagram_id (int): The ID of the diagram to be deleted.
 
     Returns:
-        - 200 JSON response: {"success": True} on successful deletion.
+        - 200 JSON response: {"success": True, "id": pool_id, "html": ...} with the diagram
+          pool's re-rendered rows on successful deletion.
         - 404 JSON response: {"error": "Diagram not found."} if the diagram ID is invalid.
         - 404 JSON response: {"error": "Diagram file not found."} if the file does not exist on 
           the server.
@@ -510,20 +547,20 @@ def delete_diagram(diagram_id):
     if not diagram:
         return jsonify({"error": "Diagram not found."}), 404
 
-    # Delete the diagram file from the server
-    upload_folder = app.config['UPLOAD_FOLDER']
-    file_path = os.path.join(upload_folder, os.path.basename(diagram.path))
-    if os.path.exists(file_path):
-        os.remove(file_path)
-    else:
-        app.logger.error(f"File does not exist: {file_path}")
+    # Check the diagram file is in the diagram store
+    if not diagram_store.get_store().exists(diagram_store.store_name(diagram.path)):
+        app.logger.error(f"File does not exist: {diagram.path}")
         return jsonify({"error": "Diagram file not found."}), 404
 
-    # Delete the diagram itself
-    db.session.delete(diagram)
+    # Delete the diagram itself, and its files unless another pool shares them
+    pool_id = diagram.pool_id
+    paths = services.delete_diagrams([diagram])
+    bump_pool_version(pool_id)
     db.session.commit()
+    services.release_diagram_files(paths)
+    cache.invalidate(cache.POOLS)
 
-    return jsonify({"success": True}), 200
+    return pool_rows(pool_id)
 
 @main_ve.route('/ve/exam/results', methods=['POST'])
 @login_required
@@ -564,8 +601,7 @@ def ve_exam_results():
         return redirect(url_for(PAGE_SESSIONS))
 
     # Get the exam answers
-    exam_answers = \
-        ExamAnswer.query.filter_by(exam_id=exam.id).order_by(ExamAnswer.question_number).all()
+    exam_answers = answer_store.load_answers(exam)
 
     # Get the exam name
     exam_name = get_exam_name(f'{exam.element}')
@@ -603,16 +639,16 @@ def force_close_session(session_id):
     if session is None:
         return jsonify({"error": "Session not found."}), 404
 
-    # If the session is already closed, return success without modifying end_time
+    # If the session is already closed, return its row without modifying end_time
     if not session.status:
-        return jsonify({"success": True}), 200
+        return session_row(session)
 
     # Set the end time to the current time and mark the session as closed
     session.end_time = datetime.now()
     session.status = False
     db.session.commit()
 
-    return jsonify({"success": True}), 200
+    return session_row(session)
 
 @main_ve.route('/ve/session/results/<int:session_id>', methods=['GET'])
 @login_required
@@ -631,34 +667,33 @@ def ve_session_results(session_id):
         flash("Session not found.", "danger")
         return redirect(url_for(PAGE_SESSIONS))
 
-    # Query all exams associated with the session
+    # Query all exams associated with the session, counting correct answers in the same query
     exams = db.session.query(
         Exam.id.label('exam_id'),
         Exam.user_id,
         Exam.element,
+        Exam.packed,
         User.first_name,
-        User.last_name
-    ).join(User, User.id == Exam.user_id).filter(Exam.session_id == session_id).all()
+        User.last_name,
+        func.sum(
+            case((ExamAnswer.answer == ExamAnswer.correct_answer, 1), else_=0)
+        ).label('correct_count')
+    ).join(User, User.id == Exam.user_id) \
+        .outerjoin(ExamAnswer, ExamAnswer.exam_id == Exam.id) \
+        .filter(Exam.session_id == session_id) \
+        .group_by(Exam.id, Exam.user_id, Exam.element, Exam.packed, User.first_name,
+                  User.last_name) \
+        .order_by(Exam.id) \
+        .all()
+
+    # Packed exams have no answer rows to count, so score them from their packs
+    packed_scores = answer_store.packed_tallies([exam.exam_id for exam in exams if exam.packed])
 
     # Prepare the formatted results list to include scores and pass/fail status
     formatted_results = []
     for exam in exams:
-        # Retrieve the exam answers for this exam to calculate the score
-        answers = ExamAnswer.query.filter_by(exam_id=exam.exam_id).all()
-
-        # Calculate the number of correct answers
-        correct_count = sum(1 for answer in answers if answer.answer == answer.correct_answer)
-
-        # Determine the pass/fail threshold based on the element
-        if exam.element in [2, 3]:
-            pass_threshold = 26
-        elif exam.element == 4:
-            pass_threshold = 37
-        else:
-            pass_threshold = 0  # Fallback in case of unexpected element
-
-        # Determine pass/fail status
-        passed = correct_count >= pass_threshold
+        correct_count = packed_scores[exam.exam_id][2] if exam.exam_id in packed_scores \
+            else exam.correct_count or 0
 
         # Add the exam result data to the formatted list
         formatted_results.append({
@@ -666,7 +701,7 @@ def ve_session_results(session_id):
             "first_name": exam.first_name,
             "element": exam.element,
             "correct": correct_count,
-            "passed": passed,
+            "passed": exam_passed(exam.element, correct_count),
             "session_id": session_id,
             "hc_id": exam.user_id
         })
@@ -678,6 +713,45 @@ def ve_session_results(session_id):
         session=session
     )
 
+@main_ve.route('/ve/session/monitor/<int:session_id>', methods=['GET'])
+@login_required
+def ve_session_monitor(session_id):
+    """
+    Route to show the live progress of every candidate in a session.
+    """
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
+
+    session = db.session.get(ExamSession, session_id)
+    if session is None:
+        flash("Session not found.", "danger")
+        return redirect(url_for(PAGE_SESSIONS))
+
+    return render_template('session_monitor.html', session=session)
+
+@main_ve.route('/ve/session/monitor/<int:session_id>/stream', methods=['GET'])
+@login_required
+def ve_session_monitor_stream(session_id):
+    """
+    Stream a session's candidate progress as Server-Sent Events.
+
+    The stream opens with a 'snapshot' event listing every exam in the session, followed by a
+    'progress' event each time a candidate starts an exam, saves an answer or finishes.
+
+    Returns:
+        - 200 text/event-stream response.
+        - 404 JSON response if the session does not exist.
+    """
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
+
+    if db.session.get(ExamSession, session_id) is None:
+        return jsonify({"error": "Session not found."}), 404
+
+    return session_monitor.stream_response(session_id)
+
 @main_ve.route('/ve/delete_session/<int:session_id>', methods=['DELETE'])
 @login_required
 def delete_session(session_id):
@@ -703,81 +777,41 @@ def delete_session(session_id):
     try:
         db.session.delete(session)
         db.session.commit()
-        return jsonify({"success": True}), 200
+        return row_deleted(session_id)
     except Exception as e: # pylint: disable=W0718
         # Log the error and send a failure response
         db.session.rollback()
-        print(f"Error deleting session: {e}")
+        logger.error("Error deleting session %s: %s", session_id, e)
         return jsonify({"error": "Failed to delete the session. Please try again later."}), 500
 
 @main_ve.route('/ve/purge_sessions', methods=['DELETE'])
 @login_required
 def purge_sessions():
     """
-    Route to delete all exam sessions older than 15 months.
+    Route to queue the deletion of all exam sessions older than 15 months.
+
+    Returns:
+        - 202 JSON response with the job id and its status URL.
+        - 500 JSON response if the job could not be queued.
     """
     # Check if the current user has role 2
     if current_user.role != 2:
         flash(MSG_ACCESS_DENIED, "danger")
         return redirect(url_for(PAGE_LOGOUT))
 
-    # Get the current date
-    current_date = datetime.now().date()
-
-    # Calculate the date 15 months ago
-    purge_date = current_date.replace(year=current_date.year - 1, month=current_date.month - 3)
-
     try:
-        # Bulk delete associated ExamAnswer entries
-        db.session.query(ExamAnswer).filter(
-            ExamAnswer.exam_id.in_(
-                db.session.query(Exam.id).filter(
-                    Exam.session_id.in_(
-                        db.session.query(ExamSession.id).filter(
-                            ExamSession.session_date < purge_date
-                        )
-                    )
-                )
-            )
-        ).delete(synchronize_session=False)
-
-        # Bulk delete associated Exam entries
-        db.session.query(Exam).filter(
-            Exam.session_id.in_(
-                db.session.query(ExamSession.id).filter(
-                    ExamSession.session_date < purge_date
-                )
-            )
-        ).delete(synchronize_session=False)
-
-        # Bulk delete associated ExamRegistration entries
-        db.session.query(ExamRegistration).filter(
-            ExamRegistration.session_id.in_(
-                db.session.query(ExamSession.id).filter(
-                    ExamSession.session_date < purge_date
-                )
-            )
-        ).delete(synchronize_session=False)
-
-        # Bulk delete ExamSession entries
-        db.session.query(ExamSession).filter(
-            ExamSession.session_date < purge_date
-        ).delete(synchronize_session=False)
-
-        # Commit the changes
-        db.session.commit()
-        return jsonify({"success": True}), 200
+        # Delete the old sessions with their answers, exams and registrations in batches
+        purge_date = services.purge_cutoff(datetime.now().date())
+        job = jobs.enqueue('purge-sessions', user_id=current_user.id,
+                           before=purge_date.isoformat(),
+                           batch_size=app.config['PURGE_BATCH_SIZE'])
+        return job_accepted(job)
 
     except SQLAlchemyError as db_error:
         db.session.rollback()
-        print(f"Database error during purge: {db_error}")
+        logger.error("Database error during purge: %s", db_error)
         return jsonify({"success": False, "error": "Database operation failed"}), 500
 
-    except ValueError as value_error:
-        db.session.rollback()
-        print(f"Value error during purge: {value_error}")
-        return jsonify({"success": False, "error": "Value error in date calculation"}), 400
-
 @main_ve.route('/ve/analytics', methods=['GET'])
 @login_required
 def data_analytics():
@@ -807,19 +841,30 @@ def data_analytics():
 
     # Filter questions and answers by the selected pool
     if pool_id:
-        questions_in_pool = Question.query.filter_by(pool_id=pool_id).all()
-        question_ids = [q.id for q in questions_in_pool]
-        incorrect_answers = ExamAnswer.query.filter(
-            ExamAnswer.answer != ExamAnswer.correct_answer,
-            ExamAnswer.question_id.in_(question_ids)
-        ).all()
+        questions_in_pool = {q.id: q for q in Question.query.filter_by(pool_id=pool_id).all()}
+
+        # Count incorrect selections per question and answer in the database
+        incorrect_answers = db.session.query(
+            ExamAnswer.question_id,
+            ExamAnswer.answer,
+            func.count(ExamAnswer.id)
+        ).join(Question, Question.id == ExamAnswer.question_id).filter(
+            Question.pool_id == pool_id,
+            ExamAnswer.answer != ExamAnswer.correct_answer
+        ).group_by(ExamAnswer.question_id, ExamAnswer.answer).all()
+
+        # Packed exams have no answer rows to count, so add their selections separately
+        incorrect_answers += [
+            (question_id, selected_answer, selection_count)
+            for (question_id, selected_answer), selection_count
+            in answer_store.packed_incorrect_counts(pool_id).items()
+            if question_id in questions_in_pool
+        ]
 
         # Initialize analytics data for each question
-        for answer in incorrect_answers:
-            question_id = answer.question_id
-            selected_answer = answer.answer
+        for question_id, selected_answer, selection_count in incorrect_answers:
             if question_id not in analytics_data:
-                question = db.session.get(Question, question_id)
+                question = questions_in_pool[question_id]
                 analytics_data[question_id] = {
                     "miss_count": 0,
                     "incorrect_selections": {},
@@ -832,12 +877,14 @@ def data_analytics():
                     },
                     "answer_counts": [0, 0, 0, 0]  
                 }
-            analytics_data[question_id]["miss_count"] += 1
+            analytics_data[question_id]["miss_count"] += selection_count
             if selected_answer in analytics_data[question_id]["incorrect_selections"]:
-                analytics_data[question_id]["incorrect_selections"][selected_answer] += 1
+                analytics_data[question_id]["incorrect_selections"][selected_answer] += \
+                    selection_count
             else:
-                analytics_data[question_id]["incorrect_selections"][selected_answer] = 1
-            analytics_data[question_id]["answer_counts"][selected_answer] += 1
+                analytics_data[question_id]["incorrect_selections"][selected_answer] = \
+                    selection_count
+            analytics_data[question_id]["answer_counts"][selected_answer] += selection_count
 
         for question_id, data in analytics_data.items():
             data["most_selected_wrong_answer"] = max(
@@ -855,3 +902,83 @@ def data_analytics():
                            analytics_data=top_missed_questions,
                            pools=question_pools,
                            selected_pool_id=pool_id)
+
+@main_ve.route('/ve/csp_violations', methods=['GET'])
+@login_required
+def csp_violations():
+    """Route to show the most frequent Content Security Policy violations."""
+    # Check if the current user has role 2
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
+
+    # Save this worker's pending counts so the page is up to date
+    csp_reports.get_aggregator(app).flush()
+
+    violations = CspViolation.query.order_by(CspViolation.count.desc()) \
+        .limit(app.config['CSP_REPORT_TOP_N']).all()
+    return render_template('ve_csp_violations.html', violations=violations)
+
+@main_ve.route('/ve/jobs', methods=['GET'])
+@login_required
+def job_list():
+    """Return the most recent background jobs as JSON."""
+    # Check if the current user has role 2
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
+
+    recent = Job.query.order_by(Job.id.desc()).limit(20).all()
+    return jsonify({"jobs": [jobs.job_to_dict(job) for job in recent]}), 200
+
+@main_ve.route('/ve/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def job_status(job_id):
+    """
+    Return the status and progress of a background job.
+
+    Args:
+        job_id (int): The ID of the job.
+
+    Returns:
+        - 200 JSON response with the job's status, progress, result and error.
+        - 404 JSON response: {"error": "Job not found."} if the job ID is invalid.
+    """
+    # Check if the current user has role 2
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
+
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    response = jsonify(jobs.job_to_dict(job))
+    response.headers['Cache-Control'] = 'no-store'
+    return response, 200
+
+@main_ve.route('/ve/jobs/<int:job_id>/retry', methods=['POST'])
+@login_required
+def retry_job(job_id):
+    """
+    Queue a failed background job again.
+
+    Args:
+        job_id (int): The ID of the job.
+
+    Returns:
+        - 202 JSON response with the job id and its status URL.
+        - 400 JSON response if the job has not failed.
+        - 404 JSON response: {"error": "Job not found."} if the job ID is invalid.
+    """
+    # Check if the current user has role 2
+    if current_user.role != 2:
+        flash(MSG_ACCESS_DENIED, "danger")
+        return redirect(url_for(PAGE_LOGOUT))
+
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    if not jobs.retry(job):
+        return jsonify({"error": "Only failed jobs can be retried."}), 400
+    return job_accepted(job)
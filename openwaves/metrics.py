@@ -0,0 +1,230 @@
+"""File: metrics.py
+
+    This file contains the in-process metrics for the application and the /metrics route that
+    exposes them in the Prometheus text format. Counters and histograms are guarded by a lock so
+    they are safe under threaded workers; each worker process keeps its own values, so scrape
+    every process (or sum them in Prometheus) when running several.
+"""
+
+import bisect
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from flask import Blueprint, abort, current_app, g, request
+from sqlalchemy.exc import SQLAlchemyError
+
+metrics = Blueprint('metrics', __name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(labelnames, values, extra=()):
+    """Return the {name="value",...} part of a sample line."""
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class Counter:
+    """A monotonically increasing value, optionally split by labels.
+
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The HELP text.
+        labelnames (tuple): Names of the labels passed to inc().
+    """
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Add ``amount`` to the series identified by ``labels``."""
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Return the current value of one series (0 if it was never incremented)."""
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def samples(self):
+        """Return the exposition lines for every series."""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                for key, value in items]
+
+class Histogram:
+    """A distribution of observed values (usually durations in seconds) in cumulative buckets.
+
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The HELP text.
+        labelnames (tuple): Names of the labels passed to observe().
+        buckets (tuple): Upper bounds of the buckets, in increasing order.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record one observation in the series identified by ``labels``."""
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts plus one overflow slot, the sum and the count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        """Return the number of observations in one series."""
+        series = self._series.get(tuple(labels[name] for name in self.labelnames))
+        return series[2] if series else 0
+
+    def samples(self):
+        """Return the bucket, sum and count lines for every series."""
+        with self._lock:
+            items = sorted((key, (list(series[0]), series[1], series[2]))
+                           for key, series in self._series.items())
+        lines = []
+        for key, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                labels = _format_labels(self.labelnames, key, [('le', le)])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Gauge: # pylint: disable=R0903
+    """A value read from a callback each time the metrics are scraped.
+
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The HELP text.
+        function (callable): Returns the current value.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+
+    def samples(self):
+        """Return the exposition line for the current value."""
+        return [f"{self.name} {self.function()}"]
+
+def _count_open_exams():
+    from .models import Exam  # pylint: disable=C0415,R0401
+    return Exam.query.filter_by(open=True).count()
+
+def _count_open_sessions():
+    from .models import ExamSession  # pylint: disable=C0415,R0401
+    return ExamSession.query.filter_by(status=True).count()
+
+REQUEST_LATENCY = Histogram('openwaves_request_duration_seconds',
+                            'Time spent handling a request.', ('endpoint', 'method'))
+REQUESTS = Counter('openwaves_requests_total', 'Requests handled, by response status.',
+                   ('endpoint', 'method', 'status'))
+DB_QUERY_TIME = Histogram('openwaves_db_query_duration_seconds',
+                          'Database time spent per request.', ('endpoint',),
+                          buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+DB_QUERIES = Counter('openwaves_db_queries_total', 'SQL statements executed.', ('endpoint',))
+ANSWERS_SAVED = Counter('openwaves_answers_saved_total',
+                        'Exam answers saved (use rate() for answers per second).')
+LOGIN_ATTEMPTS = Counter('openwaves_login_attempts_total', 'Login attempts, by result.',
+                         ('result',))
+PASSWORD_HASH_TIME = Histogram('openwaves_password_hash_seconds',
+                               'Time spent hashing or verifying passwords.', ('operation',))
+OPEN_EXAMS = Gauge('openwaves_open_exams', 'Exams currently being taken.', _count_open_exams)
+OPEN_SESSIONS = Gauge('openwaves_open_sessions', 'Exam sessions currently open.',
+                      _count_open_sessions)
+
+REGISTRY = (REQUEST_LATENCY, REQUESTS, DB_QUERY_TIME, DB_QUERIES, ANSWERS_SAVED, LOGIN_ATTEMPTS,
+            PASSWORD_HASH_TIME, OPEN_EXAMS, OPEN_SESSIONS)
+
+def render_metrics():
+    """Return every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        try:
+            samples = metric.samples()
+        except SQLAlchemyError:
+            # A failing gauge query should not hide the in-process metrics
+            continue
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+@metrics.route('/metrics')
+def metrics_endpoint():
+    """Route to expose the application metrics to a Prometheus scraper.
+
+    Returns 404 when METRICS_ENABLED is off, or when no METRICS_TOKEN is set outside debug and
+    testing, so exam and session counts are never published to anyone who asks. When
+    METRICS_TOKEN is set the scraper must send it as a bearer token.
+    """
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        if not (current_app.debug or current_app.testing):
+            abort(404)
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    return current_app.response_class(render_metrics(), mimetype=CONTENT_TYPE)
+
+def init_app(app):
+    """Register the request timing hooks and the /metrics route with the Flask app."""
+    @app.before_request
+    def start_request_timer():
+        g.request_start_time = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop('request_start_time', None)
+        if start is None or not app.config['METRICS_ENABLED']:
+            return response
+        endpoint = request.endpoint or 'none'
+        REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint,
+                                method=request.method)
+        REQUESTS.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+        stats = g.get('query_stats')
+        if stats is not None:
+            DB_QUERY_TIME.observe(stats.total_time, endpoint=endpoint)
+            DB_QUERIES.inc(stats.count, endpoint=endpoint)
+        return response
+
+    app.register_blueprint(metrics)
@@ -55,6 +55,9 @@ class Pool(db.Model):
         element (int): The element number for the pool.
         start_date (datetime): The start date for the pool.
         end_date (datetime): The end date for the pool.
+        version (int): Incremented whenever the pool's questions or diagrams change.
+        question_version (int): Incremented only when the pool's questions change, so pre-built
+            exam forms survive diagram uploads.
     """
 
     id: int = db.Column(db.Integer, primary_key=True)
@@ -62,6 +65,8 @@ class Pool(db.Model):
     element: int = db.Column(db.Integer, nullable=False)
     start_date: datetime = db.Column(db.DateTime, nullable=False)
     end_date: datetime = db.Column(db.DateTime, nullable=False)
+    version: int = db.Column(db.Integer, nullable=False, default=1)
+    question_version: int = db.Column(db.Integer, nullable=False, default=1)
 
     def __repr__(self):
         """Return a string representation of the pool.
@@ -144,6 +149,10 @@ class ExamSession(db.Model): # pylint: disable=R0902
         gen_pool_id (int): The pool ID for the General exam.
         extra_pool_id (int): The pool ID for the Extra exam.
         status (bool): Whether the exam session is active (default False).
+        monitor_version (int): Bumped whenever a candidate's progress changes while the session
+            is watched, so live monitors in any worker process know when to reload.
+        monitor_watched_until (datetime, optional): Until when a live monitor watches the
+            session; progress changes are not published after it.
     """
 
     id: int = db.Column(db.Integer, primary_key=True)
@@ -154,6 +163,8 @@ class ExamSession(db.Model): # pylint: disable=R0902
     gen_pool_id: int = db.Column(db.Integer, db.ForeignKey(FK_POOL_ID), nullable=False)
     extra_pool_id: int = db.Column(db.Integer, db.ForeignKey(FK_POOL_ID), nullable=False)
     status: bool = db.Column(db.Boolean, default=False)
+    monitor_version: int = db.Column(db.Integer, nullable=False, default=0)
+    monitor_watched_until: datetime = db.Column(db.DateTime)
 
     def __repr__(self):
         """Return a string representation of the exam session.
@@ -180,7 +191,8 @@ class ExamRegistration(db.Model):
     """
 
     id: int = db.Column(db.Integer, primary_key=True)
-    session_id: int = db.Column(db.Integer, db.ForeignKey('exam_session.id'), nullable=False)
+    session_id: int = db.Column(db.Integer, db.ForeignKey('exam_session.id'), nullable=False,
+                                index=True)
     user_id: int = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     tech: bool = db.Column(db.Boolean, default=False)
     gen: bool = db.Column(db.Boolean, default=False)
@@ -195,7 +207,7 @@ class ExamRegistration(db.Model):
         return f"ExamRegistration('{self.user_id}', '{self.session_id}')"
 
 @dataclass
-class ExamDiagram(db.Model):
+class ExamDiagram(db.Model): # pylint: disable=R0902
     """Database model for exam diagrams.
     
     Represents a diagram for an exam question.
@@ -204,13 +216,22 @@ class ExamDiagram(db.Model):
         id (int): The primary key for the exam diagram.
         pool_id (int): The foreign key for the pool's id in Pool.
         name (str): The diagram name
-        path (str): The path to the diagram file.
+        path (str): The path to the diagram file (the PNG/JPEG every browser can show).
+        webp_path (str, optional): The path to the WebP version of the diagram.
+        digest (str, optional): SHA-256 of the uploaded file; diagrams with the same digest
+            share their files (see diagrams.py).
+        width (int, optional): The stored image's width in pixels.
+        height (int, optional): The stored image's height in pixels.
     """
 
     id: int = db.Column(db.Integer, primary_key=True)
     pool_id: int = db.Column(db.Integer, db.ForeignKey(FK_POOL_ID), nullable=False)
     name: str = db.Column(db.String(100), nullable=False)
     path: str = db.Column(db.String(100), nullable=False)
+    webp_path: str = db.Column(db.String(100), nullable=True)
+    digest: str = db.Column(db.String(64), nullable=True, index=True)
+    width: int = db.Column(db.Integer, nullable=True)
+    height: int = db.Column(db.Integer, nullable=True)
 
     def __repr__(self):
         """Return a string representation of the diagram.
@@ -221,7 +242,47 @@ class ExamDiagram(db.Model):
         return f"ExamDiagram('{self.path}')"
 
 @dataclass
-class Exam(db.Model):
+class ExamForm(db.Model): # pylint: disable=R0902
+    """Database model for pre-built exam forms.
+
+    Represents one fixed question set (version A, B, ...) of a pool, shared by every candidate
+    assigned to it (see exam_forms.py).
+
+    Attributes:
+        id (int): The primary key for the form.
+        pool_id (int): The foreign key referencing the pool's id in the Pool model.
+        label (str): The version letter shown to VEs.
+        pool_version (int): The pool's question_version the form was built from; forms built
+            from older questions are no longer assigned.
+        active (bool): Whether new exams are assigned the form (False once it is replaced).
+        assignments (int): Exams assigned the form, which picks the next form in round-robin
+            mode.
+        question_ids (bytes): The question ids in question number order, encoded as in
+            ExamAnswerPack.
+        correct_answers (bytes): The correct answer of each question, one byte each.
+        created_at (datetime): When the form was built.
+    """
+
+    id: int = db.Column(db.Integer, primary_key=True)
+    pool_id: int = db.Column(db.Integer, db.ForeignKey(FK_POOL_ID), nullable=False, index=True)
+    label: str = db.Column(db.String(2), nullable=False)
+    pool_version: int = db.Column(db.Integer, nullable=False)
+    active: bool = db.Column(db.Boolean, nullable=False, default=True)
+    assignments: int = db.Column(db.Integer, nullable=False, default=0)
+    question_ids: bytes = db.Column(db.LargeBinary, nullable=False)
+    correct_answers: bytes = db.Column(db.LargeBinary, nullable=False)
+    created_at: datetime = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        """Return a string representation of the form.
+
+        Returns:
+            str: A string showing the form id, pool and label.
+        """
+        return f"ExamForm('{self.id}', pool: '{self.pool_id}', '{self.label}')"
+
+@dataclass
+class Exam(db.Model): # pylint: disable=R0902
     """Database model for exams.
     
     Represents an exam that is part of a session, associated with a user and a question pool.
@@ -233,14 +294,31 @@ class Exam(db.Model):
         session_id (int): The foreign key referencing the session's id in the ExamSession model.
         element (int): The element number for the exam.
         open (bool): Indicates whether the exam is open (default is True).
+        packed (bool): The answers are kept in one ExamAnswerPack row instead of ExamAnswer
+            rows (see answer_store.py).
+        form_id (int, optional): The pre-built ExamForm the exam was assigned; its questions
+            and correct answers come from the form.
+        seed (int, optional): The seed the exam's questions are regenerated from on demand
+            (see utils.generate_seeded_exam); ExamAnswer rows are written only for answered
+            questions.
+        started_at (datetime): When the candidate launched the exam.
+        finished_at (datetime, optional): When the candidate submitted the exam, or the
+            session ended with it open.
     """
 
     id: int = db.Column(db.Integer, primary_key=True)
     user_id: int = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     pool_id: int = db.Column(db.Integer, db.ForeignKey(FK_POOL_ID), nullable=False)
-    session_id: int = db.Column(db.Integer, db.ForeignKey('exam_session.id'), nullable=False)
+    session_id: int = db.Column(db.Integer, db.ForeignKey('exam_session.id'), nullable=False,
+                                index=True)
     element: int = db.Column(db.Integer, nullable=False)
     open: bool = db.Column(db.Boolean, default=True)
+    packed: bool = db.Column(db.Boolean, nullable=False, default=False)
+    form_id: int = db.Column(db.Integer, db.ForeignKey('exam_form.id'), nullable=True,
+                             index=True)
+    seed: int = db.Column(db.BigInteger, nullable=True)
+    started_at: datetime = db.Column(db.DateTime, nullable=True, default=datetime.now)
+    finished_at: datetime = db.Column(db.DateTime, nullable=True)
 
     def __repr__(self):
         """Return a string representation of the exam.
@@ -264,14 +342,24 @@ class ExamAnswer(db.Model):
         question_number (int): The number of the question in the exam.
         correct_answer (int): The correct answer to the question.
         answer (int, optional): The answer provided by the user.
+        answered_at (int, optional): When the answer was chosen, in milliseconds since the
+            epoch; the offline exam client keeps the most recent write.
+
+    Each question of an exam has at most one row; the unique index stops concurrent requests
+    from both inserting the row of a seeded exam's question.
     """
 
+    __table_args__ = (db.Index('uq_exam_answer_question', 'exam_id', 'question_number',
+                               unique=True),)
+
     id: int = db.Column(db.Integer, primary_key=True)
-    exam_id: int = db.Column(db.Integer, db.ForeignKey('exam.id'), nullable=False)
-    question_id: int = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    exam_id: int = db.Column(db.Integer, db.ForeignKey('exam.id'), nullable=False, index=True)
+    question_id: int = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False,
+                                 index=True)
     question_number: int = db.Column(db.Integer(), nullable=False)
     correct_answer: int = db.Column(db.Integer(), nullable=False)
     answer: int = db.Column(db.Integer(), nullable=True)
+    answered_at: int = db.Column(db.BigInteger(), nullable=True)
 
     def __repr__(self):
         """Return a string representation of the answer.
@@ -280,3 +368,122 @@ class ExamAnswer(db.Model):
             str: A string showing the answer to the question.
         """
         return f"ExamAnswer('{self.answer}')"
+
+@dataclass
+class ExamAnswerPack(db.Model):
+    """Database model for the packed answers of one exam.
+
+    Holds what would otherwise be one ExamAnswer row per question as arrays, indexed by
+    question number - 1 (see answer_store.py for the encoding). Exams assigned an ExamForm
+    leave question_ids and correct_answers empty and read them from the form.
+
+    Attributes:
+        exam_id (int): The primary key, and the foreign key referencing the exam's id.
+        question_ids (bytes): The question ids, little-endian unsigned 32-bit integers.
+        correct_answers (bytes): The correct answer of each question, one byte each.
+        answers (bytes): The candidate's answers, one byte each (255 when unanswered).
+        answered_at (bytes): When each answer was chosen in milliseconds since the epoch,
+            little-endian signed 64-bit integers (0 when unanswered).
+    """
+
+    exam_id: int = db.Column(db.Integer, db.ForeignKey('exam.id'), primary_key=True,
+                             autoincrement=False)
+    question_ids: bytes = db.Column(db.LargeBinary, nullable=False)
+    correct_answers: bytes = db.Column(db.LargeBinary, nullable=False)
+    answers: bytes = db.Column(db.LargeBinary, nullable=False)
+    answered_at: bytes = db.Column(db.LargeBinary, nullable=False)
+
+    def __repr__(self):
+        """Return a string representation of the packed answers.
+
+        Returns:
+            str: A string showing the exam id and number of questions.
+        """
+        return f"ExamAnswerPack('{self.exam_id}', {len(self.correct_answers)} questions)"
+
+@dataclass
+class CspViolation(db.Model):
+    """Database model for aggregated Content Security Policy violations.
+
+    Represents every report for one directive and blocked resource, counted together.
+
+    Attributes:
+        id (int): The primary key for the violation.
+        directive (str): The violated directive (e.g. script-src-elem).
+        blocked_uri (str): The blocked resource.
+        document_uri (str): The first page seen reporting the violation.
+        count (int): Reports received (estimated when reports are sampled).
+        first_seen (datetime): When the violation was first reported.
+        last_seen (datetime): When the violation was last reported.
+    """
+
+    __table_args__ = (db.UniqueConstraint('directive', 'blocked_uri'),)
+
+    id: int = db.Column(db.Integer, primary_key=True)
+    directive: str = db.Column(db.String(100), nullable=False)
+    blocked_uri: str = db.Column(db.String(255), nullable=False)
+    document_uri: str = db.Column(db.String(255))
+    count: int = db.Column(db.Integer, nullable=False, default=0)
+    first_seen: datetime = db.Column(db.DateTime, nullable=False)
+    last_seen: datetime = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        """Return a string representation of the violation.
+
+        Returns:
+            str: A string showing the directive, blocked resource and count.
+        """
+        return f"CspViolation('{self.directive}', '{self.blocked_uri}', {self.count})"
+
+@dataclass
+class Job(db.Model): # pylint: disable=R0902
+    """Database model for background jobs.
+
+    Represents one heavy VE operation queued for the job worker.
+
+    Attributes:
+        id (int): The primary key for the job.
+        kind (str): The registered task that runs the job (e.g. import-questions).
+        params (str): JSON arguments for the task.
+        status (str): queued, running, succeeded or failed.
+        progress (int): Units of work done so far.
+        total (int): Units of work in the job (0 while unknown).
+        message (str): The latest progress message.
+        result (str): JSON result of a successful job.
+        error (str): The error from the latest failed attempt.
+        attempts (int): Attempts started so far.
+        max_attempts (int): Attempts allowed before the job fails.
+        user_id (int, optional): The VE who queued the job.
+        created_at (datetime): When the job was queued.
+        run_after (datetime): The job is not started before this time (retry back-off).
+        started_at (datetime, optional): When the latest attempt started.
+        heartbeat_at (datetime, optional): When the worker running the job last reported it
+            was alive.
+        finished_at (datetime, optional): When the job succeeded or failed.
+    """
+
+    id: int = db.Column(db.Integer, primary_key=True)
+    kind: str = db.Column(db.String(50), nullable=False)
+    params: str = db.Column(db.Text, nullable=False, default='{}')
+    status: str = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    progress: int = db.Column(db.Integer, nullable=False, default=0)
+    total: int = db.Column(db.Integer, nullable=False, default=0)
+    message: str = db.Column(db.String(255))
+    result: str = db.Column(db.Text)
+    error: str = db.Column(db.Text)
+    attempts: int = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts: int = db.Column(db.Integer, nullable=False, default=3)
+    user_id: int = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at: datetime = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    run_after: datetime = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    started_at: datetime = db.Column(db.DateTime)
+    heartbeat_at: datetime = db.Column(db.DateTime)
+    finished_at: datetime = db.Column(db.DateTime)
+
+    def __repr__(self):
+        """Return a string representation of the job.
+
+        Returns:
+            str: A string showing the job id, kind and status.
+        """
+        return f"Job('{self.id}', '{self.kind}', '{self.status}')"
@@ -0,0 +1,100 @@
+"""File: pdf.py
+
+    This file contains a minimal PDF writer for the printable score reports. Documents are
+    pages of wrapped text lines in the standard Helvetica fonts, which every PDF viewer has
+    built in, so nothing is embedded and no PDF package is needed. Page content streams are
+    Flate compressed.
+"""
+
+import textwrap
+import zlib
+
+PAGE_WIDTH = 612  # US Letter, in points
+PAGE_HEIGHT = 792
+MARGIN = 54
+FONTS = {False: 'F1', True: 'F2'}  # Helvetica, Helvetica-Bold
+# Average Helvetica character width as a fraction of the font size, used to wrap lines
+CHAR_WIDTH = 0.52
+LINE_SPACING = 1.3
+
+def pdf_string(text):
+    """Encode text as a PDF literal string in the fonts' WinAnsi encoding."""
+    data = text.encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+class PdfDocument:
+    """A PDF built line by line, starting a new page when the current one is full.
+
+    Attributes:
+        title (str): The document title recorded in its metadata.
+        pages (list): The content stream commands of each page.
+    """
+
+    def __init__(self, title):
+        self.title = title
+        self.pages = []
+        self.y = 0
+        self.new_page()
+
+    def new_page(self):
+        """Start a new page at its top margin."""
+        self.pages.append([])
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def text(self, line, size=10, bold=False, indent=0):
+        """Add text, wrapped to the page width.
+
+        Args:
+            line (str): The text.
+            size (int): Font size in points.
+            bold (bool): Use Helvetica-Bold.
+            indent (int): Left indent in points.
+        """
+        width = int((PAGE_WIDTH - 2 * MARGIN - indent) / (size * CHAR_WIDTH))
+        for part in textwrap.wrap(line, width) or ['']:
+            leading = size * LINE_SPACING
+            if self.y - leading < MARGIN:
+                self.new_page()
+            self.y -= leading
+            self.pages[-1].append(
+                b'BT /%s %d Tf %d %.1f Td ' % (FONTS[bold].encode(), size, MARGIN + indent,
+                                               self.y) + pdf_string(part) + b' Tj ET')
+
+    def space(self, points):
+        """Leave vertical space."""
+        self.y -= points
+
+    def to_bytes(self):
+        """Return the finished PDF file."""
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            None,  # The page tree, filled in once the page objects are numbered
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica '
+            b'/Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold '
+            b'/Encoding /WinAnsiEncoding >>',
+            b'<< /Title ' + pdf_string(self.title) + b' /Producer (OpenWaves) >>',
+        ]
+        page_refs = []
+        for commands in self.pages:
+            content = zlib.compress(b'\n'.join(commands))
+            objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content)
+                           + content + b'\nendstream')
+            objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                           b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> '
+                           b'/Contents %d 0 R >>' % (PAGE_WIDTH, PAGE_HEIGHT, len(objects)))
+            page_refs.append(b'%d 0 R' % len(objects))
+        objects[1] = b'<< /Type /Pages /Kids [' + b' '.join(page_refs) + \
+            b'] /Count %d >>' % len(page_refs)
+
+        output = bytearray(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        xref = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        output += b'trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n' \
+            % (len(objects) + 1, xref)
+        return bytes(output)
@@ -0,0 +1,113 @@
+"""File: query_stats.py
+
+    This file contains the per-request SQL instrumentation for the application. SQLAlchemy engine
+    events count the statements and database time of each request, log them, optionally expose
+    them in response headers, and flag statements repeated often enough to look like an N+1.
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Literal values are stripped so "WHERE id = 1" and "WHERE id = 2" count as the same statement
+LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+class QueryStats:
+    """Statement count and total database time for one request (or one capture block).
+
+    Attributes:
+        count (int): Number of statements executed.
+        total_time (float): Total time spent executing them, in seconds.
+        statements (Counter): Executions per normalized statement.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, elapsed):
+        """Record one executed statement."""
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[LITERAL_PATTERN.sub('?', ' '.join(statement.split()))] += 1
+
+    def repeated(self, threshold):
+        """Return the statements executed at least ``threshold`` times (likely N+1 queries)."""
+        return {statement: count for statement, count in self.statements.items()
+                if count >= threshold}
+
+    def report(self):
+        """Return a readable summary listing each statement and how often it ran."""
+        lines = [f"{self.count} queries in {self.total_time * 1000:.1f} ms"]
+        lines += [f"  {count}x {statement}" for statement, count in self.statements.most_common()]
+        return '\n'.join(lines)
+
+_captures = []
+_captures_lock = threading.Lock()
+
+@contextmanager
+def capture_queries():
+    """Collect every statement executed on any engine while the block is active.
+
+    Unlike the per-request stats this spans several requests, which makes it suitable for tests
+    that drive the app through the test client.
+
+    Yields:
+        QueryStats: The statistics collected so far.
+    """
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, _cursor, statement, _parameters, _context, _executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    if has_app_context():
+        if 'query_stats' not in g:
+            g.query_stats = QueryStats()
+        g.query_stats.record(statement, elapsed)
+    for stats in list(_captures):
+        stats.record(statement, elapsed)
+
+def init_app(app):
+    """Register the per-request logging and response headers with the Flask app."""
+    @app.before_request
+    def reset_query_stats():
+        # The app context (and g) can outlive a single request, e.g. under the test client
+        g.query_stats = QueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        if not app.config['QUERY_STATS_ENABLED']:
+            return response
+        stats = g.get('query_stats') or QueryStats()
+
+        app.logger.debug("%s %s: %d queries, %.1f ms", request.method, request.path,
+                         stats.count, stats.total_time * 1000)
+        threshold = app.config['QUERY_STATS_REPEAT_THRESHOLD']
+        for statement, count in stats.repeated(threshold).items():
+            app.logger.warning("Possible N+1 in %s: %d executions of %s", request.endpoint,
+                               count, statement)
+
+        if app.config['QUERY_STATS_HEADER']:
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['X-Query-Time'] = f"{stats.total_time * 1000:.2f}"
+            response.headers.add('Server-Timing',
+                                 f'db;dur={stats.total_time * 1000:.2f};'
+                                 f'desc="{stats.count} queries"')
+        return response
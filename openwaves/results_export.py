@@ -0,0 +1,213 @@
+"""File: results_export.py
+
+    This file contains the streaming export of exam results for VEC submission. One aggregated
+    query over the exams of a session or a date range is read in batches with yield_per, and
+    each batch is written out as CSV or XLSX before the next is fetched, so an export of a year
+    of sessions holds only one batch in memory however many rows it produces.
+
+    The XLSX writer streams the workbook through zipfile onto an unseekable buffer (each entry
+    is followed by a data descriptor instead of a rewritten header), so no spreadsheet library
+    is needed and the worksheet is never assembled in memory.
+"""
+
+import csv
+import re
+import zipfile
+from datetime import datetime, time, timedelta
+from itertools import islice
+from xml.sax.saxutils import escape
+from sqlalchemy import case, func
+from . import answer_store
+from .imports import db, Exam, ExamAnswer, ExamSession, User, exam_passed
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+EXPORT_COLUMNS = ('exam_id', 'session_id', 'session_date', 'username', 'last_name',
+                  'first_name', 'element', 'correct', 'total', 'result', 'started_at',
+                  'finished_at')
+MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+BATCH_SIZE = 500
+
+# Characters XML 1.0 cannot hold, even escaped
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>')
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/officeDocument"/></Relationships>')
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Results" sheetId="1" r:id="rId1"/></sheets></workbook>')
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="worksheets/sheet1.xml" Type="http://schemas.'
+    'openxmlformats.org/officeDocument/2006/relationships/worksheet"/></Relationships>')
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+XLSX_SHEET_END = '</sheetData></worksheet>'
+
+def results_query(session_id=None, start=None, end=None):
+    """Build the aggregated results query, one row per exam.
+
+    Args:
+        session_id (int): Only export this session.
+        start (date): Only export sessions on or after this day.
+        end (date): Only export sessions on or before this day.
+
+    Returns:
+        Query: Exams with their session, candidate and answer counts, in session date order.
+    """
+    query = db.session.query(
+        Exam.id, Exam.session_id, ExamSession.session_date, User.username, User.last_name,
+        User.first_name, Exam.element, Exam.open, Exam.packed, Exam.pool_id, Exam.seed,
+        Exam.started_at, Exam.finished_at,
+        func.count(ExamAnswer.id).label('total'),
+        func.sum(case((ExamAnswer.answer == ExamAnswer.correct_answer, 1), else_=0))
+        .label('correct')
+    ).join(ExamSession, ExamSession.id == Exam.session_id) \
+        .join(User, User.id == Exam.user_id) \
+        .outerjoin(ExamAnswer, ExamAnswer.exam_id == Exam.id)
+    if session_id is not None:
+        query = query.filter(Exam.session_id == session_id)
+    if start is not None:
+        query = query.filter(ExamSession.session_date >= datetime.combine(start, time.min))
+    if end is not None:
+        query = query.filter(ExamSession.session_date
+                             < datetime.combine(end + timedelta(days=1), time.min))
+
+    return query.group_by(Exam.id, Exam.session_id, ExamSession.session_date, User.username,
+                          User.last_name, User.first_name, Exam.element, Exam.open,
+                          Exam.packed, Exam.pool_id, Exam.seed, Exam.started_at,
+                          Exam.finished_at) \
+        .order_by(ExamSession.session_date, Exam.session_id, Exam.id)
+
+def iter_results(session_id=None, start=None, end=None, batch_size=BATCH_SIZE):
+    """Yield one tuple of EXPORT_COLUMNS per exam, fetching batch_size exams at a time.
+
+    Packed and seeded exams are counted per batch, as on the results and monitor pages.
+    """
+    rows = iter(results_query(session_id, start, end).yield_per(batch_size))
+    while batch := list(islice(rows, batch_size)):
+        packed = answer_store.packed_tallies([row.id for row in batch if row.packed])
+        seeded = answer_store.seeded_totals((row.id, row.pool_id, row.seed) for row in batch)
+        for row in batch:
+            _answered, total, correct = packed.get(row.id, (None, row.total, row.correct or 0))
+            total = seeded.get(row.id, total)
+            if row.open:
+                result = ''
+            else:
+                result = 'Pass' if exam_passed(row.element, correct) else 'Fail'
+            yield (row.id, row.session_id, row.session_date.date(), row.username,
+                   row.last_name, row.first_name, row.element, correct, total, result,
+                   row.started_at, row.finished_at)
+
+def format_value(value):
+    """Return the text of an exported value (ISO dates and times, blank for None)."""
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat(sep=' ', timespec='seconds') if hasattr(value, 'hour') \
+            else value.isoformat()
+    return str(value)
+
+class LineBuffer: # pylint: disable=R0903
+    """A file-like object whose write() returns what was written, for csv.writer."""
+
+    def write(self, value):
+        """Return the written text instead of storing it."""
+        return value
+
+def iter_csv(rows):
+    """Yield the results as CSV text, one chunk per batch of rows."""
+    writer = csv.writer(LineBuffer())
+    yield writer.writerow(EXPORT_COLUMNS)
+    rows = iter(rows)
+    while batch := list(islice(rows, BATCH_SIZE)):
+        yield ''.join(writer.writerow([format_value(value) for value in row]) for row in batch)
+
+class ChunkBuffer:
+    """An unseekable output for zipfile that hands the written bytes back in chunks."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        """Keep a copy of the written bytes until the next drain()."""
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        """Nothing to flush; zipfile calls this when it closes."""
+
+    def drain(self):
+        """Return and forget the bytes written since the last call."""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def xlsx_cell(value):
+    """Return the XML of one worksheet cell."""
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(INVALID_XML_CHARS.sub('', format_value(value)))
+    return f'<c t="inlineStr"><is><t>{text}</t></is></c>'
+
+def xlsx_row(values):
+    """Return the XML of one worksheet row."""
+    return '<row>' + ''.join(xlsx_cell(value) for value in values) + '</row>'
+
+def iter_xlsx(rows):
+    """Yield the results as an XLSX workbook, one chunk per batch of rows."""
+    output = ChunkBuffer()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        workbook.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        workbook.writestr('xl/workbook.xml', XLSX_WORKBOOK)
+        workbook.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        with workbook.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write((XLSX_SHEET_START + xlsx_row(EXPORT_COLUMNS)).encode())
+            rows = iter(rows)
+            while batch := list(islice(rows, BATCH_SIZE)):
+                sheet.write(''.join(xlsx_row(row) for row in batch).encode())
+                yield output.drain()
+            sheet.write(XLSX_SHEET_END.encode())
+    yield output.drain()
+
+def export_results(export_format, session_id=None, start=None, end=None):
+    """Return a generator of the export's chunks (str for CSV, bytes for XLSX).
+
+    Raises:
+        ValueError: If the format is not one of EXPORT_FORMATS.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Export format must be one of {', '.join(EXPORT_FORMATS)}.")
+    rows = iter_results(session_id, start, end)
+    return iter_csv(rows) if export_format == 'csv' else iter_xlsx(rows)
+
+def export_filename(export_format, session_id=None, start=None, end=None):
+    """Return the download name of an export, e.g. results_session_4.csv."""
+    if session_id is not None:
+        scope = f'session_{session_id}'
+    else:
+        scope = f"{start or 'start'}_to_{end or 'today'}"
+    return f'results_{scope}.{export_format}'
@@ -0,0 +1,217 @@
+"""File: score_reports.py
+
+    This file contains the batch generation of printable score reports and Certificate of
+    Successful Completion of Examination (CSCE) drafts for a whole exam session. The session's
+    results are read from the database once, in the request, as plain data; the CPU-bound PDF
+    rendering is then spread over a process pool and each finished file is written into a ZIP
+    that is streamed back while the rest are still rendering.
+
+    REPORT_WORKERS sets the pool size: 0 for one process per CPU, 1 to render in the calling
+    process (used by the tests). The pool is started on first use and kept for the life of the
+    app process; its processes are spawned rather than forked so they do not inherit the app's
+    threads and database connections.
+"""
+
+import atexit
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from . import answer_store
+from .imports import db, Exam, ExamSession, Question, User, exam_passed
+from .pdf import PdfDocument
+from .results_export import ChunkBuffer
+
+ELEMENT_NAMES = {2: 'Element 2 (Technician)', 3: 'Element 3 (General)', 4: 'Element 4 (Extra)'}
+OPTION_LETTERS = 'ABCD'
+
+_pool_lock = threading.Lock()
+
+def option_letter(option):
+    """Return the letter of an answer option, or '-' if unanswered."""
+    return OPTION_LETTERS[option] if option is not None and 0 <= option < 4 else '-'
+
+def collect_reports(session_id):
+    """Read everything the session's reports need as plain, picklable data.
+
+    Args:
+        session_id (int): The exam session.
+
+    Returns:
+        dict: The session's id and date, and one dict per finished exam in candidate order
+        with the candidate, element, score and each question's answer.
+    """
+    session = db.session.get(ExamSession, session_id)
+    rows = db.session.query(Exam, User).join(User, User.id == Exam.user_id) \
+        .filter(Exam.session_id == session_id, Exam.open.is_(False)) \
+        .order_by(User.last_name, User.first_name, Exam.element).all()
+
+    answers = answer_store.load_exam_answers([exam for exam, _user in rows])
+    question_ids = {answer.question_id for exam_answers in answers.values()
+                    for answer in exam_answers}
+    questions = {question.id: question for question in
+                 Question.query.filter(Question.id.in_(question_ids))} if question_ids else {}
+
+    exams = []
+    for exam, user in rows:
+        exam_answers = answers[exam.id]
+        correct = sum(1 for answer in exam_answers if answer.answer == answer.correct_answer)
+        exams.append({
+            'exam_id': exam.id,
+            'user_id': user.id,
+            'username': user.username,
+            'name': f'{user.first_name} {user.last_name}',
+            'element': exam.element,
+            'correct': correct,
+            'total': len(exam_answers),
+            'passed': exam_passed(exam.element, correct),
+            'finished_at': exam.finished_at,
+            'questions': [{
+                'number': answer.question_number,
+                'pool_number': getattr(questions.get(answer.question_id), 'number', ''),
+                'text': getattr(questions.get(answer.question_id), 'question', ''),
+                'answer': answer.answer,
+                'correct_answer': answer.correct_answer,
+            } for answer in exam_answers],
+        })
+    return {'session_id': session.id, 'session_date': session.session_date, 'exams': exams}
+
+def render_score_report(session, exam):
+    """Render one exam's score report as a PDF.
+
+    Args:
+        session (dict): The session from collect_reports(), without its exams.
+        exam (dict): One exam from collect_reports().
+
+    Returns:
+        bytes: The PDF file.
+    """
+    document = PdfDocument(f"Score report - {exam['name']}")
+    document.text('Examination Score Report', size=16, bold=True)
+    document.space(6)
+    document.text(f"Candidate: {exam['name']} ({exam['username']})")
+    document.text(f"Exam session: {session['session_id']}, "
+                  f"{session['session_date']:%B %d, %Y}")
+    document.text(ELEMENT_NAMES.get(exam['element'], f"Element {exam['element']}"))
+    document.text(f"Score: {exam['correct']}/{exam['total']} "
+                  f"({'Pass' if exam['passed'] else 'Fail'})", size=12, bold=True)
+    document.space(10)
+
+    for question in exam['questions']:
+        correct = question['answer'] == question['correct_answer']
+        document.text(f"{question['number']}. {question['pool_number']}   "
+                      f"Answer: {option_letter(question['answer'])}   "
+                      f"Correct: {option_letter(question['correct_answer'])}   "
+                      f"{'Correct' if correct else 'Incorrect'}", bold=not correct)
+        document.text(question['text'], size=9, indent=18)
+        document.space(3)
+    return document.to_bytes()
+
+def render_csce_draft(session, candidate_exams):
+    """Render a draft CSCE listing the elements a candidate passed in the session.
+
+    Args:
+        session (dict): The session from collect_reports(), without its exams.
+        candidate_exams (list): The candidate's exams from collect_reports(), at least one
+            of them passed.
+
+    Returns:
+        bytes: The PDF file.
+    """
+    first = candidate_exams[0]
+    document = PdfDocument(f"CSCE draft - {first['name']}")
+    document.text('Certificate of Successful Completion of Examination', size=16, bold=True)
+    document.text('DRAFT - not valid until completed and signed by three accredited VEs',
+                  bold=True)
+    document.space(10)
+    document.text(f"Candidate: {first['name']}")
+    document.text(f"Call sign / username: {first['username']}")
+    document.text(f"Exam session: {session['session_id']}, "
+                  f"{session['session_date']:%B %d, %Y}")
+    document.space(10)
+    document.text('Examination elements passed:', bold=True)
+    for exam in candidate_exams:
+        if exam['passed']:
+            document.text(f"{ELEMENT_NAMES.get(exam['element'], exam['element'])}: "
+                          f"{exam['correct']}/{exam['total']}", indent=18)
+    document.space(24)
+    for number in (1, 2, 3):
+        document.text(f'VE {number} signature: ______________________   '
+                      'Call sign: __________   Date: __________')
+        document.space(12)
+    return document.to_bytes()
+
+def safe_name(text):
+    """Return text reduced to a portable file name part."""
+    return re.sub(r'[^A-Za-z0-9]+', '_', text).strip('_') or 'candidate'
+
+def report_tasks(data):
+    """List the files of a session's report bundle.
+
+    Args:
+        data (dict): The session from collect_reports().
+
+    Returns:
+        list: (file name, render function, args) per file.
+    """
+    session = {key: value for key, value in data.items() if key != 'exams'}
+    tasks = []
+    by_candidate = {}
+    for exam in data['exams']:
+        name = safe_name(exam['name'])
+        tasks.append((f"score_reports/{name}_{exam['exam_id']}_element{exam['element']}.pdf",
+                      render_score_report, (session, exam)))
+        by_candidate.setdefault(exam['user_id'], []).append(exam)
+
+    for user_id, candidate_exams in by_candidate.items():
+        if any(exam['passed'] for exam in candidate_exams):
+            tasks.append((f"csce_drafts/{safe_name(candidate_exams[0]['name'])}_{user_id}.pdf",
+                          render_csce_draft, (session, candidate_exams)))
+    return tasks
+
+def run_task(task):
+    """Render one file in a pool process."""
+    render, args = task
+    return render(*args)
+
+def get_pool(app=None):
+    """Return the app's report process pool, or None to render in the calling process."""
+    app = app or current_app
+    workers = app.config.get('REPORT_WORKERS', 0) or os.cpu_count() or 1
+    if workers == 1:
+        return None
+    with _pool_lock:
+        pool = app.extensions.get('openwaves_report_pool')
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers,
+                                       mp_context=multiprocessing.get_context('spawn'))
+            app.extensions['openwaves_report_pool'] = pool
+            atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+def render_files(tasks, pool=None):
+    """Yield (file name, PDF bytes) for each task in order, rendering in the pool if given."""
+    jobs = [(render, args) for _name, render, args in tasks]
+    results = pool.map(run_task, jobs) if pool is not None else map(run_task, jobs)
+    for (name, _render, _args), data in zip(tasks, results):
+        yield name, data
+
+def iter_zip(files):
+    """Yield a ZIP archive of (name, bytes) files, one chunk per file as it is added.
+
+    The PDFs are already compressed, so they are stored rather than deflated again.
+    """
+    output = ChunkBuffer()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            yield output.drain()
+    yield output.drain()
+
+def session_reports(session_id):
+    """Collect a session's results and return a generator of its report ZIP's chunks."""
+    tasks = report_tasks(collect_reports(session_id))
+    return iter_zip(render_files(tasks, get_pool()))
@@ -0,0 +1,390 @@
+"""File: services.py
+
+    This file contains the bulk administrative operations shared by the VE routes and the
+    `flask openwaves` commands: creating pools, importing questions and diagrams, purging old
+    sessions, rescoring answers and database maintenance.
+"""
+
+import calendar
+import io
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from flask import current_app
+from sqlalchemy import func, inspect, literal, select
+from . import answer_store, cache, diagram_store, diagrams
+from .imports import db, Pool, Question, TLI, ExamSession, ExamDiagram, Exam, ExamAnswer, \
+    ExamRegistration, allowed_file, bump_pool_version
+
+# Months a session is kept before it can be purged
+RETENTION_MONTHS = 15
+
+# Columns of the question pool CSV files published by the NCVEC
+QUESTION_COLUMNS = ('id', 'correct', 'question', 'a', 'b', 'c', 'd', 'refs')
+
+def missing_question_columns(fieldnames):
+    """Return the QUESTION_COLUMNS missing from a pool CSV header, sorted."""
+    return sorted(set(QUESTION_COLUMNS) - set(fieldnames or ()))
+
+def create_pool(name, element, start_date, end_date):
+    """Create a question pool.
+
+    Args:
+        name (str): The pool name.
+        element (int): The exam element (2, 3 or 4).
+        start_date (str): The first day the pool is valid, as YYYY-MM-DD.
+        end_date (str): The last day the pool is valid, as YYYY-MM-DD.
+
+    Returns:
+        Pool: The committed pool.
+    """
+    pool = Pool(
+        name=name,
+        element=element,
+        start_date=datetime.strptime(start_date, '%Y-%m-%d'),
+        end_date=datetime.strptime(end_date, '%Y-%m-%d'),
+    )
+    db.session.add(pool)
+    db.session.commit()
+    cache.invalidate(cache.POOLS)
+    return pool
+
+def import_questions(pool_id, rows):
+    """Add questions from parsed CSV rows to a pool and count them per TLI.
+
+    Args:
+        pool_id (int): The pool receiving the questions.
+        rows (iterable): Dicts with the QUESTION_COLUMNS keys, e.g. from csv.DictReader.
+
+    Returns:
+        int: The number of questions imported.
+    """
+    tlis = {}
+    questions = []
+    for row in rows:
+        # The TLI is the first 3 characters of the question number
+        tli = row['id'][:3]
+        tlis[tli] = tlis.get(tli, 0) + 1
+        questions.append({
+            'pool_id': pool_id,
+            'number': row['id'],
+            'correct_answer': row['correct'],
+            'question': row['question'],
+            'option_a': row['a'],
+            'option_b': row['b'],
+            'option_c': row['c'],
+            'option_d': row['d'],
+            'refs': row['refs']
+        })
+
+    # Seeded exams would regenerate different questions from the changed pool
+    answer_store.materialize_seeded(pool_id)
+    db.session.add_all(TLI(pool_id=pool_id, tli=tli, quantity=count)
+                       for tli, count in tlis.items())
+
+    # Insert every question with one executemany
+    if questions:
+        db.session.execute(Question.__table__.insert(), questions)
+    bump_pool_version(pool_id, questions=True)
+    db.session.commit()
+    cache.invalidate(cache.POOLS)
+    return len(questions)
+
+def add_diagram(pool_id, name, filename, save, commit=True):
+    """Store a diagram in the upload folder and record it for a pool.
+
+    The upload is resized and converted by diagrams.store_diagram() and stored under its
+    content hash, so the same image added to several pools is kept once.
+
+    Args:
+        pool_id (int): The pool the diagram belongs to.
+        name (str): The diagram name referenced by question text, e.g. "T1".
+        filename (str): The original file name.
+        save (callable): Writes the uploaded file to the binary stream it is given.
+        commit (bool): Commit the session after adding the diagram.
+
+    Returns:
+        ExamDiagram: The new diagram.
+    """
+    upload = io.BytesIO()
+    save(upload)
+    diagram = ExamDiagram(pool_id=pool_id, name=name,
+                          **diagrams.store_diagram(upload.getvalue(), filename))
+    db.session.add(diagram)
+    bump_pool_version(pool_id)
+    if commit:
+        db.session.commit()
+        cache.invalidate(cache.POOLS)
+    return diagram
+
+def diagram_file_paths(diagram):
+    """Return the stored file paths of a diagram (its image and any WebP version)."""
+    return [path for path in (diagram.path, diagram.webp_path) if path]
+
+def diagram_references(paths):
+    """Count the diagrams referencing each of the given file paths.
+
+    Args:
+        paths (set): Stored file paths, as in ExamDiagram.path and ExamDiagram.webp_path.
+
+    Returns:
+        Counter: The number of diagrams using each path; unreferenced paths are absent.
+    """
+    counts = Counter()
+    for column in (ExamDiagram.path, ExamDiagram.webp_path):
+        counts.update(dict(db.session.query(column, func.count())
+                           .filter(column.in_(paths)).group_by(column)))
+    return counts
+
+def delete_diagrams(deleted):
+    """Delete diagrams; nothing is committed.
+
+    Their files are left in place: pass the returned paths to release_diagram_files() once the
+    deletion has been committed.
+
+    Args:
+        deleted (list): The ExamDiagram rows to delete.
+
+    Returns:
+        set: The stored file paths the deleted diagrams used.
+    """
+    paths = {path for diagram in deleted for path in diagram_file_paths(diagram)}
+    for diagram in deleted:
+        db.session.delete(diagram)
+    return paths
+
+def release_diagram_files(paths):
+    """Remove the files of deleted diagrams that no diagram references any more.
+
+    Identical uploads share their files, so the references are counted after the deletion
+    has committed; a diagram added with the same bytes since then keeps the file.
+
+    Args:
+        paths (set): The paths returned by delete_diagrams().
+    """
+    store = diagram_store.get_store()
+    references = diagram_references(paths)
+    for path in sorted(paths):
+        if references[path]:
+            continue
+        if not store.delete(diagram_store.store_name(path)):
+            current_app.logger.error(f"File does not exist: {path}")
+
+def import_diagrams(pool_id, directory, progress=None):
+    """Copy every image in a directory into the upload folder as diagrams of a pool.
+
+    Each diagram is named after its file without the extension, so T1.png becomes "T1".
+
+    Args:
+        pool_id (int): The pool receiving the diagrams.
+        directory (str): The directory to import.
+        progress (callable): Called with each imported file name.
+
+    Returns:
+        int: The number of diagrams imported.
+    """
+    os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+    imported = 0
+    for entry in sorted(os.listdir(directory)):
+        source = os.path.join(directory, entry)
+        if not os.path.isfile(source) or not allowed_file(entry):
+            continue
+        add_diagram(pool_id, os.path.splitext(entry)[0], entry,
+                    lambda target, source=source: target.write(Path(source).read_bytes()),
+                    commit=False)
+        imported += 1
+        if progress:
+            progress(entry)
+    db.session.commit()
+    cache.invalidate(cache.POOLS)
+    return imported
+
+def purge_cutoff(today):
+    """Return the date before which sessions are purged (RETENTION_MONTHS before today)."""
+    months = today.year * 12 + today.month - 1 - RETENTION_MONTHS
+    year, month = divmod(months, 12)
+    month += 1
+    # Clamp the day for shorter months (e.g. 31 May -> 28 or 29 February)
+    return today.replace(year=year, month=month,
+                         day=min(today.day, calendar.monthrange(year, month)[1]))
+
+def purge_sessions(before, batch_size=500, progress=None):
+    """Delete sessions older than a date with their registrations, exams and answers.
+
+    Sessions are deleted in batches, each in its own transaction, so a large purge does not
+    hold the database lock for its whole duration.
+
+    Args:
+        before (date): Sessions dated before this are deleted.
+        batch_size (int): Sessions deleted per transaction.
+        progress (callable): Called with (sessions deleted, total) after each batch.
+
+    Returns:
+        int: The number of sessions deleted.
+    """
+    session_ids = [row.id for row in db.session.query(ExamSession.id).filter(
+        ExamSession.session_date < before
+    ).order_by(ExamSession.id)]
+
+    for start in range(0, len(session_ids), batch_size):
+        batch = session_ids[start:start + batch_size]
+        exam_ids = select(Exam.id).where(Exam.session_id.in_(batch))
+
+        answer_store.delete_answers(exam_ids)
+        Exam.query.filter(Exam.session_id.in_(batch)).delete(synchronize_session=False)
+        ExamRegistration.query.filter(ExamRegistration.session_id.in_(batch)) \
+            .delete(synchronize_session=False)
+        ExamSession.query.filter(ExamSession.id.in_(batch)).delete(synchronize_session=False)
+        db.session.commit()
+
+        if progress:
+            progress(start + len(batch), len(session_ids))
+    return len(session_ids)
+
+def rescore_answers(pool_id=None):
+    """Copy each question's current correct answer onto the exam answers that differ.
+
+    Exam answers keep the correct answer from the time the exam was taken; run this after
+    correcting an answer key so scores and analytics use the fixed key.
+
+    Args:
+        pool_id (int): Only rescore exams taken from this pool.
+
+    Returns:
+        int: The number of answers changed.
+    """
+    current = select(Question.correct_answer) \
+        .where(Question.id == ExamAnswer.question_id).scalar_subquery()
+    query = ExamAnswer.query.filter(ExamAnswer.correct_answer != current)
+    if pool_id is not None:
+        query = query.filter(ExamAnswer.exam_id.in_(
+            select(Exam.id).where(Exam.pool_id == pool_id)))
+    changed = query.update({ExamAnswer.correct_answer: current}, synchronize_session=False)
+    changed += answer_store.rescore_packs(pool_id)
+    db.session.commit()
+    # Seeded exams read the key of their unanswered questions from the cached question lists
+    cache.invalidate(cache.QUESTIONS)
+    return changed
+
+def rebuild_analytics():
+    """Create missing indexes used by the analytics and results queries and refresh statistics.
+
+    db.create_all() does not add indexes to tables that already exist, so databases created
+    before an index was declared need this once.
+
+    Returns:
+        list: The names of the indexes that were created.
+    """
+    created = []
+    with db.engine.begin() as connection:
+        for table in (ExamAnswer.__table__, Exam.__table__, ExamRegistration.__table__):
+            existing = {index['name'] for index in
+                        inspect(connection).get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    delete_duplicates(connection, index)
+                    index.create(connection)
+                    created.append(index.name)
+        # Let the query planner see the current row distribution
+        connection.exec_driver_sql('ANALYZE')
+    return created
+
+def delete_duplicates(connection, index):
+    """Delete the rows a new unique index would reject, keeping the newest row of each key.
+
+    Databases written before the index existed may hold duplicates, e.g. two ExamAnswer rows
+    for one question left by a double submit. Does nothing for a non-unique index.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    if not index.unique:
+        return 0
+    table = index.table
+    key = list(table.primary_key.columns)[0]
+    newest = select(func.max(key)).group_by(*index.columns)
+    return connection.execute(table.delete().where(key.not_in(newest))).rowcount
+
+def column_definition(column, dialect):
+    """Return the ALTER TABLE ... ADD COLUMN definition of a model column.
+
+    A NOT NULL column is only added as NOT NULL when it has a constant default to fill the
+    existing rows with; otherwise it is added as nullable.
+    """
+    preparer = dialect.identifier_preparer
+    definition = f"{preparer.quote(column.name)} {column.type.compile(dialect=dialect)}"
+    default = column.default.arg if column.default is not None and \
+        column.default.is_scalar else None
+    if default is not None:
+        literal_value = literal(default, column.type).compile(
+            dialect=dialect, compile_kwargs={'literal_binds': True})
+        definition += f" DEFAULT {literal_value}"
+        if not column.nullable:
+            definition += " NOT NULL"
+    for foreign_key in column.foreign_keys:
+        definition += f" REFERENCES {preparer.quote(foreign_key.column.table.name)} " \
+            f"({preparer.quote(foreign_key.column.name)})"
+    return definition
+
+def upgrade_database():
+    """Bring an existing database up to the current models.
+
+    db.create_all() only creates missing tables, so databases created before a column or index
+    was added to a model need this once after upgrading: missing tables are created, missing
+    columns are added (existing rows get the column's default) and missing indexes are built.
+    Before a unique index is built, rows that duplicate its key are deleted, keeping the newest.
+
+    Returns:
+        list: A description of each change made, e.g. "added column exam.seed".
+    """
+    changes = []
+    db.session.remove()
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        db.metadata.create_all(connection)
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                changes.append(f"created table {table.name}")
+                continue
+
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {connection.dialect.identifier_preparer.quote(table.name)}"
+                        f" ADD COLUMN {column_definition(column, connection.dialect)}")
+                    changes.append(f"added column {table.name}.{column.name}")
+
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in indexes:
+                    removed = delete_duplicates(connection, index)
+                    if removed:
+                        changes.append(f"deleted {removed} duplicate rows from {table.name}")
+                    index.create(connection)
+                    changes.append(f"created index {index.name}")
+    return changes
+
+def database_size():
+    """Return the size in bytes of a SQLite database file, or None for other databases."""
+    database = db.engine.url.database
+    if db.engine.dialect.name != 'sqlite' or not database or database == ':memory:':
+        return None
+    path = database if os.path.isabs(database) else \
+        os.path.join(current_app.instance_path, database)
+    return os.path.getsize(path) if os.path.exists(path) else None
+
+def vacuum():
+    """Reclaim the space left by deleted rows.
+
+    Returns:
+        tuple: The database size in bytes before and after (None if unknown).
+    """
+    before = database_size()
+    db.session.remove()
+    # VACUUM cannot run inside a transaction
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.exec_driver_sql('VACUUM')
+    return before, database_size()
@@ -0,0 +1,289 @@
+"""File: session_monitor.py
+
+    This file contains the live session monitor feed. Each app process runs at most one
+    SessionPoller per watched session, shared by every VE stream that process serves. The
+    poller checks the session's monitor_version every SESSION_MONITOR_POLL_INTERVAL seconds
+    and, only when it has moved, loads the session's progress once and hands the exams that
+    changed to each local stream. Streams themselves never query the database, so ten VEs
+    watching a room cost one version read and at most one aggregate per poll per process.
+
+    The exam routes publish a candidate's progress when an exam is launched, an answer is saved
+    or an exam is finished by bumping monitor_version in the same transaction, but only while a
+    poller in some process holds the session's watch lease (monitor_watched_until). A session
+    nobody watches is never written to. Because the version is in the database, candidates and
+    VEs may be served by any worker process.
+
+    Streams end after SESSION_MONITOR_MAX_AGE seconds so they never hold a worker for long. The
+    browser reconnects with the last version it saw (Last-Event-ID) and only gets a new snapshot
+    if the session changed in between.
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import Response, current_app, request
+from sqlalchemy import case, func
+from . import answer_store
+from .imports import db, Exam, ExamAnswer, ExamSession, User, exam_passed
+
+logger = logging.getLogger(__name__)
+
+# Seconds a poller's claim that a session is watched lasts; it is renewed at half this
+WATCH_LEASE = 60
+
+def load_progress(session_id, exam_id=None):
+    """Return the progress of a session's exams, or of one exam, in a single query.
+
+    Args:
+        session_id (int): The session.
+        exam_id (int): Only load this exam.
+
+    Returns:
+        list: One dict per exam with the candidate's name, element, answered and total question
+        counts, whether it is still open, and the score once it is finished.
+    """
+    query = db.session.query(
+        Exam.id, Exam.element, Exam.open, Exam.packed, Exam.pool_id, Exam.seed,
+        User.first_name, User.last_name,
+        func.count(ExamAnswer.answer).label('answered'),
+        func.count(ExamAnswer.id).label('total'),
+        func.sum(case((ExamAnswer.answer == ExamAnswer.correct_answer, 1), else_=0))
+        .label('correct')
+    ).join(User, User.id == Exam.user_id) \
+        .outerjoin(ExamAnswer, ExamAnswer.exam_id == Exam.id) \
+        .filter(Exam.session_id == session_id)
+    if exam_id is not None:
+        query = query.filter(Exam.id == exam_id)
+
+    rows = query.group_by(Exam.id, Exam.element, Exam.open, Exam.packed, Exam.pool_id,
+                          Exam.seed, User.first_name, User.last_name).order_by(Exam.id).all()
+    # Packed exams have no answer rows to count, so count their packs
+    packed = answer_store.packed_tallies([row.id for row in rows if row.packed])
+    # Seeded exams have rows only for answered questions, so take their length from the seed
+    seeded = answer_store.seeded_totals((row.id, row.pool_id, row.seed) for row in rows)
+
+    progress = []
+    for row in rows:
+        answered, total, correct = packed.get(row.id, (row.answered, row.total, row.correct or 0))
+        total = seeded.get(row.id, total)
+        progress.append({
+            'exam_id': row.id,
+            'first_name': row.first_name,
+            'last_name': row.last_name,
+            'element': row.element,
+            'answered': answered,
+            'total': total,
+            'open': bool(row.open),
+            # Scores are only shown once the candidate has finished
+            'correct': None if row.open else correct,
+            'passed': None if row.open else exam_passed(row.element, correct),
+        })
+    return progress
+
+def publish_exam(exam):
+    """Tell the VEs watching an exam's session that its progress changed.
+
+    Call it before the commit that saves the change: the version bump joins that transaction,
+    so watchers never see a version whose change is not yet visible. The session row is only
+    updated while a poller holds its watch lease.
+    """
+    ExamSession.query.filter(ExamSession.id == exam.session_id,
+                             ExamSession.monitor_watched_until > datetime.now()).update(
+        {ExamSession.monitor_version: ExamSession.monitor_version + 1},
+        synchronize_session=False)
+
+def load_version(session_id):
+    """Return a session's monitor version, or None if the session no longer exists."""
+    return db.session.query(ExamSession.monitor_version).filter_by(id=session_id).scalar()
+
+class Subscriber:
+    """One stream's pending updates, keyed by exam so only the latest of each is sent."""
+
+    def __init__(self):
+        self._pending = {}
+        self._version = None
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def push(self, rows, version):
+        """Queue changed exams, replacing any update of the same exam not yet sent."""
+        with self._condition:
+            self._pending.update((row['exam_id'], row) for row in rows)
+            self._version = version
+            self._condition.notify()
+
+    def close(self):
+        """End the stream, e.g. because the session was deleted."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds for updates.
+
+        Returns:
+            tuple: (updates, version, closed); updates is empty if none arrived in time.
+        """
+        with self._condition:
+            if not self._pending and not self._closed:
+                self._condition.wait(timeout)
+            updates = list(self._pending.values())
+            self._pending.clear()
+            return updates, self._version, self._closed
+
+class SessionPoller: # pylint: disable=R0902
+    """Polls one session for every stream of this process and fans the changes out.
+
+    The polling thread starts with the first subscriber and stops once the last one has left.
+    """
+
+    def __init__(self, app, session_id):
+        self.app = app
+        self.session_id = session_id
+        self.version = None
+        self.progress = {}
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._lease_renew_at = 0
+        self._reload = False
+
+    def renew_lease(self):
+        """Mark the session as watched so publishers bump its version; commits."""
+        if time.monotonic() < self._lease_renew_at:
+            return
+        ExamSession.query.filter_by(id=self.session_id).update(
+            {ExamSession.monitor_watched_until: datetime.now() + timedelta(seconds=WATCH_LEASE)},
+            synchronize_session=False)
+        db.session.commit()
+        self._lease_renew_at = time.monotonic() + WATCH_LEASE / 2
+
+    def subscribe(self):
+        """Add a stream, loading the session first if nothing in this process watches it.
+
+        Returns:
+            tuple: (subscriber, version, snapshot) where snapshot lists every exam's progress.
+        """
+        with self._lock:
+            if self._thread is None:
+                self.renew_lease()
+                self.version = load_version(self.session_id)
+                self.progress = {row['exam_id']: row for row in load_progress(self.session_id)}
+                # A change committed while the lease was being taken may not have bumped the
+                # version, so the first poll reloads the progress whatever the version says
+                self._reload = True
+                self._thread = threading.Thread(
+                    target=self.run, daemon=True,
+                    name=f'openwaves-monitor-{self.session_id}')
+                self._thread.start()
+            subscriber = Subscriber()
+            self._subscribers.add(subscriber)
+            return subscriber, self.version, list(self.progress.values())
+
+    def unsubscribe(self, subscriber):
+        """Remove a stream that ended or disconnected."""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def run(self):
+        """Poll until no stream is left."""
+        interval = self.app.config['SESSION_MONITOR_POLL_INTERVAL']
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    self._lease_renew_at = 0
+                    return
+            try:
+                with self.app.app_context():
+                    self.poll()
+            except Exception: # pylint: disable=W0718
+                # Keep the streams alive when the database is briefly unavailable
+                logger.exception("Session monitor poll failed for session %s", self.session_id)
+
+    def poll(self):
+        """Check the session's version and push the exams that changed to every stream."""
+        self.renew_lease()
+        latest = load_version(self.session_id)
+        if latest is None:
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for subscriber in subscribers:
+                subscriber.close()
+            return
+        if latest == self.version and not self._reload:
+            return
+        self._reload = False
+        changed = [row for row in load_progress(self.session_id)
+                   if self.progress.get(row['exam_id']) != row]
+        with self._lock:
+            self.version = latest
+            self.progress.update((row['exam_id'], row) for row in changed)
+            subscribers = list(self._subscribers)
+        if changed:
+            for subscriber in subscribers:
+                subscriber.push(changed, latest)
+
+def get_poller(session_id, app=None):
+    """Return this process's poller for a session, creating it on first use."""
+    app = app or current_app._get_current_object() # pylint: disable=W0212
+    pollers = app.extensions.setdefault('openwaves_session_monitor', {})
+    poller = pollers.get(session_id)
+    if poller is None:
+        # setdefault keeps the first poller if two requests create one at the same time
+        poller = pollers.setdefault(session_id, SessionPoller(app, session_id))
+    return poller
+
+def format_event(event, data, event_id=None):
+    """Format one Server-Sent Event, with an id the browser sends back when it reconnects."""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_response(session_id, heartbeat=None, max_age=None):
+    """Return a session's Server-Sent Events response.
+
+    The stream opens with a 'snapshot' event unless the browser reconnects with the version it
+    already shows, then sends a 'progress' event for each exam the session's poller reports
+    changed. A comment line is sent every heartbeat seconds without changes to keep proxies
+    from closing the connection.
+
+    Args:
+        session_id (int): The session to watch.
+        heartbeat (float): Seconds between keep-alive lines (SESSION_MONITOR_HEARTBEAT).
+        max_age (float): Seconds before the stream ends (SESSION_MONITOR_MAX_AGE).
+
+    Returns:
+        Response: The streamed text/event-stream response.
+    """
+    config = current_app.config
+    heartbeat = heartbeat or config['SESSION_MONITOR_HEARTBEAT']
+    max_age = max_age or config['SESSION_MONITOR_MAX_AGE']
+    poller = get_poller(session_id)
+    subscriber, version, snapshot = poller.subscribe()
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    send_snapshot = not (last_event_id.isdigit() and int(last_event_id) == version)
+
+    def generate():
+        deadline = time.monotonic() + max_age
+        yield "retry: 3000\n\n"
+        if send_snapshot:
+            yield format_event('snapshot', snapshot, version)
+        while (remaining := deadline - time.monotonic()) > 0:
+            updates, latest, closed = subscriber.wait(min(heartbeat, remaining))
+            for progress in updates:
+                yield format_event('progress', progress, latest)
+            if closed:
+                return
+            if not updates:
+                yield ": keepalive\n\n"
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-store'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    # Runs when the client disconnects or the stream ends
+    response.call_on_close(lambda: poller.unsubscribe(subscriber))
+    return response
@@ -0,0 +1,409 @@
+// Offline exam client. The exam page loads the whole exam bundle once and moves between
+// questions without the server; answers are kept in IndexedDB and sent back in batches. Without
+// fetch or IndexedDB the exam form keeps posting each answer to the server as before.
+const ANSWER_LETTERS = ['A', 'B', 'C', 'D'];
+const SYNC_BATCH_SIZE = 5;  // Send answers once this many are waiting
+const SYNC_INTERVAL = 15000;  // ...or at least this often (milliseconds)
+const DB_NAME = 'openwaves-exam';
+const DB_STORE = 'answers';
+
+// Wrap an IndexedDB request in a promise
+function requestResult(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+// Open the answer store, keyed by exam and question number
+function openAnswerStore(indexedDb = globalThis.indexedDB) {
+    if (!indexedDb) {
+        return Promise.resolve(null);
+    }
+    const request = indexedDb.open(DB_NAME, 1);
+    request.onupgradeneeded = () => {
+        const store = request.result.createObjectStore(DB_STORE,
+            { keyPath: ['exam_id', 'question_number'] });
+        store.createIndex('exam_id', 'exam_id');
+    };
+    return requestResult(request);
+}
+
+// Return the answers stored for an exam
+function loadAnswers(db, examId) {
+    if (!db) {
+        return Promise.resolve([]);
+    }
+    const index = db.transaction(DB_STORE).objectStore(DB_STORE).index('exam_id');
+    return requestResult(index.getAll(examId));
+}
+
+// Store answers, replacing earlier copies
+function storeAnswers(db, examId, records) {
+    if (!db || !records.length) {
+        return Promise.resolve();
+    }
+    const transaction = db.transaction(DB_STORE, 'readwrite');
+    const store = transaction.objectStore(DB_STORE);
+    records.forEach(record => store.put({ ...record, exam_id: examId }));
+    return new Promise((resolve, reject) => {
+        transaction.oncomplete = () => resolve();
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+// Forget an exam's answers once it is finished
+function clearAnswers(db, examId) {
+    if (!db) {
+        return Promise.resolve();
+    }
+    const store = db.transaction(DB_STORE, 'readwrite').objectStore(DB_STORE);
+    return requestResult(store.index('exam_id').getAllKeys(examId))
+        .then(keys => Promise.all(keys.map(key => requestResult(store.delete(key)))));
+}
+
+// Merge the server's answers with stored ones; the most recent write of each answer wins
+function mergeAnswers(serverAnswers, localAnswers) {
+    const answers = new Map();
+    serverAnswers.forEach(answer => {
+        answers.set(answer.question_number, {
+            question_number: answer.question_number,
+            answer: answer.answer,
+            updated_at: answer.updated_at || 0,
+            pending: false,
+        });
+    });
+    localAnswers.forEach(answer => {
+        const current = answers.get(answer.question_number);
+        if (!current || answer.updated_at > current.updated_at) {
+            answers.set(answer.question_number, { ...answer });
+        }
+    });
+    return answers;
+}
+
+// Return the answers not yet sent to the server
+function pendingAnswers(state) {
+    return Array.from(state.answers.values()).filter(answer => answer.pending);
+}
+
+// Build the answer digest the server compares before finishing an exam (see answer_digest)
+function answerDigest(answers) {
+    return Array.from(answers.values())
+        .sort((a, b) => a.question_number - b.question_number)
+        .map(answer => (answer.answer === null || answer.answer === undefined ? '-' : String(answer.answer)))
+        .join('');
+}
+
+// Show how many answers are waiting for the network
+function showSyncStatus(state, message) {
+    if (!state.status) {
+        return;
+    }
+    const waiting = pendingAnswers(state).length;
+    state.status.textContent = message ||
+        (waiting ? `${waiting} answer(s) waiting to be sent.` : 'All answers saved.');
+}
+
+// Send the waiting answers in one request; resolves to the number still waiting
+function syncAnswers(state) {
+    if (state.syncing) {
+        return state.syncing;
+    }
+    const batch = pendingAnswers(state);
+    if (!batch.length) {
+        return Promise.resolve(0);
+    }
+
+    const headers = { 'Content-Type': 'application/json' };
+    if (state.csrfToken) {
+        headers['X-CSRFToken'] = state.csrfToken;
+    }
+    state.syncing = fetch(state.syncUrl, {
+        method: 'POST',
+        headers,
+        // keepalive lets the last batch go out while the page unloads
+        keepalive: true,
+        body: JSON.stringify({
+            answers: batch.map(({ question_number, answer, updated_at }) =>
+                ({ question_number, answer, updated_at })),
+        }),
+    })
+        .then(response => response.json().then(data => {
+            if (!response.ok) {
+                throw new Error(data.error || `Server responded with status: ${response.status}`);
+            }
+            return data;
+        }))
+        .then(data => {
+            // Take the server's answers, except those changed while the request was out
+            const saved = [];
+            data.answers.forEach(serverAnswer => {
+                const local = state.answers.get(serverAnswer.question_number);
+                if (local && local.pending && local.updated_at > (serverAnswer.updated_at || 0)) {
+                    return;
+                }
+                const merged = { ...serverAnswer, updated_at: serverAnswer.updated_at || 0, pending: false };
+                state.answers.set(serverAnswer.question_number, merged);
+                saved.push(merged);
+            });
+            return storeAnswers(state.db, state.examId, saved);
+        })
+        .then(() => pendingAnswers(state).length)
+        .finally(() => {
+            state.syncing = null;
+            showSyncStatus(state);
+        });
+    return state.syncing;
+}
+
+// Try to send the waiting answers, keeping them for a later attempt if the network is down
+function trySync(state) {
+    return syncAnswers(state).catch(error => {
+        console.error('Error:', error);
+        showSyncStatus(state, `${pendingAnswers(state).length} answer(s) waiting for the network.`);
+        return pendingAnswers(state).length;
+    });
+}
+
+// Record the candidate's choice for a question
+function recordAnswer(state, questionNumber, value) {
+    const current = state.answers.get(questionNumber);
+    if (current && current.answer === value) {
+        return Promise.resolve();
+    }
+    const record = { question_number: questionNumber, answer: value, updated_at: Date.now(), pending: true };
+    state.answers.set(questionNumber, record);
+    showSyncStatus(state);
+    const stored = storeAnswers(state.db, state.examId, [record]);
+    if (pendingAnswers(state).length >= SYNC_BATCH_SIZE) {
+        trySync(state);
+    }
+    return stored;
+}
+
+// Show one question of the bundle in the exam page
+function renderQuestion(state, root, index) {
+    const questions = state.bundle.questions;
+    index = Math.max(0, Math.min(index, questions.length - 1));
+    const question = questions[index];
+    const answer = state.answers.get(question.question_number);
+
+    root.querySelector('#question-meta').textContent =
+        `Question ID: ${question.number}, References: ${question.refs}`;
+    root.querySelector('#question-text').textContent = `Q${index + 1}: ${question.question}`;
+    root.querySelectorAll('.option-text').forEach((label, option) => {
+        label.textContent = `${ANSWER_LETTERS[option]}. ${question.options[option]}`;
+    });
+    root.querySelectorAll('input[name="answer"]').forEach(input => {
+        input.checked = answer !== undefined && answer.answer === Number(input.value);
+    });
+    root.querySelector('input[name="question_number"]').value = question.question_number;
+
+    const figure = root.querySelector('#exam-diagram');
+    const image = figure.querySelector('img');
+    // The bundle gives one URL per diagram, so drop the server-rendered WebP source and size
+    figure.querySelectorAll('source').forEach(source => source.remove());
+    image.removeAttribute('width');
+    image.removeAttribute('height');
+    if (question.diagram) {
+        image.src = question.diagram;
+        image.alt = question.diagram_name;
+    } else {
+        image.removeAttribute('src');
+        image.alt = '';
+    }
+    figure.classList.toggle('is-hidden', !question.diagram);
+
+    root.querySelector('#exam-back').disabled = index === 0;
+    root.querySelector('#exam-next').disabled = index === questions.length - 1;
+
+    // Keep the URL on the question shown, so a reload opens it again
+    const url = new URL(window.location.href);
+    url.searchParams.set('index', index);
+    root.querySelector('#exam-form').action = url.pathname + url.search;
+    if (window.history && window.history.replaceState) {
+        window.history.replaceState(null, '', url.pathname + url.search);
+    }
+    state.index = index;
+    return question;
+}
+
+// Leave for the review page once every answer has reached the server
+function openReview(state) {
+    return trySync(state).then(waiting => {
+        if (waiting) {
+            showSyncStatus(state, `${waiting} answer(s) waiting for the network. ` +
+                'Keep going; they are sent as soon as the connection returns.');
+            return false;
+        }
+        window.location.href = state.bundle.review_url;
+        return true;
+    });
+}
+
+// Finish the exam once every answer has reached the server
+function finishExam(state, finishUrl) {
+    return trySync(state).then(waiting => {
+        if (waiting) {
+            showSyncStatus(state, `${waiting} answer(s) waiting for the network. ` +
+                'The exam can be finished once they are sent.');
+            return false;
+        }
+        const url = `${finishUrl}?answers=${encodeURIComponent(answerDigest(state.answers))}`;
+        return clearAnswers(state.db, state.examId).catch(() => undefined).then(() => {
+            if (navigator.serviceWorker && navigator.serviceWorker.controller) {
+                navigator.serviceWorker.controller.postMessage({ type: 'clear' });
+            }
+            window.location.href = url;
+            return true;
+        });
+    });
+}
+
+// Keep sending answers in the background
+function scheduleSync(state) {
+    setInterval(() => trySync(state), SYNC_INTERVAL);
+    window.addEventListener('online', () => trySync(state));
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') {
+            trySync(state);
+        }
+    });
+}
+
+// Read the CSRF token rendered into the page
+function csrfToken() {
+    const input = document.querySelector('input[name="csrf_token"]');
+    return input ? input.value : null;
+}
+
+// Register the service worker and hand it the exam's diagrams to keep
+function registerWorker(workerUrl, bundle) {
+    if (!('serviceWorker' in navigator)) {
+        return Promise.resolve(null);
+    }
+    return navigator.serviceWorker.register(workerUrl)
+        .then(() => navigator.serviceWorker.ready)
+        .then(registration => {
+            const urls = bundle.questions.map(question => question.diagram).filter(Boolean);
+            if (registration.active) {
+                registration.active.postMessage({ type: 'precache', urls: [...new Set(urls)] });
+            }
+            return registration;
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            return null;
+        });
+}
+
+// Start the offline client on the exam page
+async function initExam(root) {
+    const bundleResponse = await fetch(root.dataset.bundleUrl, { headers: { 'Accept': 'application/json' } });
+    if (!bundleResponse.ok) {
+        return null;  // Leave the server-side form in charge
+    }
+    const bundle = await bundleResponse.json();
+    const db = await openAnswerStore().catch(() => null);
+    const examId = bundle.exam_id;
+
+    const state = {
+        bundle,
+        db,
+        examId,
+        syncUrl: bundle.sync_url,
+        csrfToken: csrfToken(),
+        answers: mergeAnswers(bundle.answers, await loadAnswers(db, examId)),
+        status: root.querySelector('#sync-status'),
+        syncing: null,
+        index: 0,
+    };
+
+    const requested = new URLSearchParams(window.location.search).get('index');
+    renderQuestion(state, root, Number(requested !== null ? requested : root.dataset.index) || 0);
+    showSyncStatus(state);
+
+    root.querySelector('#exam-form').addEventListener('submit', event => {
+        event.preventDefault();
+        const choice = root.querySelector('input[name="answer"]:checked');
+        if (choice) {
+            const question = state.bundle.questions[state.index];
+            recordAnswer(state, question.question_number, Number(choice.value));
+        }
+
+        const action = event.submitter ? event.submitter.name : 'next';
+        if (action === 'review') {
+            openReview(state);
+        } else {
+            renderQuestion(state, root, state.index + (action === 'back' ? -1 : 1));
+        }
+    });
+
+    scheduleSync(state);
+    registerWorker(root.dataset.workerUrl, bundle);
+    return state;
+}
+
+// Start the offline client on the review page: show answers still waiting, and sync them
+// before finishing
+async function initReview(finishLink) {
+    const rows = Array.from(document.querySelectorAll('.review-row'));
+    const serverAnswers = rows.map(row => ({
+        question_number: Number(row.dataset.questionNumber),
+        answer: row.dataset.answer === '' ? null : Number(row.dataset.answer),
+        updated_at: Number(row.dataset.updatedAt) || 0,
+    }));
+    const db = await openAnswerStore().catch(() => null);
+    const examId = Number(finishLink.dataset.examId);
+
+    const state = {
+        db,
+        examId,
+        syncUrl: finishLink.dataset.syncUrl,
+        csrfToken: csrfToken(),
+        answers: mergeAnswers(serverAnswers, await loadAnswers(db, examId)),
+        status: document.getElementById('sync-status'),
+        syncing: null,
+    };
+
+    rows.forEach(row => {
+        const answer = state.answers.get(Number(row.dataset.questionNumber));
+        const cell = row.querySelector('.review-answer');
+        if (answer && cell) {
+            cell.textContent = answer.answer === null ? '' : ANSWER_LETTERS[answer.answer];
+        }
+    });
+    if (pendingAnswers(state).length) {
+        showSyncStatus(state);
+        trySync(state);
+    }
+
+    finishLink.addEventListener('click', event => {
+        event.preventDefault();
+        finishExam(state, finishLink.getAttribute('href'));
+    });
+    return state;
+}
+
+// Conditionally export for testing if module.exports exists (Node.js)
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = {
+        openAnswerStore, loadAnswers, storeAnswers, clearAnswers, mergeAnswers, pendingAnswers,
+        answerDigest, syncAnswers, trySync, recordAnswer, renderQuestion, openReview, finishExam,
+        initExam, initReview,
+    };
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    if (typeof fetch !== 'function' || !globalThis.indexedDB) {
+        return;
+    }
+    const examRoot = document.getElementById('exam');
+    const finishLink = document.getElementById('finish-exam');
+    if (examRoot) {
+        initExam(examRoot).catch(error => console.error('Error:', error));
+    } else if (finishLink) {
+        initReview(finishLink).catch(error => console.error('Error:', error));
+    }
+});
@@ -0,0 +1,88 @@
+// Service worker for the offline exam client. It keeps the exam pages, the exam bundle, the
+// scripts and styles they load and the exam's diagrams, so a candidate can keep working through
+// a dropped connection. Served from /exam/sw.js so it controls every page under /exam/.
+const CACHE_PREFIX = 'openwaves-exam-';
+const CACHE_NAME = `${CACHE_PREFIX}v1`;
+
+// Exam pages and bundles; finishing an exam or viewing results must always reach the server
+const EXAM_PATH = /^\/exam\/\d+(\/bundle|\/review)?$/;
+
+self.addEventListener('install', () => {
+    self.skipWaiting();
+});
+
+// Drop caches of older worker versions and take over open exam pages at once
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(names
+                .filter(name => name.startsWith(CACHE_PREFIX) && name !== CACHE_NAME)
+                .map(name => caches.delete(name))))
+            .then(() => self.clients.claim())
+    );
+});
+
+// The exam page sends the diagrams of its bundle at launch, and asks to clear the cache once
+// the exam is finished
+self.addEventListener('message', event => {
+    const data = event.data || {};
+    if (data.type === 'precache' && Array.isArray(data.urls)) {
+        // One missing diagram must not keep the others out of the cache
+        event.waitUntil(caches.open(CACHE_NAME).then(cache =>
+            Promise.allSettled(data.urls.map(url => cache.add(url)))));
+    } else if (data.type === 'clear') {
+        event.waitUntil(caches.delete(CACHE_NAME));
+    }
+});
+
+// Fresh copies while online, the last copy when the network is gone
+async function networkFirst(request) {
+    const cache = await caches.open(CACHE_NAME);
+    try {
+        const response = await fetch(request);
+        if (response.ok) {
+            await cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        // Exam pages differ only by ?index=, and the client renders any question itself
+        const cached = await cache.match(request, { ignoreSearch: request.mode === 'navigate' });
+        if (cached) {
+            return cached;
+        }
+        throw error;
+    }
+}
+
+// Static files answer from the cache at once and are refreshed in the background
+async function staleWhileRevalidate(event) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(event.request);
+    const refresh = fetch(event.request).then(response => {
+        if (response.ok) {
+            return cache.put(event.request, response.clone()).then(() => response);
+        }
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(refresh.catch(() => undefined));
+        return cached;
+    }
+    return refresh;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+    if (url.pathname.startsWith('/static/') || url.pathname.startsWith('/diagrams/')) {
+        event.respondWith(staleWhileRevalidate(event));
+    } else if (EXAM_PATH.test(url.pathname)) {
+        event.respondWith(networkFirst(request));
+    }
+});
@@ -0,0 +1,37 @@
+// Poll a background job until it finishes, reporting its progress after each check
+async function pollJob(statusUrl, onProgress = null, interval = 1000) {
+    for (;;) {
+        const response = await fetch(statusUrl, { cache: 'no-store' });
+        if (!response.ok) {
+            throw new Error(`Server responded with status: ${response.status}`);
+        }
+        const job = await response.json();
+        if (onProgress) onProgress(job);
+        if (job.status === 'succeeded' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, interval));
+    }
+}
+
+// Show a job's progress in the job progress box of the page, if it has one
+function showJobProgress(job) {
+    const box = document.getElementById('job-status');
+    if (!box) return;
+    box.classList.remove('is-hidden');
+
+    const bar = document.getElementById('job-progress');
+    if (job.total > 0) {
+        bar.max = job.total;
+        bar.value = job.progress;
+    } else {
+        bar.removeAttribute('value');  // Indeterminate until the total is known
+    }
+    document.getElementById('job-message').textContent =
+        job.status === 'failed' ? `Failed: ${job.error}` : (job.message || `Job ${job.status}...`);
+}
+
+// Conditionally export for testing if module.exports exists (Node.js)
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = { pollJob, showJobProgress };
+}
@@ -9,109 +9,251 @@ if (!window.poolsEventListenersInitialized) {
             }
         }
 
-        // Handle deleting pools
-        document.querySelectorAll('.delete-pool-button').forEach(button => {
-            button.addEventListener('click', function() {
-                const poolId = this.getAttribute('data-id');
-                const poolName = this.getAttribute('data-name');
-                const csrfToken = document.querySelector('input[name="csrf_token"]').value;
-
-                if (confirm("Are you sure you want to delete the " + poolName + " pool and all associated questions?")) {
-                    fetch(`/ve/delete_pool/${poolId}`, {
-                        method: 'DELETE',
-                        headers: {
-                            'X-CSRFToken': csrfToken,
-                            'Content-Type': 'application/json'
-                        }
-                    })
-                    .then(response => {
-                        if (response.ok) {
-                            alert('Pool deleted successfully.');
-                            location.reload();  // Reload the page to reflect changes
-                        } else {
-                            alert('There was an error deleting the pool.');
-                        }
-                    })
-                    .catch(error => {
-                        console.error('Error:', error);
-                        alert('There was an error deleting the pool.');
-                    });
+        // Return the elements matching a selector in a root, including the root itself
+        function findAll(root, selector) {
+            const found = Array.from(root.querySelectorAll(selector));
+            if (root.matches && root.matches(selector)) {
+                found.unshift(root);
+            }
+            return found;
+        }
+
+        // Patch the pool's rows from a route's JSON response, or reload the page without one
+        function updatePoolRows(data) {
+            const tbody = document.getElementById('pool-rows');
+            const expanded = data && tbody &&
+                tbody.querySelector(`.expandable-row.show[data-id='${data.id}']`) !== null;
+            const rows = typeof applyRowUpdate === 'function' ? applyRowUpdate(tbody, data) : false;
+            if (!rows) {
+                location.reload();
+                return;
+            }
+            rows.forEach(row => {
+                bindPoolRows(row);
+                // Keep the diagrams of a changed pool open
+                if (expanded && row.classList.contains('expandable-row')) {
+                    row.classList.add('show');
                 }
             });
-        });
+        }
 
-        // Handle deleting diagrams
-        document.querySelectorAll('.delete-diagram-button').forEach(button => {
-            button.addEventListener('click', function() {
-                const diagramId = this.getAttribute('data-id');
-                const diagramPath = this.getAttribute('data-name');
-                const csrfToken = document.querySelector('input[name="csrf_token"]').value;
-
-                if (confirm("Are you sure you want to delete the " + diagramPath + " diagram?")) {
-                    fetch(`/ve/delete_diagram/${diagramId}`, {
-                        method: 'DELETE',
-                        headers: {
-                            'X-CSRFToken': csrfToken,
-                            'Content-Type': 'application/json'
-                        }
-                    })
-                    .then(response => {
-                        if (response.ok) {
-                            alert('Diagram deleted successfully.');
-                            location.reload();  // Reload the page to reflect changes
-                        } else {
+        // Read a JSON response body, if there is one
+        function readJson(response) {
+            return typeof response.json === 'function' ? response.json() : null;
+        }
+
+        // Patch the rows from a successful response once its body has been read
+        function updateFromResponse(response) {
+            const data = readJson(response);
+            return data ? data.then(updatePoolRows) : updatePoolRows(null);
+        }
+
+        // Attach the handlers of the pool rows in root (the page, or rows inserted later)
+        function bindPoolRows(root) {
+            // Handle deleting pools
+            findAll(root, '.delete-pool-button').forEach(button => {
+                button.addEventListener('click', function() {
+                    const poolId = this.getAttribute('data-id');
+                    const poolName = this.getAttribute('data-name');
+                    const csrfToken = document.querySelector('input[name="csrf_token"]').value;
+
+                    if (confirm("Are you sure you want to delete the " + poolName + " pool and all associated questions?")) {
+                        fetch(`/ve/delete_pool/${poolId}`, {
+                            method: 'DELETE',
+                            headers: {
+                                'X-CSRFToken': csrfToken,
+                                'Content-Type': 'application/json'
+                            }
+                        })
+                        .then(response => {
+                            if (response.ok) {
+                                alert('Pool deleted successfully.');
+                                return updateFromResponse(response);
+                            } else {
+                                alert('There was an error deleting the pool.');
+                            }
+                        })
+                        .catch(error => {
+                            console.error('Error:', error);
+                            alert('There was an error deleting the pool.');
+                        });
+                    }
+                });
+            });
+
+            // Handle deleting diagrams
+            findAll(root, '.delete-diagram-button').forEach(button => {
+                button.addEventListener('click', function() {
+                    const diagramId = this.getAttribute('data-id');
+                    const diagramPath = this.getAttribute('data-name');
+                    const csrfToken = document.querySelector('input[name="csrf_token"]').value;
+
+                    if (confirm("Are you sure you want to delete the " + diagramPath + " diagram?")) {
+                        fetch(`/ve/delete_diagram/${diagramId}`, {
+                            method: 'DELETE',
+                            headers: {
+                                'X-CSRFToken': csrfToken,
+                                'Content-Type': 'application/json'
+                            }
+                        })
+                        .then(response => {
+                            if (response.ok) {
+                                alert('Diagram deleted successfully.');
+                                return updateFromResponse(response);
+                            } else {
+                                alert('There was an error deleting the diagram.');
+                            }
+                        })
+                        .catch(error => {
+                            console.error('Error:', error);
                             alert('There was an error deleting the diagram.');
+                        });
+                    }
+                });
+            });
+
+            // Toggle the upload modal
+            findAll(root, '[id^=upload-button]').forEach(button => {
+                button.addEventListener('click', function() {
+                    const poolId = this.id.split('-')[2];
+                    document.getElementById('upload-modal-' + poolId).classList.add('is-active');
+                });
+            });
+
+            // Close modals on clicking the 'Cancel' button, 'X', or any element with class 'close-modal'
+            findAll(root, '.close-modal').forEach(button => {
+                button.addEventListener('click', function() {
+                    const modal = this.closest('.modal');
+                    closeModal(modal);
+                });
+            });
+
+            // Handle form submission for uploading questions
+            findAll(root, '[id^=submit-upload]').forEach(button => {
+                button.addEventListener('click', async function(e) {
+                    e.preventDefault();
+                    const poolId = this.id.split('-')[2];
+                    const form = document.getElementById('upload-form-' + poolId);
+                    const formData = new FormData(form);
+
+                    // Submit the form data via AJAX to the server
+                    const response = await fetch(`/ve/upload_questions/${poolId}`, {
+                        method: 'POST',
+                        body: formData,
+                    });
+
+                    // Close the modal after form submission
+                    closeModal(document.getElementById('upload-modal-' + poolId));
+
+                    if (!response.ok) {
+                        alert('There was an error uploading the questions.');
+                        return;
+                    }
+
+                    // The import runs as a background job; follow it until it finishes
+                    const data = await readJson(response);
+                    if (data && data.status_url && typeof pollJob === 'function') {
+                        try {
+                            const job = await pollJob(data.status_url, showJobProgress);
+                            if (job.status === 'failed') {
+                                alert('There was an error importing the questions: ' + job.error);
+                                return;
+                            }
+                        } catch (error) {
+                            console.error('Error:', error);
                         }
-                    })
-                    .catch(error => {
+                    }
+                    alert('Questions uploaded successfully!');
+
+                    // Show the new question count
+                    try {
+                        const rows = await fetch(`/ve/pool_rows/${poolId}`);
+                        updatePoolRows(rows.ok ? await readJson(rows) : null);
+                    } catch (error) {
                         console.error('Error:', error);
-                        alert('There was an error deleting the diagram.');
-                    });
-                }
+                        location.reload();
+                    }
+                });
             });
-        });
 
-        // Toggle the upload modal
-        document.querySelectorAll('[id^=upload-button]').forEach(button => {
-            button.addEventListener('click', function() {
-                const poolId = this.id.split('-')[2];
-                document.getElementById('upload-modal-' + poolId).classList.add('is-active');
+            // Toggle expandable pool rows
+            findAll(root, '.pool-row').forEach(row => {
+                row.addEventListener('click', function(event) {
+                    // Check if any modal is active, and if so, prevent toggling
+                    const isAnyModalActive = document.querySelector('.modal.is-active');
+                    if (isAnyModalActive) {
+                        return; // Don't toggle rows if a modal is open
+                    }
+
+                    // Proceed to toggle the expandable row if no modal is active
+                    const poolId = event.currentTarget.getAttribute('data-id');
+                    const expandableRow = document.querySelector(`.expandable-row[data-id='${poolId}']`);
+                
+                    if (expandableRow) {
+                        expandableRow.classList.toggle('show');
+                    } else {
+                        console.error(`No expandable row found for pool ID: ${poolId}`);
+                    }
+                });
             });
-        });
 
-        // Close modals on clicking the 'Cancel' button, 'X', or any element with class 'close-modal'
-        document.querySelectorAll('.close-modal').forEach(button => {
-            button.addEventListener('click', function() {
-                const modal = this.closest('.modal');
-                closeModal(modal);
+            // Open the modal when the 'Upload' button is clicked
+            findAll(root, '.upload-diagram-button').forEach(button => {
+                button.addEventListener('click', function() {
+                    const poolId = this.getAttribute('data-id');
+                    const modal = document.getElementById(`upload-modal-${poolId}`);
+                    if (modal) {
+                        modal.classList.add('is-active');
+                        modal.addEventListener('click', function(event) {
+                            event.stopPropagation();
+                        });
+                    }
+                });
             });
-        });
 
-        // Handle form submission for uploading questions
-        document.querySelectorAll('[id^=submit-upload]').forEach(button => {
-            button.addEventListener('click', async function(e) {
-                e.preventDefault();
-                const poolId = this.id.split('-')[2];
-                const form = document.getElementById('upload-form-' + poolId);
-                const formData = new FormData(form);
-
-                // Submit the form data via AJAX to the server
-                const response = await fetch(`/ve/upload_questions/${poolId}`, {
-                    method: 'POST',
-                    body: formData,
+            // Handle the upload button in the modal
+            findAll(root, '.submit-upload').forEach(button => {
+                button.addEventListener('click', async function() {
+                    const poolId = this.getAttribute('data-pool-id');
+                    const form = document.getElementById(`upload-form-${poolId}`);
+                    const formData = new FormData(form);
+                    // Close the modal before its rows are replaced
+                    const modal = document.getElementById(`upload-modal-${poolId}`);
+                    if (modal) {
+                        modal.classList.remove('is-active');
+                    }
+                    try {
+                        const response = await fetch(`/ve/upload_diagram/${poolId}`, {
+                            method: 'POST',
+                            headers: { 'Accept': 'application/json' },
+                            body: formData,
+                        });
+                        if (response.ok) {
+                            alert('Diagram uploaded successfully!');
+                            updatePoolRows(await readJson(response));
+                        } else {
+                            alert('There was an error uploading the diagram.');
+                        }
+                    } catch (error) {
+                        console.error('Error:', error);
+                        alert('There was an error uploading the diagram.');
+                    }
                 });
+            });
 
-                if (response.ok) {
-                    alert('Questions uploaded successfully!');
-                    location.reload();  // Reload the page to show the new questions
-                } else {
-                    alert('There was an error uploading the questions.');
-                }
+            // Handle image click to show enlarged version
+            findAll(root, '.thumbnail-image').forEach(image => {
+                image.addEventListener('click', function() {
+                    const fullscreenOverlay = document.getElementById('fullscreen-overlay');
+                    const fullscreenImage = document.getElementById('fullscreen-image');
 
-                // Close the modal after form submission
-                closeModal(document.getElementById('upload-modal-' + poolId));
+                    fullscreenImage.src = this.src;
+                    fullscreenOverlay.style.display = 'flex';
+                });
             });
-        });
+        }
+
+        bindPoolRows(document);
 
         // Handle creating a new pool
         const createPoolButton = document.getElementById('create-pool-button');
@@ -175,90 +317,15 @@ if (!window.poolsEventListenersInitialized) {
                 body: formData,
             });
 
+            // Close the modal after form submission
+            closeModal(createPoolModal);
+
             if (response.ok) {
                 alert('Pool created successfully!');
-                location.reload();
+                updatePoolRows(await readJson(response));
             } else {
                 alert('There was an error creating the pool.');
             }
-
-            // Close the modal after form submission
-            closeModal(createPoolModal);
-        });
-
-        // Toggle expandable pool rows
-        document.querySelectorAll('.pool-row').forEach(row => {
-            row.addEventListener('click', function(event) {
-                // Check if any modal is active, and if so, prevent toggling
-                const isAnyModalActive = document.querySelector('.modal.is-active');
-                if (isAnyModalActive) {
-                    return; // Don't toggle rows if a modal is open
-                }
-
-                // Proceed to toggle the expandable row if no modal is active
-                const poolId = event.currentTarget.getAttribute('data-id');
-                const expandableRow = document.querySelector(`.expandable-row[data-id='${poolId}']`);
-                
-                if (expandableRow) {
-                    expandableRow.classList.toggle('show');
-                } else {
-                    console.error(`No expandable row found for pool ID: ${poolId}`);
-                }
-            });
-        });
-
-        // Open the modal when the 'Upload' button is clicked
-        document.querySelectorAll('.upload-diagram-button').forEach(button => {
-            button.addEventListener('click', function() {
-                const poolId = this.getAttribute('data-id');
-                const modal = document.getElementById(`upload-modal-${poolId}`);
-                if (modal) {
-                    modal.classList.add('is-active');
-                    modal.addEventListener('click', function(event) {
-                        event.stopPropagation();
-                    });
-                }
-            });
-        });
-
-        // Handle the upload button in the modal
-        document.querySelectorAll('.submit-upload').forEach(button => {
-            button.addEventListener('click', async function() {
-                const poolId = this.getAttribute('data-pool-id');
-                const form = document.getElementById(`upload-form-${poolId}`);
-                const formData = new FormData(form);
-                try {
-                    const response = await fetch(`/ve/upload_diagram/${poolId}`, {
-                        method: 'POST',
-                        body: formData,
-                    });
-                    if (response.ok) {
-                        alert('Diagram uploaded successfully!');
-                        location.reload(); // Reload the page to show the new diagram
-                    } else {
-                        alert('There was an error uploading the diagram.');
-                    }
-                } catch (error) {
-                    console.error('Error:', error);
-                    alert('There was an error uploading the diagram.');
-                }
-                // Close the modal after submission
-                const modal = document.getElementById(`upload-modal-${poolId}`);
-                if (modal) {
-                    modal.classList.remove('is-active');
-                }
-            });
-        });
-
-        // Handle image click to show enlarged version
-        document.querySelectorAll('.thumbnail-image').forEach(image => {
-            image.addEventListener('click', function() {
-                const fullscreenOverlay = document.getElementById('fullscreen-overlay');
-                const fullscreenImage = document.getElementById('fullscreen-image');
-
-                fullscreenImage.src = this.src;
-                fullscreenOverlay.style.display = 'flex';
-            });
         });
 
         // Close fullscreen overlay when clicked
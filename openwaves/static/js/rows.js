@@ -0,0 +1,65 @@
+// Parse the HTML of table rows returned by a VE route
+function parseRows(html) {
+    const template = document.createElement('template');
+    template.innerHTML = html.trim();
+    return Array.from(template.content.querySelectorAll(':scope > tr'));
+}
+
+// Show the table's placeholder row only when it has no other rows
+function toggleEmptyRow(tbody) {
+    const emptyRow = tbody.querySelector(':scope > tr.empty-row');
+    if (emptyRow) {
+        const hasRows = tbody.querySelector(':scope > tr[data-id]') !== null;
+        emptyRow.classList.toggle('is-hidden', hasRows);
+    }
+}
+
+// Replace the rows of an item, or insert them in the order given by the tbody's data-sort
+function replaceRows(tbody, id, html) {
+    const rows = parseRows(html);
+    const existing = tbody.querySelectorAll(`:scope > tr[data-id="${id}"]`);
+    let anchor = null;
+
+    if (existing.length) {
+        anchor = existing[existing.length - 1].nextElementSibling;
+        existing.forEach(row => row.remove());
+    } else if (rows.length) {
+        // Rows are sorted by their data-sort key, ascending or descending
+        const key = rows[0].dataset.sort || '';
+        const descending = tbody.dataset.sort === 'desc';
+        anchor = Array.from(tbody.querySelectorAll(':scope > tr[data-sort]')).find(row => {
+            const other = row.dataset.sort;
+            return descending ? other < key : other > key;
+        }) || tbody.querySelector(':scope > tr.empty-row');
+    }
+
+    rows.forEach(row => tbody.insertBefore(row, anchor));
+    toggleEmptyRow(tbody);
+    return rows;
+}
+
+// Remove the rows of a deleted item
+function removeRows(tbody, id) {
+    tbody.querySelectorAll(`:scope > tr[data-id="${id}"]`).forEach(row => row.remove());
+    toggleEmptyRow(tbody);
+}
+
+// Apply a row update returned by a VE route; returns false if the page must be reloaded
+function applyRowUpdate(tbody, data) {
+    if (!tbody || !data || data.id === undefined) {
+        return false;
+    }
+    if (data.deleted) {
+        removeRows(tbody, data.id);
+        return [];
+    }
+    if (typeof data.html === 'string') {
+        return replaceRows(tbody, data.id, data.html);
+    }
+    return false;
+}
+
+// Conditionally export for testing if module.exports exists (Node.js)
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = { parseRows, toggleEmptyRow, replaceRows, removeRows, applyRowUpdate };
+}
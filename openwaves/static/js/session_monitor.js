@@ -0,0 +1,68 @@
+// Build the table cells for one candidate's progress
+function progressCells(progress) {
+    let status = 'Testing';
+    let score = '';
+    if (!progress.open) {
+        status = 'Finished';
+        score = `${progress.correct}/${progress.total} (${progress.passed ? 'Pass' : 'Fail'})`;
+    }
+    return [
+        progress.last_name,
+        progress.first_name,
+        progress.element,
+        `${progress.answered}/${progress.total}`,
+        status,
+        score,
+    ];
+}
+
+// Add or update the row of one exam in the monitor table
+function renderProgress(tbody, progress) {
+    let row = tbody.querySelector(`tr[data-exam-id="${progress.exam_id}"]`);
+    if (!row) {
+        row = document.createElement('tr');
+        row.dataset.examId = progress.exam_id;
+        tbody.appendChild(row);
+        tbody.querySelector('.monitor-empty')?.remove();
+    }
+    row.replaceChildren(...progressCells(progress).map(value => {
+        const cell = document.createElement('td');
+        cell.textContent = value;
+        return cell;
+    }));
+    row.classList.toggle('has-text-success', !progress.open && progress.passed);
+    row.classList.toggle('has-text-danger', !progress.open && !progress.passed);
+}
+
+// Follow a session's event stream and keep the table current
+function watchSession(table, status) {
+    const tbody = table.querySelector('tbody');
+    const source = new EventSource(table.dataset.streamUrl);
+
+    source.addEventListener('snapshot', event => {
+        tbody.querySelectorAll('tr[data-exam-id]').forEach(row => row.remove());
+        JSON.parse(event.data).forEach(progress => renderProgress(tbody, progress));
+        status.textContent = 'Live';
+    });
+    source.addEventListener('progress', event => {
+        renderProgress(tbody, JSON.parse(event.data));
+    });
+    // EventSource reconnects by itself with the last event id, and gets a new snapshot
+    // only if the session changed in between
+    source.addEventListener('error', () => {
+        status.textContent = 'Reconnecting...';
+    });
+    return source;
+}
+
+// Conditionally export for testing if module.exports exists (Node.js)
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = { progressCells, renderProgress, watchSession };
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    const table = document.getElementById('session-monitor');
+    if (table && typeof EventSource !== 'undefined') {
+        watchSession(table, document.getElementById('monitor-status'));
+    }
+});
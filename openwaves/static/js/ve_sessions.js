@@ -74,7 +74,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 })
                 .then(data => {
                     if (data && data.success) {
-                        location.reload();
+                        toggleModal(createSessionModal, 'close');
+                        updateSessionRows(data);
                     } else {
                         alert('Error creating session: ' + (data && data.error ? data.error : 'Unknown error'));
                     }
@@ -86,9 +87,20 @@ document.addEventListener('DOMContentLoaded', () => {
         });        
     }
 
+    // Patch the session's row from a route's JSON response, or reload the page without one
+    function updateSessionRows(data) {
+        const tbody = document.getElementById('session-rows');
+        const rows = typeof applyRowUpdate === 'function' ? applyRowUpdate(tbody, data) : false;
+        if (!rows) {
+            location.reload();
+            return;
+        }
+        rows.forEach(row => bindSessionRow(row));
+    }
+
     // Generic function to handle session actions (open/close/delete)
-    function handleSessionAction(buttonSelector, action, method = 'POST') {
-        document.querySelectorAll(buttonSelector).forEach((button) => {
+    function handleSessionAction(buttonSelector, action, method = 'POST', root = document) {
+        root.querySelectorAll(buttonSelector).forEach((button) => {
             button.addEventListener('click', () => {
                 const sessionId = button.getAttribute('data-id');
                 const csrfTokenInput = document.querySelector('input[name="csrf_token"]');
@@ -105,7 +117,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 makeRequest(endpoint, method, { action }, csrfToken)
                     .then(data => {
                         if (data && data.success) {
-                            location.reload();
+                            updateSessionRows(data);
                         } else {
                             alert(`Error ${action} session: ` + (data && data.error ? data.error : 'Unknown error'));
                         }
@@ -139,6 +151,16 @@ document.addEventListener('DOMContentLoaded', () => {
 
             makeRequest('/ve/purge_sessions', 'DELETE', null, csrfToken)
                 .then(data => {
+                    // The purge runs as a background job; follow it before reloading
+                    if (data && data.success && data.status_url && typeof pollJob === 'function') {
+                        return pollJob(data.status_url, showJobProgress).then(job => {
+                            if (job.status === 'failed') {
+                                alert('Error purging sessions: ' + job.error);
+                            } else {
+                                location.reload();
+                            }
+                        });
+                    }
                     if (data && data.success) {
                         location.reload();
                     } else {
@@ -166,10 +188,15 @@ document.addEventListener('DOMContentLoaded', () => {
     // Initialize session form submit
     handleSessionFormSubmit();
 
+    // Attach event listeners for the session actions of the rows in root
+    function bindSessionRow(root) {
+        handleSessionAction('.delete-session-button', 'delete', 'DELETE', root);
+        handleSessionAction('.open-session-button', 'open', 'POST', root);
+        handleSessionAction('.close-session-button', 'close', 'POST', root);
+    }
+
     // Attach event listeners for session actions
-    handleSessionAction('.delete-session-button', 'delete', 'DELETE');
-    handleSessionAction('.open-session-button', 'open');
-    handleSessionAction('.close-session-button', 'close');
+    bindSessionRow(document);
 
     // Initialize purge button submit
     handlePurgeButtonSubmit();
@@ -5,14 +5,33 @@
 
 import os
 import sys
+from contextlib import contextmanager
+from functools import lru_cache
 import pytest
 from werkzeug.security import generate_password_hash
 from openwaves import create_app, db
 from openwaves.models import User
+from openwaves.query_stats import capture_queries
 
 # Add the project root directory to sys.path (this ensures Python can find openwaves)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Tests do not need production-strength key stretching; logins verify against the iteration
+# count stored in the hash, so this keeps every login in the suite cheap as well
+TEST_PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+
+@lru_cache(maxsize=None)
+def cached_password_hash(password):
+    """Return a password hash, computing each distinct password only once per test run.
+
+    Args:
+        password (str): The plaintext password.
+
+    Returns:
+        str: The hash, usable with check_password_hash.
+    """
+    return generate_password_hash(password, method=TEST_PASSWORD_HASH_METHOD)
+
 @pytest.fixture
 def app():
     """Create and configure a new Flask application instance for each test.
@@ -27,7 +46,10 @@ def app():
         "TESTING": True,
         "SQLALCHEMY_DATABASE_URI": "sqlite:///test_db.sqlite",
         "WTF_CSRF_ENABLED": False,
-        "SECRET_KEY": "test_secret_key"
+        "SECRET_KEY": "test_secret_key",
+        "PASSWORD_HASH_METHOD": TEST_PASSWORD_HASH_METHOD,
+        "TEMPLATE_WARMUP": False,
+        "JOBS_MODE": "inline"
     })
 
     # Set the correct root path and template folder for testing
@@ -47,7 +69,7 @@ def app():
             first_name="first_test",
             last_name="last_test",
             email="testuser@example.com",
-            password=generate_password_hash("testpassword", method="pbkdf2:sha256"),
+            password=cached_password_hash("testpassword"),
             role=1
         )
         db.session.add(test_user)
@@ -55,6 +77,10 @@ def app():
 
     yield app
 
+    # Counts a test left pending would otherwise be written at exit, after the tables are gone
+    aggregator = app.extensions.get('openwaves_csp_reports')
+    if aggregator is not None:
+        aggregator.drain()
     db.session.remove()
     db.drop_all()
     ctx.pop()
@@ -86,7 +112,7 @@ def ve_user(): # pylint: disable=W0621
         first_name="VE",
         last_name="User",
         email="veuser@example.com",
-        password=generate_password_hash("vepassword", method="pbkdf2:sha256"),
+        password=cached_password_hash("vepassword"),
         role=2,
         active=True
     )
@@ -103,10 +129,25 @@ def user_to_toggle(): # pylint: disable=W0621
         first_name="User",
         last_name="ToToggle",
         email="usertotoggle@example.com",
-        password=generate_password_hash("password", method="pbkdf2:sha256"),
+        password=cached_password_hash("password"),
         role=1,
         active=True
     )
     db.session.add(user)
     db.session.commit()
     return db.session.get(User, user.id)
+
+@pytest.fixture
+def query_budget():
+    """Provide a context manager that fails the test if a block runs too many SQL statements.
+
+    Usage: ``with query_budget(5): client.get(...)``. On failure the message lists every
+    statement executed, which makes N+1 regressions easy to spot.
+    """
+    @contextmanager
+    def budget(max_queries):
+        with capture_queries() as stats:
+            yield stats
+        assert stats.count <= max_queries, \
+            f"Query budget of {max_queries} exceeded:\n{stats.report()}"
+    return budget
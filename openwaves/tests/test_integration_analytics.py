@@ -104,7 +104,7 @@ def test_data_analytics_incorrect_answers_aggregation(client, ve_user):
     incorrect_answer = ExamAnswer(
         exam_id=exam.id,
         question_id=question.id,
-        question_number=1,
+        question_number=2,
         correct_answer=1,
         answer=2
     )
@@ -266,7 +266,7 @@ def test_data_analytics_mixed_correct_incorrect_answers(client, ve_user):
     incorrect_answer = ExamAnswer(
         exam_id=exam.id,
         question_id=question.id,
-        question_number=1,
+        question_number=2,
         correct_answer=1,
         answer=2
     )
@@ -421,11 +421,11 @@ def test_data_analytics_sorting_consistency(client, ve_user):
             ExamAnswer(
                 exam_id=exam.id,
                 question_id=question.id,
-                question_number=i,
+                question_number=i * 10 + attempt,
                 answer=2,
                 correct_answer=1
             )
-            for _ in range(i)
+            for attempt in range(i)
         ]
         db.session.add_all(incorrect_answers)
     db.session.commit()
@@ -0,0 +1,121 @@
+"""File: test_integration_answer_store.py
+
+    This file contains the integration tests for packed exam answers: the candidate routes,
+    the VE results, analytics and maintenance that read them, and the convert-answers command.
+"""
+
+from datetime import datetime
+import pytest
+from flask import url_for
+from openwaves import db, session_monitor, services
+from openwaves.answer_store import load_answers, pack_exams
+from openwaves.imports import Exam, ExamAnswer, ExamAnswerPack, Question
+from openwaves.tests.test_unit_auth import login
+from openwaves.tests.test_integration_conditional import setup_open_exam
+
+def answer_tuples(exam):
+    """Return (question_number, question_id, correct_answer, answer, answered_at) per answer."""
+    db.session.expire_all()
+    return [(answer.question_number, answer.question_id, answer.correct_answer, answer.answer,
+             answer.answered_at) for answer in load_answers(db.session.get(Exam, exam.id))]
+
+@pytest.mark.usefixtures("app")
+def test_packed_exam_routes(client, user_to_toggle):
+    """Test ID: IT-201
+    Verify a candidate can take and finish a packed exam through the usual routes.
+
+    Asserts:
+        - Answers posted by the exam form and the offline client are stored in the pack.
+        - No ExamAnswer rows are created for the packed exam.
+        - The results page scores the packed answers.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    assert pack_exams() == 1
+    assert ExamAnswer.query.count() == 0
+
+    login(client, user_to_toggle.username, 'password')
+    client.post(url_for('main.take_exam', exam_id=exam.id, index=0),
+                data={'answer': '0', 'question_number': '1', 'next': 'Next'})
+    data = client.post(url_for('main.sync_answers', exam_id=exam.id),
+                       json={'answers': [{'question_number': 2, 'answer': 3,
+                                          'updated_at': 1_000}]}).get_json()
+    assert data['digest'] == '03'
+
+    answers = answer_tuples(exam)
+    assert [answer[3] for answer in answers] == [0, 3]
+    assert answers[0][4] > 0 and answers[1][4] == 1_000
+    assert ExamAnswer.query.count() == 0
+
+    client.get(url_for('main.finish_exam', exam_id=exam.id), query_string={'answers': '03'})
+    response = client.get(url_for('main.exam_results', session_id=exam.session_id,
+                                  exam_element=2))
+    assert b'Score: 1/35 (Fail)' in response.data
+
+@pytest.mark.usefixtures("app")
+def test_packed_exams_in_results_and_maintenance(client, ve_user):
+    """Test ID: IT-202
+    Verify VE results, the session monitor, analytics, rescoring and purging read packed exams.
+
+    Asserts:
+        - Session results and monitor progress count packed answers.
+        - Analytics include wrong answers from packed exams.
+        - Rescoring corrects a packed answer key.
+        - Purging a session deletes the packs of its exams.
+    """
+    pool, exam = setup_open_exam(ve_user)
+    answers = ExamAnswer.query.filter_by(exam_id=exam.id).order_by(ExamAnswer.question_number)
+    for answer, value in zip(answers, (0, 2)):
+        answer.answer = value
+    exam.open = False
+    db.session.commit()
+    pack_exams()
+
+    progress = session_monitor.load_progress(exam.session_id)
+    assert (progress[0]['answered'], progress[0]['total'], progress[0]['correct']) == (2, 2, 1)
+
+    login(client, ve_user.username, 'vepassword')
+    response = client.get(url_for('main_ve.ve_session_results', session_id=exam.session_id))
+    assert b'<td>1</td>' in response.data
+    response = client.get(url_for('main_ve.data_analytics', pool_id=pool.id))
+    assert b'Question 2?' in response.data
+
+    # Fix the key of question 2 to the answer the candidate chose
+    question = Question.query.filter_by(number='T1A02').one()
+    question.correct_answer = 2
+    db.session.commit()
+    assert services.rescore_answers(pool.id) == 1
+    assert [answer[2] for answer in answer_tuples(exam)] == [0, 2]
+    assert session_monitor.load_progress(exam.session_id)[0]['correct'] == 2
+
+    assert services.purge_sessions(datetime(2025, 1, 1)) == 1
+    assert ExamAnswerPack.query.count() == 0
+
+@pytest.mark.usefixtures("app")
+def test_convert_answers_command(runner, user_to_toggle):
+    """Test ID: IT-203
+    Verify convert-answers moves exams between formats without changing their answers.
+
+    Asserts:
+        - Packing replaces each exam's rows with one pack, and unpacking restores the rows.
+        - Answers, keys and answer times survive the round trip.
+        - Exams already in the requested format are left alone.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    answer = ExamAnswer.query.filter_by(exam_id=exam.id, question_number=2).one()
+    answer.answer, answer.answered_at = 1, 1_700_000_000_000
+    db.session.commit()
+    before = answer_tuples(exam)
+
+    result = runner.invoke(args=['openwaves', 'convert-answers', 'packed', '--batch-size', '1'])
+    assert result.exit_code == 0, result.output
+    assert 'Converted 1 exams to packed answers' in result.output
+    assert (ExamAnswer.query.count(), ExamAnswerPack.query.count()) == (0, 1)
+    assert answer_tuples(exam) == before
+
+    result = runner.invoke(args=['openwaves', 'convert-answers', 'packed'])
+    assert 'Converted 0 exams' in result.output
+
+    result = runner.invoke(args=['openwaves', 'convert-answers', 'rows'])
+    assert result.exit_code == 0, result.output
+    assert (ExamAnswer.query.count(), ExamAnswerPack.query.count()) == (2, 0)
+    assert answer_tuples(exam) == before
@@ -5,10 +5,11 @@
 
 import re
 from flask_login import current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
 from openwaves import db
 from openwaves.models import User
 from openwaves.tests.test_unit_auth import login, logout
+from openwaves.tests.conftest import cached_password_hash
 
 #######################
 #                     #
@@ -40,7 +41,7 @@ def test_login_post_valid_ve(client, app):
             first_name='VE',
             last_name='User',
             email='veuser@example.com',
-            password=generate_password_hash('vepassword', method='pbkdf2:sha256'),
+            password=cached_password_hash('vepassword'),
             role=2
         )
         db.session.add(ve_user)
@@ -111,7 +112,7 @@ def test_signup_post_existing_username(client, app):
             first_name='Existing',
             last_name='User',
             email='existinguser@example.com',
-            password=generate_password_hash('password', method='pbkdf2:sha256'),
+            password=cached_password_hash('password'),
             role=1
         )
         db.session.add(existing_user)
@@ -217,7 +218,7 @@ def test_ve_signup_existing_username(client, app):
             first_name='VE',
             last_name='User',
             email='veuser3@example.com',
-            password=generate_password_hash('somepassword', method='pbkdf2:sha256'),
+            password=cached_password_hash('somepassword'),
             role=2
         )
         db.session.add(existing_user)
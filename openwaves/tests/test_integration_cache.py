@@ -0,0 +1,77 @@
+"""File: test_integration_cache.py
+
+    This file contains the integration tests for the application cache in the cache.py file and
+    its invalidation by the VE routes.
+"""
+
+from datetime import datetime
+import pytest
+from flask import url_for
+from openwaves import db
+from openwaves.cache import get_cache
+from openwaves.imports import Pool, Question, bump_pool_version
+from openwaves.tests.test_unit_auth import login
+from openwaves.tests.test_integration_conditional import setup_open_exam
+
+@pytest.mark.usefixtures("app")
+def test_pool_pages_cached_and_invalidated_by_routes(client, ve_user, query_budget):
+    """Test ID: IT-190
+    Verify the pools and sessions pages read pools from the cache until a VE route changes them.
+
+    Asserts:
+        - A repeated pools page is answered from the cache with fewer queries.
+        - A change made outside the routes is not visible until the cache is invalidated.
+        - Creating and deleting a pool through the routes shows on both pages at once.
+    """
+    login(client, ve_user.username, 'vepassword')
+    client.post('/ve/create_pool', data={'pool_name': 'Tech', 'exam_element': '2',
+                                         'start_date': '2022-07-01', 'end_date': '2026-06-30'})
+    client.get(url_for('main_ve.pools'))
+    db.session.expire_all()
+    with query_budget(100) as cold:
+        get_cache().clear()
+        client.get(url_for('main_ve.pools'))
+    db.session.expire_all()
+    with query_budget(100) as warm:
+        assert b'Tech' in client.get(url_for('main_ve.pools')).data
+    assert warm.count < cold.count
+
+    # A direct database change waits for an invalidation
+    db.session.add(Pool(name='Direct', element=3, start_date=datetime(2023, 7, 1),
+                        end_date=datetime(2027, 6, 30)))
+    db.session.commit()
+    assert b'Direct' not in client.get(url_for('main_ve.pools')).data
+
+    client.post('/ve/create_pool', data={'pool_name': 'Extra', 'exam_element': '4',
+                                         'start_date': '2024-07-01', 'end_date': '2028-06-30'})
+    assert b'Direct' in client.get(url_for('main_ve.pools')).data
+    assert b'Extra 2024-2028' in client.get(url_for('main_ve.ve_sessions')).data
+
+    extra = Pool.query.filter_by(name='Extra').one()
+    assert client.delete(f'/ve/delete_pool/{extra.id}').status_code == 200
+    assert b'Extra 2024-2028' not in client.get(url_for('main_ve.ve_sessions')).data
+
+@pytest.mark.usefixtures("app")
+def test_exam_question_cached_per_pool_version(client, user_to_toggle):
+    """Test ID: IT-191
+    Verify exam questions are cached until their pool's version changes.
+
+    Asserts:
+        - An edited question keeps its cached text while the pool version is unchanged.
+        - Bumping the pool version shows the new text.
+    """
+    pool, exam = setup_open_exam(user_to_toggle)
+    login(client, user_to_toggle.username, 'password')
+    url = url_for('main.take_exam', exam_id=exam.id, index=0)
+    assert b'Question 1?' in client.get(url).data
+
+    question = Question.query.filter_by(pool_id=pool.id, number='T1A01').one()
+    question.question = 'Reworded question?'
+    db.session.commit()
+    assert b'Question 1?' in client.get(url).data
+
+    bump_pool_version(pool.id)
+    db.session.commit()
+    response = client.get(url)
+    assert b'Reworded question?' in response.data
+    assert b'Question 1?' not in response.data
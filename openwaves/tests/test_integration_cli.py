@@ -0,0 +1,247 @@
+"""File: test_integration_cli.py
+
+    This file contains the integration tests for the `flask openwaves` commands in the cli.py
+    file and the service functions they share with the VE routes.
+"""
+
+import os
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+from openwaves import db
+from openwaves.imports import Pool, Question, TLI, ExamDiagram, ExamSession, ExamRegistration, \
+    Exam, ExamAnswer
+
+CSV_HEADER = 'id,correct,question,a,b,c,d,refs\n'
+
+def add_pool():
+    """Create a Tech pool with one question and return it."""
+    pool = Pool(name='Tech', element=2, start_date=datetime(2022, 7, 1),
+                end_date=datetime(2026, 6, 30))
+    db.session.add(pool)
+    db.session.flush()
+    db.session.add(Question(pool_id=pool.id, number='T1A01', correct_answer=1, question='Q?',
+                            option_a='A', option_b='B', option_c='C', option_d='D', refs=''))
+    db.session.commit()
+    return pool
+
+def add_session(pool, days_ago, answers=2):
+    """Create a session with one registration, exam and answers, dated days_ago days back."""
+    session_date = datetime.now() - timedelta(days=days_ago)
+    session = ExamSession(session_date=session_date, start_time=session_date,
+                          tech_pool_id=pool.id, gen_pool_id=pool.id, extra_pool_id=pool.id,
+                          status=False)
+    db.session.add(session)
+    db.session.flush()
+    db.session.add(ExamRegistration(session_id=session.id, user_id=1, tech=True))
+    exam = Exam(user_id=1, pool_id=pool.id, session_id=session.id, element=2, open=False)
+    db.session.add(exam)
+    db.session.flush()
+    question = Question.query.filter_by(pool_id=pool.id).first()
+    db.session.add_all(ExamAnswer(exam_id=exam.id, question_id=question.id, question_number=n,
+                                  correct_answer=question.correct_answer, answer=0)
+                       for n in range(1, answers + 1))
+    db.session.commit()
+    return session
+
+@pytest.mark.usefixtures("app")
+def test_import_pool_creates_pool_and_questions(runner, tmp_path):
+    """Test ID: IT-181
+    Verify import-pool creates a pool from a CSV file with its questions and TLI counts.
+
+    Asserts:
+        - The command succeeds and reports the number of questions.
+        - Questions and TLI quantities are stored and correct answers are integers.
+        - A CSV without the expected columns is rejected.
+    """
+    csv_path = tmp_path / 'tech.csv'
+    csv_path.write_text(CSV_HEADER +
+                        'T1A01,0,First?,a,b,c,d,[97.1]\n'
+                        'T1A02,3,Second?,a,b,c,d,[97.3]\n'
+                        'T1B01,2,Third?,a,b,c,d,\n', encoding='utf-8')
+
+    result = runner.invoke(args=['openwaves', 'import-pool', str(csv_path), '--name', 'Tech',
+                                 '--element', '2', '--start-date', '2022-07-01',
+                                 '--end-date', '2026-06-30'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Imported 3 questions' in result.output
+    pool = Pool.query.one()
+    assert [q.correct_answer for q in Question.query.order_by(Question.number)] == [0, 3, 2]
+    assert {tli.tli: tli.quantity for tli in TLI.query.filter_by(pool_id=pool.id)} == \
+        {'T1A': 2, 'T1B': 1}
+
+    bad_path = tmp_path / 'bad.csv'
+    bad_path.write_text('id,question\nT1A01,First?\n', encoding='utf-8')
+    result = runner.invoke(args=['openwaves', 'import-pool', str(bad_path),
+                                 '--pool-id', str(pool.id)])
+    assert result.exit_code != 0
+    assert 'Missing CSV columns' in result.output
+
+@pytest.mark.usefixtures("app")
+def test_import_diagrams_copies_images(runner, app, tmp_path):
+    """Test ID: IT-182
+    Verify import-diagrams copies every image into the upload folder and records it.
+
+    Asserts:
+        - Images are imported and named after their files; other files are skipped.
+        - The files exist in the upload folder under the stored path.
+        - An unknown pool is rejected.
+    """
+    pool = add_pool()
+    source = tmp_path / 'source'
+    source.mkdir()
+    (source / 'T1.png').write_bytes(b'png')
+    (source / 'T2.jpg').write_bytes(b'jpg')
+    (source / 'notes.txt').write_text('skip me', encoding='utf-8')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+
+    result = runner.invoke(args=['openwaves', 'import-diagrams', str(source),
+                                 '--pool-id', str(pool.id)])
+
+    assert result.exit_code == 0, result.output
+    assert 'Imported 2 diagrams' in result.output
+    diagrams = ExamDiagram.query.order_by(ExamDiagram.name).all()
+    assert [diagram.name for diagram in diagrams] == ['T1', 'T2']
+    for diagram in diagrams:
+        assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'],
+                                           os.path.basename(diagram.path)))
+
+    result = runner.invoke(args=['openwaves', 'import-diagrams', str(source), '--pool-id', '99'])
+    assert result.exit_code != 0
+    assert 'Pool 99 not found' in result.output
+
+@pytest.mark.usefixtures("app")
+def test_purge_deletes_old_sessions_in_batches(runner):
+    """Test ID: IT-183
+    Verify purge deletes sessions older than 15 months with their data, batch by batch.
+
+    Asserts:
+        - Progress is printed after each batch.
+        - Old sessions, registrations, exams and answers are gone; the recent session remains.
+    """
+    pool = add_pool()
+    for _ in range(3):
+        add_session(pool, days_ago=500)
+    recent = add_session(pool, days_ago=30)
+
+    result = runner.invoke(args=['openwaves', 'purge', '--batch-size', '2', '--yes'])
+
+    assert result.exit_code == 0, result.output
+    assert '2/3 sessions deleted' in result.output
+    assert '3/3 sessions deleted' in result.output
+    assert 'Purged 3 sessions' in result.output
+    assert [session.id for session in ExamSession.query] == [recent.id]
+    assert ExamRegistration.query.count() == 1
+    assert Exam.query.count() == 1
+    assert ExamAnswer.query.count() == 2
+
+@pytest.mark.usefixtures("app")
+def test_rescore_updates_changed_answer_keys(runner):
+    """Test ID: IT-184
+    Verify rescore copies a corrected answer key onto existing exam answers.
+
+    Asserts:
+        - Every answer of the corrected question is updated and counted.
+        - A second run changes nothing.
+    """
+    pool = add_pool()
+    add_session(pool, days_ago=1, answers=3)
+    Question.query.filter_by(pool_id=pool.id).update({Question.correct_answer: 0})
+    db.session.commit()
+
+    result = runner.invoke(args=['openwaves', 'rescore', '--pool-id', str(pool.id)])
+
+    assert result.exit_code == 0, result.output
+    assert 'Rescored 3 answers' in result.output
+    db.session.expire_all()
+    assert {answer.correct_answer for answer in ExamAnswer.query} == {0}
+    assert 'Rescored 0 answers' in runner.invoke(args=['openwaves', 'rescore']).output
+
+@pytest.mark.usefixtures("app")
+def test_rebuild_analytics_and_vacuum(runner):
+    """Test ID: IT-185
+    Verify rebuild-analytics recreates a missing index and vacuum runs.
+
+    Asserts:
+        - A dropped index on exam_answer is recreated and reported.
+        - A second run creates nothing.
+        - vacuum completes.
+    """
+    db.session.remove()
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql('DROP INDEX ix_exam_answer_question_id')
+
+    result = runner.invoke(args=['openwaves', 'rebuild-analytics'])
+
+    assert result.exit_code == 0, result.output
+    assert 'created index ix_exam_answer_question_id' in result.output
+    assert 'ix_exam_answer_question_id' in \
+        {index['name'] for index in inspect(db.engine).get_indexes('exam_answer')}
+    assert '(0 created)' in runner.invoke(args=['openwaves', 'rebuild-analytics']).output
+
+    result = runner.invoke(args=['openwaves', 'vacuum'])
+    assert result.exit_code == 0, result.output
+    assert 'Vacuum complete' in result.output
+
+@pytest.mark.usefixtures("app")
+def test_upgrade_db_adds_missing_columns(runner):
+    """Test ID: IT-214
+    Verify upgrade-db brings a database created before newer columns and indexes up to date.
+
+    Asserts:
+        - Dropped columns and an index are added back and reported.
+        - Existing rows get the default of a NOT NULL column.
+        - A second run makes no changes.
+    """
+    add_pool()
+    db.session.remove()
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql('DROP INDEX ix_exam_answer_exam_id')
+        connection.exec_driver_sql('ALTER TABLE pool DROP COLUMN version')
+        connection.exec_driver_sql('ALTER TABLE exam DROP COLUMN seed')
+
+    result = runner.invoke(args=['openwaves', 'upgrade-db'])
+
+    assert result.exit_code == 0, result.output
+    assert 'added column pool.version' in result.output
+    assert 'added column exam.seed' in result.output
+    assert 'created index ix_exam_answer_exam_id' in result.output
+    assert Pool.query.one().version == 1
+    assert '(0 changes)' in runner.invoke(args=['openwaves', 'upgrade-db']).output
+
+@pytest.mark.usefixtures("app")
+def test_upgrade_db_adds_unique_answer_index(runner):
+    """Test ID: IT-225
+    Verify upgrade-db adds the unique index on an exam's question numbers to an old database.
+
+    Asserts:
+        - Duplicate answer rows left by earlier races are deleted, keeping the newest.
+        - The unique index is created and then rejects a duplicate row.
+    """
+    pool = add_pool()
+    question = Question.query.one()
+    exam = Exam(user_id=1, pool_id=pool.id, session_id=1, element=2, open=False)
+    db.session.add(exam)
+    db.session.commit()
+    exam_id, question_id = exam.id, question.id
+    db.session.remove()
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql('DROP INDEX uq_exam_answer_question')
+    db.session.add_all([ExamAnswer(exam_id=exam_id, question_id=question_id, question_number=1,
+                                   correct_answer=0, answer=answer) for answer in (None, 2)])
+    db.session.commit()
+    db.session.remove()
+
+    result = runner.invoke(args=['openwaves', 'upgrade-db'])
+
+    assert result.exit_code == 0, result.output
+    assert 'deleted 1 duplicate rows from exam_answer' in result.output
+    assert 'created index uq_exam_answer_question' in result.output
+    assert [row.answer for row in ExamAnswer.query.filter_by(exam_id=exam_id)] == [2]
+    db.session.add(ExamAnswer(exam_id=exam_id, question_id=question_id, question_number=1,
+                              correct_answer=0))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
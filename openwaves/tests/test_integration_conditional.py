@@ -0,0 +1,158 @@
+"""File: test_conditional.py
+
+    This file contains the integration tests for the conditional GET code in the conditional.py
+    file and the exam routes that use it.
+"""
+
+from datetime import datetime
+import pytest
+from flask import url_for
+from openwaves import db
+from openwaves.imports import ExamSession, Exam, ExamAnswer, Pool, Question, bump_pool_version
+from openwaves.tests.test_unit_auth import login
+
+def setup_open_exam(user):
+    """Create a pool, an open session and an open exam with two unanswered questions.
+
+    Returns:
+        - pool, exam
+    """
+    pool = Pool(name="Tech Pool", element=2, start_date=datetime(2024, 1, 1),
+                end_date=datetime(2024, 12, 31))
+    db.session.add(pool)
+    db.session.commit()
+
+    exam_session = ExamSession(session_date=datetime(2024, 10, 1), tech_pool_id=pool.id,
+                               gen_pool_id=pool.id, extra_pool_id=pool.id, status=True)
+    db.session.add(exam_session)
+    db.session.commit()
+
+    exam = Exam(user_id=user.id, open=True, element=2, pool_id=pool.id,
+                session_id=exam_session.id)
+    db.session.add(exam)
+    db.session.commit()
+
+    for number in (1, 2):
+        question = Question(pool_id=pool.id, number=f'T1A0{number}', correct_answer=0,
+                            question=f'Question {number}?', option_a='A', option_b='B',
+                            option_c='C', option_d='D', refs='')
+        db.session.add(question)
+        db.session.commit()
+        db.session.add(ExamAnswer(exam_id=exam.id, question_id=question.id,
+                                  question_number=number, correct_answer=0))
+    db.session.commit()
+    return pool, exam
+
+@pytest.mark.usefixtures("app")
+def test_take_exam_not_modified(client, user_to_toggle):
+    """Test ID: IT-152
+    Verify an unchanged exam question page is answered with a 304.
+
+    Asserts:
+        - The first GET returns 200 with an ETag and private, no-cache caching.
+        - A GET with If-None-Match returns 304 without a CSP header.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    login(client, user_to_toggle.username, 'password')
+
+    response = client.get(url_for('main.take_exam', exam_id=exam.id, index=0))
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert 'no-cache' in response.headers['Cache-Control']
+    assert 'private' in response.headers['Cache-Control']
+
+    response = client.get(url_for('main.take_exam', exam_id=exam.id, index=0),
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert 'Content-Security-Policy' not in response.headers
+
+@pytest.mark.usefixtures("app")
+def test_take_exam_etag_changes_with_answer(client, user_to_toggle):
+    """Test ID: IT-153
+    Verify saving an answer changes the page's ETag.
+
+    Asserts:
+        - After answering, the old ETag no longer produces a 304.
+        - Different questions of the same exam have different ETags.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    login(client, user_to_toggle.username, 'password')
+
+    etag = client.get(url_for('main.take_exam', exam_id=exam.id, index=0)).headers['ETag']
+    other = client.get(url_for('main.take_exam', exam_id=exam.id, index=1)).headers['ETag']
+    assert etag != other
+
+    client.post(url_for('main.take_exam', exam_id=exam.id, index=0),
+                data={'answer': '1', 'question_number': 1})
+
+    response = client.get(url_for('main.take_exam', exam_id=exam.id, index=0),
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+@pytest.mark.usefixtures("app")
+def test_review_exam_etag_changes_with_pool_version(client, user_to_toggle):
+    """Test ID: IT-154
+    Verify the review page is revalidated when the pool changes.
+
+    Asserts:
+        - The review page returns 304 for a matching ETag.
+        - After the pool version is bumped the same ETag gets a full 200 response.
+    """
+    pool, exam = setup_open_exam(user_to_toggle)
+    login(client, user_to_toggle.username, 'password')
+
+    etag = client.get(url_for('main.review_exam', exam_id=exam.id)).headers['ETag']
+    response = client.get(url_for('main.review_exam', exam_id=exam.id),
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    bump_pool_version(pool.id)
+    db.session.commit()
+
+    response = client.get(url_for('main.review_exam', exam_id=exam.id),
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+@pytest.mark.usefixtures("app")
+def test_pending_flash_disables_etag(client, user_to_toggle):
+    """Test ID: IT-155
+    Verify pages are not cached while a flash message is waiting to be shown.
+
+    Asserts:
+        - No ETag is sent when the session holds flashed messages.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    login(client, user_to_toggle.username, 'password')
+
+    with client.session_transaction() as session:
+        session['_flashes'] = [('info', 'Heads up')]
+
+    response = client.get(url_for('main.take_exam', exam_id=exam.id, index=0))
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+def test_diagram_strong_etag(app, tmp_path):
+    """Test ID: IT-156
+    Verify uploaded diagrams are served with a strong, content-based ETag.
+
+    Asserts:
+        - The ETag is strong and identical for identical content.
+        - A matching If-None-Match returns 304.
+    """
+    (tmp_path / 'images' / 'diagrams').mkdir(parents=True)
+    (tmp_path / 'images' / 'diagrams' / '1_T1.png').write_bytes(b'\x89PNG diagram')
+    app.static_folder = str(tmp_path)
+    client = app.test_client()
+
+    response = client.get('/static/images/diagrams/1_T1.png')
+    etag, weak = response.get_etag()
+    response.close()
+    assert etag and not weak
+    assert 'Last-Modified' in response.headers
+
+    response = client.get('/static/images/diagrams/1_T1.png',
+                          headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+    response.close()
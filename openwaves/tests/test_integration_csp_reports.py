@@ -0,0 +1,189 @@
+"""File: test_csp_reports.py
+
+    This file contains the integration tests for the CSP violation report endpoint, the batched
+    persistence in the csp_reports.py file and the VE violations page.
+"""
+
+import json
+import time
+from datetime import datetime
+from io import BytesIO
+import pytest
+from flask import url_for
+from sqlalchemy.exc import IntegrityError
+from openwaves import db
+from openwaves.imports import CspViolation
+from openwaves.csp_reports import get_aggregator, write_counts
+from openwaves.tests.test_unit_auth import login
+
+REPORT = json.dumps({"csp-report": {"document-uri": "https://exam.local/exam/1",
+                                    "violated-directive": "script-src",
+                                    "blocked-uri": "https://evil.com/x.js"}})
+
+def post_report(client, body=REPORT):
+    """Post a legacy CSP report the way a browser does."""
+    return client.post('/csp-violation-report-endpoint', data=body,
+                       content_type='application/csp-report')
+
+@pytest.mark.usefixtures("app")
+def test_report_storm_is_batched(client, app):
+    """Test ID: IT-172
+    Verify a storm of identical reports is aggregated in memory and saved as one row.
+
+    Asserts:
+        - Every report is answered with 204 without writing to the database.
+        - A flush writes a single row with the full count.
+        - A later flush adds to the existing row.
+    """
+    for _ in range(200):
+        assert post_report(client).status_code == 204
+    assert CspViolation.query.count() == 0
+
+    assert get_aggregator(app).flush() == 1
+    violation = CspViolation.query.one()
+    assert (violation.directive, violation.blocked_uri, violation.count) == \
+        ('script-src', 'https://evil.com/x.js', 200)
+
+    post_report(client)
+    get_aggregator(app).flush()
+    assert CspViolation.query.one().count == 201
+
+@pytest.mark.usefixtures("app")
+def test_report_flushed_when_interval_elapsed(client, app):
+    """Test ID: IT-173
+    Verify pending counts are saved by the first report after the flush interval.
+
+    Asserts:
+        - With a zero interval each report is saved immediately.
+    """
+    app.config['CSP_REPORT_FLUSH_INTERVAL'] = 0
+    post_report(client)
+    assert CspViolation.query.one().count == 1
+
+@pytest.mark.usefixtures("app")
+def test_report_flushed_without_later_reports(client, app):
+    """Test ID: IT-231
+    Verify pending counts are saved even when no report follows them.
+
+    Asserts:
+        - A report within the flush interval is saved by a timer once the interval ends.
+        - The at-exit flush saves counts still pending.
+    """
+    app.config['CSP_REPORT_FLUSH_INTERVAL'] = 0.1
+    for _ in range(2):
+        post_report(client)
+    assert CspViolation.query.count() == 0
+    for _ in range(40):
+        db.session.remove()
+        if CspViolation.query.count():
+            break
+        time.sleep(0.05)
+    assert CspViolation.query.one().count == 2
+
+    app.config['CSP_REPORT_FLUSH_INTERVAL'] = 60
+    post_report(client, REPORT.replace('evil.com', 'other.com'))
+    assert get_aggregator(app).flush_in_app() == 1
+    assert CspViolation.query.count() == 2
+
+@pytest.mark.usefixtures("app")
+def test_report_size_limit_and_sampling(client, app, monkeypatch):
+    """Test ID: IT-174
+    Verify oversized reports are rejected and unsampled reports are ignored.
+
+    Asserts:
+        - A body over CSP_REPORT_MAX_BYTES returns 413.
+        - With a sample rate of 0 no report is counted.
+        - With a sample rate of 0.5 each counted report stands for two.
+    """
+    app.config['CSP_REPORT_MAX_BYTES'] = 100
+    assert post_report(client, REPORT + ' ' * 100).status_code == 413
+    app.config['CSP_REPORT_MAX_BYTES'] = 8192
+
+    app.config['CSP_REPORT_SAMPLE_RATE'] = 0
+    post_report(client)
+    assert not get_aggregator(app).drain()
+
+    app.config['CSP_REPORT_SAMPLE_RATE'] = 0.5
+    monkeypatch.setattr('openwaves.csp_reports.random.random', lambda: 0.25)
+    post_report(client)
+    assert get_aggregator(app).drain()[('script-src', 'https://evil.com/x.js')]['count'] == 2
+
+def test_report_endpoint_exempt_from_csrf():
+    """Test ID: IT-175
+    Verify browsers can post reports when CSRF protection is enabled.
+
+    Asserts:
+        - The report endpoint returns 204 without a CSRF token.
+    """
+    from openwaves import create_app  # pylint: disable=C0415
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://",
+                      "WTF_CSRF_ENABLED": True, "TEMPLATE_WARMUP": False})
+    assert post_report(app.test_client()).status_code == 204
+    # This app has no tables for the count to be written to at exit
+    with app.app_context():
+        get_aggregator(app).drain()
+
+@pytest.mark.usefixtures("app")
+def test_ve_violations_page(client, ve_user, user_to_toggle):
+    """Test ID: IT-176
+    Verify VEs see the saved violations, most frequent first, and candidates are refused.
+
+    Asserts:
+        - The page flushes pending reports and lists them by count.
+        - A candidate is redirected to log out.
+    """
+    for _ in range(3):
+        post_report(client)
+    post_report(client, REPORT.replace('evil.com', 'other.com'))
+
+    login(client, ve_user.username, 'vepassword')
+    response = client.get(url_for('main_ve.csp_violations'))
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert body.index('https://evil.com/x.js') < body.index('https://other.com/x.js')
+    client.get(url_for('auth.logout'))
+
+    login(client, user_to_toggle.username, 'password')
+    response = client.get(url_for('main_ve.csp_violations'))
+    assert response.status_code == 302
+
+@pytest.mark.usefixtures("app")
+def test_chunked_report_and_concurrent_insert(client, app, monkeypatch):
+    """Test ID: IT-216
+    Verify chunked reports are read up to the size limit and a lost insert race is retried.
+
+    Asserts:
+        - A chunked report without Content-Length is counted; one over the limit returns 413.
+        - When another worker inserts the same new pair first, the flush adds to its row.
+    """
+    def post_chunked(body):
+        # Servers that decode chunked bodies mark the input as terminated
+        return client.post('/csp-violation-report-endpoint', input_stream=BytesIO(body.encode()),
+                           headers={'Content-Type': 'application/csp-report',
+                                    'Transfer-Encoding': 'chunked'},
+                           environ_overrides={'wsgi.input_terminated': True})
+
+    app.config['CSP_REPORT_MAX_BYTES'] = 1000
+    assert post_chunked(REPORT).status_code == 204
+    assert post_chunked(REPORT + ' ' * 1000).status_code == 413
+    aggregator = get_aggregator(app)
+    assert aggregator.drain()[('script-src', 'https://evil.com/x.js')]['count'] == 1
+
+    attempts = []
+    def lose_race(pending):
+        attempts.append(pending)
+        if len(attempts) == 1:
+            # Another worker commits the same pair between our lookup and our insert
+            with db.engine.begin() as connection:
+                connection.execute(CspViolation.__table__.insert().values(
+                    directive='script-src', blocked_uri='https://evil.com/x.js', count=5,
+                    first_seen=datetime.now(), last_seen=datetime.now()))
+            raise IntegrityError('INSERT INTO csp_violation', {}, Exception('UNIQUE'))
+        write_counts(pending)
+    monkeypatch.setattr('openwaves.csp_reports.write_counts', lose_race)
+
+    for _ in range(3):
+        post_report(client)
+    assert aggregator.flush() == 1
+    assert len(attempts) == 2
+    assert CspViolation.query.one().count == 8
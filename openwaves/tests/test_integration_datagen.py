@@ -0,0 +1,107 @@
+"""File: test_integration_datagen.py
+
+    This file contains the integration tests for the synthetic data generator in the datagen.py
+    file.
+"""
+
+import pytest
+from sqlalchemy import text
+from openwaves import db
+from openwaves.imports import User, Pool, ExamSession, ExamRegistration, Exam, ExamAnswer
+from openwaves.datagen import generate_dataset
+
+def answer_snapshot():
+    """Return the generated exams and answers in insertion order, without their ids."""
+    exams = [(exam.element, exam.open) for exam in Exam.query.order_by(Exam.id)]
+    answers = [(answer.question_number, answer.correct_answer, answer.answer)
+               for answer in ExamAnswer.query.order_by(ExamAnswer.id)]
+    return exams, answers
+
+@pytest.mark.usefixtures("app")
+def test_generate_dataset_counts():
+    """Test ID: IT-178
+    Verify the generator creates consistent rows for all three elements.
+
+    Asserts:
+        - The reported counts match the rows in the database.
+        - Synthetic pools exist for every element and every exam uses its element's pool.
+        - Every session is closed and every exam is finished.
+    """
+    counts = generate_dataset(users=20, sessions=3, seed=7, participation=0.5)
+
+    assert User.query.filter(User.username.like('GEN%')).count() == 20
+    assert ExamSession.query.count() == counts['sessions'] == 3
+    assert ExamRegistration.query.count() == counts['registrations'] > 0
+    assert Exam.query.count() == counts['exams'] >= counts['registrations']
+    assert ExamAnswer.query.count() == counts['answers']
+    assert {pool.element for pool in Pool.query} == {2, 3, 4}
+    assert {exam.element for exam in Exam.query} == {2, 3, 4}
+    for exam in Exam.query:
+        assert db.session.get(Pool, exam.pool_id).element == exam.element
+    assert not ExamSession.query.filter_by(status=True).count()
+    assert not Exam.query.filter_by(open=True).count()
+
+@pytest.mark.usefixtures("app")
+def test_generate_dataset_question_numbers():
+    """Test ID: IT-179
+    Verify answers are numbered 1..N within each exam and hold plausible responses.
+
+    Asserts:
+        - question_number is an integer sequence starting at 1, one per TLI.
+        - Tech and General exams have 35 questions, Extra exams 50.
+        - Most answers are correct but not all, and some wrong answers are recorded.
+    """
+    generate_dataset(users=10, sessions=2, seed=3, participation=1)
+
+    for exam in Exam.query:
+        numbers = sorted(answer.question_number for answer in
+                         ExamAnswer.query.filter_by(exam_id=exam.id))
+        assert numbers == list(range(1, (50 if exam.element == 4 else 35) + 1))
+
+    answers = ExamAnswer.query.all()
+    correct = sum(answer.answer == answer.correct_answer for answer in answers)
+    assert 0.5 < correct / len(answers) < 0.95
+    assert any(answer.answer is not None and answer.answer != answer.correct_answer
+               for answer in answers)
+
+@pytest.mark.usefixtures("app")
+def test_generate_dataset_is_deterministic():
+    """Test ID: IT-180
+    Verify the same seed always produces the same dataset and another seed does not.
+
+    Asserts:
+        - Two runs with the same seed on empty databases give identical exams and answers.
+        - A different seed gives different answers.
+    """
+    def run(seed):
+        db.drop_all()
+        db.create_all()
+        generate_dataset(users=8, sessions=2, seed=seed, participation=0.6)
+        return answer_snapshot()
+
+    first = run(11)
+    assert run(11) == first
+    assert run(12)[1] != first[1]
+
+@pytest.mark.usefixtures("app")
+def test_generate_dataset_batches_with_foreign_keys(monkeypatch):
+    """Test ID: IT-217
+    Verify batches insert their parents first and the generator can run twice with one seed.
+
+    Asserts:
+        - With foreign keys enforced and small batches, every answer's exam already exists.
+        - A second run with the same seed adds new accounts instead of failing on usernames.
+    """
+    monkeypatch.setattr('openwaves.datagen.BATCH_SIZE', 100)
+    db.session.remove()
+    db.session.execute(text('PRAGMA foreign_keys=ON'))
+    assert db.session.execute(text('PRAGMA foreign_keys')).scalar() == 1
+    try:
+        first = generate_dataset(users=6, sessions=2, seed=5, participation=1)
+        second = generate_dataset(users=6, sessions=2, seed=5, participation=1)
+    finally:
+        db.session.execute(text('PRAGMA foreign_keys=OFF'))
+
+    assert User.query.filter(User.username.like('GEN%')).count() == 12
+    assert Exam.query.count() == first['exams'] + second['exams']
+    assert ExamAnswer.query.count() == first['answers'] + second['answers']
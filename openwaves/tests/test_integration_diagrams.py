@@ -0,0 +1,189 @@
+"""File: test_integration_diagrams.py
+
+    This file contains the integration tests for deduplicated diagram storage through the
+    upload_diagram, delete_diagram and delete_pool routes in the main_ve.py file, and for the
+    diagram delivery route in the diagram_store.py file.
+"""
+
+import hashlib
+import os
+import threading
+from datetime import datetime
+from io import BytesIO
+import pytest
+from openwaves import create_app, db, services
+from openwaves.diagram_store import LocalDiagramStore
+from openwaves.imports import ExamDiagram, Pool
+from openwaves.tests.test_unit_diagrams import png_header
+from openwaves.tests.test_unit_auth import login
+
+@pytest.mark.usefixtures("app")
+def test_shared_diagram_files(app, client, ve_user, tmp_path):
+    """Test ID: IT-212
+    Verify an image uploaded to two pools is stored once and kept until its last diagram goes.
+
+    Asserts:
+        - Both diagrams point at the same content-named file, with the size from its header.
+        - Deleting one diagram keeps the file the other still uses.
+        - Deleting the pool of the last diagram removes the file.
+    """
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    pools = [Pool(name=name, element=2, start_date=datetime(2022, 7, 1),
+                  end_date=datetime(2026, 6, 30)) for name in ('Tech', 'Tech copy')]
+    db.session.add_all(pools)
+    db.session.commit()
+    login(client, ve_user.username, 'vepassword')
+
+    data = png_header(400, 300)
+    for pool in pools:
+        response = client.post(f'/ve/upload_diagram/{pool.id}', data={
+            'diagram_name': 'T-1', 'file': (BytesIO(data), 'T1.png')})
+        assert response.status_code == 302
+
+    stored = tmp_path / f'{hashlib.sha256(data).hexdigest()}.png'
+    first, second = ExamDiagram.query.order_by(ExamDiagram.id).all()
+    assert first.path == second.path == f'diagrams/{stored.name}'
+    assert (first.width, first.height) == (400, 300)
+    assert [path.name for path in tmp_path.iterdir()] == [stored.name]
+
+    assert client.delete(f'/ve/delete_diagram/{first.id}').status_code == 200
+    assert stored.exists()
+    assert db.session.get(ExamDiagram, first.id) is None
+
+    assert client.delete(f'/ve/delete_pool/{pools[1].id}').status_code == 200
+    assert not stored.exists()
+
+@pytest.mark.usefixtures("app")
+def test_diagram_deleted_then_added_again(app, client, ve_user, tmp_path):
+    """Test ID: IT-229
+    Verify an image deleted from one pool and added to another with the same bytes keeps its file.
+
+    Asserts:
+        - Re-adding the image after its pool was deleted writes the file again.
+        - A stored file is rewritten by an upload, not trusted because its name exists.
+        - A diagram added between a deletion's commit and the release of its files keeps the
+          shared file, as references are counted after the commit.
+    """
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    pools = [Pool(name=name, element=2, start_date=datetime(2022, 7, 1),
+                  end_date=datetime(2026, 6, 30)) for name in ('Tech', 'Tech copy', 'Tech new')]
+    db.session.add_all(pools)
+    db.session.commit()
+    pool_ids = [pool.id for pool in pools]
+    login(client, ve_user.username, 'vepassword')
+
+    data = png_header(120, 80)
+    stored = tmp_path / f'{hashlib.sha256(data).hexdigest()}.png'
+
+    def upload(pool_id):
+        response = client.post(f'/ve/upload_diagram/{pool_id}', data={
+            'diagram_name': 'T-1', 'file': (BytesIO(data), 'T1.png')})
+        assert response.status_code == 302
+
+    upload(pool_ids[0])
+    assert client.delete(f'/ve/delete_pool/{pool_ids[0]}').status_code == 200
+    assert not stored.exists()
+    upload(pool_ids[1])
+    assert stored.read_bytes() == data
+
+    stored.write_bytes(b'truncated')
+    upload(pool_ids[2])
+    assert stored.read_bytes() == data
+
+    assert client.delete('/ve/delete_diagram/' + str(
+        ExamDiagram.query.filter_by(pool_id=pool_ids[2]).one().id)).status_code == 200
+    assert stored.exists()
+    paths = services.delete_diagrams(ExamDiagram.query.filter_by(pool_id=pool_ids[1]).all())
+    db.session.commit()
+    upload(pool_ids[2])
+    services.release_diagram_files(paths)
+    assert stored.read_bytes() == data
+    assert client.get(f'/diagrams/{stored.name}').data == data
+
+@pytest.mark.usefixtures("app")
+def test_diagram_delivery(app, client, ve_user, tmp_path):
+    """Test ID: IT-213
+    Verify diagrams are served from /diagrams/ by the app or handed to the front server.
+
+    Asserts:
+        - The pool rows link the diagram at /diagrams/<digest>.png.
+        - 'flask' delivery sends the file with an immutable Cache-Control.
+        - 'x-accel-redirect' and 'x-sendfile' answer with an empty body and the offload header.
+        - Names that are not stored, or leave the store, return 404.
+    """
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    pool = Pool(name='Tech', element=2, start_date=datetime(2022, 7, 1),
+                end_date=datetime(2026, 6, 30))
+    db.session.add(pool)
+    db.session.commit()
+    login(client, ve_user.username, 'vepassword')
+
+    data = png_header(100, 50)
+    name = f'{hashlib.sha256(data).hexdigest()}.png'
+    response = client.post(f'/ve/upload_diagram/{pool.id}', headers={'Accept': 'application/json'},
+                           data={'diagram_name': 'T-1', 'file': (BytesIO(data), 'T1.png')})
+    assert f'/diagrams/{name}' in response.get_json()['html']
+
+    response = client.get(f'/diagrams/{name}')
+    assert response.status_code == 200
+    assert response.data == data
+    assert response.mimetype == 'image/png'
+    assert 'immutable' in response.headers['Cache-Control']
+
+    app.config['DIAGRAM_DELIVERY'] = 'x-accel-redirect'
+    response = client.get(f'/diagrams/{name}')
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'] == f'/_diagrams/{name}'
+    assert response.mimetype == 'image/png'
+
+    app.config['DIAGRAM_DELIVERY'] = 'x-sendfile'
+    response = client.get(f'/diagrams/{name}')
+    assert response.data == b''
+    assert response.headers['X-Sendfile'] == str(tmp_path / name)
+
+    assert client.get('/diagrams/missing.png').status_code == 404
+    assert client.get('/diagrams/..%2Fconfig.py').status_code == 404
+
+def test_diagram_store_writes_and_settings(tmp_path, monkeypatch):
+    """Test ID: IT-222
+    Verify concurrent writes of one diagram are safe and invalid store settings fail at start-up.
+
+    Asserts:
+        - Threads storing the same file at once all succeed and leave one readable file and no
+          temporary files.
+        - A failed rename removes the temporary file.
+        - An unknown DIAGRAM_STORE or DIAGRAM_DELIVERY stops create_app with a ValueError.
+    """
+    store = LocalDiagramStore(str(tmp_path))
+    data = png_header(100, 50)
+    errors = []
+
+    def put():
+        try:
+            store.put('shared.png', data)
+        except OSError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=put) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert [path.name for path in tmp_path.iterdir()] == ['shared.png']
+    assert (tmp_path / 'shared.png').read_bytes() == data
+    assert (tmp_path / 'shared.png').stat().st_mode & 0o777 == 0o644
+
+    def fail_replace(source, target):
+        raise OSError(f"cannot rename {source} to {target}")
+
+    monkeypatch.setattr(os, 'replace', fail_replace)
+    with pytest.raises(OSError):
+        store.put('other.png', data)
+    assert [path.name for path in tmp_path.iterdir()] == ['shared.png']
+    monkeypatch.undo()
+
+    for setting, value in (('DIAGRAM_STORE', 's3'), ('DIAGRAM_DELIVERY', 'sendfile')):
+        with pytest.raises(ValueError, match=setting):
+            create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+                        'TEMPLATE_WARMUP': False, 'JOBS_MODE': 'inline', setting: value})
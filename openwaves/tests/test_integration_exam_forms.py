@@ -0,0 +1,179 @@
+"""File: test_integration_exam_forms.py
+
+    This file contains the integration tests for pre-built exam forms in the exam_forms.py file
+    and the routes that build, assign and analyse them.
+"""
+
+from datetime import datetime
+import pytest
+from flask import url_for
+from openwaves import db, exam_forms, services
+from openwaves.answer_store import create_answers, load_answers
+from openwaves.imports import Pool, Question, TLI, ExamSession, ExamRegistration, Exam, \
+    ExamAnswer, ExamAnswerPack, ExamForm, User, bump_pool_version
+from openwaves.tests.test_unit_auth import login
+
+def add_complete_pool():
+    """Create a Tech pool with 35 TLIs of two questions each, enough to draw full exams."""
+    pool = Pool(name='Tech', element=2, start_date=datetime(2022, 7, 1),
+                end_date=datetime(2026, 6, 30))
+    db.session.add(pool)
+    db.session.flush()
+    for tli in range(35):
+        code = f'T{tli // 10}{chr(65 + tli % 10)}'
+        db.session.add(TLI(pool_id=pool.id, tli=code, quantity=2))
+        db.session.add_all(Question(pool_id=pool.id, number=f'{code}0{n}', correct_answer=n,
+                                    question=f'{code} question {n}?', option_a='A',
+                                    option_b='B', option_c='C', option_d='D', refs='')
+                           for n in (1, 2))
+    db.session.commit()
+    return pool
+
+def add_form_exam(form, user_id, session_id, answers):
+    """Create a finished exam on a form with the given answers."""
+    exam = Exam(user_id=user_id, pool_id=form.pool_id, session_id=session_id, element=2,
+                open=False)
+    db.session.add(exam)
+    db.session.flush()
+    create_answers(exam, None, form)
+    db.session.flush()
+    for answer, value in zip(load_answers(exam), answers):
+        answer.answer = value
+    db.session.commit()
+    return exam
+
+@pytest.mark.usefixtures("app")
+def test_build_forms_and_form_analytics(client, ve_user):
+    """Test ID: IT-204
+    Verify VEs can build a pool's forms and read per-form item analytics.
+
+    Asserts:
+        - Building forms creates complete, distinct-label forms for the current pool version.
+        - Rebuilding deletes unused forms and retires forms that exams use.
+        - A pool that cannot supply a complete exam is rejected.
+        - Form analytics count each option chosen per question over finished exams.
+        - Rescoring a form's key counts every exam on the form.
+    """
+    pool = add_complete_pool()
+    login(client, ve_user.username, 'vepassword')
+
+    response = client.post(url_for('main_ve.pool_forms', pool_id=pool.id), data={'count': '2'})
+    assert response.status_code == 201
+    forms = response.get_json()['forms']
+    assert sorted(form['label'] for form in forms) == ['A', 'B']
+    assert all(form['questions'] == 35 and form['assigned'] for form in forms)
+
+    form_a = ExamForm.query.filter_by(label='A').one()
+    add_form_exam(form_a, ve_user.id, 1, [0] * 35)
+    add_form_exam(form_a, ve_user.id, 1, [3] + [None] * 34)
+
+    client.post(url_for('main_ve.pool_forms', pool_id=pool.id), data={'count': '3'})
+    forms = client.get(url_for('main_ve.pool_forms', pool_id=pool.id)).get_json()['forms']
+    assert [(form['label'], form['assigned'], form['exams']) for form in forms] == \
+        [('A', True, 0), ('B', True, 0), ('C', True, 0), ('A', False, 2)]
+
+    empty_pool = Pool(name='Empty', element=2, start_date=datetime(2022, 7, 1),
+                      end_date=datetime(2026, 6, 30))
+    db.session.add(empty_pool)
+    db.session.commit()
+    response = client.post(url_for('main_ve.pool_forms', pool_id=empty_pool.id))
+    assert response.status_code == 400
+
+    items = client.get(url_for('main_ve.form_analytics', form_id=form_a.id)).get_json()['items']
+    first = items[0]
+    assert first['option_counts'][0] == 1 and first['option_counts'][3] == 1
+    assert first['answered'] == 2
+    assert first['correct'] == first['option_counts'][first['correct_answer']]
+    assert items[1]['answered'] == 1
+
+    question = db.session.get(Question, first['question_id'])
+    question.correct_answer = 0 if question.correct_answer else 1
+    db.session.commit()
+    assert services.rescore_answers(pool.id) == 2
+
+@pytest.mark.usefixtures("app")
+def test_launch_exam_assigns_forms(client, app):
+    """Test ID: IT-205
+    Verify launching an exam assigns a pre-built form and stores only the responses.
+
+    Asserts:
+        - The exam is assigned the next form in turn and has no ExamAnswer rows.
+        - Its pack holds only the responses; questions and key come from the form.
+        - The exam can be answered and scored as usual.
+        - Diagram changes keep the forms assigned; once the questions change they are not.
+    """
+    pool = add_complete_pool()
+    forms = exam_forms.build_forms(pool.id, 2)
+    user = User.query.filter_by(username='TESTUSER').one()
+    exam_session = ExamSession(session_date=datetime.today(), tech_pool_id=pool.id,
+                               gen_pool_id=pool.id, extra_pool_id=pool.id, status=True)
+    db.session.add(exam_session)
+    db.session.flush()
+    db.session.add(ExamRegistration(user_id=user.id, session_id=exam_session.id, tech=True,
+                                    valid=True))
+    db.session.commit()
+
+    login(client, user.username, 'testpassword')
+    client.post(url_for('main.launch_exam'),
+                data={'session_id': exam_session.id, 'exam_element': '2'})
+    exam = Exam.query.filter_by(user_id=user.id).one()
+    assert exam.form_id == forms[0].id
+    assert ExamAnswer.query.count() == 0
+    assert db.session.get(ExamAnswerPack, exam.id).question_ids == b''
+
+    answers = load_answers(exam)
+    first_question = db.session.get(Question, answers[0].question_id)
+    response = client.get(url_for('main.take_exam', exam_id=exam.id))
+    assert first_question.question.encode() in response.data
+
+    client.post(url_for('main.take_exam', exam_id=exam.id, index=0),
+                data={'answer': str(first_question.correct_answer), 'question_number': '1',
+                      'review': 'Review'})
+    client.get(url_for('main.finish_exam', exam_id=exam.id))
+    response = client.get(url_for('main.exam_results', session_id=exam_session.id,
+                                  exam_element=2))
+    assert b'Score: 1/35 (Fail)' in response.data
+
+    # The next candidate gets the other form
+    assert exam_forms.assign_form(pool.id).id == forms[1].id
+    app.config['EXAM_FORM_ASSIGNMENT'] = 'random'
+    assert exam_forms.assign_form(pool.id) in forms
+
+    # A diagram change keeps the forms; a question import retires them
+    bump_pool_version(pool.id)
+    db.session.commit()
+    assert exam_forms.assign_form(pool.id) in forms
+    bump_pool_version(pool.id, questions=True)
+    db.session.commit()
+    assert exam_forms.assign_form(pool.id) is None
+
+@pytest.mark.usefixtures("app")
+def test_round_robin_claims_are_atomic(monkeypatch):
+    """Test ID: IT-220
+    Verify a round-robin turn taken by a simultaneous launch is not handed out twice.
+
+    Asserts:
+        - When another launch raises the least assigned form's count first, the next form is
+          assigned instead.
+        - Each form is counted once per assignment.
+    """
+    pool = add_complete_pool()
+    forms = exam_forms.build_forms(pool.id, 2)
+    load_forms = exam_forms.active_forms
+    calls = []
+
+    def racing_forms(pool):
+        found = load_forms(pool)
+        if not calls:
+            # Another worker claims form A between our read and our update
+            with db.engine.begin() as connection:
+                connection.execute(ExamForm.__table__.update()
+                                   .where(ExamForm.id == forms[0].id)
+                                   .values(assignments=ExamForm.assignments + 1))
+        calls.append(pool.id)
+        return found
+
+    monkeypatch.setattr(exam_forms, 'active_forms', racing_forms)
+    assert exam_forms.assign_form(pool.id).id == forms[1].id
+    db.session.commit()
+    assert [form.assignments for form in load_forms(pool)] == [1, 1]
@@ -0,0 +1,130 @@
+"""File: test_integration_exam_sync.py
+
+    This file contains the integration tests for the offline exam client routes in the main.py
+    file: the exam bundle, batched answer sync, the finish check and the service worker.
+"""
+
+import pytest
+from flask import url_for
+from openwaves import db
+from openwaves.imports import ExamAnswer, ExamDiagram, ExamSession, User
+from openwaves.tests.test_unit_auth import login
+from openwaves.tests.test_integration_conditional import setup_open_exam
+
+def stored_answers(exam):
+    """Return (answer, answered_at) of an exam's answers in question order."""
+    db.session.expire_all()
+    return [(answer.answer, answer.answered_at) for answer in
+            ExamAnswer.query.filter_by(exam_id=exam.id).order_by(ExamAnswer.question_number)]
+
+@pytest.mark.usefixtures("app")
+def test_exam_bundle(client, user_to_toggle):
+    """Test ID: IT-198
+    Verify the exam bundle holds every question and diagram, but no correct answers.
+
+    Asserts:
+        - Questions are listed in exam order with their options and diagram URL.
+        - Correct answers are not part of the bundle.
+        - Only the candidate who owns the open exam can load it, and not once the session closes.
+    """
+    pool, exam = setup_open_exam(user_to_toggle)
+    db.session.add(ExamDiagram(pool_id=pool.id, name='Question 2', path='diagrams/q2.png'))
+    db.session.commit()
+
+    login(client, user_to_toggle.username, 'password')
+    response = client.get(url_for('main.exam_bundle', exam_id=exam.id))
+    bundle = response.get_json()
+    assert response.cache_control.private
+    assert [question['question'] for question in bundle['questions']] == \
+        ['Question 1?', 'Question 2?']
+    assert bundle['questions'][0]['options'] == ['A', 'B', 'C', 'D']
+    assert bundle['questions'][0]['diagram'] is None
+    assert bundle['questions'][1]['diagram'].endswith('q2.png')
+    assert bundle['answers'] == [{'question_number': 1, 'answer': None, 'updated_at': None},
+                                 {'question_number': 2, 'answer': None, 'updated_at': None}]
+    assert bundle['digest'] == '--'
+    assert 'correct_answer' not in response.get_data(as_text=True)
+
+    exam_session = db.session.get(ExamSession, exam.session_id)
+    exam_session.status = False
+    db.session.commit()
+    response = client.get(url_for('main.exam_bundle', exam_id=exam.id))
+    assert response.status_code == 409
+
+    # Another candidate's exam
+    exam.user_id = User.query.filter_by(username='TESTUSER').one().id
+    db.session.commit()
+    response = client.get(url_for('main.exam_bundle', exam_id=exam.id))
+    assert response.status_code == 404
+
+@pytest.mark.usefixtures("app")
+def test_sync_answers_and_finish(client, user_to_toggle):
+    """Test ID: IT-199
+    Verify batched answers keep the latest write and the exam only finishes once they all match.
+
+    Asserts:
+        - A batch is applied, and a replayed or older batch changes nothing.
+        - A malformed batch is rejected with 400 and changes nothing.
+        - Finishing with answers the server does not hold is refused and the exam stays open.
+        - Finishing with the server's digest closes the exam.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    login(client, user_to_toggle.username, 'password')
+    url = url_for('main.sync_answers', exam_id=exam.id)
+
+    batch = {'answers': [{'question_number': 1, 'answer': 2, 'updated_at': 2_000},
+                         {'question_number': 2, 'answer': 0, 'updated_at': 2_000}]}
+    data = client.post(url, json=batch).get_json()
+    assert (data['applied'], data['digest']) == (2, '20')
+
+    older = {'answers': [{'question_number': 1, 'answer': 3, 'updated_at': 1_000}]}
+    assert client.post(url, json=batch).get_json()['applied'] == 0
+    assert client.post(url, json=older).get_json()['applied'] == 0
+    assert stored_answers(exam) == [(2, 2_000), (0, 2_000)]
+
+    response = client.post(url, json={'answers': [{'question_number': 7, 'answer': 1,
+                                                   'updated_at': 3_000}]})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Question 7 is not part of this exam."}
+
+    finish_url = url_for('main.finish_exam', exam_id=exam.id)
+    response = client.get(finish_url, query_string={'answers': '21'}, follow_redirects=True)
+    assert b'Some answers have not reached the server yet.' in response.data
+    db.session.refresh(exam)
+    assert exam.open
+
+    client.get(finish_url, query_string={'answers': '20'})
+    db.session.refresh(exam)
+    assert not exam.open
+
+@pytest.mark.usefixtures("app")
+def test_exam_pages_load_offline_client(client, user_to_toggle):
+    """Test ID: IT-200
+    Verify the exam pages load the offline client and the service worker is served for /exam/.
+
+    Asserts:
+        - The exam and review pages load exam_offline.js with the URLs it needs.
+        - Answers posted by the form are timestamped, so they compete with synced answers.
+        - The service worker is JavaScript that browsers revalidate on every visit.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    login(client, user_to_toggle.username, 'password')
+
+    page = client.get(url_for('main.take_exam', exam_id=exam.id)).get_data(as_text=True)
+    assert 'js/exam_offline.js' in page
+    assert f'data-bundle-url="{url_for("main.exam_bundle", exam_id=exam.id)}"' in page
+
+    client.post(url_for('main.take_exam', exam_id=exam.id, index=0),
+                data={'answer': '1', 'question_number': '1', 'next': 'Next'})
+    answer, answered_at = stored_answers(exam)[0]
+    assert answer == 1 and answered_at > 0
+
+    page = client.get(url_for('main.review_exam', exam_id=exam.id)).get_data(as_text=True)
+    assert f'data-sync-url="{url_for("main.sync_answers", exam_id=exam.id)}"' in page
+    assert f'data-updated-at="{answered_at}"' in page
+
+    response = client.get(url_for('main.exam_service_worker'))
+    assert response.status_code == 200
+    assert response.mimetype == 'text/javascript'
+    assert response.cache_control.no_cache
+    assert b'openwaves-exam-' in response.data
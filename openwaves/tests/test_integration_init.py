@@ -3,11 +3,14 @@
     This file contains the integration tests for the code in the init.py file.
 """
 
+import json
 import pytest
-from werkzeug.security import generate_password_hash
+from jinja2 import FileSystemBytecodeCache
 from openwaves import db
 from openwaves.models import User
-from openwaves import load_user
+from openwaves import load_user, create_app, warm_templates
+from openwaves.tests.conftest import cached_password_hash, TEST_PASSWORD_HASH_METHOD
+from benchmarks.load_test import run_load_test, save_results, ENDPOINTS
 
 def test_load_user_valid_id(app):
     """Test ID: IT-01
@@ -29,7 +32,7 @@ def test_load_user_valid_id(app):
             first_name='Test',
             last_name='User',
             email='testloaduser@example.com',
-            password=generate_password_hash('password', method='pbkdf2:sha256'),
+            password=cached_password_hash('password'),
             role=1
         )
         db.session.add(user)
@@ -78,3 +81,78 @@ def test_load_user_non_integer_id(app):
         # Now test load_user
         with pytest.raises(ValueError):
             _loaded_user = load_user(non_integer_user_id)
+
+def test_template_bytecode_cache(tmp_path):
+    """Test ID: IT-157
+    Test that create_app configures a filesystem bytecode cache and warms every template.
+
+    Args:
+        tmp_path: Temporary directory used for the bytecode cache.
+
+    Asserts:
+        - The Jinja environment uses a FileSystemBytecodeCache.
+        - Warm-up writes a cache file for every template.
+        - Every template is already loaded in the environment's template cache.
+    """
+    cache_dir = tmp_path / 'jinja'
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "TEMPLATE_BYTECODE_CACHE_DIR": str(cache_dir),
+        "TEMPLATE_WARMUP": True
+    })
+
+    assert isinstance(app.jinja_env.bytecode_cache, FileSystemBytecodeCache)
+    template_names = app.jinja_env.list_templates(extensions=['html'])
+    assert len(list(cache_dir.iterdir())) == len(template_names)
+    assert len(app.jinja_env.cache) >= len(template_names)
+
+def test_warm_templates_disabled(tmp_path):
+    """Test ID: IT-158
+    Test that templates are compiled lazily when warm-up and the bytecode cache are disabled.
+
+    Args:
+        tmp_path: Temporary directory that must stay empty.
+
+    Asserts:
+        - No bytecode cache is configured.
+        - No templates are compiled during app creation.
+        - warm_templates() compiles all templates on demand.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "TEMPLATE_BYTECODE_CACHE": False,
+        "TEMPLATE_BYTECODE_CACHE_DIR": str(tmp_path),
+        "TEMPLATE_WARMUP": False
+    })
+
+    assert app.jinja_env.bytecode_cache is None
+    assert len(app.jinja_env.cache) == 0
+    assert warm_templates(app) == len(app.jinja_env.list_templates(extensions=['html']))
+    assert not list(tmp_path.iterdir())
+
+def test_load_test_smoke(tmp_path):
+    """Test ID: IT-177
+    Verify the load-test harness can take candidates through a whole exam session.
+
+    Args:
+        tmp_path: Temporary directory for the results file.
+
+    Asserts:
+        - Every candidate completes an exam without errors or lock errors.
+        - Every endpoint of the flow is timed and the results are saved as JSON.
+    """
+    summary = run_load_test(candidates=2, poll_interval=0.05,
+                            config={"PASSWORD_HASH_METHOD": TEST_PASSWORD_HASH_METHOD})
+
+    assert summary['exams_completed'] == 2
+    assert summary['failed_candidates'] == 0
+    assert summary['lock_errors'] == 0
+    assert set(ENDPOINTS) <= set(summary['endpoints'])
+    assert summary['endpoints']['take_exam']['requests'] == 2 * (35 + 1)
+    assert all(stats['errors'] == 0 for stats in summary['endpoints'].values())
+
+    path = save_results(summary, str(tmp_path))
+    with open(path, encoding='utf-8') as results_file:
+        assert json.load(results_file)['exams_completed'] == 2
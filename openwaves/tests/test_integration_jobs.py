@@ -0,0 +1,238 @@
+"""File: test_integration_jobs.py
+
+    This file contains the integration tests for the background job queue in the jobs.py file,
+    its status endpoints in main_ve.py and the `flask openwaves worker` command.
+"""
+
+import time
+from datetime import datetime, timedelta
+from io import BytesIO
+import pytest
+from openwaves import db, jobs
+from openwaves.imports import Job, Pool
+from openwaves.tests.test_unit_auth import login
+
+CSV_CONTENT = """id,correct,question,a,b,c,d,refs
+T1A01,0,What is 1+1?,2,3,4,5,Reference1
+T1A02,1,What is 2+2?,1,4,3,5,Reference2
+"""
+
+@pytest.fixture(name='flaky_task')
+def fixture_flaky_task(monkeypatch):
+    """Register a task that fails until its ``failures`` counter reaches zero."""
+    state = {'failures': 100, 'calls': 0}
+
+    def run(context, value):
+        state['calls'] += 1
+        if state['failures'] > 0:
+            state['failures'] -= 1
+            raise RuntimeError('temporary failure')
+        context.progress(1, 1, 'done')
+        return {'value': value}
+
+    monkeypatch.setitem(jobs.TASKS, 'flaky', run)
+    return state
+
+@pytest.mark.usefixtures("app")
+def test_upload_questions_job_status(client, ve_user):
+    """Test ID: IT-186
+    Verify a question upload returns a job whose progress and result can be polled.
+
+    Asserts:
+        - The upload answers 202 with the job id and status URL.
+        - The status endpoint reports the finished job with its result and full progress.
+        - The job list includes the job and unknown jobs return 404.
+    """
+    login(client, ve_user.username, 'vepassword')
+    pool = Pool(name='Tech', element=2, start_date=datetime(2022, 7, 1),
+                end_date=datetime(2026, 6, 30))
+    db.session.add(pool)
+    db.session.commit()
+
+    response = client.post(f'/ve/upload_questions/{pool.id}',
+                           data={'file': (BytesIO(CSV_CONTENT.encode('utf-8')), 'pool.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202
+
+    status = client.get(response.get_json()['status_url'])
+    assert status.status_code == 200
+    assert status.headers['Cache-Control'] == 'no-store'
+    job = status.get_json()
+    assert job['kind'] == 'import-questions'
+    assert job['status'] == 'succeeded'
+    assert job['result'] == {'questions': 2}
+    assert job['progress'] == job['total'] == 2
+
+    listed = client.get('/ve/jobs').get_json()['jobs']
+    assert [item['id'] for item in listed] == [job['id']]
+    assert client.get('/ve/jobs/999').status_code == 404
+
+@pytest.mark.usefixtures("app")
+def test_job_retries_then_fails_and_can_be_retried(client, ve_user, flaky_task):
+    """Test ID: IT-187
+    Verify a failing job is retried up to JOBS_MAX_ATTEMPTS and can be queued again by a VE.
+
+    Asserts:
+        - The job fails after three attempts and keeps the last error.
+        - Retrying a job that has not failed is rejected.
+        - The retry endpoint runs the job again, which then succeeds.
+    """
+    job = jobs.enqueue('flaky', value=7)
+    db.session.refresh(job)
+    assert (job.status, job.attempts, flaky_task['calls']) == ('failed', 3, 3)
+    assert job.error == 'RuntimeError: temporary failure'
+    assert job.finished_at is not None
+
+    login(client, ve_user.username, 'vepassword')
+    flaky_task['failures'] = 0
+    response = client.post(f'/ve/jobs/{job.id}/retry')
+    assert response.status_code == 202
+
+    status = client.get(f'/ve/jobs/{job.id}').get_json()
+    assert (status['status'], status['attempts'], status['error']) == ('succeeded', 1, None)
+    assert status['result'] == {'value': 7}
+    assert client.post(f'/ve/jobs/{job.id}/retry').status_code == 400
+
+@pytest.mark.usefixtures("app")
+def test_upload_questions_checked_before_queueing(client, ve_user, monkeypatch):
+    """Test ID: IT-228
+    Negative test: Verify a bad question upload is refused before a job is queued, and a job
+    failing on bad input is not retried.
+
+    Asserts:
+        - An unknown pool answers 404 and a CSV missing pool columns answers 400 naming them.
+        - Neither queues a job.
+        - A task raising ValueError or KeyError fails after one attempt.
+    """
+    login(client, ve_user.username, 'vepassword')
+    pool = Pool(name='Tech', element=2, start_date=datetime(2022, 7, 1),
+                end_date=datetime(2026, 6, 30))
+    db.session.add(pool)
+    db.session.commit()
+
+    def upload(pool_id, content):
+        return client.post(f'/ve/upload_questions/{pool_id}',
+                           data={'file': (BytesIO(content.encode('utf-8')), 'pool.csv')},
+                           content_type='multipart/form-data')
+
+    response = upload(pool.id + 1, CSV_CONTENT)
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Pool not found."}
+    response = upload(pool.id, "id,correct,question\nT1A01,0,What is 1+1?\n")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Missing CSV columns: a, b, c, d, refs"}
+    assert Job.query.count() == 0
+
+    calls = []
+
+    def bad_input(_context, error):
+        calls.append(error)
+        raise {'value': ValueError, 'key': KeyError}[error](error)
+
+    monkeypatch.setitem(jobs.TASKS, 'bad-input', bad_input)
+    for error in ('value', 'key'):
+        job = jobs.enqueue('bad-input', error=error)
+        db.session.refresh(job)
+        assert (job.status, job.attempts) == ('failed', 1)
+    assert calls == ['value', 'key']
+
+@pytest.mark.usefixtures("app")
+def test_external_worker_backoff_and_stale_jobs(app, runner, flaky_task):
+    """Test ID: IT-188
+    Verify queued jobs wait for a worker, failed attempts back off and stale jobs are requeued.
+
+    Asserts:
+        - In external mode a queued job is not run until `flask openwaves worker --once`.
+        - A failed attempt is scheduled for later and not claimed before then.
+        - A job left running by a dead worker is queued again.
+    """
+    app.config['JOBS_MODE'] = 'external'
+    flaky_task['failures'] = 1
+    job = jobs.enqueue('flaky', value=1)
+    assert db.session.get(Job, job.id).status == 'queued'
+
+    result = runner.invoke(args=['openwaves', 'worker', '--once'])
+    assert result.exit_code == 0, result.output
+    assert 'Ran 1 jobs' in result.output
+
+    db.session.expire_all()
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.attempts) == ('queued', 1)
+    assert job.run_after > datetime.now()
+    assert jobs.claim() is None
+
+    # Move the retry time into the past and let the worker finish the job
+    job.run_after = datetime.now() - timedelta(seconds=1)
+    db.session.commit()
+    runner.invoke(args=['openwaves', 'worker', '--once'])
+    db.session.expire_all()
+    assert db.session.get(Job, job.id).status == 'succeeded'
+
+    stale = Job(kind='flaky', params='{"value": 2}', status='running', attempts=1,
+                started_at=datetime.now() - timedelta(hours=2))
+    db.session.add(stale)
+    db.session.commit()
+    assert jobs.requeue_stale() == 1
+    assert db.session.get(Job, stale.id).status == 'queued'
+
+@pytest.mark.usefixtures("app")
+def test_thread_worker_runs_queued_job(app, flaky_task):
+    """Test ID: IT-189
+    Verify the in-process worker thread picks up a job as soon as it is queued.
+
+    Asserts:
+        - The job succeeds without the request thread running it.
+    """
+    app.config['JOBS_MODE'] = 'thread'
+    flaky_task['failures'] = 0
+    job = jobs.enqueue('flaky', value=3)
+    try:
+        for _ in range(50):
+            db.session.expire_all()
+            if db.session.get(Job, job.id).status == 'succeeded':
+                break
+            time.sleep(0.1)
+        assert db.session.get(Job, job.id).status == 'succeeded'
+    finally:
+        jobs.get_worker(app).stop()
+
+@pytest.mark.usefixtures("app")
+def test_heartbeat_keeps_long_job_from_being_requeued(app, runner, monkeypatch):
+    """Test ID: IT-218
+    Verify a running job's heartbeat, not its start time, decides whether it is abandoned.
+
+    Asserts:
+        - A job running longer than JOBS_STALE_AFTER is not requeued while its worker is alive.
+        - The worker records heartbeats while the job runs.
+        - A running job whose heartbeat stopped is requeued even though it started recently
+          enough for the old start-time check.
+    """
+    app.config.update(JOBS_MODE='external', JOBS_HEARTBEAT_INTERVAL=0.05, JOBS_STALE_AFTER=0.3)
+    seen = {}
+
+    def slow(context): # pylint: disable=W0613
+        time.sleep(0.6)
+        seen['requeued'] = jobs.requeue_stale()
+        return {}
+
+    monkeypatch.setitem(jobs.TASKS, 'slow', slow)
+    job = jobs.enqueue('slow')
+    result = runner.invoke(args=['openwaves', 'worker', '--once'])
+    assert result.exit_code == 0, result.output
+
+    db.session.expire_all()
+    job = db.session.get(Job, job.id)
+    assert seen['requeued'] == 0
+    assert (job.status, job.attempts) == ('succeeded', 1)
+    assert job.heartbeat_at > job.started_at
+
+    now = datetime.now()
+    dead = Job(kind='slow', status='running', attempts=1, started_at=now - timedelta(seconds=1),
+               heartbeat_at=now - timedelta(seconds=1))
+    alive = Job(kind='slow', status='running', attempts=1, started_at=now - timedelta(hours=2),
+                heartbeat_at=now)
+    db.session.add_all([dead, alive])
+    db.session.commit()
+    assert jobs.requeue_stale() == 1
+    assert db.session.get(Job, dead.id).status == 'queued'
+    assert db.session.get(Job, alive.id).status == 'running'
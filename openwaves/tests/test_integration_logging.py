@@ -0,0 +1,72 @@
+"""File: test_logging.py
+
+    This file contains the integration tests for the request ids and log records produced by the
+    routes through the logging_config.py file.
+"""
+
+import logging
+from datetime import datetime
+import pytest
+from openwaves import db
+from openwaves.imports import Pool
+from openwaves.tests.test_unit_auth import login
+
+@pytest.mark.usefixtures("app")
+def test_request_id_header(client):
+    """Test ID: IT-169
+    Verify every response carries a request id and a safe incoming id is reused.
+
+    Asserts:
+        - A generated id is returned when none is sent.
+        - A well-formed X-Request-ID is echoed back.
+        - A malformed X-Request-ID is replaced.
+    """
+    generated = client.get('/').headers['X-Request-ID']
+    assert len(generated) == 32
+
+    response = client.get('/', headers={'X-Request-ID': 'lb-1234.abc'})
+    assert response.headers['X-Request-ID'] == 'lb-1234.abc'
+
+    response = client.get('/', headers={'X-Request-ID': 'bad id with spaces'})
+    assert response.headers['X-Request-ID'] != 'bad id with spaces'
+
+@pytest.mark.usefixtures("app")
+def test_create_session_logs_once_with_request_id(client, ve_user, caplog):
+    """Test ID: IT-170
+    Verify creating a session writes a single log record tagged with the request id.
+
+    Asserts:
+        - One record is logged by openwaves.main_ve.
+        - The record carries the request id returned to the client.
+    """
+    pool = Pool(name="Tech Pool", element=2, start_date=datetime(2024, 1, 1),
+                end_date=datetime(2024, 12, 31))
+    db.session.add(pool)
+    db.session.commit()
+    login(client, ve_user.username, 'vepassword')
+
+    with caplog.at_level(logging.DEBUG, logger='openwaves'):
+        response = client.post('/ve/create_session', data={
+            'start_date': '2024-10-01', 'tech_pool': pool.id, 'general_pool': pool.id,
+            'extra_pool': pool.id})
+    assert response.status_code == 200
+
+    records = [record for record in caplog.records if record.name == 'openwaves.main_ve']
+    assert len(records) == 1
+    assert 'Created exam session' in records[0].getMessage()
+    assert records[0].request_id == response.headers['X-Request-ID']
+
+def test_per_module_log_levels(app):
+    """Test ID: IT-171
+    Verify LOG_LEVELS sets the level of individual modules.
+
+    Asserts:
+        - The named module gets its own level while the package keeps LOG_LEVEL.
+    """
+    from openwaves import create_app  # pylint: disable=C0415
+    config = dict(app.config)
+    config.update({'LOG_LEVEL': 'WARNING', 'LOG_LEVELS': 'openwaves.test_module=DEBUG'})
+    create_app(config)
+    assert logging.getLogger('openwaves').level == logging.WARNING
+    assert logging.getLogger('openwaves.test_module').level == logging.DEBUG
+    logging.getLogger('openwaves.test_module').setLevel(logging.NOTSET)
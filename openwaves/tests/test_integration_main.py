@@ -5,10 +5,10 @@
 
 from datetime import datetime
 from flask import url_for
-from werkzeug.security import generate_password_hash
 from openwaves import db
 from openwaves.imports import User, Pool, Question
 from openwaves.tests.test_unit_auth import login, logout
+from openwaves.tests.conftest import cached_password_hash
 
 ####################################
 #                                  #
@@ -56,7 +56,7 @@ def test_profile_access(client, app):
             first_name='Test',
             last_name='User',
             email='testuser@example.com',  # Same email as current_user
-            password=generate_password_hash('vepassword', method='pbkdf2:sha256'),
+            password=cached_password_hash('vepassword'),
             role=2
         )
         db.session.add(ve_user)
@@ -91,7 +91,7 @@ def test_ve_profile_exists(client, app):
             first_name='Test',
             last_name='User',
             email='testuser@example.com',  # Same email as current_user
-            password=generate_password_hash('vepassword', method='pbkdf2:sha256'),
+            password=cached_password_hash('vepassword'),
             role=2
         )
         db.session.add(ve_user)
@@ -0,0 +1,84 @@
+"""File: test_metrics.py
+
+    This file contains the integration tests for the /metrics route and the metrics collected by
+    the application in the metrics.py file.
+"""
+
+import pytest
+from flask import url_for
+from openwaves.metrics import REQUEST_LATENCY, ANSWERS_SAVED, LOGIN_ATTEMPTS, \
+    PASSWORD_HASH_TIME
+from openwaves.tests.test_unit_auth import login
+from openwaves.tests.test_integration_conditional import setup_open_exam
+
+@pytest.mark.usefixtures("app")
+def test_metrics_endpoint_exposition(client, user_to_toggle):
+    """Test ID: IT-166
+    Verify /metrics serves the registered metrics in the Prometheus text format.
+
+    Asserts:
+        - The response is text/plain with HELP and TYPE lines.
+        - Request latency, database time and the open exams gauge are present.
+    """
+    setup_open_exam(user_to_toggle)
+    client.get(url_for('auth.login'))
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert '# TYPE openwaves_request_duration_seconds histogram' in body
+    assert 'openwaves_request_duration_seconds_count{endpoint="auth.login",method="GET"}' in body
+    assert 'openwaves_db_query_duration_seconds_bucket' in body
+    assert 'openwaves_open_exams 1' in body
+
+@pytest.mark.usefixtures("app")
+def test_metrics_count_logins_and_answers(client, user_to_toggle):
+    """Test ID: IT-167
+    Verify logins, password verification time and saved answers are counted.
+
+    Asserts:
+        - Failed and successful logins are counted separately.
+        - Each login records a password verification time.
+        - Saving an answer increments the answers counter.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    failures = LOGIN_ATTEMPTS.value(result='failure')
+    successes = LOGIN_ATTEMPTS.value(result='success')
+    verifications = PASSWORD_HASH_TIME.count(operation='verify')
+    answers = ANSWERS_SAVED.value()
+    requests = REQUEST_LATENCY.count(endpoint='main.take_exam', method='POST')
+
+    login(client, user_to_toggle.username, 'wrong')
+    login(client, user_to_toggle.username, 'password')
+    client.post(url_for('main.take_exam', exam_id=exam.id, index=0),
+                data={'answer': '1', 'question_number': 1})
+
+    assert LOGIN_ATTEMPTS.value(result='failure') == failures + 1
+    assert LOGIN_ATTEMPTS.value(result='success') == successes + 1
+    assert PASSWORD_HASH_TIME.count(operation='verify') == verifications + 2
+    assert ANSWERS_SAVED.value() == answers + 1
+    assert REQUEST_LATENCY.count(endpoint='main.take_exam', method='POST') == requests + 1
+
+def test_metrics_token_and_disable(app, client):
+    """Test ID: IT-168
+    Verify /metrics can require a bearer token and can be switched off.
+
+    Asserts:
+        - Without the token the route returns 401; with it, 200.
+        - Without a configured token the route returns 404 outside debug and testing.
+        - With METRICS_ENABLED off the route returns 404.
+    """
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+    assert client.get('/metrics').status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+
+    app.config['METRICS_TOKEN'] = None
+    assert client.get('/metrics').status_code == 200
+    app.config['TESTING'] = False
+    assert client.get('/metrics').status_code == 404
+    app.config['TESTING'] = True
+
+    app.config['METRICS_ENABLED'] = False
+    assert client.get('/metrics').status_code == 404
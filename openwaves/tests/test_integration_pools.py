@@ -50,8 +50,8 @@ def test_upload_questions_success(client, ve_user):
         ve_user: The VE user fixture.
 
     Asserts:
-        - The response status code is 200.
-        - The response contains a JSON success message.
+        - The response status code is 202.
+        - The response contains a JSON success message with the import job.
         - Two questions were added to the database, and one TLI entry was created.
     """
     # First, create a pool to upload questions to
@@ -78,9 +78,10 @@ T1A02,B,What is 2+2?,1,4,3,5,Reference2
 
     response = client.post(f'/ve/upload_questions/{pool_id}',
                            data=data, content_type='multipart/form-data')
-    assert response.status_code == 200
+    assert response.status_code == 202
     assert response.is_json
     assert response.get_json()['success'] is True
+    assert response.get_json()['status_url'] == f"/ve/jobs/{response.get_json()['job_id']}"
 
     # Verify that questions were added to the database
     with client.application.app_context():
@@ -102,8 +103,12 @@ def test_upload_questions_no_file(client, ve_user):
         - The response contains a JSON error message stating "No file provided.".
     """
     login(client, ve_user.username, 'vepassword')
-    # Assume there's a pool with ID 1
-    response = client.post('/ve/upload_questions/1', data={}, content_type='multipart/form-data')
+    pool = Pool(name='Tech', element=2, start_date=datetime(2022, 7, 1),
+                end_date=datetime(2026, 6, 30))
+    db.session.add(pool)
+    db.session.commit()
+    response = client.post(f'/ve/upload_questions/{pool.id}', data={},
+                           content_type='multipart/form-data')
     assert response.status_code == 400
     assert response.is_json
     assert 'No file provided.' in response.get_json()['error']
@@ -321,7 +326,7 @@ def test_upload_diagram_directory_does_not_exist(mock_exists, client, app, ve_us
 
 @patch('os.path.exists', return_value=True)
 @patch('werkzeug.datastructures.FileStorage.save')
-def test_upload_diagram_successful(mock_save, mock_exists, client, app, ve_user): # pylint: disable=W0613
+def test_upload_diagram_successful(mock_save, mock_exists, client, app, ve_user, tmp_path): # pylint: disable=W0613,R0913,R0917
     """Test ID: IT-50
     Test successful upload of a diagram.
 
@@ -333,11 +338,13 @@ def test_upload_diagram_successful(mock_save, mock_exists, client, app, ve_user)
         mock_exists: Mock for os.path.exists to simulate an existing directory.
         client: The test client instance.
         app: The Flask application instance.
+        tmp_path: The directory the diagram store writes to.
 
     Asserts:
         - The appropriate flash message is displayed for successful upload.
         - The response redirects to the pools page.
     """
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
     # Ensure a VE user is logged in
     login(client, ve_user.username, 'vepassword')
 
@@ -400,7 +407,7 @@ def test_delete_diagram_success(mock_remove, mock_exists, client, app, ve_user):
 
     Asserts:
         - The diagram is deleted from the file system and the database.
-        - A success message is returned.
+        - A success message with the pool's re-rendered rows is returned.
     """
     # Ensure a VE user is logged in
     login(client, ve_user.username, 'vepassword')
@@ -425,7 +432,8 @@ def test_delete_diagram_success(mock_remove, mock_exists, client, app, ve_user):
     # Assert successful removal
     assert response.status_code == 200
     response_json = response.get_json()
-    assert response_json == {"success": True}, f"Unexpected response: {response_json}"
+    assert response_json["success"] is True, f"Unexpected response: {response_json}"
+    assert b'No diagrams found.' in response_json["html"].encode()
 
     mock_remove.assert_called_once()
 
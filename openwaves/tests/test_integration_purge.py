@@ -2,12 +2,13 @@
 
     This file contains the integration tests for the purge sessions code in the main_ve.py file.
 """
+import json
 from datetime import datetime, timedelta
 import pytest
 from flask import url_for
 import sqlalchemy
 from openwaves import db
-from openwaves.imports import ExamSession, Pool
+from openwaves.imports import ExamSession, Pool, Job
 from openwaves.tests.test_unit_auth import login
 
 @pytest.mark.usefixtures("app")
@@ -16,8 +17,8 @@ def test_purge_sessions_authorized_success(client, ve_user):
     Functional test: Verify successful purge for sessions older than 15 months.
     
     Asserts:
-        - The response status code is 200.
-        - The response JSON indicates success.
+        - The response status code is 202 and the JSON holds the purge job.
+        - The job succeeded and deleted the old session.
     """
     # Set up a mock pool, required for the foreign key constraints
     pool = Pool(
@@ -49,8 +50,11 @@ def test_purge_sessions_authorized_success(client, ve_user):
     response = client.delete(url_for('main_ve.purge_sessions'))
 
     # Validate response
-    assert response.status_code == 200
+    assert response.status_code == 202
     assert response.json.get("success") is True
+    job = db.session.get(Job, response.json["job_id"])
+    assert job.status == 'succeeded'
+    assert json.loads(job.result) == {'sessions': 1}
 
     # Check that the session has been deleted
     try:
@@ -87,8 +91,8 @@ def test_purge_sessions_no_old_sessions(client, ve_user):
     Functional test: Verify purge operation when no sessions are older than 15 months.
 
     Asserts:
-        - The response status code is 200.
-        - The response JSON indicates success.
+        - The response status code is 202.
+        - The response JSON indicates success and the recent session is kept.
     """
     # Set up a mock pool, required for foreign key constraints in ExamSession
     pool = Pool(
@@ -120,5 +124,6 @@ def test_purge_sessions_no_old_sessions(client, ve_user):
     response = client.delete(url_for('main_ve.purge_sessions'))
 
     # Validate response
-    assert response.status_code == 200
+    assert response.status_code == 202
     assert response.json.get("success") is True
+    assert db.session.get(ExamSession, recent_session.id) is not None
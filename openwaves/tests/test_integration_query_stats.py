@@ -0,0 +1,181 @@
+"""File: test_query_stats.py
+
+    This file contains the integration tests for the per-request SQL instrumentation in the
+    query_stats.py file and the query budgets of the busiest pages.
+"""
+
+from datetime import datetime
+import logging
+import pytest
+from flask import url_for
+from openwaves import db
+from openwaves.cache import get_cache
+from openwaves.imports import ExamSession, Exam, ExamAnswer, Pool, Question
+from openwaves.tests.test_unit_auth import login
+from openwaves.tests.test_integration_conditional import setup_open_exam
+
+def add_pool(name='Tech Pool', questions=0):
+    """Create a pool with the given number of questions.
+
+    Returns:
+        - pool, list of questions
+    """
+    pool = Pool(name=name, element=2, start_date=datetime(2024, 1, 1),
+                end_date=datetime(2024, 12, 31))
+    db.session.add(pool)
+    db.session.commit()
+    question_list = [Question(pool_id=pool.id, number=f'T1A{number:02d}', correct_answer=0,
+                              question=f'Question {number}?', option_a='A', option_b='B',
+                              option_c='C', option_d='D', refs='')
+                     for number in range(1, questions + 1)]
+    db.session.add_all(question_list)
+    db.session.commit()
+    return pool, question_list
+
+def add_finished_exams(user, pool, question_list, count):
+    """Create a closed session holding ``count`` finished exams, every answer incorrect.
+
+    Returns:
+        - exam_session
+    """
+    exam_session = ExamSession(session_date=datetime(2024, 10, 1), tech_pool_id=pool.id,
+                               gen_pool_id=pool.id, extra_pool_id=pool.id, status=False)
+    db.session.add(exam_session)
+    db.session.commit()
+    for _ in range(count):
+        exam = Exam(user_id=user.id, open=False, element=2, pool_id=pool.id,
+                    session_id=exam_session.id)
+        db.session.add(exam)
+        db.session.commit()
+        db.session.add_all([ExamAnswer(exam_id=exam.id, question_id=question.id,
+                                       question_number=number, correct_answer=0,
+                                       answer=number % 3 + 1)
+                            for number, question in enumerate(question_list, start=1)])
+    db.session.commit()
+    return exam_session
+
+def count_queries(query_budget, client, url):
+    """Return the number of statements a GET of ``url`` executes.
+
+    The page is requested once beforehand so objects the shared test session has already loaded
+    (such as the logged-in user) are counted the same way for every URL. The application cache
+    is then cleared so the uncached queries are counted.
+    """
+    client.get(url)
+    db.session.expire_all()
+    get_cache().clear()
+    with query_budget(100) as stats:
+        assert client.get(url).status_code == 200
+    return stats.count
+
+@pytest.mark.usefixtures("app")
+def test_take_exam_query_budget(client, user_to_toggle, query_budget):
+    """Test ID: IT-160
+    Verify the exam question page stays within its query budget.
+
+    Asserts:
+        - A full render runs at most 5 statements.
+        - A 304 revalidation runs at most 3 statements.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    login(client, user_to_toggle.username, 'password')
+    url = url_for('main.take_exam', exam_id=exam.id, index=0)
+
+    with query_budget(5):
+        etag = client.get(url).headers['ETag']
+    with query_budget(3):
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+@pytest.mark.usefixtures("app")
+def test_pools_query_count_constant(client, ve_user, query_budget):
+    """Test ID: IT-161
+    Verify the pools page does not run a query per pool.
+
+    Asserts:
+        - The statement count is the same for 1 and 6 pools.
+    """
+    login(client, ve_user.username, 'vepassword')
+    add_pool('Pool 0', questions=2)
+    url = url_for('main_ve.pools')
+    baseline = count_queries(query_budget, client, url)
+
+    for number in range(1, 6):
+        add_pool(f'Pool {number}', questions=2)
+    assert count_queries(query_budget, client, url) == baseline
+
+@pytest.mark.usefixtures("app")
+def test_session_results_query_count_constant(client, ve_user, user_to_toggle, query_budget):
+    """Test ID: IT-162
+    Verify the session results page does not run a query per exam.
+
+    Asserts:
+        - The statement count is the same for 1 and 6 exams.
+    """
+    login(client, ve_user.username, 'vepassword')
+    pool, question_list = add_pool(questions=3)
+    small = add_finished_exams(user_to_toggle, pool, question_list, 1)
+    large = add_finished_exams(user_to_toggle, pool, question_list, 6)
+
+    baseline = count_queries(query_budget, client,
+                             url_for('main_ve.ve_session_results', session_id=small.id))
+    assert count_queries(query_budget, client,
+                         url_for('main_ve.ve_session_results', session_id=large.id)) == baseline
+
+@pytest.mark.usefixtures("app")
+def test_analytics_query_count_constant(client, ve_user, user_to_toggle, query_budget):
+    """Test ID: IT-163
+    Verify the analytics page does not run a query per missed question.
+
+    Asserts:
+        - The statement count is the same for 2 and 8 missed questions.
+    """
+    login(client, ve_user.username, 'vepassword')
+    small_pool, small_questions = add_pool('Small', questions=2)
+    large_pool, large_questions = add_pool('Large', questions=8)
+    add_finished_exams(user_to_toggle, small_pool, small_questions, 2)
+    add_finished_exams(user_to_toggle, large_pool, large_questions, 2)
+
+    baseline = count_queries(query_budget, client,
+                             url_for('main_ve.data_analytics', pool_id=small_pool.id))
+    assert count_queries(query_budget, client,
+                         url_for('main_ve.data_analytics', pool_id=large_pool.id)) == baseline
+
+@pytest.mark.usefixtures("app")
+def test_query_stats_headers(client, user_to_toggle, app):
+    """Test ID: IT-164
+    Verify the query statistics headers are added when enabled.
+
+    Asserts:
+        - No headers are sent by default.
+        - X-Query-Count, X-Query-Time and a db Server-Timing entry are sent when enabled.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    login(client, user_to_toggle.username, 'password')
+    url = url_for('main.take_exam', exam_id=exam.id, index=0)
+
+    assert 'X-Query-Count' not in client.get(url).headers
+
+    app.config['QUERY_STATS_HEADER'] = True
+    response = client.get(url)
+    assert int(response.headers['X-Query-Count']) > 0
+    assert float(response.headers['X-Query-Time']) >= 0
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+
+@pytest.mark.usefixtures("app")
+def test_query_stats_warns_on_repeated_statement(client, app, caplog):
+    """Test ID: IT-165
+    Verify a statement repeated past the threshold is logged as a possible N+1.
+
+    Asserts:
+        - A warning naming the endpoint is logged.
+    """
+    @app.route('/n-plus-one')
+    def n_plus_one():
+        for question_id in range(1, 8):
+            db.session.get(Question, question_id)
+        return 'ok'
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        client.get('/n-plus-one')
+    assert any('Possible N+1 in n_plus_one' in record.getMessage()
+               for record in caplog.records)
@@ -0,0 +1,105 @@
+"""File: test_integration_results_export.py
+
+    This file contains the integration tests for the results export route and the
+    export-results command.
+"""
+
+import csv
+import io
+import zipfile
+from datetime import datetime
+import pytest
+from flask import url_for
+from openwaves import db
+from openwaves.answer_store import build_pack
+from openwaves.imports import Exam, ExamSession, User
+from openwaves.tests.test_unit_auth import login
+from openwaves.tests.test_integration_conditional import setup_open_exam
+
+def setup_results(user):
+    """Create a finished exam stored as rows in 2024 and a finished packed exam in 2025.
+
+    Returns:
+        - the 2024 exam, the 2025 exam
+    """
+    pool, first = setup_open_exam(user)
+    first.open = False
+    first.finished_at = datetime(2024, 10, 1, 10, 30)
+
+    exam_session = ExamSession(session_date=datetime(2025, 3, 1), tech_pool_id=pool.id,
+                               gen_pool_id=pool.id, extra_pool_id=pool.id, status=True)
+    db.session.add(exam_session)
+    db.session.flush()
+    candidate = User.query.filter_by(username='TESTUSER').one()
+    second = Exam(user_id=candidate.id, pool_id=pool.id, session_id=exam_session.id,
+                  element=2, open=False, packed=True)
+    db.session.add(second)
+    db.session.flush()
+    db.session.add(build_pack(second.id, [(1, 0, 0, 1_000), (2, 0, 3, 2_000)]))
+    db.session.commit()
+    return first, second
+
+def read_csv(response):
+    """Return the rows of a streamed CSV response as dicts."""
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+@pytest.mark.usefixtures("app")
+def test_export_results_route(client, ve_user):
+    """Test ID: IT-208
+    Verify VEs can stream a session's or a date range's results as CSV or XLSX.
+
+    Asserts:
+        - The CSV has one row per exam with the candidate, element, score, result and times.
+        - Packed exams are scored from their packs.
+        - Exports can be limited to a session or a date range.
+        - The XLSX export is a workbook attachment.
+        - Unknown formats and malformed dates are rejected, and unknown sessions are not found.
+    """
+    first, second = setup_results(ve_user)
+    login(client, ve_user.username, 'vepassword')
+
+    response = client.get(url_for('main_reports.export_results'))
+    assert response.status_code == 200 and response.is_streamed
+    assert response.mimetype == 'text/csv'
+    rows = read_csv(response)
+    assert [(row['exam_id'], row['username'], row['session_date'], row['correct'],
+             row['total'], row['result'], row['finished_at']) for row in rows] == [
+        (str(first.id), ve_user.username, '2024-10-01', '0', '2', 'Fail', '2024-10-01 10:30:00'),
+        (str(second.id), 'TESTUSER', '2025-03-01', '1', '2', 'Fail', '')]
+
+    response = client.get(url_for('main_reports.export_results', start='2025-01-01',
+                                  end='2025-03-01'))
+    assert [row['exam_id'] for row in read_csv(response)] == [str(second.id)]
+    response = client.get(url_for('main_reports.export_results', session_id=first.session_id))
+    assert [row['exam_id'] for row in read_csv(response)] == [str(first.id)]
+    assert f'results_session_{first.session_id}.csv' in response.headers['Content-Disposition']
+
+    response = client.get(url_for('main_reports.export_results', format='xlsx'))
+    assert response.mimetype.endswith('spreadsheetml.sheet')
+    with zipfile.ZipFile(io.BytesIO(response.data)) as workbook:
+        sheet = workbook.read('xl/worksheets/sheet1.xml')
+    assert b'TESTUSER' in sheet and ve_user.username.encode() in sheet
+
+    assert client.get(url_for('main_reports.export_results', format='pdf')).status_code == 400
+    assert client.get(url_for('main_reports.export_results',
+                              start='2025-13-01')).status_code == 400
+    assert client.get(url_for('main_reports.export_results', session_id=999)).status_code == 404
+
+@pytest.mark.usefixtures("app")
+def test_export_results_command(runner, ve_user, tmp_path):
+    """Test ID: IT-209
+    Verify the export-results command writes the results to a file or stdout.
+
+    Asserts:
+        - The format follows the output file's extension.
+        - '-' writes the CSV to stdout.
+    """
+    setup_results(ve_user)
+    output = tmp_path / 'results.xlsx'
+    result = runner.invoke(args=['openwaves', 'export-results', str(output)])
+    assert result.exit_code == 0
+    assert zipfile.is_zipfile(output)
+
+    result = runner.invoke(args=['openwaves', 'export-results', '-', '--start', '2025-01-01'])
+    assert result.exit_code == 0
+    assert result.output.splitlines()[1].split(',')[3] == 'TESTUSER'
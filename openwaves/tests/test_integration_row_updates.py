@@ -0,0 +1,109 @@
+"""File: test_integration_row_updates.py
+
+    This file contains the integration tests for the table rows returned by the pool and session
+    routes in the main_ve.py file, which the VE pages patch in place instead of reloading.
+"""
+
+import hashlib
+from datetime import datetime
+from io import BytesIO
+import pytest
+from openwaves import db
+from openwaves.imports import ExamSession, Pool
+from openwaves.tests.test_unit_auth import login
+
+@pytest.mark.usefixtures("app")
+def test_pool_routes_return_rows(client, ve_user):
+    """Test ID: IT-195
+    Verify the pool routes return the re-rendered rows of the pool they changed.
+
+    Asserts:
+        - Creating a pool returns its summary and diagrams rows.
+        - The pool rows route returns the current question count.
+        - Deleting a pool, or asking for a missing one, returns a deleted row.
+    """
+    login(client, ve_user.username, 'vepassword')
+    response = client.post('/ve/create_pool', data={'pool_name': 'Tech', 'exam_element': '2',
+                                                     'start_date': '2022-07-01',
+                                                     'end_date': '2026-06-30'})
+    data = response.get_json()
+    pool = Pool.query.filter_by(name='Tech').one()
+    assert data['success'] is True
+    assert data['id'] == pool.id
+    assert f'class="pool-row" data-id="{pool.id}" data-sort="2-2022-07-01"' in data['html']
+    assert f'class="expandable-row" data-id="{pool.id}"' in data['html']
+    assert 'Upload Questions' in data['html']
+
+    data = client.get(f'/ve/pool_rows/{pool.id}').get_json()
+    assert data['id'] == pool.id
+    assert 'Upload Questions' in data['html']
+
+    assert client.delete(f'/ve/delete_pool/{pool.id}').get_json() == \
+        {"success": True, "id": pool.id, "deleted": True}
+    assert client.get(f'/ve/pool_rows/{pool.id}').get_json()['deleted'] is True
+
+@pytest.mark.usefixtures("app")
+def test_upload_diagram_json(app, client, ve_user, tmp_path):
+    """Test ID: IT-196
+    Verify a diagram upload that accepts JSON returns the pool's rows or a JSON error.
+
+    Asserts:
+        - A valid upload returns rows listing the new diagram.
+        - An invalid file returns a 400 JSON error instead of a redirect.
+    """
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    pool = Pool(name='Tech', element=2, start_date=datetime(2022, 7, 1),
+                end_date=datetime(2026, 6, 30))
+    db.session.add(pool)
+    db.session.commit()
+    login(client, ve_user.username, 'vepassword')
+
+    headers = {'Accept': 'application/json'}
+    response = client.post(f'/ve/upload_diagram/{pool.id}', headers=headers, data={
+        'diagram_name': 'T-1', 'file': (BytesIO(b'image'), 't1.png')})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['id'] == pool.id
+    assert 'T-1' in data['html']
+    assert f"diagrams/{hashlib.sha256(b'image').hexdigest()}.png" in data['html']
+
+    response = client.post(f'/ve/upload_diagram/{pool.id}', headers=headers, data={
+        'diagram_name': 'T-2', 'file': (BytesIO(b'text'), 't2.txt')})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid file type. Allowed types: png, jpg, jpeg, gif"}
+
+@pytest.mark.usefixtures("app")
+def test_session_routes_return_rows(client, ve_user):
+    """Test ID: IT-197
+    Verify the session routes return the re-rendered row of the session they changed.
+
+    Asserts:
+        - Creating a session returns its row with the Open button.
+        - Opening and closing the session return its row in the new state.
+        - Deleting a session returns a deleted row.
+    """
+    login(client, ve_user.username, 'vepassword')
+    today = datetime.now().date()
+    data = client.post('/ve/create_session', data={
+        'start_date': today.strftime('%Y-%m-%d'), 'tech_pool': '1', 'general_pool': '2',
+        'extra_pool': '3'}).get_json()
+    session_id = ExamSession.query.one().id
+    assert data['id'] == session_id
+    assert f'data-sort="{today.strftime("%Y-%m-%d")}"' in data['html']
+    assert 'open-session-button' in data['html']
+
+    data = client.post(f'/ve/open_session/{session_id}').get_json()
+    assert 'close-session-button' in data['html']
+    assert 'Monitor' in data['html']
+
+    data = client.post(f'/ve/close_session/{session_id}').get_json()
+    assert '<td>Closed</td>' in data['html']
+    assert 'Results' in data['html']
+
+    # Sessions that were started cannot be deleted, so use a new one
+    exam_session = ExamSession(session_date=today, tech_pool_id=1, gen_pool_id=2,
+                               extra_pool_id=3)
+    db.session.add(exam_session)
+    db.session.commit()
+    assert client.delete(f'/ve/delete_session/{exam_session.id}').get_json() == \
+        {"success": True, "id": exam_session.id, "deleted": True}
@@ -0,0 +1,110 @@
+"""File: test_integration_score_reports.py
+
+    This file contains the integration tests for the session score report route and the
+    session-reports command.
+"""
+
+import io
+import zipfile
+import pytest
+from flask import url_for
+from openwaves import answer_store, db
+from openwaves.imports import Exam, ExamAnswer
+from openwaves.score_reports import collect_reports
+from openwaves.tests.test_unit_auth import login
+from openwaves.tests.test_integration_conditional import setup_open_exam
+
+@pytest.mark.usefixtures("app")
+def test_session_reports_route(app, client, ve_user):
+    """Test ID: IT-210
+    Verify VEs can download a session's score reports as a ZIP rendered in a process pool.
+
+    Asserts:
+        - Each finished exam has a score report PDF in the streamed ZIP.
+        - Open exams and candidates who did not pass get no files.
+        - Unknown sessions are not found.
+    """
+    _pool, exam = setup_open_exam(ve_user)
+    login(client, ve_user.username, 'vepassword')
+
+    app.config['REPORT_WORKERS'] = 1
+    response = client.get(url_for('main_reports.session_reports', session_id=exam.session_id))
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert archive.namelist() == []
+
+    exam.open = False
+    db.session.commit()
+    app.config['REPORT_WORKERS'] = 2
+    response = client.get(url_for('main_reports.session_reports', session_id=exam.session_id))
+    assert response.status_code == 200 and response.is_streamed
+    assert response.mimetype == 'application/zip'
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        names = archive.namelist()
+        assert len(names) == 1 and names[0].startswith('score_reports/')
+        assert archive.read(names[0]).startswith(b'%PDF')
+
+    response = client.get(url_for('main_reports.session_reports', session_id=999))
+    assert response.status_code == 404
+
+@pytest.mark.usefixtures("app")
+def test_session_reports_command(app, runner, ve_user, tmp_path):
+    """Test ID: IT-211
+    Verify the session-reports command writes the report ZIP to a file.
+
+    Asserts:
+        - The ZIP holds the session's score reports.
+        - An unknown session is an error.
+    """
+    app.config['REPORT_WORKERS'] = 1
+    _pool, exam = setup_open_exam(ve_user)
+    exam.open = False
+    db.session.commit()
+
+    output = tmp_path / 'reports.zip'
+    result = runner.invoke(args=['openwaves', 'session-reports', str(exam.session_id),
+                                 str(output)])
+    assert result.exit_code == 0
+    with zipfile.ZipFile(output) as archive:
+        assert len(archive.namelist()) == 1
+
+    result = runner.invoke(args=['openwaves', 'session-reports', '999', str(output)])
+    assert result.exit_code != 0
+
+@pytest.mark.usefixtures("app")
+def test_collect_reports_loads_answers_in_batches(ve_user, query_budget):
+    """Test ID: IT-230
+    Verify a session's reports read the answers of all its exams with a fixed number of queries.
+
+    Asserts:
+        - Eight finished exams, half packed and half stored as rows, are read in at most six
+          queries.
+        - Each exam's score and answers match what load_answers() returns for it.
+    """
+    _pool, first = setup_open_exam(ve_user)
+    first.open = False
+    question_ids = [answer.question_id for answer in answer_store.load_answers(first)]
+    for index in range(7):
+        if index == 3:
+            answer_store.pack_exams()
+        exam = Exam(user_id=ve_user.id, open=False, element=2, pool_id=first.pool_id,
+                    session_id=first.session_id)
+        db.session.add(exam)
+        db.session.flush()
+        db.session.add_all([ExamAnswer(exam_id=exam.id, question_id=question_id,
+                                       question_number=number, correct_answer=0,
+                                       answer=(index + number) % 2)
+                            for number, question_id in enumerate(question_ids, start=1)])
+    db.session.commit()
+    exams = Exam.query.filter_by(session_id=first.session_id).all()
+    assert len(exams) == 8 and 0 < sum(exam.packed for exam in exams) < 8
+
+    with query_budget(6):
+        reports = collect_reports(first.session_id)
+
+    assert len(reports['exams']) == 8
+    for report in reports['exams']:
+        expected = answer_store.load_answers(db.session.get(Exam, report['exam_id']))
+        assert [question['answer'] for question in report['questions']] == \
+            [answer.answer for answer in expected]
+        assert report['correct'] == sum(answer.answer == answer.correct_answer
+                                        for answer in expected)
@@ -0,0 +1,178 @@
+"""File: test_integration_seeded_exams.py
+
+    This file contains the integration tests for seeded exams, whose questions are regenerated
+    from a per-exam seed and whose answer rows are written only when a question is answered.
+"""
+
+from datetime import datetime
+import pytest
+from flask import url_for
+from openwaves import db, services, session_monitor
+from openwaves import answer_store
+from openwaves.answer_store import load_answers
+from openwaves.imports import Question, ExamSession, ExamRegistration, Exam, ExamAnswer, \
+    ExamAnswerPack, User, generate_seeded_exam
+from openwaves.tests.test_unit_auth import login
+from openwaves.tests.test_integration_exam_forms import add_complete_pool
+
+@pytest.mark.usefixtures("app")
+def test_launch_seeded_exam(client, app):
+    """Test ID: IT-206
+    Verify a seeded exam is launched as a single row and writes answers as they are given.
+
+    Asserts:
+        - Launching stores a seed and no answer rows or packs.
+        - The exam's questions are regenerated from the seed, the same each time.
+        - Answering a question writes one ExamAnswer row.
+        - The monitor counts every question and the results page scores the exam.
+        - Finishing writes out every question and drops the seed.
+    """
+    app.config['EXAM_GENERATION'] = 'seeded'
+    pool = add_complete_pool()
+    user = User.query.filter_by(username='TESTUSER').one()
+    exam_session = ExamSession(session_date=datetime.today(), tech_pool_id=pool.id,
+                               gen_pool_id=pool.id, extra_pool_id=pool.id, status=True)
+    db.session.add(exam_session)
+    db.session.flush()
+    db.session.add(ExamRegistration(user_id=user.id, session_id=exam_session.id, tech=True,
+                                    valid=True))
+    db.session.commit()
+
+    login(client, user.username, 'testpassword')
+    client.post(url_for('main.launch_exam'),
+                data={'session_id': exam_session.id, 'exam_element': '2'})
+    exam = Exam.query.filter_by(user_id=user.id).one()
+    assert exam.seed is not None
+    assert ExamAnswer.query.count() == 0 and ExamAnswerPack.query.count() == 0
+
+    question_ids = [answer.question_id for answer in load_answers(exam)]
+    assert question_ids == [question.id for question in generate_seeded_exam(pool.id, exam.seed)]
+    assert question_ids == [answer.question_id for answer in load_answers(exam)]
+    assert len(question_ids) == 35
+
+    first_question = db.session.get(Question, question_ids[0])
+    response = client.get(url_for('main.take_exam', exam_id=exam.id))
+    assert first_question.question.encode() in response.data
+    client.post(url_for('main.take_exam', exam_id=exam.id, index=0),
+                data={'answer': str(first_question.correct_answer), 'question_number': '1',
+                      'review': 'Review'})
+    rows = ExamAnswer.query.all()
+    assert [(row.question_number, row.question_id, row.answer) for row in rows] == \
+        [(1, first_question.id, first_question.correct_answer)]
+
+    progress = session_monitor.load_progress(exam_session.id)
+    assert (progress[0]['answered'], progress[0]['total']) == (1, 35)
+
+    client.get(url_for('main.finish_exam', exam_id=exam.id))
+    db.session.expire_all()
+    assert db.session.get(Exam, exam.id).seed is None
+    assert [row.question_id for row in ExamAnswer.query.filter_by(exam_id=exam.id)
+            .order_by(ExamAnswer.question_number)] == question_ids
+    response = client.get(url_for('main.exam_results', session_id=exam_session.id,
+                                  exam_element=2))
+    assert b'Score: 1/35 (Fail)' in response.data
+
+@pytest.mark.usefixtures("app")
+def test_seeded_exams_follow_pool_changes(user_to_toggle):
+    """Test ID: IT-207
+    Verify seeded exams stay correct when their pool's key or questions change.
+
+    Asserts:
+        - Different seeds can select different questions.
+        - Rescoring updates the key of unanswered seeded questions.
+        - Importing questions writes out the seeded exam's rows and drops its seed, keeping
+          its questions and answers.
+    """
+    pool = add_complete_pool()
+    assert [question.id for question in generate_seeded_exam(pool.id, 1)] != \
+        [question.id for question in generate_seeded_exam(pool.id, 2)]
+
+    exam = Exam(user_id=user_to_toggle.id, pool_id=pool.id, session_id=1, element=2, open=True,
+                seed=1)
+    db.session.add(exam)
+    db.session.commit()
+    answers = load_answers(exam)
+    answers[0].answer = 2
+    db.session.commit()
+
+    question = db.session.get(Question, answers[1].question_id)
+    question.correct_answer = 3
+    db.session.commit()
+    services.rescore_answers(pool.id)
+    before = [(answer.question_id, answer.correct_answer, answer.answer)
+              for answer in load_answers(exam)]
+    assert before[1][1] == 3
+
+    services.import_questions(pool.id, [{
+        'id': 'T0A03', 'correct': 0, 'question': 'New question?', 'a': 'A', 'b': 'B', 'c': 'C',
+        'd': 'D', 'refs': ''}])
+    db.session.expire_all()
+    exam = db.session.get(Exam, exam.id)
+    assert exam.seed is None
+    assert ExamAnswer.query.filter_by(exam_id=exam.id).count() == 35
+    assert [(answer.question_id, answer.correct_answer, answer.answer)
+            for answer in load_answers(exam)] == before
+
+@pytest.mark.usefixtures("app")
+def test_seeded_exam_pool_cannot_supply(user_to_toggle):
+    """Test ID: IT-221
+    Negative test: Verify a seeded exam whose pool was emptied is reported, not scored 0/0.
+
+    Asserts:
+        - Loading the answers raises LookupError instead of returning an empty exam.
+    """
+    pool = add_complete_pool()
+    exam = Exam(user_id=user_to_toggle.id, pool_id=pool.id, session_id=1, element=2, open=True,
+                seed=1)
+    db.session.add(exam)
+    Question.query.filter_by(pool_id=pool.id).delete()
+    db.session.commit()
+    with pytest.raises(LookupError):
+        load_answers(exam)
+
+def insert_concurrently(exam_id, answer, choice):
+    """Insert an answer row on another connection, as a concurrent request would."""
+    with db.engine.begin() as connection:
+        connection.execute(ExamAnswer.__table__.insert().values(
+            exam_id=exam_id, question_id=answer.question_id,
+            question_number=answer.question_number, correct_answer=answer.correct_answer,
+            answer=choice))
+
+@pytest.mark.usefixtures("app")
+def test_seeded_answer_races(user_to_toggle, monkeypatch):
+    """Test ID: IT-226
+    Verify two requests writing the same seeded question keep one row holding the later answer.
+
+    Asserts:
+        - An answer whose row another request inserted first (a double submit, or an offline
+          sync racing take_exam) updates that row instead of failing.
+        - Finishing an exam while a late answer is inserted writes out the other questions and
+          keeps the late answer.
+        - Each question has exactly one row.
+    """
+    pool = add_complete_pool()
+    exam = Exam(user_id=user_to_toggle.id, pool_id=pool.id, session_id=1, element=2, open=True,
+                seed=7)
+    db.session.add(exam)
+    db.session.commit()
+
+    answers = load_answers(exam)
+    insert_concurrently(exam.id, answers[0], 1)
+    answers[0].answer = 2
+    db.session.commit()
+    assert [row.answer for row in ExamAnswer.query.filter_by(exam_id=exam.id)] == [2]
+
+    stale_load = answer_store.load_answers
+
+    def load_then_race(racing_exam):
+        loaded = stale_load(racing_exam)
+        insert_concurrently(racing_exam.id, loaded[1], 3)
+        return loaded
+
+    monkeypatch.setattr(answer_store, 'load_answers', load_then_race)
+    answer_store.materialize_exam(exam)
+    db.session.commit()
+    rows = ExamAnswer.query.filter_by(exam_id=exam.id).order_by(ExamAnswer.question_number).all()
+    assert exam.seed is None
+    assert [row.question_number for row in rows] == list(range(1, 36))
+    assert [row.answer for row in rows[:3]] == [2, 3, None]
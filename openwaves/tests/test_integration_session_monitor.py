@@ -0,0 +1,215 @@
+"""File: test_integration_session_monitor.py
+
+    This file contains the integration tests for the live session monitor in the
+    session_monitor.py file and its routes in main_ve.py.
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+import pytest
+from flask import url_for
+from openwaves import db, session_monitor
+from openwaves.imports import ExamSession
+from openwaves.session_monitor import load_version, publish_exam
+from openwaves.tests.test_unit_auth import login
+from openwaves.tests.test_integration_conditional import setup_open_exam
+
+def read_events(response, with_ids=False):
+    """Read a finished event stream and return its (event, data) pairs, without keep-alives.
+
+    With with_ids, return (id, event, data) triples instead. The response is closed, which
+    unsubscribes the stream as a server does when the client goes away.
+    """
+    events = []
+    body = response.get_data(as_text=True)
+    response.close()
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines()
+                      if not line.startswith(':'))
+        if 'event' in fields:
+            event = (fields['event'], json.loads(fields['data']))
+            events.append((int(fields['id']),) + event if with_ids else event)
+    return events
+
+@pytest.mark.usefixtures("app")
+def test_monitor_streams_snapshot_and_progress(app, client, ve_user, user_to_toggle):
+    """Test ID: IT-192
+    Verify the monitor stream opens with a snapshot and pushes answer and finish updates.
+
+    Asserts:
+        - The stream is an uncached text/event-stream.
+        - The snapshot lists the open exam with nothing answered and no score.
+        - Saving an answer and finishing the exam are pushed as progress events, the last one
+          with the score.
+    """
+    app.config.update(SESSION_MONITOR_HEARTBEAT=0.05, SESSION_MONITOR_POLL_INTERVAL=0.05,
+                      SESSION_MONITOR_MAX_AGE=0.3)
+    _pool, exam = setup_open_exam(user_to_toggle)
+    login(client, ve_user.username, 'vepassword')
+    assert b'Live Session' in client.get(
+        url_for('main_ve.ve_session_monitor', session_id=exam.session_id)).data
+
+    response = client.get(url_for('main_ve.ve_session_monitor_stream',
+                                  session_id=exam.session_id))
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-store'
+
+    # The candidate answers the first question correctly and finishes
+    candidate = app.test_client()
+    login(candidate, user_to_toggle.username, 'password')
+    candidate.post(url_for('main.take_exam', exam_id=exam.id, index=0),
+                   data={'answer': '0', 'question_number': '1', 'next': 'Next'})
+    candidate.get(url_for('main.finish_exam', exam_id=exam.id))
+
+    events = read_events(response)
+    response.close()
+
+    kind, snapshot = events[0]
+    assert kind == 'snapshot'
+    assert [(row['exam_id'], row['answered'], row['total'], row['open'], row['correct'])
+            for row in snapshot] == [(exam.id, 0, 2, True, None)]
+
+    # Changes between two version checks are sent once, with the latest state
+    kind, progress = events[-1]
+    assert kind == 'progress'
+    assert (progress['answered'], progress['open'], progress['correct'], progress['passed']) \
+        == (1, False, 1, False)
+
+@pytest.mark.usefixtures("app")
+def test_monitor_publish_and_access(client, user_to_toggle, query_budget):
+    """Test ID: IT-193
+    Verify publishing only writes a watched session, in the caller's transaction, and the
+    stream is VE-only.
+
+    Asserts:
+        - Without a watch lease publish_exam leaves the session's version alone.
+        - With a live lease it runs a single statement and its bump is undone with a rollback.
+        - A committed bump is visible through load_version.
+        - Candidates are logged out.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    db.session.refresh(exam)
+    version = load_version(exam.session_id)
+    publish_exam(exam)
+    db.session.commit()
+    assert load_version(exam.session_id) == version
+
+    db.session.get(ExamSession, exam.session_id).monitor_watched_until = \
+        datetime.now() + timedelta(minutes=1)
+    db.session.commit()
+    db.session.refresh(exam)
+    with query_budget(1):
+        publish_exam(exam)
+    db.session.rollback()
+    assert load_version(exam.session_id) == version
+
+    publish_exam(exam)
+    db.session.commit()
+    assert load_version(exam.session_id) == version + 1
+
+    login(client, user_to_toggle.username, 'password')
+    response = client.get(url_for('main_ve.ve_session_monitor_stream',
+                                  session_id=exam.session_id))
+    assert response.status_code == 302
+
+@pytest.mark.usefixtures("app")
+def test_monitor_reconnect_skips_unchanged_snapshot(app, client, ve_user, user_to_toggle):
+    """Test ID: IT-219
+    Verify a reconnecting monitor only gets a snapshot when the session changed meanwhile.
+
+    Asserts:
+        - Events carry the session's version as their id.
+        - Reconnecting with the current version sends no snapshot.
+        - Reconnecting with an older version sends a fresh snapshot.
+        - A stream of a session deleted while it is watched ends.
+    """
+    app.config.update(SESSION_MONITOR_HEARTBEAT=0.05, SESSION_MONITOR_POLL_INTERVAL=0.05,
+                      SESSION_MONITOR_MAX_AGE=0.2)
+    _pool, exam = setup_open_exam(user_to_toggle)
+    login(client, ve_user.username, 'vepassword')
+    stream_url = url_for('main_ve.ve_session_monitor_stream', session_id=exam.session_id)
+
+    events = read_events(client.get(stream_url), with_ids=True)
+    version = load_version(exam.session_id)
+    assert events == [(version, 'snapshot', events[0][2])]
+
+    assert not read_events(client.get(stream_url, headers={'Last-Event-ID': str(version)}))
+
+    response = client.get(stream_url, headers={'Last-Event-ID': str(version)})
+    exam.open = False
+    publish_exam(exam)
+    db.session.commit()
+    events = read_events(response, with_ids=True)
+    assert [(event_id, kind, data['open']) for event_id, kind, data in events] \
+        == [(version + 1, 'progress', False)]
+
+    events = read_events(client.get(stream_url, headers={'Last-Event-ID': str(version)}))
+    assert [kind for kind, _data in events] == ['snapshot']
+
+    response = client.get(stream_url)
+    ExamSession.query.filter_by(id=exam.session_id).delete()
+    db.session.commit()
+    assert [kind for kind, _data in read_events(response)] == ['snapshot']
+
+@pytest.mark.usefixtures("app")
+def test_monitor_unknown_session(client, ve_user):
+    """Test ID: IT-194
+    Negative test: Verify the monitor pages reject a session that does not exist.
+
+    Asserts:
+        - The stream returns 404 JSON.
+        - The page redirects to the sessions page with a message.
+    """
+    login(client, ve_user.username, 'vepassword')
+    response = client.get(url_for('main_ve.ve_session_monitor_stream', session_id=999))
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Session not found."}
+
+    response = client.get(url_for('main_ve.ve_session_monitor', session_id=999),
+                          follow_redirects=True)
+    assert b'Session not found.' in response.data
+
+@pytest.mark.usefixtures("app")
+def test_monitor_streams_share_one_poller(app, client, ve_user, user_to_toggle, monkeypatch):
+    """Test ID: IT-224
+    Verify every stream of a session in one process is fed by a single poller.
+
+    Asserts:
+        - Three streams of one session share one SessionPoller.
+        - A change reaches every stream while the session's progress is loaded a fixed number
+          of times, not once per stream.
+        - The poller stops once the streams have closed.
+    """
+    app.config.update(SESSION_MONITOR_HEARTBEAT=0.05, SESSION_MONITOR_POLL_INTERVAL=0.05,
+                      SESSION_MONITOR_MAX_AGE=0.3)
+    _pool, exam = setup_open_exam(user_to_toggle)
+    loads = []
+    load_progress = session_monitor.load_progress
+
+    def counted_load_progress(session_id, exam_id=None):
+        loads.append(session_id)
+        return load_progress(session_id, exam_id)
+
+    monkeypatch.setattr(session_monitor, 'load_progress', counted_load_progress)
+    login(client, ve_user.username, 'vepassword')
+    stream_url = url_for('main_ve.ve_session_monitor_stream', session_id=exam.session_id)
+    responses = [client.get(stream_url) for _ in range(3)]
+    poller = session_monitor.get_poller(exam.session_id)
+    assert len(app.extensions['openwaves_session_monitor']) == 1
+
+    exam.open = False
+    publish_exam(exam)
+    db.session.commit()
+    for response in responses:
+        events = read_events(response)
+        assert [kind for kind, _data in events] == ['snapshot', 'progress']
+        assert events[-1][1]['open'] is False
+    # The first subscription, the poller's first check and the change; never one per stream
+    assert len(loads) <= 3
+
+    for _ in range(20):
+        if poller._thread is None: # pylint: disable=W0212
+            break
+        time.sleep(0.05)
+    assert poller._thread is None # pylint: disable=W0212
@@ -6,10 +6,11 @@
 from datetime import datetime
 import pytest
 from flask import url_for
-from openwaves import db
+from openwaves import answer_store, db
 from openwaves.imports import User, ExamSession, Exam, ExamAnswer, Pool, \
                             Question
 from openwaves.tests.test_unit_auth import login
+from openwaves.tests.test_integration_conditional import setup_open_exam
 
 def test_take_exam_invalid_exam_id(client, app):
     """Test ID: IT-110
@@ -602,3 +603,57 @@ def test_take_exam_role_not_allowed(client, ve_user):
 
     assert response.status_code == 200
     assert b'Access denied' in response.data
+
+@pytest.mark.usefixtures("app")
+def test_take_exam_invalid_question_number(client, user_to_toggle):
+    """Test ID: IT-215
+    Verify an answer posted for a question number the exam does not have is rejected.
+
+    Asserts:
+        - Out-of-range and missing question numbers redirect with a flash instead of a 500.
+        - No answer is saved.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    login(client, user_to_toggle.username, 'password')
+
+    for question_number in ('99', 'abc', None):
+        data = {'answer': '1', 'next': 'Next'}
+        if question_number is not None:
+            data['question_number'] = question_number
+        response = client.post(f'/exam/{exam.id}?index=1', data=data)
+        assert response.status_code == 302
+        assert f'/exam/{exam.id}?index=1' in response.headers['Location']
+
+    assert b'Invalid question number.' in client.get(f'/exam/{exam.id}').data
+    assert ExamAnswer.query.filter(ExamAnswer.answer.isnot(None)).count() == 0
+
+@pytest.mark.usefixtures("app")
+def test_take_exam_rejects_invalid_answer_packed(client, user_to_toggle):
+    """Test ID: IT-223
+    Negative test: Verify answers outside A-D are rejected before they reach a packed exam.
+
+    Asserts:
+        - Out-of-range, "unanswered" (255) and non-integer answers redirect with a flash
+          instead of a 500.
+        - The packed exam keeps the question unanswered; a valid answer is still saved.
+    """
+    _pool, exam = setup_open_exam(user_to_toggle)
+    assert answer_store.pack_exams() == 1
+    db.session.expire_all()
+    exam = db.session.get(Exam, exam.id)
+    assert exam.packed
+    login(client, user_to_toggle.username, 'password')
+
+    for value in ('300', '-1', '255', '4', 'abc'):
+        response = client.post(f'/exam/{exam.id}?index=0',
+                               data={'answer': value, 'question_number': '1', 'next': 'Next'})
+        assert response.status_code == 302
+        assert f'/exam/{exam.id}?index=0' in response.headers['Location']
+    assert b'Invalid answer.' in client.get(f'/exam/{exam.id}').data
+    db.session.expire_all()
+    assert [answer.answer for answer in answer_store.load_answers(exam)] == [None, None]
+
+    client.post(f'/exam/{exam.id}?index=0',
+                data={'answer': '3', 'question_number': '1', 'next': 'Next'})
+    db.session.expire_all()
+    assert answer_store.load_answers(exam)[0].answer == 3
@@ -267,3 +267,38 @@ def test_ve_exam_results_valid_request(client, ve_user):
     assert response.status_code == 200
     assert b'What is question 1?' in response.data
     assert b'Score: 1/35' in response.data
+
+@pytest.mark.usefixtures("app")
+def test_ve_session_results_unknown_element_fails(client, ve_user):
+    """Test ID: IT-227
+    Negative test: Verify the session results fail an exam of an unknown element.
+
+    Asserts:
+        - An element with no pass mark is shown as Fail, not passed at any score.
+        - A Tech exam of the same session is still marked against its own pass mark.
+    """
+    pool = Pool(name="Tech Pool", element=2, start_date=datetime(2024, 1, 1),
+                end_date=datetime(2024, 12, 31))
+    db.session.add(pool)
+    db.session.flush()
+    session = ExamSession(session_date=datetime(2024, 10, 1), tech_pool_id=pool.id,
+                          gen_pool_id=pool.id, extra_pool_id=pool.id, status=False)
+    db.session.add(session)
+    db.session.flush()
+    exams = [Exam(user_id=ve_user.id, session_id=session.id, element=element, pool_id=pool.id,
+                  open=False) for element in (9, 2)]
+    db.session.add_all(exams)
+    db.session.flush()
+    db.session.add_all([ExamAnswer(exam_id=exam.id, question_id=i, question_number=i,
+                                   correct_answer=1, answer=1)
+                        for exam in exams for i in range(1, 36)])
+    db.session.commit()
+
+    login(client, ve_user.username, 'vepassword')
+    response = client.get(url_for('main_ve.ve_session_results', session_id=session.id))
+
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert page.count('is-danger">Fail') == 1
+    assert page.count('is-success">Pass') == 1
+    assert page.index('is-danger">Fail') < page.index('is-success">Pass')
@@ -0,0 +1,119 @@
+"""File: test_unit_answer_store.py
+
+    This file contains the unit tests for the packed answer format in the answer_store.py file.
+"""
+
+import pytest
+from openwaves import db
+from openwaves.answer_store import build_pack, create_answers, decode_array, draw_questions, \
+    encode_array, load_answers, PackedAnswer, PackedAnswers, SeededAnswer
+from openwaves.imports import Exam, ExamAnswer, ExamAnswerPack, ExamForm, Question
+
+def test_packed_answers_write_through():
+    """Test ID: UT-96
+    Verify packed answers read like ExamAnswer rows and changes are written back to the pack.
+
+    Asserts:
+        - Arrays are stored little-endian and decode to the values encoded.
+        - Each answer exposes the ExamAnswer attributes, with None for unanswered questions.
+        - Setting answer and answered_at updates the pack's bytes.
+        - tally() counts answered, total and correct answers.
+    """
+    assert encode_array('I', [1, 258]) == b'\x01\x00\x00\x00\x02\x01\x00\x00'
+    assert list(decode_array('q', encode_array('q', [0, 1_700_000_000_000]))) == \
+        [0, 1_700_000_000_000]
+
+    pack = build_pack(7, [(101, 2, 2, 1_000), (102, 0, None, None), (70_000, 3, 1, 2_000)])
+    answers = [PackedAnswer(PackedAnswers(pack), index) for index in range(3)]
+    assert [(answer.exam_id, answer.question_number, answer.question_id, answer.correct_answer,
+             answer.answer, answer.answered_at) for answer in answers] == \
+        [(7, 1, 101, 2, 2, 1_000), (7, 2, 102, 0, None, None), (7, 3, 70_000, 3, 1, 2_000)]
+
+    answers[1].answer = 0
+    answers[1].answered_at = 3_000
+    assert pack.answers == bytes([2, 0, 1])
+    assert list(decode_array('q', pack.answered_at)) == [1_000, 3_000, 2_000]
+    assert PackedAnswers(pack).tally() == (3, 3, 2)
+
+@pytest.mark.usefixtures("app")
+def test_create_answers_uses_configured_storage(app, user_to_toggle):
+    """Test ID: UT-97
+    Verify new exams are created in the format chosen by ANSWER_STORAGE.
+
+    Asserts:
+        - 'rows' creates one ExamAnswer per question.
+        - 'packed' creates one ExamAnswerPack and marks the exam as packed.
+        - Both load as the same answers in question number order.
+        - An unknown format is rejected.
+    """
+    questions = [Question(pool_id=1, number=f'T1A0{n}', correct_answer=n, question='Q?',
+                          option_a='A', option_b='B', option_c='C', option_d='D')
+                 for n in (3, 1)]
+    db.session.add_all(questions)
+    db.session.commit()
+
+    loaded = []
+    for storage in ('rows', 'packed'):
+        app.config['ANSWER_STORAGE'] = storage
+        exam = Exam(user_id=user_to_toggle.id, pool_id=1, session_id=1, element=2, open=True)
+        db.session.add(exam)
+        db.session.flush()
+        create_answers(exam, questions)
+        db.session.commit()
+        loaded.append([(answer.question_number, answer.question_id, answer.correct_answer,
+                        answer.answer) for answer in load_answers(exam)])
+
+    assert loaded[0] == loaded[1] == [(1, questions[0].id, 3, None), (2, questions[1].id, 1, None)]
+    assert ExamAnswer.query.count() == 2
+    assert ExamAnswerPack.query.count() == 1
+    assert [exam.packed for exam in Exam.query.order_by(Exam.id)] == [False, True]
+
+    app.config['ANSWER_STORAGE'] = 'columns'
+    with pytest.raises(ValueError):
+        create_answers(Exam.query.first(), questions)
+
+def test_form_exam_pack_reads_form():
+    """Test ID: UT-98
+    Verify a form exam's pack holds only responses and reads its questions and key from the form.
+
+    Asserts:
+        - The questions and correct answers come from the form.
+        - A pack with its own questions ignores the form.
+    """
+    form = ExamForm(question_ids=encode_array('I', [11, 12]), correct_answers=bytes([1, 2]))
+    pack = ExamAnswerPack(exam_id=3, question_ids=b'', correct_answers=b'',
+                          answers=bytes([1, 255]), answered_at=encode_array('q', [5, 0]))
+    packed = PackedAnswers(pack, form)
+    assert [(answer.question_id, answer.correct_answer, answer.answer)
+            for answer in (PackedAnswer(packed, index) for index in range(len(packed)))] == \
+        [(11, 1, 1), (12, 2, None)]
+    assert packed.tally() == (1, 2, 1)
+
+    own = build_pack(4, [(21, 0, 0, 1)])
+    assert list(PackedAnswers(own, form).question_ids) == [21]
+
+@pytest.mark.usefixtures("app")
+def test_seeded_answer_writes_row_on_first_answer(app):
+    """Test ID: UT-99
+    Verify an unanswered seeded question adds its ExamAnswer row only when it is answered.
+
+    Asserts:
+        - An unanswered question reads as None and adds nothing to the session.
+        - Setting answer and answered_at inserts one row holding both.
+        - An unknown EXAM_GENERATION is rejected.
+    """
+    answer = SeededAnswer(5, 2, 40, 3)
+    assert (answer.answer, answer.answered_at, answer.row) == (None, None, None)
+    assert not db.session.new
+
+    answer.answer = 1
+    answer.answered_at = 1_000
+    db.session.flush()
+    assert [(row.exam_id, row.question_number, row.question_id, row.correct_answer, row.answer,
+             row.answered_at) for row in ExamAnswer.query.filter_by(exam_id=5)] == \
+        [(5, 2, 40, 3, 1, 1_000)]
+    db.session.rollback()
+
+    app.config['EXAM_GENERATION'] = 'cached'
+    with pytest.raises(ValueError):
+        draw_questions(1)
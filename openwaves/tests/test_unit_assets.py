@@ -0,0 +1,143 @@
+"""File: test_assets.py
+
+    This file contains the unit tests for the static asset pipeline in the assets.py file.
+"""
+import gzip
+import os
+import pytest
+from flask import url_for
+from openwaves import assets
+from openwaves.assets import build_assets, load_manifest
+
+@pytest.fixture
+def static_folder(tmp_path):
+    """Create a small static folder with a stylesheet, a script, an image and a diagram."""
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'js').mkdir()
+    (tmp_path / 'images' / 'diagrams').mkdir(parents=True)
+    (tmp_path / 'css' / 'site.css').write_text(
+        "body { background-image: url('../images/bg.webp'); }\n" * 20)
+    (tmp_path / 'js' / 'app.js').write_text("console.log('hello');\n" * 50)
+    (tmp_path / 'images' / 'bg.webp').write_bytes(b'RIFF0000WEBP')
+    (tmp_path / 'images' / 'diagrams' / '1_T1.png').write_bytes(b'\x89PNG')
+    return tmp_path
+
+def test_build_assets_creates_hashed_files(static_folder): # pylint: disable=W0621
+    """Test ID: UT-70
+    Verify the build step writes content-hashed copies, compressed siblings and a manifest.
+
+    Asserts:
+        - Each logical asset maps to a hashed name in the dist folder.
+        - Text assets have a gzip sibling that decompresses to the original bytes.
+        - Runtime diagram uploads are not part of the build.
+    """
+    manifest = build_assets(str(static_folder))
+
+    assert set(manifest) == {'css/site.css', 'js/app.js', 'images/bg.webp'}
+    js_entry = manifest['js/app.js']
+    assert js_entry['hashed'].startswith('js/app.') and js_entry['hashed'].endswith('.js')
+    assert 'gzip' in js_entry['encodings']
+
+    hashed_path = static_folder / 'dist' / js_entry['hashed']
+    with gzip.open(f"{hashed_path}.gz") as handle:
+        assert handle.read() == hashed_path.read_bytes()
+
+    assert manifest['images/bg.webp']['encodings'] == []
+    assert os.path.exists(static_folder / 'dist' / 'manifest.json')
+
+def test_build_assets_rewrites_css_urls(static_folder): # pylint: disable=W0621
+    """Test ID: UT-71
+    Verify stylesheet url() references point at the fingerprinted image names.
+
+    Asserts:
+        - The hashed stylesheet references the hashed background image.
+    """
+    manifest = build_assets(str(static_folder))
+
+    css = (static_folder / 'dist' / manifest['css/site.css']['hashed']).read_text()
+    hashed_image = os.path.basename(manifest['images/bg.webp']['hashed'])
+    assert f"url('../images/{hashed_image}')" in css
+
+def test_build_assets_is_reproducible(static_folder): # pylint: disable=W0621
+    """Test ID: UT-72
+    Verify rebuilding unchanged sources produces the same hashed names.
+
+    Asserts:
+        - Two builds produce identical manifests.
+    """
+    assert build_assets(str(static_folder)) == build_assets(str(static_folder))
+
+def test_static_url_and_serving(app, static_folder): # pylint: disable=W0621
+    """Test ID: UT-73
+    Verify url_for points at the hashed asset and the precompressed variant is served.
+
+    Asserts:
+        - url_for('static') returns the hashed dist path.
+        - A gzip-accepting client gets the .gz bytes with Content-Encoding and immutable caching.
+        - A client without gzip gets the plain file.
+    """
+    manifest = build_assets(str(static_folder))
+    app.static_folder = str(static_folder)
+    load_manifest(app)
+    hashed_url = f"/static/dist/{manifest['js/app.js']['hashed']}"
+
+    with app.test_request_context():
+        assert url_for('static', filename='js/app.js') == hashed_url
+
+    client = app.test_client()
+    response = client.get(hashed_url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'javascript' in response.mimetype
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data).startswith(b"console.log")
+    response.close()
+
+    response = client.get(hashed_url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data.startswith(b"console.log")
+    response.close()
+
+def test_runtime_files_are_versioned_by_stat(app, static_folder): # pylint: disable=W0621
+    """Test ID: UT-74
+    Verify files outside the build (e.g. uploaded diagrams) get a stat-based version token.
+
+    Asserts:
+        - url_for adds a 'v' query argument.
+        - The versioned URL is served with immutable caching.
+        - A made-up or mismatched version token is not cached as immutable.
+    """
+    app.static_folder = str(static_folder)
+    load_manifest(app)
+
+    with app.test_request_context():
+        url = url_for('static', filename='images/diagrams/1_T1.png')
+    assert '?v=' in url
+
+    response = app.test_client().get(url)
+    assert response.status_code == 200
+    assert 'immutable' in response.headers['Cache-Control']
+    response.close()
+
+    for url in ('/static/images/diagrams/1_T1.png?v=made-up', '/static/js/app.js?v=1'):
+        response = app.test_client().get(url)
+        assert response.status_code == 200
+        assert 'immutable' not in response.headers.get('Cache-Control', '')
+        response.close()
+
+def test_fingerprinting_disabled(app, static_folder): # pylint: disable=W0621
+    """Test ID: UT-75
+    Verify no rewriting happens when ASSET_FINGERPRINTING is off.
+
+    Asserts:
+        - url_for returns the plain static path.
+    """
+    build_assets(str(static_folder))
+    app.static_folder = str(static_folder)
+    app.config['ASSET_FINGERPRINTING'] = False
+    load_manifest(app)
+
+    with app.test_request_context():
+        assert url_for('static', filename='js/app.js') == '/static/js/app.js'
+    assert assets.load_manifest(app) == {}
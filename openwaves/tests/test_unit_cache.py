@@ -0,0 +1,85 @@
+"""File: test_unit_cache.py
+
+    This file contains the unit tests for the application cache in the cache.py file.
+"""
+
+from unittest.mock import patch
+from openwaves.cache import AppCache, LocalCache, MemoryClient, SharedCache
+
+def test_local_cache_lru_and_ttl():
+    """Test ID: UT-91
+    Verify the local backend evicts the least recently used entry and expires old entries.
+
+    Asserts:
+        - Reading an entry protects it from the next eviction.
+        - An entry past its TTL is a miss.
+        - Counters survive evictions.
+    """
+    backend = LocalCache(max_entries=2)
+    backend.incr('generation:pools')
+    backend.set('a', 1)
+    backend.set('b', 2)
+    assert backend.get('a') == (True, 1)
+    backend.set('c', 3)
+    assert backend.get('b') == (False, None)
+    assert backend.get('a') == (True, 1)
+    assert backend.counter('generation:pools') == 1
+
+    with patch('openwaves.cache.time.monotonic', return_value=1000.0):
+        backend.set('d', 4, ttl=10)
+    with patch('openwaves.cache.time.monotonic', return_value=1011.0):
+        assert backend.get('d') == (False, None)
+
+def test_app_cache_regions_and_invalidation():
+    """Test ID: UT-92
+    Verify get_or_set fills misses once and invalidate() only drops the given region.
+
+    Asserts:
+        - The loader runs on the first lookup only, and hits and misses are counted.
+        - Invalidating a region reloads its entries but not those of other regions.
+        - A disabled cache always calls the loader.
+    """
+    app_cache = AppCache(LocalCache())
+    calls = []
+
+    def loader(value):
+        return lambda: calls.append(value) or value
+
+    assert app_cache.get_or_set('pools', 'list', loader('pools')) == 'pools'
+    assert app_cache.get_or_set('pools', 'list', loader('stale')) == 'pools'
+    assert app_cache.get_or_set('questions', 1, loader('q1')) == 'q1'
+    assert (app_cache.hits, app_cache.misses) == (1, 2)
+
+    app_cache.invalidate('pools')
+    assert app_cache.get_or_set('pools', 'list', loader('fresh')) == 'fresh'
+    assert app_cache.get_or_set('questions', 1, loader('q1 again')) == 'q1'
+    assert calls == ['pools', 'q1', 'fresh']
+
+    disabled = AppCache(None)
+    disabled.invalidate('pools')
+    assert [disabled.get_or_set('pools', 'list', loader(n)) for n in (1, 2)] == [1, 2]
+
+def test_shared_cache_invalidates_across_workers():
+    """Test ID: UT-93
+    Verify two workers sharing one client see each other's entries and invalidations.
+
+    Asserts:
+        - An entry stored by one worker is a hit for the other.
+        - Invalidation by one worker makes the other reload.
+        - A failing client falls back to the loader instead of raising.
+    """
+    client = MemoryClient()
+    worker_a = AppCache(SharedCache(client))
+    worker_b = AppCache(SharedCache(client))
+
+    worker_a.get_or_set('pools', 'options', lambda: {2: {1: 'Tech 2022-2026'}})
+    assert worker_b.get_or_set('pools', 'options', dict) == {2: {1: 'Tech 2022-2026'}}
+
+    worker_a.invalidate('pools')
+    assert worker_b.get_or_set('pools', 'options', lambda: {2: {}}) == {2: {}}
+
+    worker_a.clear()
+    assert client.scan_iter('openwaves:*') == []
+
+    with patch.object(client, 'get', side_effect=ConnectionError('down')):
+        assert worker_a.get_or_set('pools', 'options', lambda: 'loaded') == 'loaded'
@@ -0,0 +1,94 @@
+"""File: test_compression.py
+
+    This file contains the unit tests for the response compression code in the compression.py file.
+"""
+import gzip
+import pytest
+from flask import g, jsonify
+
+@pytest.fixture
+def big_routes(app):
+    """Register routes returning large HTML, JSON and binary bodies plus a small HTML body."""
+    @app.route('/_test/big.html')
+    def big_html():
+        return f"<html><body nonce='{g.csp_nonce}'>" + "<p>question text</p>" * 500 + \
+            "</body></html>"
+
+    @app.route('/_test/big.json')
+    def big_json():
+        return jsonify({"rows": [{"question": "text", "answer": i} for i in range(500)]})
+
+    @app.route('/_test/big.bin')
+    def big_binary():
+        return app.response_class(b"\x00" * 5000, mimetype='application/octet-stream')
+
+    @app.route('/_test/small.html')
+    def small_html():
+        return "<p>tiny</p>"
+
+    return app.test_client()
+
+def test_html_is_gzipped(big_routes): # pylint: disable=W0621
+    """Test ID: UT-76
+    Verify a large HTML page is gzipped for a client that accepts gzip.
+
+    Asserts:
+        - Content-Encoding is gzip and Vary includes Accept-Encoding.
+        - The body decompresses to the page and the CSP nonce still matches the header.
+    """
+    response = big_routes.get('/_test/big.html', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+    body = gzip.decompress(response.data).decode()
+    nonce = body.split("nonce='")[1].split("'")[0]
+    assert f"'nonce-{nonce}'" in response.headers['Content-Security-Policy']
+    assert int(response.headers['Content-Length']) == len(response.data)
+
+def test_json_prefers_brotli(big_routes): # pylint: disable=W0621
+    """Test ID: UT-77
+    Verify JSON is Brotli encoded when the client prefers it and brotli is installed.
+
+    Asserts:
+        - Content-Encoding is br and the body decodes as JSON.
+    """
+    brotli = pytest.importorskip('brotli')
+    response = big_routes.get('/_test/big.json', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data).startswith(b'{')
+
+def test_no_compression_without_accept_encoding(big_routes): # pylint: disable=W0621
+    """Test ID: UT-78
+    Verify responses are left alone when the client does not accept compression.
+
+    Asserts:
+        - No Content-Encoding header is set.
+    """
+    response = big_routes.get('/_test/big.html')
+    assert 'Content-Encoding' not in response.headers
+    assert response.data.startswith(b'<html>')
+
+def test_threshold_and_allowlist(big_routes): # pylint: disable=W0621
+    """Test ID: UT-79
+    Verify small bodies and non-allowlisted content types are not compressed.
+
+    Asserts:
+        - A body under COMPRESSION_MIN_SIZE is sent as-is.
+        - An application/octet-stream body is sent as-is.
+    """
+    response = big_routes.get('/_test/small.html', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+    response = big_routes.get('/_test/big.bin', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+def test_compression_disabled(app, big_routes): # pylint: disable=W0621
+    """Test ID: UT-80
+    Verify COMPRESSION_ENABLED = False turns the middleware off.
+
+    Asserts:
+        - No Content-Encoding header is set.
+    """
+    app.config['COMPRESSION_ENABLED'] = False
+    response = big_routes.get('/_test/big.html', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
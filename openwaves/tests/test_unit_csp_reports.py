@@ -0,0 +1,57 @@
+"""File: test_csp_reports.py
+
+    This file contains the unit tests for the report parsing and aggregation in the
+    csp_reports.py file.
+"""
+
+import json
+from openwaves.csp_reports import parse_reports, CspReportAggregator
+
+def test_parse_legacy_and_reporting_api():
+    """Test ID: UT-88
+    Verify both report formats are parsed and normalised.
+
+    Asserts:
+        - A legacy csp-report body gives its directive, blocked and document URIs.
+        - Only csp-violation entries of a Reporting API list are used.
+        - Malformed bodies give no violations.
+    """
+    legacy = json.dumps({"csp-report": {"document-uri": "https://exam.local/exam/1",
+                                        "violated-directive": "script-src 'self'",
+                                        "blocked-uri": "https://evil.com/x.js"}})
+    assert parse_reports(legacy.encode()) == [
+        ('script-src', 'https://evil.com/x.js', 'https://exam.local/exam/1')]
+
+    reporting_api = json.dumps([
+        {"type": "csp-violation", "body": {"effectiveDirective": "img-src",
+                                           "blockedURL": "https://cdn.test/a.png",
+                                           "documentURL": "https://exam.local/"}},
+        {"type": "deprecation", "body": {"id": "x"}}
+    ])
+    assert parse_reports(reporting_api.encode()) == [
+        ('img-src', 'https://cdn.test/a.png', 'https://exam.local/')]
+
+    assert not parse_reports(b'not json')
+    assert not parse_reports(b'{"other": 1}')
+
+def test_aggregator_dedups_and_caps_keys():
+    """Test ID: UT-89
+    Verify reports are counted per (directive, blocked URI) with a cap on distinct pairs.
+
+    Asserts:
+        - Only the first report of a pair is reported as new.
+        - Reports for pairs beyond max_keys are dropped and counted.
+        - drain() returns the counts and empties the aggregator.
+    """
+    aggregator = CspReportAggregator(max_keys=2)
+    assert aggregator.record('script-src', 'https://a', '/') is True
+    assert aggregator.record('script-src', 'https://a', '/other') is False
+    assert aggregator.record('img-src', 'https://b', '/') is True
+    assert aggregator.record('style-src', 'https://c', '/') is False
+    assert aggregator.dropped == 1
+
+    pending = aggregator.drain()
+    assert pending[('script-src', 'https://a')]['count'] == 2
+    assert pending[('script-src', 'https://a')]['document_uri'] == '/'
+    assert len(pending) == 2
+    assert not aggregator.drain()
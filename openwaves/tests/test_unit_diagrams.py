@@ -0,0 +1,88 @@
+"""File: test_unit_diagrams.py
+
+    This file contains the unit tests for the diagram upload pipeline in the diagrams.py file.
+"""
+
+import hashlib
+import io
+import struct
+from unittest.mock import patch
+import pytest
+from openwaves import diagrams
+
+def png_header(width, height):
+    """Return the signature and IHDR chunk of a PNG of the given size."""
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + \
+        struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+
+@pytest.mark.usefixtures("app")
+def test_header_size_and_process_without_pillow(app, tmp_path):
+    """Test ID: UT-102
+    Verify diagram sizes are read from image headers and uploads are stored by content hash.
+
+    Asserts:
+        - PNG, GIF and JPEG headers give their width and height; other data gives None.
+        - Without Pillow the upload is stored as sent, named after its SHA-256, with no WebP.
+        - Storing the same upload twice keeps one file.
+    """
+    assert diagrams.header_size(png_header(640, 480)) == (640, 480)
+    assert diagrams.header_size(b'GIF89a' + struct.pack('<HH', 32, 16)) == (32, 16)
+    jpeg = b'\xff\xd8' + b'\xff\xe0' + struct.pack('>H', 4) + b'JF' + \
+        b'\xff\xc0' + struct.pack('>HBHH', 11, 8, 300, 200) + b'\x03'
+    assert diagrams.header_size(jpeg) == (200, 300)
+    assert diagrams.header_size(b'not an image') == (None, None)
+
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    data = png_header(640, 480)
+    digest = hashlib.sha256(data).hexdigest()
+    with app.app_context(), patch.object(diagrams, 'Image', None):
+        stored = diagrams.store_diagram(data, 'T1.PNG')
+        assert diagrams.store_diagram(data, 'copy.png') == stored
+
+    assert stored == {'path': f'diagrams/{digest}.png', 'webp_path': None, 'digest': digest,
+                      'width': 640, 'height': 480}
+    assert [path.name for path in tmp_path.iterdir()] == [f'{digest}.png']
+    assert (tmp_path / f'{digest}.png').read_bytes() == data
+
+def encoded_image(image_module, size, image_format, mode='RGBA'):
+    """Return an image of the given size encoded with Pillow."""
+    output = io.BytesIO()
+    image_module.new(mode, size, (200, 30, 30) if mode == 'RGB' else (200, 30, 30, 255)) \
+        .save(output, image_format)
+    return output.getvalue()
+
+@pytest.mark.usefixtures("app")
+def test_process_with_pillow(app, tmp_path):
+    """Test ID: UT-105
+    Verify Pillow scales uploads to DIAGRAM_MAX_SIZE and writes WebP with a PNG/JPEG fallback.
+
+    Asserts:
+        - A large PNG is scaled to DIAGRAM_MAX_SIZE on its longest side, keeping its aspect
+          ratio, and stored as WebP and PNG of that size.
+        - A JPEG keeps a JPEG fallback; an image within the limit is not enlarged.
+        - An unreadable file with an image extension is stored as uploaded, without WebP.
+    """
+    image_module = pytest.importorskip('PIL.Image')
+    app.config.update(UPLOAD_FOLDER=str(tmp_path), DIAGRAM_MAX_SIZE=300)
+
+    stored = diagrams.store_diagram(encoded_image(image_module, (1200, 600), 'PNG'), 'T1.png')
+    digest = stored['digest']
+    assert stored == {'path': f'diagrams/{digest}.png', 'webp_path': f'diagrams/{digest}.webp',
+                      'digest': digest, 'width': 300, 'height': 150}
+    with image_module.open(tmp_path / f'{digest}.webp') as webp:
+        assert (webp.format, webp.size) == ('WEBP', (300, 150))
+    with image_module.open(tmp_path / f'{digest}.png') as fallback:
+        assert (fallback.format, fallback.size) == ('PNG', (300, 150))
+
+    stored = diagrams.store_diagram(
+        encoded_image(image_module, (120, 80), 'JPEG', mode='RGB'), 'photo.jpeg')
+    assert stored['path'].endswith('.jpg')
+    assert (stored['width'], stored['height']) == (120, 80)
+    with image_module.open(tmp_path / f"{stored['digest']}.jpg") as fallback:
+        assert fallback.format == 'JPEG'
+
+    broken = png_header(640, 480) + b'not really a PNG'
+    stored = diagrams.store_diagram(broken, 'broken.png')
+    assert stored['webp_path'] is None
+    assert (stored['width'], stored['height']) == (640, 480)
+    assert (tmp_path / f"{stored['digest']}.png").read_bytes() == broken
@@ -0,0 +1,56 @@
+"""File: test_unit_exam_sync.py
+
+    This file contains the unit tests for the offline exam answer sync in the exam_sync.py file.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from openwaves.exam_sync import answer_digest, apply_changes, parse_changes
+
+def make_answers(*values):
+    """Build answer rows numbered from 1 with the given answers and no timestamps."""
+    return [SimpleNamespace(question_number=number, answer=value, answered_at=None)
+            for number, value in enumerate(values, start=1)]
+
+def test_apply_changes_keeps_latest_write():
+    """Test ID: UT-94
+    Verify answer changes are applied by last write, whatever order they arrive in.
+
+    Asserts:
+        - A newer change replaces the answer and an older or replayed one is ignored.
+        - Timestamps ahead of the server's clock are capped.
+        - The digest lists answers in question order with '-' for unanswered questions.
+    """
+    answers = make_answers(None, 2)
+    with patch('openwaves.exam_sync.now_ms', return_value=10_000):
+        assert apply_changes(answers, [(1, 3, 2_000), (1, 1, 1_000)]) == 1
+        assert apply_changes(answers, [(1, 3, 2_000)]) == 0
+        assert apply_changes(answers, [(2, 0, 99_999)]) == 1
+    assert (answers[0].answer, answers[0].answered_at) == (3, 2_000)
+    assert answers[1].answered_at == 10_000
+    assert answer_digest(list(reversed(answers))) == '30'
+    assert answer_digest(make_answers(None, 1)) == '-1'
+
+def test_parse_and_apply_reject_bad_batches():
+    """Test ID: UT-95
+    Negative test: Verify malformed batches are rejected before any answer changes.
+
+    Asserts:
+        - Missing lists, non-integer fields and answers outside A-D raise ValueError.
+        - A batch naming a question outside the exam changes nothing.
+    """
+    for payload in (None, {}, {'answers': 'x'}, {'answers': [1]},
+                    {'answers': [{'question_number': 1, 'answer': '1', 'updated_at': 1}]},
+                    {'answers': [{'question_number': 1, 'answer': True, 'updated_at': 1}]},
+                    {'answers': [{'question_number': 1, 'answer': 4, 'updated_at': 1}]}):
+        with pytest.raises(ValueError):
+            parse_changes(payload)
+
+    assert parse_changes({'answers': [{'question_number': 1, 'answer': 0, 'updated_at': 5}]}) \
+        == [(1, 0, 5)]
+
+    answers = make_answers(None)
+    with pytest.raises(ValueError):
+        apply_changes(answers, [(1, 2, 5), (9, 1, 5)])
+    assert answers[0].answer is None
@@ -99,7 +99,7 @@ T2I35,C,What is 35+35?,1,70,4,5,Reference35
 
         response = client.post(f'/ve/upload_questions/{tech_id}',
                                data=data, content_type='multipart/form-data')
-        assert response.status_code == 200
+        assert response.status_code == 202
         assert response.is_json
         assert response.get_json()['success'] is True
 
@@ -235,7 +235,7 @@ T2I35,C,What is 35+35?,1,70,4,5,Reference35
 
         response = client.post(f'/ve/upload_questions/{tech_id}',
                                data=data, content_type='multipart/form-data')
-        assert response.status_code == 200
+        assert response.status_code == 202
         assert response.is_json
         assert response.get_json()['success'] is True
 
@@ -0,0 +1,63 @@
+"""File: test_logging_config.py
+
+    This file contains the unit tests for the logging setup in the logging_config.py file.
+"""
+
+import json
+import logging
+import sys
+from logging.handlers import QueueHandler
+from openwaves.logging_config import JsonFormatter, parse_levels, LOGGER_NAME
+
+def test_json_formatter_fields():
+    """Test ID: UT-85
+    Verify records are formatted as one JSON object with extra fields and tracebacks.
+
+    Asserts:
+        - The object holds the level, logger, message and request id.
+        - Fields passed through extra are included.
+        - Exceptions are included as formatted text.
+    """
+    logger = logging.getLogger('openwaves.test')
+    record = None
+    try:
+        raise ValueError('bad date')
+    except ValueError:
+        record = logger.makeRecord('openwaves.test', logging.ERROR, __file__, 1,
+                                   'Purge failed for %s', ('2024-01-01',),
+                                   exc_info=sys.exc_info(),
+                                   extra={'session_id': 7, 'request_id': 'abc123'})
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['level'] == 'ERROR'
+    assert entry['logger'] == 'openwaves.test'
+    assert entry['message'] == 'Purge failed for 2024-01-01'
+    assert entry['request_id'] == 'abc123'
+    assert entry['session_id'] == 7
+    assert 'ValueError: bad date' in entry['exc_info']
+
+def test_parse_levels():
+    """Test ID: UT-86
+    Verify per-module levels are read from a string or a dict.
+
+    Asserts:
+        - "name=level" pairs are split and upper-cased; blanks are ignored.
+    """
+    assert parse_levels('openwaves.main_ve=debug, openwaves.auth=WARNING,') == {
+        'openwaves.main_ve': 'DEBUG', 'openwaves.auth': 'WARNING'}
+    assert parse_levels({'openwaves.metrics': 'error'}) == {'openwaves.metrics': 'ERROR'}
+    assert not parse_levels('')
+
+def test_queue_handler_installed_once(app):
+    """Test ID: UT-87
+    Verify the openwaves logger writes through a single queue handler.
+
+    Asserts:
+        - Exactly one QueueHandler is attached even though create_app ran more than once.
+        - Flask's default stderr handler is not attached.
+    """
+    from openwaves import create_app  # pylint: disable=C0415
+    create_app(dict(app.config))
+    handlers = logging.getLogger(LOGGER_NAME).handlers
+    assert len([handler for handler in handlers if isinstance(handler, QueueHandler)]) == 1
+    assert len(handlers) == 1
@@ -3,6 +3,7 @@
     This file contains the unit tests for the code in the main.py file.
 """
 
+import logging
 from openwaves.tests.test_unit_auth import login
 
 ####################################
@@ -41,7 +42,7 @@ def test_account_select(client):
     assert response.status_code == 200
     assert b"Choose Your Role" in response.data
 
-def test_csp_violation_report_valid_json(client, capsys):
+def test_csp_violation_report_valid_json(client, caplog):
     """Test ID: UT-14
     Test reporting a valid CSP violation.
 
@@ -50,11 +51,11 @@ def test_csp_violation_report_valid_json(client, capsys):
 
     Args:
         client: The test client instance.
-        capsys: Pytest fixture to capture stdout and stderr.
+        caplog: Pytest fixture to capture log records.
 
     Asserts:
         - Response status code is 204 (No Content).
-        - The violation is printed to stdout.
+        - The violation is logged as a warning.
     """
     violation_data = {
         "csp-report": {
@@ -64,14 +65,15 @@ def test_csp_violation_report_valid_json(client, capsys):
             "blocked-uri": "http://evil.com/script.js"
         }
     }
-    response = client.post('/csp-violation-report-endpoint', json=violation_data)
+    with caplog.at_level(logging.INFO, logger='openwaves'):
+        response = client.post('/csp-violation-report-endpoint', json=violation_data)
     assert response.status_code == 204
 
-    # Capture the print output
-    captured = capsys.readouterr()
-    assert "CSP Violation:" in captured.out
+    # Check the captured log records
+    assert any(record.levelno == logging.WARNING and "CSP Violation:" in record.getMessage()
+               for record in caplog.records)
 
-def test_csp_violation_report_non_json(client, capsys):
+def test_csp_violation_report_non_json(client, caplog):
     """Test ID: UT-15
     Test handling a CSP violation report with non-JSON data.
 
@@ -80,18 +82,18 @@ def test_csp_violation_report_non_json(client, capsys):
 
     Args:
         client: The test client instance.
-        capsys: Pytest fixture to capture stdout and stderr.
+        caplog: Pytest fixture to capture log records.
 
     Asserts:
         - Response status code is 204 (No Content).
-        - A message indicating non-JSON data is printed to stdout.
+        - A message indicating non-JSON data is logged.
     """
-    response = client.post('/csp-violation-report-endpoint', data='non-json data')
+    with caplog.at_level(logging.INFO, logger='openwaves'):
+        response = client.post('/csp-violation-report-endpoint', data='non-json data')
     assert response.status_code == 204
 
-    # Capture the print output
-    captured = capsys.readouterr()
-    assert "Received non-JSON CSP violation report" in captured.out
+    # Check the captured log records
+    assert "Received non-JSON CSP violation report" in caplog.text
 
 ###############################
 #                             #
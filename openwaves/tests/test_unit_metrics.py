@@ -0,0 +1,81 @@
+"""File: test_metrics.py
+
+    This file contains the unit tests for the counters and histograms in the metrics.py file.
+"""
+
+import threading
+from openwaves.metrics import Counter, Histogram, Gauge
+
+def test_counter_labels_and_exposition():
+    """Test ID: UT-81
+    Verify a labelled counter keeps one series per label set and renders them.
+
+    Asserts:
+        - Each label set is counted separately.
+        - Label values are escaped in the exposition output.
+    """
+    counter = Counter('test_total', 'Test counter.', ('result',))
+    counter.inc(result='success')
+    counter.inc(2, result='success')
+    counter.inc(result='fail "quoted"')
+
+    assert counter.value(result='success') == 3
+    assert counter.value(result='missing') == 0
+    assert counter.samples() == ['test_total{result="fail \\"quoted\\""} 1',
+                                 'test_total{result="success"} 3']
+
+def test_histogram_cumulative_buckets():
+    """Test ID: UT-82
+    Verify histogram observations land in cumulative buckets with sum and count lines.
+
+    Asserts:
+        - Bucket counts are cumulative and end with +Inf.
+        - _sum and _count match the observations.
+    """
+    histogram = Histogram('test_seconds', 'Test histogram.', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.samples() == ['test_seconds_bucket{le="0.1"} 2',
+                                   'test_seconds_bucket{le="1.0"} 3',
+                                   'test_seconds_bucket{le="+Inf"} 4',
+                                   'test_seconds_sum 3.65',
+                                   'test_seconds_count 4']
+
+def test_metrics_are_thread_safe():
+    """Test ID: UT-83
+    Verify concurrent updates from several threads are not lost.
+
+    Asserts:
+        - The counter and histogram count every increment from every thread.
+    """
+    counter = Counter('test_total', 'Test counter.')
+    histogram = Histogram('test_seconds', 'Test histogram.', ('operation',))
+
+    def work():
+        for _ in range(2000):
+            counter.inc()
+            with histogram.time(operation='hash'):
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value() == 16000
+    assert histogram.count(operation='hash') == 16000
+
+def test_gauge_reads_callback():
+    """Test ID: UT-84
+    Verify a gauge reports the value of its callback at scrape time.
+
+    Asserts:
+        - The sample reflects the callback's latest value.
+    """
+    values = [3]
+    gauge = Gauge('test_open', 'Test gauge.', lambda: values[-1])
+    assert gauge.samples() == ['test_open 3']
+    values.append(7)
+    assert gauge.samples() == ['test_open 7']
@@ -2,16 +2,18 @@
 
     This file contains the unit tests for the purge sessions code in the main_ve.py file.
 """
+from datetime import date
 from unittest.mock import patch
 import pytest
 from flask import url_for
 from sqlalchemy.exc import SQLAlchemyError
+from openwaves.services import purge_cutoff
 from openwaves.tests.test_unit_auth import login
 
 @pytest.mark.usefixtures("app")
 def test_purge_sessions_database_error(client, ve_user):
     """Test ID: UT-69
-    Negative test: Verify proper handling of SQLAlchemy error during purge.
+    Negative test: Verify proper handling of SQLAlchemy error while queuing the purge.
 
     Asserts:
         - The response status code is 500.
@@ -21,11 +23,24 @@ def test_purge_sessions_database_error(client, ve_user):
     response = login(client, ve_user.username, 'vepassword')
     assert response.status_code == 200
 
-    # Mock the delete operation to raise an SQLAlchemyError
-    with patch('openwaves.db.session.query', side_effect=SQLAlchemyError("Database error")):
+    # Mock the job insert to raise an SQLAlchemyError
+    with patch('openwaves.db.session.commit', side_effect=SQLAlchemyError("Database error")):
         response = client.delete(url_for('main_ve.purge_sessions'))
 
     # Validate response
     assert response.status_code == 500
     assert response.json.get("success") is False
     assert response.json.get("error") == "Database operation failed"
+
+def test_purge_cutoff_month_arithmetic():
+    """Test ID: UT-90
+    Verify the purge cutoff is 15 months back for any day of the year.
+
+    Asserts:
+        - January to March roll back into the year before last.
+        - Days past the end of a shorter month are clamped.
+    """
+    assert purge_cutoff(date(2026, 10, 18)) == date(2025, 7, 18)
+    assert purge_cutoff(date(2026, 1, 15)) == date(2024, 10, 15)
+    assert purge_cutoff(date(2026, 3, 31)) == date(2024, 12, 31)
+    assert purge_cutoff(date(2025, 5, 31)) == date(2024, 2, 29)
@@ -0,0 +1,39 @@
+"""File: test_unit_results_export.py
+
+    This file contains the unit tests for the CSV and XLSX writers in the results_export.py file.
+"""
+
+import csv
+import io
+import zipfile
+from datetime import date, datetime
+from xml.etree import ElementTree
+from openwaves.results_export import EXPORT_COLUMNS, iter_csv, iter_xlsx
+
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+def test_writers_stream_rows():
+    """Test ID: UT-100
+    Verify the CSV and XLSX writers produce valid files from a stream of result rows.
+
+    Asserts:
+        - The CSV starts with the column header and writes dates, times and blanks as text.
+        - The XLSX is a valid workbook whose sheet holds the header and every row.
+        - Text is escaped and characters XML cannot hold are dropped.
+    """
+    rows = [(1, 2, date(2024, 10, 1), 'K1ABC', 'O<Brien & Co', 'Pat\x01', 2, 30, 35, 'Pass',
+             datetime(2024, 10, 1, 9, 5, 7), None)]
+    lines = list(csv.reader(io.StringIO(''.join(iter_csv(iter(rows))))))
+    assert lines[0] == list(EXPORT_COLUMNS)
+    assert lines[1][2] == '2024-10-01'
+    assert lines[1][10:] == ['2024-10-01 09:05:07', '']
+
+    with zipfile.ZipFile(io.BytesIO(b''.join(iter_xlsx(iter(rows))))) as workbook:
+        assert workbook.testzip() is None
+        assert {'[Content_Types].xml', 'xl/workbook.xml', 'xl/worksheets/sheet1.xml'} <= \
+            set(workbook.namelist())
+        sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+    cells = [[cell.findtext(f'{SHEET_NS}v') or cell.findtext(f'{SHEET_NS}is/{SHEET_NS}t')
+              for cell in row] for row in sheet.iter(f'{SHEET_NS}row')]
+    assert cells[0] == list(EXPORT_COLUMNS)
+    assert cells[1][:7] == ['1', '2', '2024-10-01', 'K1ABC', 'O<Brien & Co', 'Pat', '2']
@@ -0,0 +1,49 @@
+"""File: test_unit_score_reports.py
+
+    This file contains the unit tests for the PDF writer in the pdf.py file and the report
+    rendering in the score_reports.py file.
+"""
+
+import re
+import zlib
+from datetime import datetime
+from openwaves.pdf import PdfDocument
+from openwaves.score_reports import render_files, report_tasks
+
+def page_text(data):
+    """Return the decompressed content streams of a PDF."""
+    return b''.join(zlib.decompress(stream) for stream in
+                    re.findall(rb'stream\n(.*?)\nendstream', data, re.S))
+
+def test_pdf_document_and_report_tasks():
+    """Test ID: UT-101
+    Verify the PDF writer builds valid multi-page documents and reports are listed per exam.
+
+    Asserts:
+        - The PDF has a header, a cross-reference table pointing at each object and an EOF.
+        - Text that overflows a page continues on a new page, with parentheses escaped.
+        - Every exam gets a score report and only candidates who passed get a CSCE draft.
+    """
+    document = PdfDocument('Test')
+    for number in range(80):
+        document.text(f'Line {number} (escaped)')
+    data = document.to_bytes()
+    assert data.startswith(b'%PDF-1.4') and data.rstrip().endswith(b'%%EOF')
+    assert b'/Count 2' in data
+    offsets = [int(offset) for offset in re.findall(rb'(\d{10}) 00000 n', data)]
+    assert all(re.match(rb'\d+ 0 obj', data[offset:]) for offset in offsets)
+    assert b'(Line 79 \\(escaped\\)) Tj' in page_text(data)
+
+    exam = {'exam_id': 1, 'user_id': 7, 'username': 'K1ABC', 'name': "Pat O'Hara",
+            'element': 2, 'correct': 30, 'total': 35, 'passed': True, 'finished_at': None,
+            'questions': [{'number': 1, 'pool_number': 'T1A01', 'text': 'Why?', 'answer': None,
+                           'correct_answer': 2}]}
+    failed = dict(exam, exam_id=2, user_id=8, name='Sam Lee', correct=10, passed=False)
+    tasks = report_tasks({'session_id': 3, 'session_date': datetime(2024, 10, 1),
+                          'exams': [exam, failed]})
+    assert [name for name, _render, _args in tasks] == [
+        'score_reports/Pat_O_Hara_1_element2.pdf', 'score_reports/Sam_Lee_2_element2.pdf',
+        'csce_drafts/Pat_O_Hara_7.pdf']
+    files = dict(render_files(tasks))
+    assert b'Answer: -   Correct: C' in page_text(files['score_reports/Pat_O_Hara_1_element2.pdf'])
+    assert b'Element 2 \\(Technician\\): 30/35' in page_text(files['csce_drafts/Pat_O_Hara_7.pdf'])
@@ -6,7 +6,8 @@ from unittest.mock import patch, MagicMock
 import pytest
 from openwaves.models import ExamRegistration, ExamDiagram, Question
 from openwaves.utils import get_exam_name, is_already_registered, \
-    remove_exam_registration, requires_diagram, get_exam_score, generate_exam
+    remove_exam_registration, requires_diagram, get_exam_score, generate_exam, seeded_choice, \
+    exam_passed
 
 class MockExamAnswer: # pylint: disable=R0903
     """Mock class for simulating ExamAnswer objects in unit tests.
@@ -506,3 +507,38 @@ def test_generate_exam_non_standard_element():
     with patch("openwaves.db.session.get", return_value=pool):
         exam = generate_exam(pool_id)
         assert exam is None
+
+def test_seeded_choice_is_stable():
+    """Test ID: UT-103
+    Verify seeded picks depend only on the seed and TLI, so they never change between releases.
+
+    Asserts:
+        - A seed picks the same pinned questions whatever the order TLIs are drawn in.
+        - A different seed picks differently.
+    """
+    def tli_questions(code, count):
+        return [MagicMock(number=f"{code}{number:02d}") for number in range(1, count + 1)]
+
+    choose = seeded_choice(1)
+    codes = ['T0A', 'T0B', 'T0C', 'T0D', 'T0E', 'T0F']
+    picks = [choose(tli_questions(code, 2)).number for code in codes]
+    assert picks == ['T0A02', 'T0B01', 'T0C02', 'T0D02', 'T0E01', 'T0F02']
+    assert [choose(tli_questions(code, 2)).number for code in reversed(codes)] == picks[::-1]
+    assert [seeded_choice(2)(tli_questions(code, 3)).number for code in codes] == \
+        ['T0A02', 'T0B01', 'T0C01', 'T0D01', 'T0E01', 'T0F02']
+
+def test_exam_passed_thresholds():
+    """Test ID: UT-104
+    Verify every score check uses the same pass marks, and an unknown element fails.
+
+    Asserts:
+        - Tech and General pass at 26 and Extra at 37 correct answers.
+        - An unknown element fails whatever the score, in exam_passed and get_exam_score.
+    """
+    assert [exam_passed(element, correct) for element, correct in
+            ((2, 25), (2, 26), (3, 26), (4, 36), (4, 37))] == [False, True, True, False, True]
+    assert not exam_passed(5, 50)
+    assert not exam_passed(None, 0)
+    answers = [MockExamAnswer(1, 1)] * 50
+    assert get_exam_score(answers, 4) == 'Score: 50/50 (Pass)'
+    assert get_exam_score(answers, 5) == 'Score: 50/None (Fail)'
@@ -2,11 +2,45 @@
 
     Utility functions for user password management.
 """
+import hashlib
 import secrets
-from werkzeug.security import generate_password_hash
+from types import SimpleNamespace
+from flask import current_app
+from sqlalchemy import func
+from werkzeug.security import generate_password_hash, check_password_hash
 from openwaves.models import Pool, ExamDiagram, Question, TLI
-from . import db
+from . import cache, db
 from .config import Config
+from .metrics import PASSWORD_HASH_TIME
+
+# Correct answers needed to pass each element
+PASS_THRESHOLDS = {2: 26, 3: 26, 4: 37}
+
+def hash_password(password):
+    """Hash a plaintext password with the configured PASSWORD_HASH_METHOD.
+
+    Args:
+        password (str): The plaintext password.
+
+    Returns:
+        str: The salted password hash.
+    """
+    with PASSWORD_HASH_TIME.time(operation='hash'):
+        return generate_password_hash(password,
+                                      method=current_app.config['PASSWORD_HASH_METHOD'])
+
+def verify_password(password_hash, password):
+    """Check a plaintext password against a stored hash.
+
+    Args:
+        password_hash (str): The hash stored for the user.
+        password (str): The plaintext password to check.
+
+    Returns:
+        bool: True if the password matches.
+    """
+    with PASSWORD_HASH_TIME.time(operation='verify'):
+        return check_password_hash(password_hash, password)
 
 def update_user_password(user, new_password):
     """Update the user's password with a new hashed password.
@@ -19,18 +53,20 @@ def update_user_password(user, new_password):
         None
     """
     # Generate the new hashed password
-    hashed_password = generate_password_hash(new_password, method='pbkdf2:sha256')
+    hashed_password = hash_password(new_password)
 
     # Update the user's password
     user.password = hashed_password
     db.session.commit()
 
+# Names of the exam elements
+EXAM_NAMES = {'2': 'Tech', '3': 'General', '4': 'Extra'}
+
 # Helper function to map exam element to its name
 def get_exam_name(exam_element):
     """Map exam element number to exam name."""
     if exam_element is not None:
-        exam_map = {'2': 'Tech', '3': 'General', '4': 'Extra'}
-        return exam_map.get(exam_element, '')
+        return EXAM_NAMES.get(exam_element, '')
     return ''
 
 # Helper function to check if user is already registered for the exam element
@@ -56,14 +92,128 @@ def remove_exam_registration(existing_registration, exam_element):
         elif exam_element == '4':
             existing_registration.extra = False
 
+# Helper function to summarise question pools
+def load_pool_summaries(pool_id=None):
+    """Load pools as plain dicts with their diagrams and question counts.
+
+    Args:
+        pool_id (int): Only load this pool.
+
+    Returns:
+        list: One dict per pool with the pool columns, ``diagrams`` and ``question_count``.
+    """
+    pools = Pool.query.order_by(Pool.element.asc(), Pool.start_date.asc())
+    counts = db.session.query(Question.pool_id, func.count(Question.id))
+    diagram_query = ExamDiagram.query.order_by(ExamDiagram.id)
+    if pool_id is not None:
+        pools = pools.filter(Pool.id == pool_id)
+        counts = counts.filter(Question.pool_id == pool_id)
+        diagram_query = diagram_query.filter(ExamDiagram.pool_id == pool_id)
+
+    question_counts = dict(counts.group_by(Question.pool_id).all())
+    diagrams = {}
+    for diagram in diagram_query:
+        diagrams.setdefault(diagram.pool_id, []).append(
+            {'id': diagram.id, 'name': diagram.name, 'path': diagram.path,
+             'webp_path': diagram.webp_path})
+    return [{
+        'id': pool.id,
+        'name': pool.name,
+        'element': pool.element,
+        'start_date': pool.start_date,
+        'end_date': pool.end_date,
+        'diagrams': diagrams.get(pool.id, []),
+        'question_count': question_counts.get(pool.id, 0),
+    } for pool in pools]
+
+def pool_namespace(pool):
+    """Return a pool summary as a new object, so callers cannot modify cached data."""
+    return SimpleNamespace(**{**pool, 'diagrams': [SimpleNamespace(**diagram)
+                                                   for diagram in pool['diagrams']]})
+
 # Helper function to load question pools
 def load_question_pools():
-    """Load the question pools from the database."""
-    pools = Pool.query.order_by(Pool.element.asc(), Pool.start_date.asc()).all()
-    diagrams = ExamDiagram.query.all()
-    for pool in pools:
-        pool.diagrams = [diagram for diagram in diagrams if diagram.pool_id == pool.id]
-    return pools
+    """Load the question pools with their diagrams and question counts.
+
+    The pools are cached in the POOLS region, which the routes that change pools, questions or
+    diagrams invalidate.
+
+    Returns:
+        list: SimpleNamespace objects with the pool columns, ``diagrams`` and ``question_count``.
+    """
+    return [pool_namespace(pool)
+            for pool in cache.cached(cache.POOLS, 'list', load_pool_summaries)]
+
+# Helper function to load one question pool
+def load_question_pool(pool_id):
+    """Load one pool like load_question_pools(), for re-rendering its rows after a change.
+
+    Returns:
+        SimpleNamespace: The pool, or None if it does not exist.
+    """
+    pools = load_pool_summaries(pool_id)
+    return pool_namespace(pools[0]) if pools else None
+
+# Helper function to build the pool choices of the session form
+def load_pool_options():
+    """Return the pool choices for each exam element, cached in the POOLS region.
+
+    Returns:
+        dict: Maps element (2, 3, 4) to a dict of pool ID to label, e.g. "Tech 2022-2026".
+    """
+    def load():
+        options = {2: {}, 3: {}, 4: {}}
+        for pool in Pool.query.order_by(Pool.id):
+            if pool.element in options:
+                options[pool.element][pool.id] = \
+                    f"{pool.name} {pool.start_date.strftime('%Y')}-{pool.end_date.strftime('%Y')}"
+        return options
+
+    return cache.cached(cache.POOLS, 'options', load)
+
+# Helper function to load an exam question with its diagram
+def load_exam_question(question_id, pool_version):
+    """Return a question and the diagram it needs, cached per pool version.
+
+    Questions only change when their pool does, and every pool change bumps its version, so an
+    entry never needs to be invalidated on its own.
+
+    Args:
+        question_id (int): The question to load.
+        pool_version (int): The current version of the question's pool.
+
+    Returns:
+        tuple: (question, diagram) as SimpleNamespace objects; diagram is None if the question
+        does not need one, and both are None if the question does not exist.
+    """
+    def load():
+        question = db.session.get(Question, question_id)
+        if question is None:
+            return None, None
+        diagram = requires_diagram(question)
+        columns = ('id', 'pool_id', 'number', 'correct_answer', 'question', 'option_a',
+                   'option_b', 'option_c', 'option_d', 'refs')
+        return ({column: getattr(question, column) for column in columns},
+                {'id': diagram.id, 'name': diagram.name, 'path': diagram.path,
+                 'webp_path': diagram.webp_path, 'width': diagram.width,
+                 'height': diagram.height} if diagram else None)
+
+    question, diagram = cache.cached(cache.QUESTIONS, f"{question_id}:{pool_version}", load)
+    return (SimpleNamespace(**question) if question else None,
+            SimpleNamespace(**diagram) if diagram else None)
+
+# Helper function to mark a pool's content as changed
+def bump_pool_version(pool_id, questions=False):
+    """Increment a pool's version so cached exam pages built from it are revalidated.
+
+    Args:
+        pool_id (int): The pool.
+        questions (bool): The question set changed too, which retires the pool's exam forms.
+    """
+    values = {Pool.version: Pool.version + 1}
+    if questions:
+        values[Pool.question_version] = Pool.question_version + 1
+    Pool.query.filter_by(id=pool_id).update(values, synchronize_session=False)
 
 # Helper function to check if a file has an allowed extension
 def allowed_file(filename):
@@ -88,14 +238,26 @@ def get_exam_score(exam_answers, element):
         if answer.answer == answer.correct_answer:
             score += 1
     str_score = f'Score: {score}/{score_max}'
-    if score_max == 35 and score >= 26:
-        str_score += ' (Pass)'
-    elif score_max == 50 and score >= 37:
+    if exam_passed(element, score):
         str_score += ' (Pass)'
     else:
         str_score += ' (Fail)'
     return str_score
 
+# Helper function to check a score against the element's pass mark
+def exam_passed(element, correct):
+    """Return whether a number of correct answers passes an element.
+
+    Args:
+        element (int): The exam element (2, 3 or 4).
+        correct (int): The number of correct answers.
+
+    Returns:
+        bool: True if the score reaches PASS_THRESHOLDS; an unknown element never passes.
+    """
+    threshold = PASS_THRESHOLDS.get(element)
+    return threshold is not None and correct >= threshold
+
 # Helper function to algorithmically generate an exam
 def generate_exam(pool_id):
     """Generate an exam from the given question pool."""
@@ -109,12 +271,71 @@ def generate_exam(pool_id):
     if not tlis:
         return None
 
-    # Extract TLI codes
-    tli_codes = [tli.tli for tli in tlis]
-
     # Retrieve all questions matching the TLIs in a single query
     questions = Question.query.filter_by(pool_id=pool_id).all()
 
+    return select_exam_questions(pool, tlis, questions, secrets.choice)
+
+# Helper function to regenerate the same exam from a seed
+def generate_seeded_exam(pool_id, seed):
+    """Generate the exam a seed selects from the given question pool.
+
+    TLIs and questions are read in id order and each TLI's question is picked by
+    seeded_choice(), so the same seed gives the same TLI-ordered question list on every Python
+    version for as long as the pool's questions stay the same.
+
+    Args:
+        pool_id (int): The pool to draw from.
+        seed (int): The exam's seed.
+
+    Returns:
+        list: The exam's questions, or None if the pool cannot supply a complete exam.
+    """
+    pool = db.session.get(Pool, pool_id)
+    if not pool:
+        return None
+
+    tlis = TLI.query.filter_by(pool_id=pool_id).order_by(TLI.id).all()
+    if not tlis:
+        return None
+
+    questions = Question.query.filter_by(pool_id=pool_id).order_by(Question.id).all()
+
+    return select_exam_questions(pool, tlis, questions, seeded_choice(seed))
+
+def seeded_choice(seed):
+    """Return a chooser for select_exam_questions() that picks by hashing (seed, TLI).
+
+    The pick depends only on SHA-256 of the seed and the TLI code, not on the random module,
+    whose sequences are not guaranteed to stay the same between Python versions.
+
+    Args:
+        seed (int): The exam's seed.
+
+    Returns:
+        callable: Picks one question from a TLI's questions, given in id order.
+    """
+    def choose(tli_questions):
+        tli_code = tli_questions[0].number[:3]
+        digest = hashlib.sha256(f"{seed}:{tli_code}".encode()).digest()
+        return tli_questions[int.from_bytes(digest[:8], 'big') % len(tli_questions)]
+    return choose
+
+def select_exam_questions(pool, tlis, questions, choose):
+    """Pick one question per TLI, in TLI order.
+
+    Args:
+        pool (Pool): The pool the exam is drawn from.
+        tlis (list): The pool's TLIs.
+        questions (list): The pool's questions.
+        choose (callable): Picks one question from a list.
+
+    Returns:
+        list: The exam's questions, or None if the pool cannot supply a complete exam.
+    """
+    # Extract TLI codes
+    tli_codes = [tli.tli for tli in tlis]
+
     # Create a mapping of questions by TLI
     questions_by_tli = {tli_code: [] for tli_code in tli_codes}
     for question in questions:
@@ -128,7 +349,7 @@ def generate_exam(pool_id):
     for tli_code in tli_codes:
         tli_questions = questions_by_tli.get(tli_code)
         if tli_questions:
-            selected_question = secrets.choice(tli_questions)
+            selected_question = choose(tli_questions)
             exam.append(selected_question)
 
     # Ensure we have a complete exam